@@ -0,0 +1,15 @@
+"""
+Local benchmark suite: API endpoints, the grading task and serializers.
+
+Runs in-process (Django test client, eager Celery, in-memory SQLite from
+``test_settings``) against a dataset built by ``exam.dataset``, so results are
+comparable between runs on the same machine without a server or a broker::
+
+    cd app
+    python -m benchmarks run --scale small --output benchmarks/baseline.json
+    python -m benchmarks compare benchmarks/baseline.json --threshold 0.2
+
+``run`` records p50/p95/p99 latency, throughput and query count per case;
+``compare`` runs the suite again (or reads ``--current``) and exits with status
+1 when a case got slower than the threshold or runs more queries.
+"""
@@ -0,0 +1,109 @@
+"""
+Command line entry point: ``python -m benchmarks {run,compare} ...`` (from ``app/``).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = APP_DIR / 'benchmarks' / 'baseline.json'
+
+
+def setup_django():
+    # Same layout as conftest.py: ``app.test_settings`` imports ``app.medway_api``
+    for path in (APP_DIR, APP_DIR.parent):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.test_settings')
+    import django
+    django.setup()
+
+
+def prepare_database(scale, seed):
+    """Creates the schema (in-memory SQLite under ``test_settings``) and the dataset."""
+    from django.core.management import call_command
+
+    from exam.dataset import AccuracyDistribution, DatasetGenerator
+    from .suite import SCALES
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    started = time.perf_counter()
+    report = DatasetGenerator(
+        accuracy=AccuracyDistribution.parse('beta:6,3'), seed=seed, prefix='benchmark-data', **SCALES[scale]
+    ).run()
+    print(f"Dataset '{scale}' (seed {seed}): {report['submissions']} submissions, "
+          f"{report['answers']} answers in {time.perf_counter() - started:.1f}s")
+    return report
+
+
+def print_result(name, result):
+    print(f"{name:<30} {result['kind']:<10} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+          f"p99 {result['p99_ms']:>9.2f} ms  {result['throughput_per_s']:>8}/s  {result['queries']:>3} queries")
+
+
+def run(options):
+    from .suite import metadata, run_suite
+
+    dataset = prepare_database(options.scale, options.seed)
+    results = run_suite(options.iterations, options.warmup, options.case, print_result)
+    meta = metadata(scale=options.scale, seed=options.seed, iterations=options.iterations,
+                    answers=dataset['answers'])
+    return meta, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('run', 'compare'):
+        command = commands.add_parser(name)
+        command.add_argument('--scale', choices=['small', 'medium'], default='small')
+        command.add_argument('--seed', type=int, default=42)
+        command.add_argument('--iterations', type=int, default=30)
+        command.add_argument('--warmup', type=int, default=3)
+        command.add_argument('--case', action='append', help='Only run this case (repeatable).')
+    commands.choices['run'].add_argument('--output', default=str(DEFAULT_BASELINE),
+                                         help='Where to write the JSON report.')
+    compare_parser = commands.choices['compare']
+    compare_parser.add_argument('baseline', nargs='?', default=str(DEFAULT_BASELINE))
+    compare_parser.add_argument('--current', help='Compare this JSON report instead of running the suite.')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='Allowed relative slowdown of p50/p95 (0.2 = 20%%).')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                                help='Ignore slowdowns smaller than this many milliseconds.')
+    compare_parser.add_argument('--output', help='Also write the new report to this path.')
+    options = parser.parse_args(argv)
+
+    setup_django()
+    from .suite import compare, load_report, save_report
+
+    if options.command == 'run':
+        meta, results = run(options)
+        save_report(options.output, meta, results)
+        print(f'Report written to {options.output}')
+        return 0
+
+    baseline = load_report(options.baseline)
+    if options.current:
+        current = load_report(options.current)['results']
+    else:
+        meta, current = run(options)
+        if options.output:
+            save_report(options.output, meta, current)
+    regressions = compare(baseline['results'], current, options.threshold, options.min_delta_ms)
+    for regression in regressions:
+        # change is None when the baseline was 0 (no relative change to show)
+        change = 'new' if regression['change'] is None else f"{regression['change']:+}"
+        print(f"REGRESSION {regression['case']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']} ({change})")
+    missing = sorted(set(baseline['results']) - set(current))
+    if missing and not options.case:
+        print(f"Cases missing from the current run: {', '.join(missing)}")
+    if not regressions:
+        print(f'No regressions over {options.threshold:.0%} against {options.baseline}.')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Benchmark cases, runner and baseline comparison (see ``benchmarks``).
+"""
+import gc
+import itertools
+import json
+import math
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import django
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamSubmission
+from exam.serializers import ExamDetailSerializer, ExamResultSerializer
+from exam.structure import get_exam_structure, structure_cache
+from exam.tasks import process_exam_submission
+from student.models import Student
+from utils.testing import count_queries
+
+SCALES = {
+    # ~50 mil respostas: roda em segundos, bom para o dia a dia
+    'small': {'students': 500, 'exams': 5, 'questions': 300, 'questions_per_exam': 50, 'submissions': 1000},
+    # ~1 milhão de respostas
+    'medium': {'students': 5000, 'exams': 20, 'questions': 2000, 'questions_per_exam': 100, 'submissions': 10000},
+}
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """``call(ctx, arg)`` is timed; ``setup(ctx)``, run before every call, is not."""
+
+    name: str
+    kind: str
+    call: Callable
+    setup: Optional[Callable] = None
+    expected_status: tuple = (200,)
+
+
+@dataclass
+class Context:
+    client: APIClient
+    async_client: AsyncClient
+    exam_id: int
+    question_ids: list
+    submission_id: int
+    student_id: int
+    counter: itertools.count
+
+    @classmethod
+    def build(cls):
+        """Ids of a representative exam, submission and the busiest student of the dataset."""
+        exam = Exam.objects.order_by('pk').first()
+        if exam is None:
+            raise RuntimeError('The database has no exams; generate a dataset first.')
+        busiest = (
+            ExamSubmission.objects.values('student_id').annotate(total=Count('id')).order_by('-total').first()
+        )
+        submission = ExamSubmission.objects.filter(student_id=busiest['student_id']).order_by('pk').first()
+        return cls(
+            client=APIClient(),
+            async_client=AsyncClient(),
+            exam_id=submission.exam_id,
+            question_ids=get_exam_structure(submission.exam_id).question_order,
+            submission_id=submission.pk,
+            student_id=busiest['student_id'],
+            counter=itertools.count(),
+        )
+
+
+def _get(path):
+    return lambda ctx, arg: ctx.client.get(path.format(ctx=ctx))
+
+
+def _async_get(path):
+    return lambda ctx, arg: async_to_sync(ctx.async_client.get)(path.format(ctx=ctx))
+
+
+def _cold(ctx):
+    cache.clear()
+    structure_cache.clear()
+
+
+def _new_student(ctx):
+    index = next(ctx.counter)
+    return Student.objects.create(
+        username=f'benchmark-{index}', email=f'benchmark-{index}@example.com', name=f'Benchmark {index}'
+    ).pk
+
+
+def _payload(ctx, student_id):
+    return {
+        'student_id': student_id,
+        'exam_id': ctx.exam_id,
+        'answers': [
+            {'question_id': question_id, 'selected_option': number % 4 + 1}
+            for number, question_id in enumerate(ctx.question_ids)
+        ],
+    }
+
+
+def _post_submission(ctx, student_id):
+    return ctx.client.post('/api/exam/submissions/', _payload(ctx, student_id), format='json')
+
+
+def _grade(ctx, student_id):
+    result = process_exam_submission.apply(args=[_payload(ctx, student_id)])
+    result.get()
+
+
+def _render_detail(ctx, arg):
+    ExamDetailSerializer(Exam.objects.get(pk=ctx.exam_id)).data
+
+
+def _render_result(ctx, arg):
+    submission = (
+        ExamSubmission.objects.select_related('student', 'exam').prefetch_related('answers').get(pk=ctx.submission_id)
+    )
+    ExamResultSerializer(submission).data
+
+
+def _render_results(ctx, arg):
+    ExamResultSerializer(
+        ExamSubmission.objects.filter(student_id=ctx.student_id)
+        .select_related('student', 'exam').prefetch_related('answers'),
+        many=True,
+    ).data
+
+
+CASES = [
+    BenchmarkCase('exams-list', 'endpoint', _get('/api/exam/exams/')),
+    BenchmarkCase('exams-detail', 'endpoint', _get('/api/exam/exams/{ctx.exam_id}/')),
+    BenchmarkCase('exams-statistics', 'endpoint', _get('/api/exam/exams/{ctx.exam_id}/statistics/')),
+    BenchmarkCase('exams-statistics-cold', 'endpoint', _get('/api/exam/exams/{ctx.exam_id}/statistics/'), _cold),
+    BenchmarkCase('submissions-create', 'endpoint', _post_submission, _new_student, expected_status=(202,)),
+    BenchmarkCase('submissions-detail', 'endpoint', _get('/api/exam/submissions/{ctx.submission_id}/')),
+    BenchmarkCase('submissions-student', 'endpoint',
+                  _get('/api/exam/submissions/student_submission/?student_id={ctx.student_id}')),
+    BenchmarkCase('submissions-student-exam', 'endpoint',
+                  _get('/api/exam/submissions/student/{ctx.student_id}/exam/{ctx.exam_id}/')),
+    BenchmarkCase('submissions-detailed-analysis', 'endpoint',
+                  _get('/api/exam/submissions/{ctx.submission_id}/detailed_analysis/')),
+    BenchmarkCase('async-exams-detail', 'endpoint', _async_get('/api/exam/async/exams/{ctx.exam_id}/')),
+    BenchmarkCase('async-exams-statistics', 'endpoint',
+                  _async_get('/api/exam/async/exams/{ctx.exam_id}/statistics/')),
+    BenchmarkCase('async-submissions-detail', 'endpoint',
+                  _async_get('/api/exam/async/submissions/{ctx.submission_id}/')),
+    BenchmarkCase('grade-submission', 'task', _grade, _new_student),
+    BenchmarkCase('render-exam-detail', 'serializer', _render_detail),
+    BenchmarkCase('render-exam-result', 'serializer', _render_result),
+    BenchmarkCase('render-student-results', 'serializer', _render_results),
+]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * fraction) - 1))
+    return sorted_values[index]
+
+
+def run_case(case, ctx, iterations, warmup):
+    gc.collect()
+    latencies, queries = [], []
+    for iteration in range(warmup + iterations):
+        arg = case.setup(ctx) if case.setup else None
+        with count_queries() as stats:
+            started = time.perf_counter()
+            response = case.call(ctx, arg)
+            elapsed = time.perf_counter() - started
+        if response is not None and response.status_code not in case.expected_status:
+            raise RuntimeError(f'{case.name}: unexpected status {response.status_code}')
+        if iteration >= warmup:
+            latencies.append(elapsed)
+            queries.append(stats.queries)
+    latencies.sort()
+    return {
+        'kind': case.kind,
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'throughput_per_s': round(iterations / sum(latencies), 1) if sum(latencies) else None,
+        'queries': int(statistics.median(queries)),
+        'queries_max': max(queries),
+    }
+
+
+def run_suite(iterations=30, warmup=3, only=None, progress=None):
+    ctx = Context.build()
+    results = {}
+    for case in CASES:
+        if only and case.name not in only:
+            continue
+        results[case.name] = run_case(case, ctx, iterations, warmup)
+        if progress:
+            progress(case.name, results[case.name])
+    return results
+
+
+def metadata(**extra):
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+        **extra,
+    }
+
+
+def save_report(path, meta, results):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': meta, 'results': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def compare(baseline, current, threshold=0.2, min_delta_ms=0.5):
+    """Regressions of ``current`` against ``baseline`` (``results`` dicts).
+
+    A case regresses when its p50 or p95 grows more than ``threshold``
+    (relative) and ``min_delta_ms`` (absolute, to ignore noise on sub-ms
+    cases), or when it runs more queries.
+    """
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = before[metric] * (1 + threshold)
+            if result[metric] > limit and result[metric] - before[metric] > min_delta_ms:
+                regressions.append({
+                    'case': name, 'metric': metric, 'baseline': before[metric], 'current': result[metric],
+                    'change': round(result[metric] / before[metric] - 1, 3) if before[metric] else None,
+                })
+        if result['queries'] > before['queries']:
+            regressions.append({
+                'case': name, 'metric': 'queries', 'baseline': before['queries'], 'current': result['queries'],
+                'change': result['queries'] - before['queries'],
+            })
+    return regressions
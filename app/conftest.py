@@ -5,6 +5,7 @@ import os
 import sys
 from pathlib import Path
 import django
+import pytest
 from django.conf import settings
 from django.test.utils import get_runner
 
@@ -15,4 +16,11 @@ def pytest_configure(config):
         sys.path.insert(0, str(app_dir))
 
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.test_settings')
-    django.setup()
\ No newline at end of file
+    django.setup()
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Isolate tests that share the locmem cache (buffers, rate limits, ...)"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
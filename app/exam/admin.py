@@ -10,3 +10,5 @@ class ExamQuestionInline(admin.TabularInline):
 @admin.register(Exam)
 class ExamAdmin(admin.ModelAdmin):
     inlines = [ExamQuestionInline]
+    list_display = ('id', 'name', 'starts_at')
+    list_filter = ('starts_at',)
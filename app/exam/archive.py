@@ -0,0 +1,245 @@
+"""
+Arquivamento (COLD) de submissões antigas.
+
+``archive_submissions`` move as respostas de submissões anteriores a um corte
+para arquivos NDJSON comprimidos com gzip no storage ``archive`` (``STORAGES``:
+disco local ou object storage). Cada arquivo guarda as submissões de um único
+exame:
+
+- 1ª linha: cabeçalho com ``question_order``, a ordem das questões usada nas
+  respostas;
+- demais linhas: uma por submissão, com ``answers`` em formato colunar, um
+  dígito por posição de ``question_order`` (``0`` = não respondida, como em
+  ``exam.packing``).
+
+A linha de ``ExamSubmission`` continua no banco como índice (aluno, exame,
+data, nota e ``archive``); as linhas de ``SubmissionAnswer`` são apagadas.
+As leituras (``ExamSubmission.get_answer_map``) decodificam o arquivo inteiro
+uma vez e guardam o resultado em um cache LRU em memória do processo.
+"""
+import gzip
+import hashlib
+import io
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExamSubmission, SubmissionAnswer, SubmissionArchive
+from .packing import (
+    UNANSWERED, UnknownPackedLayout, exam_question_order, layout_digest, layout_order, pack_answers, unpack_answers,
+)
+
+FORMAT = 'submission-archive/1'
+
+logger = logging.getLogger(__name__)
+
+
+def archive_storage():
+    return storages['archive']
+
+
+def eligible_submissions(cutoff, exam_id=None):
+    """Submissões ainda não arquivadas enviadas antes de ``cutoff``."""
+    qs = ExamSubmission.objects.active().filter(submitted_at__lt=cutoff, archive__isnull=True)
+    if exam_id is not None:
+        qs = qs.filter(exam_id=exam_id)
+    return qs
+
+
+def _encode_answers(packed):
+    return ''.join(map(str, packed))
+
+
+def _decode_answers(digits):
+    return bytes(ord(digit) - 48 for digit in digits)
+
+
+def _build_file(exam_id, rows, answers_by_submission):
+    """Conteúdo comprimido do arquivo, ordem das questões e contagens por opção."""
+    question_order = exam_question_order(exam_id)
+    known = set(question_order)
+    # Questões que saíram do exame depois da submissão continuam no arquivo.
+    question_order += sorted({
+        question_id for answers in answers_by_submission.values() for question_id in answers
+    } - known)
+
+    answer_counts = {}
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as out:
+        header = {'format': FORMAT, 'exam_id': exam_id, 'question_order': question_order, 'count': len(rows)}
+        out.write(json.dumps(header).encode() + b'\n')
+        for submission_id, student_id, submitted_at, graded_score in rows:
+            packed = pack_answers(question_order, answers_by_submission.get(submission_id, {}))
+            for question_id, option in zip(question_order, packed):
+                if option != UNANSWERED:
+                    counts = answer_counts.setdefault(str(question_id), {})
+                    counts[str(option)] = counts.get(str(option), 0) + 1
+            line = {
+                'id': submission_id,
+                'student_id': student_id,
+                'submitted_at': submitted_at.isoformat(),
+                'graded_score': graded_score,
+                'answers': _encode_answers(packed),
+            }
+            out.write(json.dumps(line).encode() + b'\n')
+    return buffer.getvalue(), answer_counts
+
+
+def archive_batch(exam_id, submission_ids, cutoff):
+    """Arquiva um bloco de submissões de um exame em um novo arquivo.
+
+    O arquivo é gravado antes da transação que aponta as submissões para ele e
+    apaga as respostas; se a transação falhar, o arquivo é removido.
+
+    Retorna ``(archive, skipped)``: submissões compactadas cuja ordem de
+    questões é desconhecida (``UnknownPackedLayout``) ficam fora do arquivo,
+    sem interromper o bloco, e são devolvidas em ``skipped``; ``archive`` é
+    ``None`` se nenhuma sobrou.
+    """
+    skipped = set()
+    for submission in ExamSubmission.objects.filter(id__in=submission_ids, graded_score__isnull=True):
+        try:
+            submission.grade()
+        except UnknownPackedLayout:
+            skipped.add(submission.id)
+
+    answers_by_submission = {}
+    for submission_id, question_id, option in SubmissionAnswer.objects.filter(
+        submission_id__in=submission_ids
+    ).values_list('submission_id', 'question_id', 'selected_alternative_option'):
+        answers_by_submission.setdefault(submission_id, {})[question_id] = option
+    packed_rows = ExamSubmission.objects.filter(
+        id__in=submission_ids, packed_answers__isnull=False
+    ).values_list('id', 'packed_answers', 'packed_layout')
+    order = current = None
+    for submission_id, packed, layout in packed_rows:
+        if order is None:
+            order = exam_question_order(exam_id)
+            current = layout_digest(order)
+        # Arrays gravados antes de o exame mudar de questões usam a própria ordem.
+        try:
+            answers_by_submission[submission_id] = unpack_answers(
+                order if layout == current else layout_order(layout), packed
+            )
+        except UnknownPackedLayout:
+            skipped.add(submission_id)
+    if skipped:
+        logger.warning('Exam %s: %d submission(s) with unknown packed layout not archived: %s',
+                       exam_id, len(skipped), sorted(skipped))
+
+    rows = [
+        row for row in ExamSubmission.objects.filter(id__in=submission_ids).order_by('id')
+        .values_list('id', 'student_id', 'submitted_at', 'graded_score')
+        if row[0] not in skipped
+    ]
+    if not rows:
+        return None, sorted(skipped)
+
+    content, answer_counts = _build_file(exam_id, rows, answers_by_submission)
+    storage = archive_storage()
+    name = storage.save(
+        f'submissions/exam_{exam_id}/{timezone.now():%Y%m%d%H%M%S}-{rows[0][0]}-{rows[-1][0]}.ndjson.gz',
+        ContentFile(content),
+    )
+    try:
+        with transaction.atomic():
+            archive = SubmissionArchive.objects.create(
+                exam_id=exam_id,
+                file_name=name,
+                cutoff=cutoff,
+                submissions_count=len(rows),
+                answer_counts=answer_counts,
+                score_sum=sum(row[3] or 0 for row in rows),
+                size_bytes=len(content),
+                checksum=hashlib.sha256(content).hexdigest(),
+            )
+            ids = [row[0] for row in rows]
+            ExamSubmission.objects.filter(id__in=ids).update(archive=archive, packed_answers=None)
+            SubmissionAnswer.objects.filter(submission_id__in=ids).delete()
+    except Exception:
+        storage.delete(name)
+        raise
+    return archive, sorted(skipped)
+
+
+def archive_exam(exam_id, cutoff, batch_size=None):
+    """Arquiva as submissões elegíveis de um exame, um arquivo por bloco (``(archive, skipped)`` por bloco)."""
+    batch_size = batch_size or settings.SUBMISSION_ARCHIVE_BATCH_SIZE
+    submissions = eligible_submissions(cutoff, exam_id).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(submissions.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield archive_batch(exam_id, ids, cutoff)
+
+
+def read_archive(archive):
+    """``(question_order, {submission_id: bytes})`` lidos do arquivo."""
+    with archive_storage().open(archive.file_name, 'rb') as raw, gzip.GzipFile(fileobj=raw) as lines:
+        header = json.loads(next(lines))
+        if header.get('format') != FORMAT:
+            raise ValueError(f'Unknown archive format in {archive.file_name}')
+        answers = {}
+        for line in lines:
+            row = json.loads(line)
+            answers[row['id']] = _decode_answers(row['answers'])
+    return header['question_order'], answers
+
+
+class DecodeCache:
+    """LRU dos arquivos já decodificados, por processo, com até ``SUBMISSION_ARCHIVE_CACHE_SIZE`` arquivos."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, archive_id):
+        with self._lock:
+            if archive_id in self._entries:
+                self._entries.move_to_end(archive_id)
+                self.hits += 1
+                return self._entries[archive_id]
+            self.misses += 1
+        # A leitura fica fora do lock; duas threads podem decodificar o mesmo
+        # arquivo ao mesmo tempo, o que só custa trabalho repetido.
+        decoded = read_archive(SubmissionArchive.objects.get(pk=archive_id))
+        with self._lock:
+            self._entries[archive_id] = decoded
+            self._entries.move_to_end(archive_id)
+            while len(self._entries) > settings.SUBMISSION_ARCHIVE_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return decoded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+decode_cache = DecodeCache()
+
+
+def archived_answer_map(submission):
+    """``{question_id: option}`` de uma submissão arquivada."""
+    question_order, answers = decode_cache.get(submission.archive_id)
+    if submission.id not in answers:
+        return {}
+    return unpack_answers(question_order, answers[submission.id])
+
+
+def delete_exam_archives(exam_id):
+    """Remove os arquivos do storage (as linhas saem junto com o exame)."""
+    storage = archive_storage()
+    for name in SubmissionArchive.objects.filter(exam_id=exam_id).values_list('file_name', flat=True):
+        storage.delete(name)
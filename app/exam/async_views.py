@@ -0,0 +1,175 @@
+"""
+Views assíncronas (ASGI) da aplicação de exames.
+
+Estas views são ``async`` nativas do Django (o ``APIView`` do DRF é síncrono) e
+devem ser servidas pelo entry point ``medway_api.asgi`` para não ocupar uma
+thread por conexão aberta.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from celery.result import AsyncResult
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+
+from utils.mixins import ReplicaReadMixin, SerializerTimingMixin
+
+from . import queries
+from .caching import exam_statistics
+from .models import Exam, ExamSubmission
+from .notifications import get_backend, wait_for_submission_status
+from .serializers import ExamResultSerializer
+from .warming import cached_exam_detail
+
+
+def _not_found(error):
+    return JsonResponse({'success': False, 'error': error}, status=404)
+
+
+def _status_code_for(message):
+    if message is None:
+        return 202
+    if message.get('state') == 'FAILURE':
+        return 500
+    return 200
+
+
+class SubmissionStatusStreamView(View):
+    """Acompanha o processamento de uma submissão sem polling.
+
+    - ``Accept: text/event-stream`` (ou ``?mode=sse``): mantém a conexão aberta
+      enviando heartbeats e emite um evento ``status`` quando a correção termina.
+    - Caso contrário (long-poll): segura a requisição até o resultado chegar ou
+      ``timeout`` expirar, respondendo no mesmo formato de
+      ``/submissions/status/`` (200, 500 ou 202 se ainda estiver pendente).
+    """
+
+    async def get(self, request):
+        task_id = request.GET.get('task_id')
+        if not task_id:
+            return JsonResponse({'success': False, 'error': 'task_id é obrigatório'}, status=400)
+        try:
+            timeout = float(request.GET.get('timeout', settings.SUBMISSION_STREAM_TIMEOUT))
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'timeout inválido'}, status=400)
+        timeout = max(0.0, min(timeout, settings.SUBMISSION_STREAM_MAX_TIMEOUT))
+
+        mode = request.GET.get('mode')
+        if mode == 'sse' or (mode is None and 'text/event-stream' in request.headers.get('Accept', '')):
+            response = StreamingHttpResponse(
+                self._sse_events(task_id, timeout), content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        message = await wait_for_submission_status(task_id, timeout)
+        return JsonResponse(
+            {'success': True, 'task': message or {'state': 'PENDING'}},
+            status=_status_code_for(message),
+        )
+
+    async def _sse_events(self, task_id, timeout):
+        heartbeat = settings.SUBMISSION_STREAM_HEARTBEAT
+        yield f'retry: {int(heartbeat * 1000)}\n\n'
+        remaining = timeout
+        while True:
+            message = await wait_for_submission_status(task_id, min(heartbeat, remaining))
+            if message is not None:
+                yield f'event: status\ndata: {json.dumps(message)}\n\n'
+                return
+            remaining -= heartbeat
+            if remaining <= 0:
+                yield f'event: timeout\ndata: {json.dumps({"state": "PENDING"})}\n\n'
+                return
+            yield ': keep-alive\n\n'
+
+
+class AsyncExamsView(View):
+    """Versão assíncrona de ``GET /exams/`` (mesmo payload de ``ExamSerializer``)."""
+
+    async def get(self, request):
+        qs = queries.exam_list_queryset(request.GET.get('search'))
+        results = [
+            {
+                'id': exam.id,
+                'name': exam.name,
+                'starts_at': queries.format_datetime(exam.starts_at),
+                'total_questions': exam.total_questions,
+            }
+            async for exam in qs
+        ]
+        return JsonResponse({'success': True, 'results': results})
+
+
+class AsyncExamDetailView(View):
+    """Versão assíncrona de ``GET /exams/<pk>/`` (mesmo payload, do mesmo cache, de ``ExamDetailAPIView``)."""
+
+    async def get(self, request, pk):
+        try:
+            exam = await Exam.objects.aget(pk=pk)
+        except Exam.DoesNotExist:
+            return _not_found('Exame não encontrado')
+        return JsonResponse(await sync_to_async(cached_exam_detail)(exam))
+
+
+class AsyncExamStatisticsView(ReplicaReadMixin, View):
+    """Versão assíncrona de ``GET /exams/<pk>/statistics/``.
+
+    Mesmo cálculo e mesmo cache de ``ExamStatisticsAPIView``
+    (``exam.caching.exam_statistics``), executados em uma thread.
+    """
+
+    async def get(self, request, pk):
+        try:
+            return JsonResponse(await sync_to_async(exam_statistics)(pk))
+        except Http404:
+            return _not_found('Exame não encontrado')
+
+
+class AsyncSubmissionDetailView(SerializerTimingMixin, View):
+    """Versão assíncrona de ``GET /submissions/<pk>/`` (payload de ``ExamResultSerializer``, em uma thread)."""
+
+    async def get(self, request, pk):
+        try:
+            results = await sync_to_async(self.submission_result)(pk)
+        except ExamSubmission.DoesNotExist:
+            return _not_found('Submissão não encontrada')
+        except APIException as exc:
+            return JsonResponse({'success': False, 'error': str(exc.detail)}, status=exc.status_code)
+        return JsonResponse({'success': True, 'results': results})
+
+    def submission_result(self, pk):
+        submission = queries.submission_queryset().prefetch_related('answers').get(pk=pk)
+        return self.serializer_data(ExamResultSerializer(submission))
+
+
+class AsyncSubmissionStatusView(View):
+    """Versão assíncrona de ``GET /submissions/status/``.
+
+    Consulta primeiro o último estado publicado pela task (ver
+    ``exam.notifications``) e só recorre ao result backend do Celery, em uma
+    thread, quando ainda não há notificação.
+    """
+
+    async def get(self, request):
+        task_id = request.GET.get('task_id')
+        if not task_id:
+            return JsonResponse({'success': False, 'error': 'task_id é obrigatório'}, status=400)
+        message = await sync_to_async(get_backend().get_latest, thread_sensitive=False)(task_id)
+        if message is None:
+            message = await sync_to_async(_task_status, thread_sensitive=False)(task_id)
+        return JsonResponse({'success': True, 'task': message or {'state': 'PENDING'}},
+                            status=_status_code_for(message))
+
+
+def _task_status(task_id):
+    res = AsyncResult(task_id)
+    if res.successful():
+        result = res.result or {}
+        return {'state': res.state, 'created': result.get('created'), 'submission': result.get('submission')}
+    if res.failed():
+        return {'state': res.state, 'error': str(res.result)}
+    return None
@@ -0,0 +1,65 @@
+"""
+Entradas de exame no cache compartilhado (ver ``utils.cache``).
+
+Cada exame tem seu namespace de estatísticas: uma nova submissão ou uma
+alteração no exame chama ``invalidate_exam_statistics`` e a próxima leitura
+recalcula, uma única vez, mesmo com muitas requisições simultâneas.
+"""
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+
+from utils.cache import get_or_compute, invalidate_namespace
+
+from .models import Exam, ExamSubmission
+
+
+def statistics_namespace(exam_id):
+    return f'exam:{exam_id}:statistics'
+
+
+def cached_statistics(exam_id, compute):
+    return get_or_compute(
+        'payload', compute, timeout=settings.EXAM_STATISTICS_CACHE_SECONDS, namespace=statistics_namespace(exam_id)
+    )
+
+
+def invalidate_exam_statistics(exam_id):
+    invalidate_namespace(statistics_namespace(exam_id))
+
+
+def exam_statistics(exam_id):
+    """Payload de ``/exams/<pk>/statistics/`` (views síncrona e assíncrona).
+
+    Consultas agrupadas de ``exam.queries``; levanta ``Http404`` se o exame
+    não existe.
+    """
+    # Import tardio: ``exam.queries`` carrega o DRF, que o worker não importa (ver utils.startup)
+    from . import queries
+    from .packing import UnknownPackedLayout, layout_digest, layout_order
+
+    def compute():
+        exam = get_object_or_404(Exam, pk=exam_id)
+        key = queries.answer_key(queries.correct_options_queryset(exam.id))
+        exam_questions = list(queries.exam_questions_queryset(exam.id))
+        packed_rows = list(queries.packed_answers_queryset(exam.id))
+        # Ordens dos arrays gravados antes de o exame mudar de questões
+        current = layout_digest(eq.question_id for eq in exam_questions)
+        layout_orders = {}
+        for digest in {layout for _, layout, _ in packed_rows} - {current}:
+            try:
+                layout_orders[digest] = layout_order(digest)
+            except UnknownPackedLayout:
+                pass
+        return queries.build_statistics(
+            exam,
+            exam_questions,
+            key,
+            queries.answer_distribution_queryset(exam.id),
+            queries.submission_scores_queryset(exam.id, list(key)),
+            ExamSubmission.objects.filter(exam=exam).count(),
+            packed_rows,
+            queries.archived_counts_queryset(exam.id),
+            layout_orders,
+        )
+
+    return cached_statistics(exam_id, compute)
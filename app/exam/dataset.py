@@ -0,0 +1,268 @@
+"""
+Geração de dados sintéticos em volume de produção (comando ``generate_dataset``).
+
+Cria estudantes, um banco de questões com 4 ou 5 alternativas (uma correta),
+exames montados a partir do banco e submissões com respostas sorteadas a
+partir de uma distribuição de acertos (``AccuracyDistribution``): cada
+submissão recebe um percentual de acerto e cada resposta é correta com essa
+probabilidade; as erradas escolhem uma das outras alternativas.
+
+Tudo sai de um único ``random.Random(seed)``, então a mesma semente gera os
+mesmos dados. As escritas usam ``bulk_create`` em blocos, dentro de uma
+transação por bloco; só as respostas, a tabela que chega a milhões de linhas,
+usam ``COPY``/``executemany`` (``insert_answer_rows``). A nota
+(``graded_score``) é calculada na geração, sem passar pela correção. Os usuários compartilham uma única senha com hash
+calculado uma vez, em vez de um PBKDF2 por usuário.
+"""
+import io
+import random
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from question.dedup import content_hash
+from question.models import Alternative, Question
+from student.models import Student
+
+from .models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from .packing import pack_submission
+
+SUBJECTS = (
+    'Cardiologia', 'Pneumologia', 'Nefrologia', 'Pediatria', 'Ginecologia', 'Obstetrícia',
+    'Cirurgia Geral', 'Infectologia', 'Psiquiatria', 'Medicina Preventiva',
+)
+
+
+@dataclass(frozen=True)
+class AccuracyDistribution:
+    """Percentual de acerto por submissão: ``beta:A,B``, ``normal:MEDIA,DP``,
+    ``uniform:MIN,MAX`` ou ``fixed:P`` (valores entre 0 e 1)."""
+
+    kind: str
+    params: tuple
+
+    KINDS = {'beta': 2, 'normal': 2, 'uniform': 2, 'fixed': 1}
+
+    @classmethod
+    def parse(cls, text):
+        kind, _, raw = text.partition(':')
+        if kind not in cls.KINDS:
+            raise ValueError(f'Unknown distribution {kind!r}; use one of {sorted(cls.KINDS)}')
+        try:
+            params = tuple(float(value) for value in raw.split(',')) if raw else ()
+        except ValueError:
+            raise ValueError(f'Invalid parameters in {text!r}') from None
+        if len(params) != cls.KINDS[kind]:
+            raise ValueError(f'{kind} takes {cls.KINDS[kind]} parameter(s)')
+        return cls(kind, params)
+
+    def sample(self, rng):
+        if self.kind == 'beta':
+            value = rng.betavariate(*self.params)
+        elif self.kind == 'normal':
+            value = rng.gauss(*self.params)
+        elif self.kind == 'uniform':
+            value = rng.uniform(*self.params)
+        else:
+            value = self.params[0]
+        return min(1.0, max(0.0, value))
+
+    def __str__(self):
+        return f"{self.kind}:{','.join(f'{param:g}' for param in self.params)}"
+
+
+class DatasetGenerator:
+    """Gera o dataset; ``progress(message)`` recebe o andamento de cada etapa."""
+
+    def __init__(self, students, exams, questions, questions_per_exam, submissions,
+                 accuracy, alternatives=(4, 5), storage='rows', seed=42, prefix='synthetic',
+                 password='senha123', days=30, batch_size=10000, progress=None):
+        if questions_per_exam > questions:
+            raise ValueError('questions_per_exam cannot exceed the question bank size')
+        if submissions > students * exams:
+            raise ValueError('Each student submits an exam at most once: submissions <= students * exams')
+        if storage not in ('rows', 'packed'):
+            raise ValueError(f'Unknown storage {storage!r}')
+        self.students = students
+        self.exams = exams
+        self.questions = questions
+        self.questions_per_exam = questions_per_exam
+        self.submissions = submissions
+        self.accuracy = accuracy
+        self.alternatives = tuple(alternatives)
+        self.storage = storage
+        self.seed = seed
+        self.prefix = prefix
+        self.password = password
+        self.days = days
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+        self.rng = random.Random(seed)
+        self.timings = {}
+
+    def run(self):
+        self.now = timezone.now()
+        student_ids = self._timed('students', self._create_students)
+        bank = self._timed('questions', self._create_question_bank)
+        exams = self._timed('exams', lambda: self._create_exams(bank))
+        answers = self._timed('submissions', lambda: self._create_submissions(student_ids, exams))
+        return {
+            'seed': self.seed,
+            'students': len(student_ids),
+            'questions': len(bank),
+            'exams': len(exams),
+            'submissions': self.submissions,
+            'answers': answers,
+            'storage': self.storage,
+            'accuracy': str(self.accuracy),
+            'timings_s': self.timings,
+        }
+
+    def _timed(self, step, function):
+        started = time.perf_counter()
+        result = function()
+        self.timings[step] = round(time.perf_counter() - started, 2)
+        self.progress(f'{step}: {self.timings[step]}s')
+        return result
+
+    def _tag(self, index):
+        return f'{self.prefix}-{self.seed}-{index}'
+
+    def _create_students(self):
+        # Um único hash para todos: o custo do PBKDF2 é pago uma vez por execução
+        password = make_password(self.password, salt=f'{self.prefix}{self.seed}')
+        ids = []
+        for start in range(0, self.students, self.batch_size):
+            batch = [
+                Student(
+                    username=self._tag(index), email=f'{self._tag(index)}@example.com',
+                    name=f'Estudante {index}', password=password,
+                )
+                for index in range(start, min(start + self.batch_size, self.students))
+            ]
+            with transaction.atomic():
+                ids.extend(student.pk for student in Student.objects.bulk_create(batch))
+        return ids
+
+    def _create_question_bank(self):
+        """Lista de ``(question_id, opções, opção correta)``."""
+        rng = self.rng
+        specs = []
+        for index in range(self.questions):
+            subject = SUBJECTS[index % len(SUBJECTS)]
+            count = rng.choice(self.alternatives)
+            contents = [f'{subject}: conduta {rng.randrange(10 ** 6)} ({self._tag(index)}-{option})'
+                        for option in range(1, count + 1)]
+            content = f'[{self._tag(index)}] {subject}: caso clínico {rng.randrange(10 ** 6)}. Qual a conduta?'
+            specs.append((content, contents, rng.randint(1, count)))
+
+        bank = []
+        for start in range(0, len(specs), self.batch_size):
+            chunk = specs[start:start + self.batch_size]
+            with transaction.atomic():
+                questions = Question.objects.bulk_create([
+                    Question(content=content, content_hash=content_hash(content, contents))
+                    for content, contents, correct in chunk
+                ])
+                Alternative.objects.bulk_create([
+                    Alternative(question=question, option=option, content=text, is_correct=option == correct)
+                    for question, (content, contents, correct) in zip(questions, chunk)
+                    for option, text in enumerate(contents, start=1)
+                ], batch_size=self.batch_size)
+            bank.extend(
+                (question.pk, len(contents), correct)
+                for question, (content, contents, correct) in zip(questions, chunk)
+            )
+        return bank
+
+    def _create_exams(self, bank):
+        """Lista de ``(exam_id, [(question_id, opções, opção correta), ...])`` em ordem de ``number``."""
+        exams = []
+        with transaction.atomic():
+            rows = Exam.objects.bulk_create([
+                Exam(name=f'Simulado {self._tag(index)}') for index in range(self.exams)
+            ])
+            links = []
+            for exam in rows:
+                questions = self.rng.sample(bank, self.questions_per_exam)
+                links.extend(
+                    ExamQuestion(exam=exam, question_id=question[0], number=number)
+                    for number, question in enumerate(questions, start=1)
+                )
+                exams.append((exam.pk, questions))
+            ExamQuestion.objects.bulk_create(links, batch_size=self.batch_size)
+        return exams
+
+    def _create_submissions(self, student_ids, exams):
+        """Distribui as submissões igualmente entre os exames; devolve o total de respostas."""
+        per_exam, extra = divmod(self.submissions, len(exams)) if exams else (0, 0)
+        chunk_size = max(1, self.batch_size // max(1, self.questions_per_exam))
+        answers = 0
+        for position, (exam_id, questions) in enumerate(exams):
+            count = per_exam + (position < extra)
+            students = self.rng.sample(student_ids, count)
+            for start in range(0, count, chunk_size):
+                answers += self._create_submission_chunk(exam_id, questions, students[start:start + chunk_size])
+            self.progress(f'exam {exam_id}: {count} submissions')
+        return answers
+
+    def _create_submission_chunk(self, exam_id, questions, students):
+        rng = self.rng
+        question_order = [question_id for question_id, options, correct in questions]
+        submissions, answer_maps = [], []
+        for student_id in students:
+            accuracy = self.accuracy.sample(rng)
+            answers = {}
+            hits = 0
+            for question_id, options, correct in questions:
+                if rng.random() < accuracy:
+                    option = correct
+                    hits += 1
+                else:
+                    option = rng.randint(1, options - 1)
+                    option += option >= correct
+                answers[question_id] = option
+            submission = ExamSubmission(
+                student_id=student_id, exam_id=exam_id,
+                submitted_at=self.now - timedelta(seconds=rng.random() * self.days * 86400),
+                graded_score=round(hits / len(questions) * 100, 2) if questions else 0,
+            )
+            if self.storage == 'packed':
+                pack_submission(submission, question_order, answers)
+            submissions.append(submission)
+            answer_maps.append(answers)
+
+        with transaction.atomic():
+            ExamSubmission.objects.bulk_create(submissions)
+            if self.storage == 'rows':
+                insert_answer_rows([
+                    (submission.pk, question_id, option)
+                    for submission, answers in zip(submissions, answer_maps)
+                    for question_id, option in answers.items()
+                ])
+        return sum(len(answers) for answers in answer_maps)
+
+
+def insert_answer_rows(rows):
+    """Grava ``(submission_id, question_id, opção)`` em ``SubmissionAnswer``.
+
+    É a tabela com dezenas de milhões de linhas, então não passa por
+    ``bulk_create`` (que monta e prepara cada campo de cada instância): usa
+    ``COPY`` no PostgreSQL e ``executemany`` nos demais bancos.
+    """
+    meta = SubmissionAnswer._meta
+    table = connection.ops.quote_name(meta.db_table)
+    columns = ', '.join(
+        connection.ops.quote_name(meta.get_field(name).column)
+        for name in ('submission', 'question', 'selected_alternative_option')
+    )
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO(''.join(f'{submission}\t{question}\t{option}\n' for submission, question, option in rows))
+            cursor.cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+        else:
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES (%s, %s, %s)', rows)
@@ -0,0 +1,174 @@
+"""
+Buffer write-behind para o autosave de respostas (rascunhos).
+
+Cada ``PUT /exams/<pk>/draft/`` grava apenas os deltas no cache compartilhado,
+em um dicionário ``{question_id: option}`` por (exame, estudante). Alterações
+repetidas na mesma questão se sobrepõem no buffer, então o banco só recebe o
+valor final, em upserts em lote feitos por ``flush_drafts`` (task periódica) ou
+na submissão final.
+
+Uma opção ``None`` no buffer significa "resposta apagada" e remove a linha de
+``DraftAnswer`` no próximo flush.
+
+O buffer só sai do cache depois do commit do upsert, e apenas se não mudou
+durante o flush: um upsert que falha não perde o autosave, e um ``PUT`` que
+chega no meio do flush fica para o próximo. Os pares (exame, estudante)
+pendentes ficam em um set do Redis (``SADD``/``SPOP``, sem lock); com outros
+backends de cache, em um ``set`` protegido por ``cache_lock``, suficiente para
+testes e instalações de um processo.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+from django.utils import timezone
+
+from utils.cache import cache_lock, redis_client
+
+from .models import DraftAnswer
+
+DIRTY_KEY = 'exam:draft:dirty'
+DIRTY_POP_COUNT = 1000
+
+
+def _draft_key(exam_id, student_id):
+    return f'exam:draft:{exam_id}:{student_id}'
+
+
+def _dirty_client():
+    return cache.make_and_validate_key(DIRTY_KEY), redis_client()
+
+
+def _mark_dirty(pairs):
+    if not pairs:
+        return
+    if isinstance(cache, RedisCache):
+        key, client = _dirty_client()
+        pipeline = client.pipeline()
+        pipeline.sadd(key, *(f'{exam_id}:{student_id}' for exam_id, student_id in pairs))
+        pipeline.expire(key, settings.EXAM_DRAFT_BUFFER_TTL)
+        pipeline.execute()
+        return
+    with cache_lock(DIRTY_KEY):
+        dirty = cache.get(DIRTY_KEY) or set()
+        dirty.update(pairs)
+        cache.set(DIRTY_KEY, dirty, settings.EXAM_DRAFT_BUFFER_TTL)
+
+
+def _take_dirty(keys=None):
+    """Retira do conjunto de pendentes os pares ``keys`` (todos, se omitido) e os retorna."""
+    if isinstance(cache, RedisCache):
+        key, client = _dirty_client()
+        if keys is not None:
+            keys = set(keys)
+            if keys:
+                client.srem(key, *(f'{exam_id}:{student_id}' for exam_id, student_id in keys))
+            return keys
+        taken = set()
+        while members := client.spop(key, DIRTY_POP_COUNT):
+            taken.update(tuple(map(int, member.decode().split(':'))) for member in members)
+        return taken
+    with cache_lock(DIRTY_KEY):
+        dirty = cache.get(DIRTY_KEY) or set()
+        keys = set(dirty if keys is None else keys)
+        remaining = dirty - keys
+        if remaining:
+            cache.set(DIRTY_KEY, remaining, settings.EXAM_DRAFT_BUFFER_TTL)
+        else:
+            cache.delete(DIRTY_KEY)
+    return keys
+
+
+def buffer_answers(exam_id, student_id, deltas):
+    """Aplica os deltas ``{question_id: option | None}`` ao buffer do estudante."""
+    key = _draft_key(exam_id, student_id)
+    with cache_lock(key):
+        buffered = cache.get(key) or {}
+        buffered.update(deltas)
+        cache.set(key, buffered, settings.EXAM_DRAFT_BUFFER_TTL)
+    _mark_dirty([(exam_id, student_id)])
+    return buffered
+
+
+def get_draft_answers(exam_id, student_id):
+    """Rascunho atual: linhas persistidas sobrepostas pelo buffer ainda não gravado."""
+    answers = dict(
+        DraftAnswer.objects.filter(exam_id=exam_id, student_id=student_id)
+        .values_list('question_id', 'selected_alternative_option')
+    )
+    for question_id, option in (cache.get(_draft_key(exam_id, student_id)) or {}).items():
+        if option is None:
+            answers.pop(question_id, None)
+        else:
+            answers[question_id] = option
+    return answers
+
+
+def flush_drafts(keys=None):
+    """Grava no banco os buffers pendentes em um único upsert em lote.
+
+    ``keys`` é uma coleção de pares ``(exam_id, student_id)``; quando omitido,
+    todos os buffers marcados como alterados são gravados. Retorna o número de
+    respostas gravadas ou removidas.
+    """
+    keys = _take_dirty(keys)
+
+    now = timezone.now()
+    flushed = {}
+    upserts, cleared = [], []
+    for exam_id, student_id in keys:
+        buffered = cache.get(_draft_key(exam_id, student_id))
+        if not buffered:
+            continue
+        flushed[exam_id, student_id] = buffered
+        for question_id, option in buffered.items():
+            if option is None:
+                cleared.append((exam_id, student_id, question_id))
+            else:
+                upserts.append(DraftAnswer(
+                    exam_id=exam_id, student_id=student_id, question_id=question_id,
+                    selected_alternative_option=option, updated_at=now,
+                ))
+
+    try:
+        with transaction.atomic():
+            if upserts:
+                DraftAnswer.objects.bulk_create(
+                    upserts,
+                    batch_size=1000,
+                    update_conflicts=True,
+                    unique_fields=['student', 'exam', 'question'],
+                    update_fields=['selected_alternative_option', 'updated_at'],
+                )
+            for exam_id, student_id, question_id in cleared:
+                DraftAnswer.objects.filter(
+                    exam_id=exam_id, student_id=student_id, question_id=question_id
+                ).delete()
+            transaction.on_commit(lambda: _release_buffers(flushed))
+    except Exception:
+        _mark_dirty(flushed)
+        raise
+    return len(upserts) + len(cleared)
+
+
+def _release_buffers(flushed):
+    """Depois do commit: apaga cada buffer que continua igual ao que foi gravado.
+
+    Buffers alterados durante o flush ficam no cache e voltam a ser pendentes.
+    """
+    changed = []
+    for (exam_id, student_id), buffered in flushed.items():
+        key = _draft_key(exam_id, student_id)
+        with cache_lock(key):
+            current = cache.get(key)
+            if current == buffered:
+                cache.delete(key)
+            elif current:
+                changed.append((exam_id, student_id))
+    _mark_dirty(changed)
+
+
+def discard_draft(exam_id, student_id):
+    """Remove o rascunho (buffer e linhas) depois da submissão final."""
+    cache.delete(_draft_key(exam_id, student_id))
+    DraftAnswer.objects.filter(exam_id=exam_id, student_id=student_id).delete()
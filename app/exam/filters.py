@@ -74,19 +74,11 @@ class ExamSubmissionFilter(django_filters.FilterSet):
     def filter_min_score(self, queryset, name, value):
         """Filtra submissões com pontuação mínima"""
         if value is not None:
-            filtered_ids = []
-            for submission in queryset:
-                if submission.score >= value:
-                    filtered_ids.append(submission.id)
-            return queryset.filter(id__in=filtered_ids)
+            return queryset.filter(graded_score__gte=value)
         return queryset
     
     def filter_max_score(self, queryset, name, value):
         """Filtra submissões com pontuação máxima"""
         if value is not None:
-            filtered_ids = []
-            for submission in queryset:
-                if submission.score <= value:
-                    filtered_ids.append(submission.id)
-            return queryset.filter(id__in=filtered_ids)
+            return queryset.filter(graded_score__lte=value)
         return queryset
\ No newline at end of file
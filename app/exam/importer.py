@@ -0,0 +1,472 @@
+"""
+Importação em lote do banco de questões (e dos exames que as usam).
+
+Os registros são lidos em streaming (JSON Lines, lista JSON ou CSV), validados
+em memória e gravados em blocos com ``bulk_create`` — sem passar por
+``Alternative.save``/``full_clean`` linha a linha. Cada bloco é gravado em uma
+transação junto com o checkpoint ``QuestionBankImport``, o que permite retomar
+uma importação interrompida do ponto exato em que parou.
+
+Formato de um registro (JSON):
+
+    {
+        "content": "Qual parte do corpo usamos para ouvir?",
+        "selection_type": "SINGLE",
+        "alternatives": [
+            {"option": "A", "content": "Dentes", "is_correct": false},
+            {"option": "C", "content": "Ouvidos", "is_correct": true}
+        ],
+        "exam": "Prova Falsa 1",
+        "number": 1
+    }
+
+``exam`` e ``number`` são opcionais (questão apenas no banco). No CSV cada
+linha é uma questão com as colunas ``content, selection_type, exam, number,
+A, B, C, D, E, correct`` (``correct`` com as letras corretas, ex.: ``C`` ou
+``A|C``).
+
+Questões cujo ``content_hash`` (ver ``question.dedup``) já existe no banco, ou
+que se repetem no próprio arquivo, não são criadas de novo: a questão existente
+é reaproveitada (inclusive no vínculo com o exame). O hash não inclui o
+gabarito: um registro que coincide com uma questão existente (ou anterior no
+arquivo) mas marca outras alternativas como corretas é rejeitado, em vez de
+perder o gabarito importado em silêncio. ``dedupe=False`` desliga essa
+verificação.
+"""
+import csv
+import hashlib
+import io
+import json
+import re
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from question.dedup import content_hash, normalize_text
+from question.models import Question, Alternative
+from question.utils import AlternativesChoices, QuestiosTypeChoices
+
+from .models import Exam, ExamQuestion, QuestionBankImport
+from .structure import invalidate_exam_structure
+
+FORMATS = ('jsonl', 'json', 'csv')
+OPTION_LETTERS = {choice.label: choice.value for choice in AlternativesChoices}
+MAX_REPORTED_ERRORS = 20
+
+
+class ImportValidationError(ValueError):
+    """Registro inválido no arquivo de importação."""
+
+
+def detect_format(filename):
+    name = filename.lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.json'):
+        return 'json'
+    if name.endswith('.csv'):
+        return 'csv'
+    raise ImportValidationError(f'Não foi possível identificar o formato de {filename}; use um de {FORMATS}')
+
+
+def file_checksum(stream, block_size=1 << 20):
+    """SHA-256 do conteúdo de um arquivo binário, lido em blocos."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(block_size), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def iter_records(stream, fmt):
+    """Itera os registros de um arquivo binário sem carregá-lo inteiro em memória."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'jsonl':
+        return _iter_json_lines(text)
+    if fmt == 'json':
+        return _iter_json_array(text)
+    if fmt == 'csv':
+        return _iter_csv(text)
+    raise ImportValidationError(f'Formato desconhecido: {fmt}')
+
+
+def _iter_json_lines(text):
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ImportValidationError(f'Linha {line_number}: JSON inválido ({exc.msg})')
+
+
+def _iter_json_array(text, read_size=1 << 16):
+    """Decodifica uma lista JSON item a item com ``raw_decode``."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+    state = 'start'
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = text.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+        if pos >= len(buf):
+            if state == 'start':
+                return
+            raise ImportValidationError('JSON incompleto: lista não foi fechada')
+
+        char = buf[pos]
+        if state == 'start':
+            if char != '[':
+                raise ImportValidationError('O arquivo JSON deve conter uma lista de questões')
+            pos += 1
+            state = 'item_or_end'
+            continue
+        if char == ']' and state != 'item':
+            return
+        if state == 'separator_or_end':
+            if char != ',':
+                raise ImportValidationError(f"JSON inválido: esperado ',' ou ']' e encontrado {char!r}")
+            pos += 1
+            state = 'item'
+            continue
+
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError as exc:
+                if eof:
+                    raise ImportValidationError(f'JSON inválido ({exc.msg})')
+                chunk = text.read(read_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+        pos = end
+        state = 'separator_or_end'
+        yield obj
+
+
+def _iter_csv(text):
+    for row in csv.DictReader(text):
+        correct = {letter.upper() for letter in re.split(r'[|;,\s]+', row.get('correct') or '') if letter}
+        yield {
+            'content': row.get('content'),
+            'selection_type': row.get('selection_type') or QuestiosTypeChoices.SINGLE,
+            'exam': row.get('exam') or None,
+            'number': row.get('number') or None,
+            'alternatives': [
+                {'option': letter, 'content': row[letter], 'is_correct': letter in correct}
+                for letter in OPTION_LETTERS
+                if (row.get(letter) or '').strip()
+            ],
+        }
+
+
+def _parse_option(value):
+    if isinstance(value, str):
+        value = value.strip().upper()
+        if value in OPTION_LETTERS:
+            return OPTION_LETTERS[value]
+        if value.isdigit():
+            value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value in AlternativesChoices.values:
+        return value
+    raise ImportValidationError(f'Alternativa inválida: {value!r} (use 1-5 ou A-E)')
+
+
+def validate_record(record):
+    """Valida e normaliza um registro; levanta ``ImportValidationError``."""
+    if not isinstance(record, dict):
+        raise ImportValidationError('Registro deve ser um objeto')
+
+    content = (record.get('content') or '').strip()
+    if not content:
+        raise ImportValidationError('Questão sem enunciado')
+
+    selection_type = record.get('selection_type') or QuestiosTypeChoices.SINGLE
+    if selection_type not in QuestiosTypeChoices.values:
+        raise ImportValidationError(f'selection_type inválido: {selection_type!r}')
+
+    alternatives = []
+    seen_options = set()
+    for alternative in record.get('alternatives') or []:
+        option = _parse_option(alternative.get('option', alternative.get('alternative')))
+        if option in seen_options:
+            raise ImportValidationError(f'Alternativa {AlternativesChoices(option).label} repetida')
+        seen_options.add(option)
+        alternative_content = (alternative.get('content') or '').strip()
+        if not alternative_content:
+            raise ImportValidationError(f'Alternativa {AlternativesChoices(option).label} sem conteúdo')
+        alternatives.append((option, alternative_content, bool(alternative.get('is_correct'))))
+    if not alternatives:
+        raise ImportValidationError('Questão sem alternativas')
+
+    correct_count = sum(1 for _, _, is_correct in alternatives if is_correct)
+    if selection_type == QuestiosTypeChoices.SINGLE and correct_count != 1:
+        raise ImportValidationError('Questões de escolha única precisam de exatamente uma alternativa correta')
+    if selection_type == QuestiosTypeChoices.MULTIPLE and correct_count < 1:
+        raise ImportValidationError('Questões de múltipla escolha precisam de ao menos uma alternativa correta')
+
+    exam = (record.get('exam') or '').strip() or None
+    number = record.get('number')
+    if (exam is None) != (number in (None, '')):
+        raise ImportValidationError('exam e number devem ser informados juntos')
+    if exam is not None:
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise ImportValidationError(f'number inválido: {number!r}')
+        if number < 1:
+            raise ImportValidationError(f'number inválido: {number!r}')
+    else:
+        number = None
+
+    return {
+        'content': content,
+        'selection_type': selection_type,
+        'alternatives': alternatives,
+        'exam': exam,
+        'number': number,
+        'content_hash': content_hash(content, [text for _, text, _ in alternatives]),
+        'answer_key': answer_key((text, is_correct) for _, text, is_correct in alternatives),
+    }
+
+
+def answer_key(alternatives):
+    """Textos normalizados das alternativas corretas, comparáveis entre questões de mesmo ``content_hash``."""
+    return tuple(sorted(normalize_text(text) for text, is_correct in alternatives if is_correct))
+
+
+class QuestionBankImporter:
+    """Grava registros validados em blocos, atualizando o checkpoint ``job``."""
+
+    def __init__(self, job, chunk_size=1000, skip_invalid=False, progress=None, dedupe=True):
+        self.job = job
+        self.chunk_size = chunk_size
+        self.skip_invalid = skip_invalid
+        self.progress = progress
+        self.dedupe = dedupe
+        self.alternatives_created = 0
+        self.questions_reused = 0
+        self.errors = []
+        self._exam_ids = {}
+        self._exam_numbers = {}
+        self._exam_hashes = {}
+
+    def run(self, records):
+        started = time.monotonic()
+        resumed_from = self.job.records_processed
+        chunk = []
+        try:
+            for index, record in enumerate(records):
+                if index < resumed_from:
+                    continue
+                chunk.append((index, record))
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk, started, resumed_from)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk, started, resumed_from)
+        except Exception:
+            self.job.status = QuestionBankImport.Status.FAILED
+            self.job.save(update_fields=['status'])
+            raise
+
+        self.job.status = QuestionBankImport.Status.COMPLETED
+        self.job.finished_at = timezone.now()
+        self.job.save(update_fields=['status', 'finished_at'])
+        return self.report(started, resumed_from)
+
+    def report(self, started, resumed_from):
+        elapsed = time.monotonic() - started
+        imported = self.job.records_processed - resumed_from
+        return {
+            'import_id': self.job.id,
+            'status': self.job.status,
+            'resumed_from': resumed_from,
+            'records_processed': self.job.records_processed,
+            'records_skipped': self.job.records_skipped,
+            'questions_created': self.job.questions_created,
+            'questions_reused': self.questions_reused,
+            'alternatives_created': self.alternatives_created,
+            'exams_created': self.job.exams_created,
+            'elapsed_seconds': round(elapsed, 3),
+            'records_per_second': round(imported / elapsed, 1) if elapsed else None,
+            'errors': self.errors,
+        }
+
+    def _validate_chunk(self, chunk):
+        valid = []
+        skipped = 0
+        for index, record in chunk:
+            try:
+                valid.append(validate_record(record))
+            except ImportValidationError as exc:
+                if not self.skip_invalid:
+                    raise ImportValidationError(f'Registro {index + 1}: {exc}')
+                skipped += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({'record': index + 1, 'error': str(exc)})
+        return valid, skipped
+
+    def _resolve_exams(self, names):
+        missing = [name for name in names if name not in self._exam_ids]
+        if not missing:
+            return 0
+        for name, exam_id in Exam.objects.filter(name__in=missing).order_by('-id').values_list('name', 'id'):
+            self._exam_ids[name] = exam_id
+        existing_ids = [self._exam_ids[name] for name in missing if name in self._exam_ids]
+        for exam_id in existing_ids:
+            self._exam_numbers[exam_id] = set()
+            self._exam_hashes[exam_id] = set()
+        for exam_id, number, question_hash in ExamQuestion.objects.filter(
+            exam_id__in=existing_ids
+        ).values_list('exam_id', 'number', 'question__content_hash'):
+            self._exam_numbers[exam_id].add(number)
+            self._exam_hashes[exam_id].add(question_hash)
+
+        to_create = [Exam(name=name) for name in missing if name not in self._exam_ids]
+        for exam in Exam.objects.bulk_create(to_create):
+            self._exam_ids[exam.name] = exam.id
+            self._exam_numbers[exam.id] = set()
+            self._exam_hashes[exam.id] = set()
+        return len(to_create)
+
+    def _reject(self, message):
+        if not self.skip_invalid:
+            raise ImportValidationError(message)
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'record': None, 'error': message})
+
+    def _existing_questions(self, items):
+        """Separa os itens sem questão equivalente no banco (um por hash) dos já existentes.
+
+        Retorna também os itens rejeitados por divergirem do gabarito da questão
+        equivalente (no banco ou anterior no bloco).
+        """
+        question_ids = {}
+        # Menor id por último: duplicatas antigas apontam sempre para a mesma questão.
+        for question_hash, question_id in Question.objects.filter(
+            content_hash__in={item['content_hash'] for item in items}
+        ).order_by('-id').values_list('content_hash', 'id'):
+            question_ids[question_hash] = question_id
+        keys = {}
+        if question_ids:
+            hashes = {question_id: question_hash for question_hash, question_id in question_ids.items()}
+            alternatives = {}
+            for question_id, text, is_correct in Alternative.objects.filter(
+                question_id__in=hashes
+            ).values_list('question_id', 'content', 'is_correct'):
+                alternatives.setdefault(question_id, []).append((text, is_correct))
+            keys = {hashes[question_id]: answer_key(alternatives.get(question_id, ())) for question_id in hashes}
+
+        new_items = {}
+        conflicting = []
+        for item in items:
+            key = keys.get(item['content_hash'])
+            if key is None:
+                key = new_items.setdefault(item['content_hash'], item)['answer_key']
+            if key != item['answer_key']:
+                conflicting.append(item)
+        return list(new_items.values()), question_ids, conflicting
+
+    def _import_chunk(self, chunk, started, resumed_from):
+        valid, skipped = self._validate_chunk(chunk)
+        with transaction.atomic():
+            exams_created = self._resolve_exams({item['exam'] for item in valid if item['exam']})
+
+            placed = []
+            for item in valid:
+                if item['exam'] is None:
+                    placed.append(item)
+                    continue
+                exam_id = self._exam_ids[item['exam']]
+                if item['number'] in self._exam_numbers[exam_id]:
+                    self._reject(f"Exame {item['exam']!r} já possui a questão número {item['number']}")
+                    skipped += 1
+                    continue
+                if self.dedupe and item['content_hash'] in self._exam_hashes[exam_id]:
+                    self._reject(f"Questão {item['number']} repete outra questão do exame {item['exam']!r}")
+                    skipped += 1
+                    continue
+                self._exam_numbers[exam_id].add(item['number'])
+                self._exam_hashes[exam_id].add(item['content_hash'])
+                placed.append(item)
+
+            if self.dedupe:
+                new_items, question_ids, conflicting = self._existing_questions(placed)
+                for item in conflicting:
+                    self._reject(f"Questão {item['content'][:80]!r} repete uma questão existente com outro gabarito")
+                    skipped += 1
+                    if item['exam'] is not None:
+                        exam_id = self._exam_ids[item['exam']]
+                        self._exam_numbers[exam_id].discard(item['number'])
+                        self._exam_hashes[exam_id].discard(item['content_hash'])
+                rejected = {id(item) for item in conflicting}
+                placed = [item for item in placed if id(item) not in rejected]
+            else:
+                new_items, question_ids = placed, {}
+            # content_hash já vem calculado do registro validado (mesmo valor de
+            # ``Question.refresh_content_hash``): uma vez por questão, sem
+            # recálculo depois do bulk_create das alternativas.
+            questions = Question.objects.bulk_create([
+                Question(content=item['content'], selection_type=item['selection_type'],
+                         content_hash=item['content_hash'])
+                for item in new_items
+            ])
+            alternatives = [
+                Alternative(question=question, option=option, content=content, is_correct=is_correct)
+                for question, item in zip(questions, new_items)
+                for option, content, is_correct in item['alternatives']
+            ]
+            Alternative.objects.bulk_create(alternatives)
+            if self.dedupe:
+                question_ids.update((item['content_hash'], question.id) for question, item in zip(questions, new_items))
+                links = [(question_ids[item['content_hash']], item) for item in placed]
+            else:
+                links = [(question.id, item) for question, item in zip(questions, placed)]
+            ExamQuestion.objects.bulk_create([
+                ExamQuestion(exam_id=self._exam_ids[item['exam']], question_id=question_id, number=item['number'])
+                for question_id, item in links
+                if item['exam'] is not None
+            ])
+            # bulk_create não dispara os sinais de exam.signals
+            transaction.on_commit(lambda: invalidate_exam_structure(
+                *{self._exam_ids[item['exam']] for item in placed if item['exam'] is not None}
+            ))
+            self.questions_reused += len(placed) - len(questions)
+
+            self.job.records_processed += len(chunk)
+            self.job.records_skipped += skipped
+            self.job.questions_created += len(questions)
+            self.job.exams_created += exams_created
+            self.job.save(update_fields=[
+                'records_processed', 'records_skipped', 'questions_created', 'exams_created',
+            ])
+        self.alternatives_created += len(alternatives)
+
+        if self.progress:
+            self.progress(self.report(started, resumed_from))
+
+
+def start_import(source_name, checksum, resume=False):
+    """Retorna o checkpoint a usar: o último incompleto (``resume``) ou um novo."""
+    if resume:
+        job = (
+            QuestionBankImport.objects
+            .filter(source_checksum=checksum)
+            .exclude(status=QuestionBankImport.Status.COMPLETED)
+            .order_by('-started_at')
+            .first()
+        )
+        if job is not None:
+            job.status = QuestionBankImport.Status.RUNNING
+            job.save(update_fields=['status'])
+            return job
+    return QuestionBankImport.objects.create(source_name=source_name, source_checksum=checksum)
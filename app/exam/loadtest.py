@@ -0,0 +1,220 @@
+"""
+Simulação de carga de uma aplicação de prova (comando ``simulate_exam_sitting``).
+
+Cada estudante simulado segue o fluxo real contra um servidor já no ar:
+
+1. chega durante a rampa (``ramp``) e abre a prova (``GET /exams/<id>/``);
+2. salva respostas aos poucos (``PUT /exams/<id>/draft/``, ``autosaves`` vezes);
+3. envia a submissão (``POST /submissions/`` com ``use_draft``); uma fração
+   (``burst_fraction``) envia nos últimos ``burst_window`` segundos antes do
+   fim, como no fechamento da prova; 429/503 do controle de admissão são
+   repetidos após o ``Retry-After``;
+4. acompanha a correção (``GET /submissions/status/``) até o resultado;
+5. lê o resultado (``GET /submissions/student/<aluno>/exam/<id>/``).
+
+O agendamento sai de ``random.Random(seed)``. O relatório traz percentis de
+latência e taxa de erro por etapa e o tempo entre o aceite da submissão (202)
+e o resultado corrigido. O cliente HTTP é o mesmo esquema de
+``benchmark_read_endpoints`` (asyncio puro, uma conexão por requisição),
+limitado a ``max_connections`` conexões simultâneas.
+"""
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+THROTTLED = (429, 503)
+
+
+@dataclass
+class StudentPlan:
+    student_id: int
+    arrive_at: float
+    autosave_at: list
+    submit_at: float
+    answers: dict
+    in_burst: bool
+
+
+def build_plans(student_ids, questions, ramp, duration, burst_fraction, burst_window, autosaves, seed):
+    """Agenda de cada estudante; ``questions`` é ``[(question_id, número de alternativas)]``."""
+    rng = random.Random(seed)
+    burst_start = max(0.0, duration - burst_window)
+    plans = []
+    for student_id in student_ids:
+        arrive_at = rng.uniform(0, min(ramp, duration))
+        in_burst = rng.random() < burst_fraction
+        if in_burst or arrive_at >= burst_start:
+            submit_at = rng.uniform(max(arrive_at, burst_start), duration)
+        else:
+            submit_at = rng.uniform(arrive_at, burst_start)
+        answers = {question_id: rng.randint(1, options) for question_id, options in questions}
+        autosave_at = sorted(rng.uniform(arrive_at, submit_at) for _ in range(autosaves))
+        plans.append(StudentPlan(student_id, arrive_at, autosave_at, submit_at, answers, in_burst))
+    return plans
+
+
+@dataclass
+class Recorder:
+    latencies: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    throttled: dict = field(default_factory=dict)
+    grading_times: list = field(default_factory=list)
+    grading_timeouts: int = 0
+    grading_failures: int = 0
+
+    def record(self, step, status, elapsed):
+        self.latencies.setdefault(step, []).append(elapsed)
+        self.errors.setdefault(step, 0)
+        self.throttled.setdefault(step, 0)
+        if status in THROTTLED:
+            self.throttled[step] += 1
+        elif status is None or status >= 400:
+            self.errors[step] += 1
+
+    def report(self, elapsed, students):
+        steps = {}
+        for step, latencies in self.latencies.items():
+            steps[step] = {
+                'requests': len(latencies),
+                'errors': self.errors[step],
+                'error_rate': round(self.errors[step] / len(latencies), 4),
+                'throttled': self.throttled[step],
+                **percentiles(latencies, scale=1000, suffix='ms'),
+            }
+        return {
+            'students': students,
+            'seconds': round(elapsed, 2),
+            'requests_per_second': round(sum(map(len, self.latencies.values())) / elapsed, 1) if elapsed else 0.0,
+            'steps': steps,
+            'grading': {
+                'graded': len(self.grading_times),
+                'timeouts': self.grading_timeouts,
+                'failures': self.grading_failures,
+                **percentiles(self.grading_times, scale=1, suffix='s'),
+            },
+        }
+
+
+def percentiles(values, scale, suffix):
+    values = sorted(values)
+    result = {}
+    for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99), ('max', 1.0)):
+        value = values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+        result[f'{name}_{suffix}'] = round(value * scale, 3) if value is not None else None
+    return result
+
+
+class ExamSittingSimulation:
+    def __init__(self, base_url, exam_id, plans, poll_interval=1.0, grading_timeout=120.0,
+                 max_connections=500, request_timeout=30.0):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.exam_id = exam_id
+        self.plans = plans
+        self.poll_interval = poll_interval
+        self.grading_timeout = grading_timeout
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.recorder = Recorder()
+
+    def run(self):
+        return asyncio.run(self._run())
+
+    async def _run(self):
+        self.connections = asyncio.Semaphore(self.max_connections)
+        self.started = time.perf_counter()
+        await asyncio.gather(*(self._student(plan) for plan in self.plans))
+        return self.recorder.report(time.perf_counter() - self.started, len(self.plans))
+
+    async def _sleep_until(self, offset):
+        delay = self.started + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _student(self, plan):
+        exam = f'/api/exam/exams/{self.exam_id}/'
+        await self._sleep_until(plan.arrive_at)
+        await self._call('exam-detail', 'GET', exam)
+
+        pending = list(plan.answers.items())
+        per_save = -(-len(pending) // (len(plan.autosave_at) + 1)) if pending else 0
+        for at in plan.autosave_at:
+            chunk, pending = pending[:per_save], pending[per_save:]
+            if not chunk:
+                break
+            await self._sleep_until(at)
+            await self._call('autosave', 'PUT', f'{exam}draft/', {
+                'student_id': plan.student_id,
+                'answers': [{'question_id': question_id, 'selected_option': option} for question_id, option in chunk],
+            })
+
+        await self._sleep_until(plan.submit_at)
+        payload = {
+            'student_id': plan.student_id,
+            'exam_id': self.exam_id,
+            'use_draft': True,
+            'answers': [{'question_id': question_id, 'selected_option': option} for question_id, option in pending],
+        }
+        while True:
+            status, headers, body = await self._call('submit', 'POST', '/api/exam/submissions/', payload)
+            if status not in THROTTLED:
+                break
+            await asyncio.sleep(float(headers.get('retry-after', 1)) * random.uniform(1.0, 1.5))
+        if status != 202:
+            return
+        accepted = time.perf_counter()
+        task_id = json.loads(body)['task_id']
+
+        while time.perf_counter() - accepted < self.grading_timeout:
+            await asyncio.sleep(self.poll_interval)
+            status, headers, body = await self._call(
+                'status', 'GET', f'/api/exam/submissions/status/?task_id={task_id}'
+            )
+            if status == 200:
+                self.recorder.grading_times.append(time.perf_counter() - accepted)
+                break
+            if status == 500:
+                self.recorder.grading_failures += 1
+                return
+        else:
+            self.recorder.grading_timeouts += 1
+            return
+
+        await self._call('results', 'GET', f'/api/exam/submissions/student/{plan.student_id}/exam/{self.exam_id}/')
+
+    async def _call(self, step, method, path, payload=None):
+        started = time.perf_counter()
+        try:
+            async with self.connections:
+                status, headers, body = await asyncio.wait_for(
+                    self._request(method, path, payload), self.request_timeout
+                )
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            status, headers, body = None, {}, b''
+        self.recorder.record(step, status, time.perf_counter() - started)
+        return status, headers, body
+
+    async def _request(self, method, path, payload):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            body = json.dumps(payload).encode() if payload is not None else b''
+            head = (
+                f'{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept: application/json\r\n'
+                f'Connection: close\r\n'
+            )
+            if payload is not None:
+                head += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+            writer.write(head.encode() + b'\r\n' + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, content = response.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = dict(
+            (name.strip().lower(), value.strip()) for name, _, value in (line.partition(':') for line in lines[1:])
+        )
+        return int(lines[0].split()[1]), headers, content
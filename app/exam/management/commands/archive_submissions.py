@@ -0,0 +1,66 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+
+from exam.archive import archive_exam, eligible_submissions
+
+
+class Command(BaseCommand):
+    """
+    Command that moves old submissions to cold storage: their answers go to
+    compressed archive files (one or more per exam, see ``exam.archive``) and
+    only a small index row is kept in ``ExamSubmission``.
+
+    Each archive file is committed on its own, so the command can be
+    interrupted and run again: archived submissions are skipped.
+
+    You can call it by terminal like this:
+    -> "python manage.py archive_submissions"
+    -> "python manage.py archive_submissions --before 2024-01-01 --exam 3 --batch-size 2000"
+    """
+
+    help = 'Archive submissions older than a cutoff into compressed files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Cutoff date (YYYY-MM-DD); default: SUBMISSION_ARCHIVE_AFTER_DAYS ago.')
+        parser.add_argument('--exam', type=int, help='Only archive submissions of this exam.')
+        parser.add_argument('--batch-size', type=int, default=settings.SUBMISSION_ARCHIVE_BATCH_SIZE,
+                            help='Submissions per archive file.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many submissions would move.')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                day = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--before must be a date in the YYYY-MM-DD format')
+            cutoff = timezone.make_aware(datetime.combine(day, time.min))
+        else:
+            cutoff = timezone.now() - timedelta(days=settings.SUBMISSION_ARCHIVE_AFTER_DAYS)
+
+        submissions = eligible_submissions(cutoff, options['exam'])
+        if options['dry_run']:
+            self.stdout.write(f'{submissions.count()} submissions would be archived (before {cutoff:%Y-%m-%d}).')
+            return
+
+        exam_ids = submissions.order_by('exam_id').values_list('exam_id', flat=True).distinct()
+        archived = files = size = skipped = 0
+        for exam_id in list(exam_ids):
+            for archive, skipped_ids in archive_exam(exam_id, cutoff, options['batch_size']):
+                if skipped_ids:
+                    skipped += len(skipped_ids)
+                    self.stderr.write(
+                        f'Exam {exam_id}: submissions {skipped_ids} skipped (packed with an unknown question order).'
+                    )
+                if archive is None:
+                    continue
+                archived += archive.submissions_count
+                files += 1
+                size += archive.size_bytes
+                self.stdout.write(f'Exam {exam_id}: {archive.submissions_count} submissions -> {archive.file_name}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{archived} submissions archived in {files} files ({size} bytes), {skipped} skipped.'
+        ))
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management import BaseCommand, CommandError
+
+# Sync path (WSGI) and its async twin (ASGI) for each benchmarked read endpoint.
+ENDPOINTS = {
+    'exams': ('/api/exam/exams/', '/api/exam/async/exams/'),
+    'exam-detail': ('/api/exam/exams/{exam}/', '/api/exam/async/exams/{exam}/'),
+    'statistics': ('/api/exam/exams/{exam}/statistics/', '/api/exam/async/exams/{exam}/statistics/'),
+    'submission': ('/api/exam/submissions/{submission}/', '/api/exam/async/submissions/{submission}/'),
+}
+
+
+async def _request(host, port, path, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: application/json\r\n'
+            f'Connection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def _run(base_url, path, clients, total, timeout):
+    """Dispara ``total`` requisições mantendo ``clients`` conexões simultâneas."""
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    latencies, errors = [], 0
+    pending = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            try:
+                code = await _request(host, port, path, timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                code = None
+            if code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return _summary(latencies, errors, elapsed)
+
+
+def _summary(latencies, errors, elapsed):
+    latencies.sort()
+
+    def percentile(value):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * value))] * 1000, 1)
+
+    return {
+        'ok': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Command that compares concurrent-request throughput of the sync (WSGI)
+    read endpoints against their async (ASGI) twins under ``/api/exam/async/``.
+
+    Both servers must already be running against the same database, e.g.:
+    -> "gunicorn medway_api.wsgi -w 4 --threads 8 -b :8000"
+    -> "uvicorn medway_api.asgi:application --workers 4 --port 8001"
+
+    You can call it by terminal like this:
+    -> "python manage.py benchmark_read_endpoints --exam 1 --clients 500"
+    -> "python manage.py benchmark_read_endpoints --endpoint statistics --exam 1 --json"
+    """
+
+    help = 'Benchmark the WSGI read endpoints against their ASGI versions with many concurrent clients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://localhost:8000', help='Base URL of the WSGI server.')
+        parser.add_argument('--asgi-url', default='http://localhost:8001', help='Base URL of the ASGI server.')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append',
+                            help='Endpoint to benchmark (repeatable). Defaults to all.')
+        parser.add_argument('--exam', type=int, default=1, help='Exam id used in the exam URLs.')
+        parser.add_argument('--submission', type=int, default=1, help='Submission id used in the submission URL.')
+        parser.add_argument('--clients', type=int, default=500, help='Concurrent clients (open connections).')
+        parser.add_argument('--requests', type=int, default=5000, help='Total requests per endpoint and server.')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report instead of a table.')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['requests'] < 1:
+            raise CommandError('--clients and --requests must be positive.')
+        report = {}
+        for name in options['endpoint'] or sorted(ENDPOINTS):
+            report[name] = {}
+            for server, template in zip(('wsgi', 'asgi'), ENDPOINTS[name]):
+                path = template.format(exam=options['exam'], submission=options['submission'])
+                report[name][server] = asyncio.run(_run(
+                    options[f'{server}_url'], path, options['clients'], options['requests'], options['timeout']
+                ))
+                if not options['json']:
+                    self._write_row(name, server, report[name][server])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def _write_row(self, name, server, result):
+        self.stdout.write(
+            f"{name:<12} {server:<5} {result['requests_per_second']:>9} req/s  "
+            f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+            f"({result['ok']} ok, {result['errors']} errors)"
+        )
@@ -0,0 +1,85 @@
+import json
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from exam.dataset import AccuracyDistribution, DatasetGenerator
+
+
+class Command(BaseCommand):
+    """
+    Command that fills the database with synthetic students, a question bank,
+    exams and graded submissions for load tests and benchmarks. The same
+    ``--seed`` always generates the same data. See ``exam.dataset``.
+
+    You can call it by terminal like this:
+    -> "python manage.py generate_dataset --students 1000 --exams 10 --submissions 5000"
+    -> "python manage.py generate_dataset --students 100000 --exams 100 --questions 5000
+        --questions-per-exam 100 --submissions 100000 --storage packed --seed 7"
+    """
+
+    help = 'Generate a reproducible synthetic dataset (students, questions, exams and submissions).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--exams', type=int, default=10)
+        parser.add_argument('--questions', type=int, default=500, help='Size of the question bank.')
+        parser.add_argument('--questions-per-exam', type=int, default=50)
+        parser.add_argument('--submissions', type=int, default=5000,
+                            help='Total submissions, spread evenly across the exams.')
+        parser.add_argument('--accuracy', default='beta:6,3',
+                            help='Per-submission accuracy distribution: beta:A,B, normal:MEAN,SD, '
+                                 'uniform:MIN,MAX or fixed:P.')
+        parser.add_argument('--alternatives', default='4,5',
+                            help='Possible alternative counts per question, chosen uniformly.')
+        parser.add_argument('--storage', choices=['rows', 'packed'],
+                            help='Answer storage (defaults to SUBMISSION_ANSWER_STORAGE).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='synthetic', help='Prefix of usernames, emails and names.')
+        parser.add_argument('--password', default='senha123', help='Password shared by the generated students.')
+        parser.add_argument('--days', type=int, default=30, help='Spread submitted_at over the last DAYS days.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per bulk insert.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            accuracy = AccuracyDistribution.parse(options['accuracy'])
+            alternatives = tuple(int(value) for value in options['alternatives'].split(','))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not alternatives or any(not 2 <= count <= 5 for count in alternatives):
+            raise CommandError('--alternatives must be between 2 and 5 (options A-E).')
+        if min(options['students'], options['exams'], options['questions_per_exam'], options['batch_size']) < 1:
+            raise CommandError('--students, --exams, --questions-per-exam and --batch-size must be positive.')
+
+        try:
+            generator = DatasetGenerator(
+                students=options['students'],
+                exams=options['exams'],
+                questions=options['questions'],
+                questions_per_exam=options['questions_per_exam'],
+                submissions=options['submissions'],
+                accuracy=accuracy,
+                alternatives=alternatives,
+                storage=options['storage'] or settings.SUBMISSION_ANSWER_STORAGE,
+                seed=options['seed'],
+                prefix=options['prefix'],
+                password=options['password'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+                progress=None if options['json'] else self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        report = generator.run()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        total = sum(report['timings_s'].values())
+        rate = round(report['answers'] / total) if total else report['answers']
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['students']} students, {report['questions']} questions, {report['exams']} exams, "
+            f"{report['submissions']} submissions, {report['answers']} answers ({report['storage']}) "
+            f"in {total:.1f}s ({rate} answers/s)."
+        ))
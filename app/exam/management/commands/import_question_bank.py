@@ -0,0 +1,86 @@
+from django.core.management import BaseCommand, CommandError
+
+from exam.importer import (
+    FORMATS,
+    ImportValidationError,
+    QuestionBankImporter,
+    detect_format,
+    file_checksum,
+    iter_records,
+    start_import,
+)
+from exam.models import QuestionBankImport
+
+
+class Command(BaseCommand):
+    """
+    Command that bulk imports questions, alternatives and exams from a
+    JSON Lines, JSON or CSV file.
+
+    You can call it by terminal like this:
+    -> "python manage.py import_question_bank banco.jsonl --chunk-size 2000"
+    -> "python manage.py import_question_bank banco.jsonl --resume"
+    """
+
+    help = 'Bulk import of the question bank (streaming, chunked bulk_create, resumable).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--resume', action='store_true', help='Resume the last unfinished import of this file.')
+        parser.add_argument('--skip-invalid', action='store_true', help='Skip invalid records instead of aborting.')
+        parser.add_argument('--force', action='store_true', help='Import again a file that was already imported.')
+        parser.add_argument('--allow-duplicates', action='store_true',
+                            help='Create questions even when an equivalent one (same content_hash) exists.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or detect_format(path)
+            stream = open(path, 'rb')
+        except (ImportValidationError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        with stream:
+            checksum = file_checksum(stream)
+            imports = QuestionBankImport.objects.filter(source_checksum=checksum)
+            already_imported = imports.filter(status=QuestionBankImport.Status.COMPLETED).exists()
+            resumable = options['resume'] and imports.exclude(status=QuestionBankImport.Status.COMPLETED).exists()
+            if already_imported and not (options['force'] or resumable):
+                raise CommandError(f'{path} was already imported (use --force to import it again).')
+
+            job = start_import(path, checksum, resume=options['resume'])
+            if job.records_processed:
+                self.stdout.write(f'Resuming import #{job.id} after {job.records_processed} records...')
+
+            importer = QuestionBankImporter(
+                job,
+                chunk_size=options['chunk_size'],
+                skip_invalid=options['skip_invalid'],
+                progress=self._progress,
+                dedupe=not options['allow_duplicates'],
+            )
+            try:
+                report = importer.run(iter_records(stream, fmt))
+            except ImportValidationError as exc:
+                raise CommandError(
+                    f'{exc}. Import #{job.id} stopped after {job.records_processed} records; '
+                    f'fix the file or rerun with --skip-invalid.'
+                )
+
+        for error in report['errors']:
+            self.stderr.write(f"Skipped record {error['record']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import #{report['import_id']} finished: {report['questions_created']} questions "
+            f"({report['questions_reused']} duplicates reused), "
+            f"{report['alternatives_created']} alternatives, {report['exams_created']} exams, "
+            f"{report['records_skipped']} skipped in {report['elapsed_seconds']}s "
+            f"({report['records_per_second']} records/s)."
+        ))
+
+    def _progress(self, report):
+        self.stdout.write(
+            f"{report['records_processed']} records processed "
+            f"({report['records_per_second']} records/s)"
+        )
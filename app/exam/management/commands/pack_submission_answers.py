@@ -0,0 +1,78 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from exam.models import ExamSubmission, SubmissionAnswer
+from exam.packing import exam_question_order, pack_submission
+
+
+class Command(BaseCommand):
+    """
+    Command that converts existing SubmissionAnswer rows into the compact
+    ``ExamSubmission.packed_answers`` array (see ``exam.packing``).
+
+    Each batch is converted in its own transaction, so the command can be
+    interrupted and run again: already packed submissions are skipped.
+
+    You can call it by terminal like this:
+    -> "python manage.py pack_submission_answers"
+    -> "python manage.py pack_submission_answers --exam 3 --batch-size 1000 --keep-rows"
+    """
+
+    help = 'Convert SubmissionAnswer rows into packed answer arrays.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Only convert submissions of this exam.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Submissions per transaction.')
+        parser.add_argument('--keep-rows', action='store_true', help='Do not delete the SubmissionAnswer rows.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many submissions would change.')
+
+    def handle(self, *args, **options):
+        submissions = (
+            ExamSubmission.objects.active()
+            .filter(packed_answers__isnull=True, archive__isnull=True)
+            .order_by('id')
+        )
+        if options['exam']:
+            submissions = submissions.filter(exam_id=options['exam'])
+        if options['dry_run']:
+            self.stdout.write(f'{submissions.count()} submissions would be packed.')
+            return
+
+        orders = {}
+        converted = skipped = rows_deleted = 0
+        last_id = 0
+        while True:
+            batch = list(submissions.filter(id__gt=last_id).only('id', 'exam_id')[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            answers = {}
+            for submission_id, question_id, option in SubmissionAnswer.objects.filter(
+                submission_id__in=[submission.id for submission in batch]
+            ).values_list('submission_id', 'question_id', 'selected_alternative_option'):
+                answers.setdefault(submission_id, {})[question_id] = option
+
+            packed = []
+            for submission in batch:
+                if submission.exam_id not in orders:
+                    orders[submission.exam_id] = exam_question_order(submission.exam_id)
+                try:
+                    pack_submission(submission, orders[submission.exam_id], answers.get(submission.id, {}))
+                except ValueError as exc:
+                    skipped += 1
+                    self.stderr.write(f'Submission {submission.id} skipped: {exc}')
+                    continue
+                packed.append(submission)
+
+            with transaction.atomic():
+                ExamSubmission.objects.bulk_update(packed, ['packed_answers', 'packed_layout'])
+                if not options['keep_rows']:
+                    rows_deleted += SubmissionAnswer.objects.filter(
+                        submission_id__in=[submission.id for submission in packed]
+                    ).delete()[0]
+            converted += len(packed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{converted} submissions packed, {skipped} skipped, {rows_deleted} answer rows deleted.'
+        ))
@@ -0,0 +1,124 @@
+import json
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+
+from exam.loadtest import ExamSittingSimulation, build_plans
+from exam.models import Exam
+from exam.structure import get_exam_structure
+from student.models import Student
+
+
+class Command(BaseCommand):
+    """
+    Command that simulates students sitting an exam against a running server:
+    open the exam, autosave, submit (with a closing-time burst), poll the
+    grading status and read the result. See ``exam.loadtest``.
+
+    The server and this command must use the same database (student and
+    question ids are read from it). Without Redis, start the server with the
+    in-process Celery stand-in:
+    -> "CELERY_TASK_ALWAYS_EAGER=1 python manage.py runserver --noreload"
+
+    You can call it by terminal like this:
+    -> "python manage.py simulate_exam_sitting --exam 3 --students 2000 --create-students"
+    -> "python manage.py simulate_exam_sitting --exam 3 --students 500 --ramp 30 --duration 120 --json"
+    """
+
+    help = 'Load test: simulate many students sitting an exam against a running server.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the server.')
+        parser.add_argument('--exam', type=int, required=True)
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--create-students', action='store_true',
+                            help='Create students when there are not enough without a submission for the exam.')
+        parser.add_argument('--ramp', type=float, default=60.0, help='Seconds over which students arrive.')
+        parser.add_argument('--duration', type=float, default=300.0, help='Seconds until the exam closes.')
+        parser.add_argument('--burst-fraction', type=float, default=0.5,
+                            help='Fraction of students that submit in the closing burst.')
+        parser.add_argument('--burst-window', type=float, default=15.0,
+                            help='Length in seconds of the closing burst.')
+        parser.add_argument('--autosaves', type=int, default=3, help='Autosaves per student before submitting.')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--grading-timeout', type=float, default=120.0)
+        parser.add_argument('--max-connections', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', action='store_true', help='Print a JSON report instead of a table.')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['duration'] <= 0 or options['max_connections'] < 1:
+            raise CommandError('--students, --duration and --max-connections must be positive.')
+        if not 0 <= options['burst_fraction'] <= 1:
+            raise CommandError('--burst-fraction must be between 0 and 1.')
+        try:
+            structure = get_exam_structure(options['exam'])
+        except Exam.DoesNotExist:
+            raise CommandError(f"Exam {options['exam']} not found.")
+        if not structure.questions:
+            raise CommandError(f"Exam {options['exam']} has no questions.")
+
+        student_ids = self._students(options['exam'], options['students'], options['create_students'])
+        plans = build_plans(
+            student_ids,
+            [(question.id, len(question.alternatives) or 1) for question in structure.questions],
+            ramp=options['ramp'],
+            duration=options['duration'],
+            burst_fraction=options['burst_fraction'],
+            burst_window=options['burst_window'],
+            autosaves=options['autosaves'],
+            seed=options['seed'],
+        )
+        if not options['json']:
+            self.stdout.write(
+                f"{len(plans)} students, exam {options['exam']} ({len(structure.questions)} questions), "
+                f"{sum(plan.in_burst for plan in plans)} in the closing burst..."
+            )
+        report = ExamSittingSimulation(
+            options['url'], options['exam'], plans,
+            poll_interval=options['poll_interval'],
+            grading_timeout=options['grading_timeout'],
+            max_connections=options['max_connections'],
+        ).run()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for step, result in report['steps'].items():
+            self.stdout.write(
+                f"{step:<12} {result['requests']:>7} req  {result['error_rate']:>7.2%} errors  "
+                f"{result['throttled']:>5} throttled  p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  "
+                f"p99 {result['p99_ms']} ms"
+            )
+        grading = report['grading']
+        self.stdout.write(
+            f"graded       {grading['graded']:>7}      {grading['timeouts']} timeouts, {grading['failures']} failures  "
+            f"submission -> result p50 {grading['p50_s']} s  p95 {grading['p95_s']} s  p99 {grading['p99_s']} s  "
+            f"max {grading['max_s']} s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['seconds']}s, {report['requests_per_second']} req/s overall."
+        ))
+
+    def _students(self, exam_id, count, create):
+        """Students that have not submitted the exam yet (the load test submits once per student)."""
+        ids = list(
+            Student.objects.exclude(examsubmission__exam_id=exam_id)
+            .filter(is_staff=False).order_by('pk').values_list('pk', flat=True)[:count]
+        )
+        missing = count - len(ids)
+        if missing and not create:
+            raise CommandError(
+                f'Only {len(ids)} students without a submission for exam {exam_id}; '
+                f'use --create-students or generate_dataset.'
+            )
+        if missing:
+            password = make_password('senha123', salt='loadtest')
+            tags = [f'loadtest-{uuid.uuid4().hex[:12]}' for _ in range(missing)]
+            created = Student.objects.bulk_create([
+                Student(username=tag, email=f'{tag}@example.com', name=f'Load test {tag[9:]}', password=password)
+                for tag in tags
+            ], batch_size=5000)
+            ids.extend(student.pk for student in created)
+        return ids
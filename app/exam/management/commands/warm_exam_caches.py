@@ -0,0 +1,41 @@
+from django.core.management import BaseCommand, CommandError
+
+from exam.models import Exam
+from exam.warming import upcoming_exams, warm_exam
+
+
+class Command(BaseCommand):
+    """
+    Command that warms the shared caches of exams before they open: exam
+    structure (answer key and validation context included) and the rendered
+    ``GET /exams/<pk>/`` payload. See ``exam.warming``.
+
+    You can call it by terminal like this:
+    -> "python manage.py warm_exam_caches 3 7"
+    -> "python manage.py warm_exam_caches --starting-within 30"
+    """
+
+    help = 'Precompute the caches of the given exams, or of exams starting soon.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int)
+        parser.add_argument('--starting-within', type=int, metavar='MINUTES',
+                            help='Warm exams whose starts_at is within the next MINUTES minutes.')
+        parser.add_argument('--force', action='store_true', help='Recompute even entries already cached.')
+
+    def handle(self, *args, **options):
+        if options['exam_ids']:
+            exams = list(Exam.objects.filter(pk__in=options['exam_ids']).order_by('pk'))
+            missing = set(options['exam_ids']) - {exam.pk for exam in exams}
+            if missing:
+                raise CommandError(f'Exams not found: {sorted(missing)}')
+        elif options['starting_within'] is not None:
+            exams = list(upcoming_exams(options['starting_within']))
+        else:
+            raise CommandError('Give exam ids or --starting-within MINUTES.')
+
+        for exam in exams:
+            status = warm_exam(exam, force=options['force'])
+            timings = ', '.join(f'{step} {ms} ms' for step, ms in status['timings_ms'].items())
+            self.stdout.write(f"Exam {exam.pk} ({status['questions']} questions): {timings}")
+        self.stdout.write(self.style.SUCCESS(f'{len(exams)} exams warmed.'))
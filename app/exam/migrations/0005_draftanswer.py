@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0004_examquestion_unique_exam_question'),
+        ('question', '0004_alter_alternative_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DraftAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected_alternative_option', models.IntegerField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exam.exam')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='question.question')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('student', 'exam', 'question')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0005_draftanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionBankImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=255)),
+                ('source_checksum', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('RUNNING', 'Em andamento'), ('COMPLETED', 'Concluída'), ('FAILED', 'Falhou')], default='RUNNING', max_length=10)),
+                ('records_processed', models.PositiveIntegerField(default=0)),
+                ('questions_created', models.PositiveIntegerField(default=0)),
+                ('exams_created', models.PositiveIntegerField(default=0)),
+                ('records_skipped', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
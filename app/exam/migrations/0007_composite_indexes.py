@@ -0,0 +1,64 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_graded_score(apps, schema_editor):
+    """Store the score of existing submissions (same rule as ``ExamSubmission.compute_score``)."""
+    ExamSubmission = apps.get_model('exam', 'ExamSubmission')
+    SubmissionAnswer = apps.get_model('exam', 'SubmissionAnswer')
+    Alternative = apps.get_model('question', 'Alternative')
+
+    correct_options = {}
+    for question_id, option in Alternative.objects.filter(is_correct=True).values_list('question_id', 'option'):
+        correct_options.setdefault(question_id, []).append(option)
+
+    batch = []
+    for submission in ExamSubmission.objects.filter(graded_score__isnull=True).only('id').iterator(chunk_size=500):
+        answers = list(
+            SubmissionAnswer.objects.filter(submission_id=submission.id)
+            .values_list('question_id', 'selected_alternative_option')
+        )
+        correct = sum(1 for question_id, option in answers if correct_options.get(question_id) == [option])
+        submission.graded_score = round(correct / len(answers) * 100, 2) if answers else 0
+        batch.append(submission)
+        if len(batch) >= 500:
+            ExamSubmission.objects.bulk_update(batch, ['graded_score'])
+            batch = []
+    if batch:
+        ExamSubmission.objects.bulk_update(batch, ['graded_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0006_questionbankimport'),
+        ('question', '0005_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsubmission',
+            name='graded_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='examsubmission',
+            index=models.Index(fields=['exam', 'graded_score'], name='exam_sub_exam_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examsubmission',
+            index=models.Index(fields=['student', '-submitted_at'], name='exam_sub_student_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examsubmission',
+            index=models.Index(fields=['exam', '-submitted_at'], name='exam_sub_exam_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submissionanswer',
+            index=models.Index(fields=['question', 'selected_alternative_option', 'submission'], name='sub_answer_question_option_idx'),
+        ),
+        migrations.RunPython(backfill_graded_score, migrations.RunPython.noop),
+    ]
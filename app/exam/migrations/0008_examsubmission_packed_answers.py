@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0007_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsubmission',
+            name='packed_answers',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
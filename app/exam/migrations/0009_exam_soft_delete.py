@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0008_examsubmission_packed_answers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_id', models.PositiveIntegerField(db_index=True)),
+                ('exam_name', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendente'), ('RUNNING', 'Em andamento'), ('COMPLETED', 'Concluída'), ('FAILED', 'Falhou')], default='PENDING', max_length=10)),
+                ('answers_deleted', models.PositiveBigIntegerField(default=0)),
+                ('submissions_deleted', models.PositiveIntegerField(default=0)),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
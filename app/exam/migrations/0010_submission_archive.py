@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0009_exam_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True)),
+                ('cutoff', models.DateTimeField()),
+                ('submissions_count', models.PositiveIntegerField()),
+                ('answer_counts', models.JSONField(default=dict)),
+                ('score_sum', models.FloatField(default=0)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0)),
+                ('checksum', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archives', to='exam.exam')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='examsubmission',
+            name='archive',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='exam.submissionarchive'),
+        ),
+    ]
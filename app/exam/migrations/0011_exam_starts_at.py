@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0010_submission_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-19 06:01
+
+from django.db import migrations, models
+
+from exam.packing import layout_digest
+
+
+def backfill_packed_layout(apps, schema_editor):
+    """Existing arrays were written in the current question order of their exam (when the sizes match)."""
+    ExamSubmission = apps.get_model('exam', 'ExamSubmission')
+    ExamQuestion = apps.get_model('exam', 'ExamQuestion')
+
+    packed = ExamSubmission.objects.filter(packed_answers__isnull=False)
+    for exam_id in packed.values_list('exam_id', flat=True).distinct():
+        order = list(
+            ExamQuestion.objects.filter(exam_id=exam_id).order_by('number').values_list('question_id', flat=True)
+        )
+        batch = []
+        for submission in packed.filter(exam_id=exam_id).only('id', 'packed_answers').iterator(chunk_size=500):
+            if len(submission.packed_answers) == len(order):
+                submission.packed_layout = layout_digest(order)
+                batch.append(submission)
+        ExamSubmission.objects.bulk_update(batch, ['packed_layout'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0011_exam_starts_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsubmission',
+            name='packed_layout',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16),
+        ),
+        migrations.RunPython(backfill_packed_layout, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-19 06:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+from exam.packing import layout_digest
+
+
+def backfill_layouts(apps, schema_editor):
+    """Store the order behind the digests set by 0012 (the exam's order at that time)."""
+    ExamSubmission = apps.get_model('exam', 'ExamSubmission')
+    ExamQuestion = apps.get_model('exam', 'ExamQuestion')
+    PackedLayout = apps.get_model('exam', 'PackedLayout')
+
+    pairs = (
+        ExamSubmission.objects.filter(packed_answers__isnull=False).exclude(packed_layout='')
+        .values_list('exam_id', 'packed_layout').distinct()
+    )
+    layouts = {}
+    for exam_id, digest in pairs:
+        order = list(
+            ExamQuestion.objects.filter(exam_id=exam_id).order_by('number').values_list('question_id', flat=True)
+        )
+        if layout_digest(order) == digest:
+            layouts[digest] = PackedLayout(digest=digest, question_order=order)
+    PackedLayout.objects.bulk_create(layouts.values(), ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0012_examsubmission_packed_layout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackedLayout',
+            fields=[
+                ('digest', models.CharField(max_length=16, primary_key=True, serialize=False)),
+                ('question_order', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(backfill_layouts, migrations.RunPython.noop),
+    ]
@@ -5,13 +5,48 @@ from question.models import Question
 from student.models import Student
 
 
+class ActiveExamManager(models.Manager):
+    """Default manager: hides exams already soft-deleted (``Exam.soft_delete``)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class ExamSubmissionQuerySet(models.QuerySet):
+    def active(self):
+        """Submissions of exams that are not soft-deleted.
+
+        Not applied by default: the filter joins ``exam_exam``, which writes,
+        tasks and lookups by an already validated exam don't need. Read views
+        that reach submissions by id or by student call it explicitly.
+        """
+        return self.filter(exam__deleted_at__isnull=True)
+
+
 class Exam(models.Model):
     name = models.CharField(max_length=100)
     questions = models.ManyToManyField(Question, through='ExamQuestion', related_name='questions')
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Scheduled opening; the caches of exams about to start are warmed ahead
+    # of time (see ``exam.warming``).
+    starts_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ActiveExamManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
 
+    def soft_delete(self):
+        """Hide the exam (and, through ``ExamSubmission.objects.active()``,
+        its submissions) right away.
+
+        The rows themselves are removed in bounded chunks by the
+        ``purge_deleted_exam`` task, see ``exam.purge``.
+        """
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
 
 class ExamQuestion(models.Model):
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
@@ -33,9 +68,31 @@ class ExamSubmission(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
     submitted_at = models.DateTimeField(default=timezone.now)
+    # Stored by ``grade()`` when the submission is processed, so score filters
+    # and aggregates (ranking, averages) run in the database.
+    graded_score = models.FloatField(null=True, blank=True)
+    # Compact mode (``SUBMISSION_ANSWER_STORAGE = 'packed'``): one byte per
+    # exam question, in ``ExamQuestion.number`` order, instead of
+    # ``SubmissionAnswer`` rows. ``packed_layout`` is the digest of the
+    # question order the array was written in (a ``PackedLayout``). See
+    # ``exam.packing``.
+    packed_answers = models.BinaryField(null=True, blank=True, editable=False)
+    packed_layout = models.CharField(max_length=16, blank=True, default='', editable=False)
+    # Cold storage: once archived the answers live only in the archive file
+    # and this row is kept as the index entry. See ``exam.archive``.
+    archive = models.ForeignKey(
+        'SubmissionArchive', null=True, blank=True, on_delete=models.PROTECT, related_name='submissions'
+    )
+
+    objects = ExamSubmissionQuerySet.as_manager()
     
     class Meta:
         unique_together = ('student', 'exam')
+        indexes = [
+            models.Index(fields=['exam', 'graded_score'], name='exam_sub_exam_score_idx'),
+            models.Index(fields=['student', '-submitted_at'], name='exam_sub_student_recent_idx'),
+            models.Index(fields=['exam', '-submitted_at'], name='exam_sub_exam_recent_idx'),
+        ]
     
     def __str__(self):
         return f'{self.student.name} - {self.exam.name}'
@@ -43,17 +100,63 @@ class ExamSubmission(models.Model):
     @property
     def score(self):
         """Calculate the score percentage for this submission"""
-        total_questions = self.answers.count()
-        if total_questions == 0:
-            return 0
-        
-        correct_answers = sum(1 for answer in self.answers.all() if answer.is_correct)
-        return round((correct_answers / total_questions) * 100, 2)
-    
+        if self.graded_score is not None:
+            return self.graded_score
+        return self.compute_score()
+
     @property 
     def correct_answers_count(self):
         """Count of correct answers"""
-        return sum(1 for answer in self.answers.all() if answer.is_correct)
+        return self.grading_counts()[0]
+
+    def get_answer_map(self):
+        """``{question_id: selected option}`` whatever the storage mode.
+
+        Compatibility layer for code that used to read ``answers``: works for
+        ``SubmissionAnswer`` rows (using them if already prefetched), for the
+        compact ``packed_answers`` array and for archived submissions.
+        """
+        if self.archive_id is not None:
+            from .archive import archived_answer_map
+            return archived_answer_map(self)
+        if self.packed_answers is not None:
+            from .packing import packed_order, unpack_answers
+            from .structure import get_exam_structure
+            structure = get_exam_structure(self.exam_id)
+            return unpack_answers(packed_order(structure, self.packed_layout), self.packed_answers)
+        if 'answers' in getattr(self, '_prefetched_objects_cache', {}):
+            return {answer.question_id: answer.selected_alternative_option for answer in self.answers.all()}
+        return dict(self.answers.values_list('question_id', 'selected_alternative_option'))
+
+    def grading_counts(self):
+        """``(correct, answered)`` against the cached answer key (``exam.structure``).
+
+        Same rule as ``SubmissionAnswer.is_correct``: only questions with
+        exactly one correct alternative can be answered correctly.
+        """
+        from .structure import get_exam_structure
+
+        structure = get_exam_structure(self.exam_id)
+        if self.packed_answers is not None and self.packed_layout == structure.layout:
+            from .packing import grade_packed
+            return grade_packed(self.packed_answers, structure.answer_key_bytes)
+        answers = self.get_answer_map()
+        key = structure.answer_key
+        correct_answers = sum(1 for question_id, option in answers.items() if key.get(question_id) == option)
+        return correct_answers, len(answers)
+
+    def compute_score(self):
+        """Score percentage computed from the stored answers."""
+        correct_answers, total_questions = self.grading_counts()
+        if total_questions == 0:
+            return 0
+        return round((correct_answers / total_questions) * 100, 2)
+
+    def grade(self):
+        """Store the current score in ``graded_score``."""
+        self.graded_score = self.compute_score()
+        self.save(update_fields=['graded_score'])
+        return self.graded_score
 
 
 class SubmissionAnswer(models.Model):
@@ -63,6 +166,14 @@ class SubmissionAnswer(models.Model):
     
     class Meta:
         unique_together = ('submission', 'question')
+        indexes = [
+            # Covers the per-question answer counts (statistics) without
+            # touching the table rows.
+            models.Index(
+                fields=['question', 'selected_alternative_option', 'submission'],
+                name='sub_answer_question_option_idx',
+            ),
+        ]
     
     @property
     def is_correct(self):
@@ -75,3 +186,109 @@ class SubmissionAnswer(models.Model):
     
     def __str__(self):
         return f'{self.submission} - Q{self.question.id}: Option {self.selected_alternative_option}'
+
+
+class PackedLayout(models.Model):
+    """Question order of ``ExamSubmission.packed_answers`` arrays, keyed by ``exam.packing.layout_digest``.
+
+    Rows are immutable: arrays written before an exam's questions changed are
+    still decoded with the order they were written in.
+    """
+    digest = models.CharField(max_length=16, primary_key=True)
+    question_order = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.digest} ({len(self.question_order)} questions)'
+
+
+class DraftAnswer(models.Model):
+    """Answer saved by autosave while the exam is still in progress.
+
+    Rows are written in bulk by ``exam.drafts.flush_drafts``; the latest
+    changes live in the shared cache buffer until then.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    selected_alternative_option = models.IntegerField()
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('student', 'exam', 'question')
+
+    def __str__(self):
+        return f'{self.student_id} - {self.exam_id} - Q{self.question_id}: Option {self.selected_alternative_option}'
+
+
+class QuestionBankImport(models.Model):
+    """Checkpoint of a bulk question-bank import, used to resume partial runs.
+
+    ``records_processed`` only advances together with the chunk it describes
+    (same transaction), so a resumed import skips exactly what was committed.
+    """
+
+    class Status(models.TextChoices):
+        RUNNING = 'RUNNING', 'Em andamento'
+        COMPLETED = 'COMPLETED', 'Concluída'
+        FAILED = 'FAILED', 'Falhou'
+
+    source_name = models.CharField(max_length=255)
+    source_checksum = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
+    records_processed = models.PositiveIntegerField(default=0)
+    questions_created = models.PositiveIntegerField(default=0)
+    exams_created = models.PositiveIntegerField(default=0)
+    records_skipped = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.source_name} ({self.status}, {self.records_processed} registros)'
+
+
+class ExamDeletion(models.Model):
+    """Progress of the background purge of a soft-deleted exam.
+
+    ``exam_id`` is a plain integer because the exam row is the last thing
+    removed; the counters advance after every committed chunk.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendente'
+        RUNNING = 'RUNNING', 'Em andamento'
+        COMPLETED = 'COMPLETED', 'Concluída'
+        FAILED = 'FAILED', 'Falhou'
+
+    exam_id = models.PositiveIntegerField(db_index=True)
+    exam_name = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    answers_deleted = models.PositiveBigIntegerField(default=0)
+    submissions_deleted = models.PositiveIntegerField(default=0)
+    requested_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.exam_name} ({self.get_status_display()})'
+
+
+class SubmissionArchive(models.Model):
+    """Compressed file holding the answers of old submissions of one exam.
+
+    Written by ``archive_submissions``; the archived ``ExamSubmission`` rows
+    point here. ``answer_counts`` (``{question_id: {option: count}}``) and
+    ``score_sum`` keep the exam statistics complete without opening the file.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='archives')
+    file_name = models.CharField(max_length=255, unique=True)
+    cutoff = models.DateTimeField()
+    submissions_count = models.PositiveIntegerField()
+    answer_counts = models.JSONField(default=dict)
+    score_sum = models.FloatField(default=0)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.file_name} ({self.submissions_count} submissões)'
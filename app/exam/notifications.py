@@ -0,0 +1,181 @@
+"""
+Canal de notificação de conclusão das submissões.
+
+O worker publica o resultado de ``process_exam_submission`` assim que a task
+termina; os endpoints de streaming (SSE / long-poll) apenas aguardam a
+mensagem, sem consultar o result backend do Celery a cada requisição.
+
+Backends disponíveis (``SUBMISSION_NOTIFY_BACKEND``):
+- ``redis``: ``SETEX`` do último estado + ``PUBLISH`` em um canal por task.
+  Cada processo web mantém uma única assinatura ``PSUBSCRIBE`` e distribui as
+  mensagens para os clientes conectados naquele processo.
+- ``memory``: registro em processo, usado em testes e desenvolvimento com o
+  Celery em modo eager.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'exam:submission-status:'
+
+
+class MemoryBackend:
+    """Guarda o último estado de cada task e acorda os ouvintes locais."""
+
+    max_results = 10000
+
+    def __init__(self, result_ttl):
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._listeners = defaultdict(set)
+
+    def publish(self, task_id, message):
+        with self._lock:
+            self._results[task_id] = (time.monotonic() + self.result_ttl, message)
+            self._results.move_to_end(task_id)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        self._dispatch(task_id, message)
+
+    def get_latest(self, task_id):
+        with self._lock:
+            entry = self._results.get(task_id)
+            if entry is None:
+                return None
+            expires_at, message = entry
+            if expires_at < time.monotonic():
+                del self._results[task_id]
+                return None
+            return message
+
+    def _dispatch(self, task_id, message):
+        with self._lock:
+            listeners = list(self._listeners.get(task_id, ()))
+        for loop, queue in listeners:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    def _ensure_listening(self):
+        """Hook para backends que precisam de uma assinatura externa."""
+
+    async def wait(self, task_id, timeout):
+        """Aguarda a mensagem de conclusão da task por até ``timeout`` segundos.
+
+        O ouvinte é registrado antes de consultar o último estado guardado, de
+        modo que uma publicação concorrente nunca é perdida.
+        """
+        self._ensure_listening()
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._listeners[task_id].add(entry)
+        try:
+            latest = await sync_to_async(self.get_latest, thread_sensitive=False)(task_id)
+            if latest is not None:
+                return latest
+            try:
+                return await asyncio.wait_for(entry[1].get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        finally:
+            with self._lock:
+                listeners = self._listeners.get(task_id)
+                if listeners is not None:
+                    listeners.discard(entry)
+                    if not listeners:
+                        del self._listeners[task_id]
+
+
+class RedisBackend(MemoryBackend):
+    """Publica via Redis e mantém uma única assinatura por processo."""
+
+    def __init__(self, result_ttl, url):
+        super().__init__(result_ttl)
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._listener_thread = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, task_id, message):
+        data = json.dumps(message)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.setex(CHANNEL_PREFIX + task_id, self.result_ttl, data)
+        pipe.publish(CHANNEL_PREFIX + task_id, data)
+        pipe.execute()
+
+    def get_latest(self, task_id):
+        data = self._client.get(CHANNEL_PREFIX + task_id)
+        return json.loads(data) if data else None
+
+    def _ensure_listening(self):
+        if self._listener_thread is not None and self._listener_thread.is_alive():
+            return
+        with self._listener_lock:
+            if self._listener_thread is not None and self._listener_thread.is_alive():
+                return
+            self._listener_thread = threading.Thread(
+                target=self._listen, name='submission-notify-listener', daemon=True
+            )
+            self._listener_thread.start()
+
+    def _listen(self):
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(CHANNEL_PREFIX + '*')
+                for item in pubsub.listen():
+                    if item.get('type') != 'pmessage':
+                        continue
+                    channel = item['channel']
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    self._dispatch(channel[len(CHANNEL_PREFIX):], json.loads(item['data']))
+            except Exception:
+                logger.exception('Assinatura de notificações de submissão caiu; reconectando')
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                ttl = settings.SUBMISSION_NOTIFY_RESULT_TTL
+                if settings.SUBMISSION_NOTIFY_BACKEND == 'redis':
+                    _backend = RedisBackend(ttl, settings.SUBMISSION_NOTIFY_REDIS_URL)
+                else:
+                    _backend = MemoryBackend(ttl)
+    return _backend
+
+
+def publish_submission_status(task_id, message):
+    """Publica o estado final de uma task de submissão.
+
+    ``message`` segue o mesmo formato do campo ``task`` de
+    ``SubmissionStatusAPIView``: ``{'state': ..., 'created': ..., 'submission': ...}``
+    ou ``{'state': 'FAILURE', 'error': ...}``. Falhas de publicação são apenas
+    registradas: o resultado continua disponível no result backend.
+    """
+    try:
+        get_backend().publish(task_id, message)
+    except Exception:
+        logger.exception('Falha ao publicar status da submissão %s', task_id)
+
+
+async def wait_for_submission_status(task_id, timeout):
+    """Retorna a mensagem de conclusão da task ou ``None`` se expirar o tempo."""
+    return await get_backend().wait(task_id, timeout)
@@ -0,0 +1,162 @@
+"""
+Armazenamento compacto das respostas de uma submissão.
+
+No modo ``packed`` (``SUBMISSION_ANSWER_STORAGE``) as respostas ficam em
+``ExamSubmission.packed_answers``: um byte por questão do exame, na ordem de
+``ExamQuestion.number``, com a opção escolhida (1-5) ou 0 quando a questão não
+foi respondida. Uma submissão de 100 questões ocupa 100 bytes em uma única
+linha, em vez de 100 linhas de ``SubmissionAnswer`` e suas entradas de índice.
+
+A leitura usa ``memoryview`` sobre o valor vindo do banco, sem cópias, e o
+restante do código enxerga as respostas pelo mapa ``{question_id: option}`` de
+``ExamSubmission.get_answer_map()``.
+
+As posições só fazem sentido na ordem de questões em que o array foi gravado,
+então cada submissão guarda também ``packed_layout`` (``layout_digest`` dessa
+ordem) e a ordem em si fica, uma vez por digest, em ``PackedLayout``. Se o
+exame ganhar, perder ou renumerar questões depois, os arrays antigos são lidos
+com a própria ordem (``packed_order``) e as respostas continuam associadas às
+mesmas questões, como nas linhas de ``SubmissionAnswer``.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from question.models import Alternative
+
+from .models import ExamQuestion, PackedLayout, SubmissionAnswer
+
+UNANSWERED = 0
+LAYOUT_CACHE_KEY = 'exam:packed-layout:{}'
+
+
+class UnknownPackedLayout(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'As respostas desta submissão foram gravadas em uma ordem de questões desconhecida.'
+    default_code = 'unknown_packed_layout'
+
+
+def layout_digest(question_order):
+    """Identificador curto (16 caracteres hex) da ordem de questões de um array."""
+    return hashlib.blake2b(','.join(map(str, question_order)).encode(), digest_size=8).hexdigest()
+
+
+def exam_question_order(exam_id):
+    """Ids das questões do exame na ordem de ``number`` (posições do array)."""
+    return list(
+        ExamQuestion.objects.filter(exam_id=exam_id).order_by('number').values_list('question_id', flat=True)
+    )
+
+
+def pack_answers(question_order, answers):
+    """Empacota ``{question_id: option}`` em ``bytes`` na ordem ``question_order``."""
+    positions = {question_id: index for index, question_id in enumerate(question_order)}
+    packed = bytearray(len(question_order))
+    for question_id, option in answers.items():
+        if question_id not in positions:
+            raise ValueError(f'Question {question_id} does not belong to the exam')
+        if not 1 <= option <= 5:
+            raise ValueError(f'Invalid option {option} for question {question_id}')
+        packed[positions[question_id]] = option
+    return bytes(packed)
+
+
+def register_layout(question_order):
+    """Grava a ordem em ``PackedLayout`` (uma vez por digest) e devolve o digest."""
+    digest = layout_digest(question_order)
+    key = LAYOUT_CACHE_KEY.format(digest)
+    if cache.get(key) is None:
+        PackedLayout.objects.get_or_create(digest=digest, defaults={'question_order': list(question_order)})
+        cache.set(key, list(question_order), None)
+    return digest
+
+
+def layout_order(digest):
+    """Ordem de questões gravada para ``digest``; ``UnknownPackedLayout`` se não existe."""
+    key = LAYOUT_CACHE_KEY.format(digest)
+    order = cache.get(key)
+    if order is None:
+        order = PackedLayout.objects.filter(digest=digest).values_list('question_order', flat=True).first()
+        if order is None:
+            raise UnknownPackedLayout()
+        cache.set(key, order, None)
+    return order
+
+
+def packed_order(structure, digest):
+    """Ordem em que um array do exame de ``structure`` foi gravado (sem consulta se é a atual)."""
+    if digest == structure.layout:
+        return structure.question_order
+    return layout_order(digest)
+
+
+def pack_submission(submission, question_order, answers):
+    """Preenche ``packed_answers`` e ``packed_layout`` de ``submission`` (sem salvar)."""
+    submission.packed_answers = pack_answers(question_order, answers)
+    submission.packed_layout = register_layout(question_order)
+    return submission
+
+
+def unpack_answers(question_order, packed):
+    """Inverso de ``pack_answers``; questões sem resposta ficam de fora do mapa."""
+    if len(packed) != len(question_order):
+        raise UnknownPackedLayout()
+    view = memoryview(packed)
+    return {
+        question_id: option
+        for question_id, option in zip(question_order, view)
+        if option != UNANSWERED
+    }
+
+
+def answer_key_bytes(question_order):
+    """Gabarito alinhado às posições: opção correta, ou 0 se a questão não tem
+    exatamente uma alternativa correta (mesma regra de ``SubmissionAnswer.is_correct``)."""
+    correct = {}
+    for question_id, option in Alternative.objects.filter(
+        question_id__in=question_order, is_correct=True
+    ).values_list('question_id', 'option'):
+        correct.setdefault(question_id, []).append(option)
+    return bytes(
+        options[0] if len(options := correct.get(question_id, [])) == 1 else UNANSWERED
+        for question_id in question_order
+    )
+
+
+def grade_packed(packed, key):
+    """``(corretas, respondidas)`` comparando o array com o gabarito posição a posição."""
+    correct = answered = 0
+    for option, expected in zip(memoryview(packed), key):
+        if option != UNANSWERED:
+            answered += 1
+            correct += option == expected
+    return correct, answered
+
+
+def store_answers(submission, answers):
+    """Grava as respostas de uma submissão recém-criada e calcula a nota.
+
+    ``answers`` é a lista validada ``[{question_id, selected_option}]``.
+    """
+    if settings.SUBMISSION_ANSWER_STORAGE == 'packed':
+        from .structure import get_exam_structure
+
+        pack_submission(
+            submission,
+            get_exam_structure(submission.exam_id).question_order,
+            {answer['question_id']: answer['selected_option'] for answer in answers},
+        )
+        submission.save(update_fields=['packed_answers', 'packed_layout'])
+    else:
+        SubmissionAnswer.objects.bulk_create([
+            SubmissionAnswer(
+                submission=submission,
+                question_id=answer['question_id'],
+                selected_alternative_option=answer['selected_option'],
+            )
+            for answer in answers
+        ], ignore_conflicts=True)
+    return submission.grade()
@@ -0,0 +1,54 @@
+"""
+Remoção em segundo plano de exames excluídos.
+
+``DELETE /exams/<pk>/`` só marca o exame como excluído (``Exam.soft_delete``),
+o que já o esconde de todos os endpoints. As linhas são removidas depois por
+``purge_exam``, em blocos de tamanho fixo, cada um em sua própria transação:
+a memória usada não cresce com o tamanho do exame, nenhuma transação longa
+segura locks e a tarefa pode ser reexecutada de onde parou.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .archive import delete_exam_archives
+from .models import DraftAnswer, Exam, ExamDeletion, ExamSubmission, SubmissionAnswer
+
+
+def _delete_in_chunks(queryset, chunk_size):
+    """Apaga as linhas de ``queryset`` em blocos; gera o total apagado em cada bloco."""
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            deleted, _ = queryset.model._base_manager.filter(id__in=ids).delete()
+        yield deleted
+
+
+def purge_exam(deletion, chunk_size=None):
+    """Remove respostas, submissões, rascunhos e por fim o próprio exame."""
+    chunk_size = chunk_size or settings.EXAM_PURGE_CHUNK_SIZE
+    exam_id = deletion.exam_id
+    deletion.status = ExamDeletion.Status.RUNNING
+    deletion.save(update_fields=['status'])
+
+    answers = SubmissionAnswer.objects.filter(submission__exam_id=exam_id).order_by()
+    for deleted in _delete_in_chunks(answers, chunk_size):
+        deletion.answers_deleted += deleted
+        deletion.save(update_fields=['answers_deleted'])
+
+    submissions = ExamSubmission.objects.filter(exam_id=exam_id).order_by()
+    for deleted in _delete_in_chunks(submissions, chunk_size):
+        deletion.submissions_deleted += deleted
+        deletion.save(update_fields=['submissions_deleted'])
+
+    for _ in _delete_in_chunks(DraftAnswer.objects.filter(exam_id=exam_id).order_by(), chunk_size):
+        pass
+
+    delete_exam_archives(exam_id)
+    Exam.all_objects.filter(id=exam_id, deleted_at__isnull=False).delete()
+    deletion.status = ExamDeletion.Status.COMPLETED
+    deletion.finished_at = timezone.now()
+    deletion.save(update_fields=['status', 'finished_at'])
+    return deletion
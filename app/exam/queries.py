@@ -0,0 +1,184 @@
+"""
+Consultas de leitura das estatísticas e da listagem de exames.
+
+As funções ``*_queryset`` apenas montam QuerySets (nada é executado), de modo
+que as estatísticas (``exam.caching.exam_statistics``) os avaliam com
+``list(...)`` e a listagem assíncrona com ``async for``. ``build_statistics``
+é pura: recebe as linhas já carregadas e devolve o payload da API, sem tocar
+no banco.
+"""
+from django.db.models import Count, Exists, OuterRef, Q
+from rest_framework import serializers
+
+from question.models import Alternative
+
+from .models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer, SubmissionArchive
+from .packing import UNANSWERED, grade_packed, layout_digest
+
+_datetime_field = serializers.DateTimeField()
+
+
+def format_datetime(value):
+    """Mesmo formato dos ``DateTimeField`` do DRF (``None`` continua ``None``)."""
+    return _datetime_field.to_representation(value)
+
+
+def exam_list_queryset(search=None):
+    qs = Exam.objects.annotate(total_questions=Count('examquestion')).order_by('name')
+    if search:
+        qs = qs.filter(name__icontains=search)
+    return qs
+
+
+def exam_questions_queryset(exam_id):
+    return ExamQuestion.objects.filter(exam_id=exam_id).select_related('question').order_by('number')
+
+
+def submission_queryset():
+    return ExamSubmission.objects.active().select_related('student', 'exam')
+
+
+def correct_options_queryset(exam_id):
+    """Pares ``(question_id, option)`` das alternativas corretas do exame."""
+    return Alternative.objects.filter(
+        question__examquestion__exam_id=exam_id, is_correct=True
+    ).values_list('question_id', 'option')
+
+
+def answer_distribution_queryset(exam_id):
+    """Contagem de respostas por ``(question_id, option)`` em uma única consulta agrupada."""
+    return (
+        SubmissionAnswer.objects.filter(submission__exam_id=exam_id)
+        .values_list('question_id', 'selected_alternative_option')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def submission_scores_queryset(exam_id, single_correct_question_ids):
+    """``(submission_id, total_respostas, corretas)`` de cada submissão do exame.
+
+    Segue a regra de ``SubmissionAnswer.is_correct``: só conta como correta a
+    resposta de questões com exatamente uma alternativa correta.
+    """
+    is_correct = Exists(Alternative.objects.filter(
+        question_id=OuterRef('question_id'),
+        option=OuterRef('selected_alternative_option'),
+        is_correct=True,
+    ))
+    return (
+        SubmissionAnswer.objects.filter(submission__exam_id=exam_id)
+        .values('submission_id')
+        .annotate(
+            total=Count('id'),
+            correct=Count('id', filter=Q(is_correct, question_id__in=single_correct_question_ids)),
+        )
+        .values_list('submission_id', 'total', 'correct')
+        .order_by()
+    )
+
+
+def packed_answers_queryset(exam_id):
+    """``(array, packed_layout, graded_score)`` das submissões gravadas no modo compacto."""
+    return ExamSubmission.objects.filter(
+        exam_id=exam_id, packed_answers__isnull=False
+    ).values_list('packed_answers', 'packed_layout', 'graded_score')
+
+
+def archived_counts_queryset(exam_id):
+    """``(answer_counts, score_sum)`` de cada arquivo de submissões antigas (ver ``exam.archive``)."""
+    return SubmissionArchive.objects.filter(exam_id=exam_id).values_list('answer_counts', 'score_sum')
+
+
+def answer_key(correct_option_rows):
+    """``{question_id: option}`` apenas para questões com uma única alternativa correta."""
+    options = {}
+    for question_id, option in correct_option_rows:
+        options.setdefault(question_id, []).append(option)
+    return {question_id: found[0] for question_id, found in options.items() if len(found) == 1}
+
+
+def score_percentage(correct, total):
+    return round((correct / total) * 100, 2) if total else 0
+
+
+def build_statistics(exam, exam_questions, key, distribution_rows, score_rows, total_submissions,
+                     packed_rows=(), archived_rows=(), layout_orders=None):
+    """Payload de ``/exams/<pk>/statistics/`` a partir das linhas agregadas.
+
+    ``packed_rows`` são os arrays das submissões no modo compacto, decodificados
+    aqui posição a posição (ver ``exam.packing``); os gravados em outra ordem de
+    questões são lidos com a ordem de ``layout_orders`` (``{digest: ordem}``),
+    ou entram só com a nota já gravada se a ordem é desconhecida. ``archived_rows`` são as
+    contagens por opção e a soma das notas guardadas com cada arquivo de
+    submissões arquivadas (ver ``exam.archive``).
+    """
+    totals, correct = {}, {}
+    for question_id, option, count in distribution_rows:
+        totals[question_id] = totals.get(question_id, 0) + count
+        if key.get(question_id) == option:
+            correct[question_id] = correct.get(question_id, 0) + count
+
+    scores = [score_percentage(correct_count, total) for _, total, correct_count in score_rows]
+
+    question_order = [eq.question_id for eq in exam_questions]
+    key_bytes = bytes(key.get(question_id, UNANSWERED) for question_id in question_order)
+    layout = layout_digest(question_order)
+    layout_orders = layout_orders or {}
+    for packed, packed_layout, graded_score in packed_rows:
+        if packed_layout != layout:
+            order = layout_orders.get(packed_layout)
+            if order is None or len(order) != len(packed):
+                scores.append(graded_score or 0)
+                continue
+            answered = 0
+            correct_count = 0
+            for question_id, option in zip(order, memoryview(packed)):
+                if option != UNANSWERED:
+                    answered += 1
+                    totals[question_id] = totals.get(question_id, 0) + 1
+                    if key.get(question_id) == option:
+                        correct_count += 1
+                        correct[question_id] = correct.get(question_id, 0) + 1
+            scores.append(score_percentage(correct_count, answered))
+            continue
+        view = memoryview(packed)
+        for question_id, option, expected in zip(question_order, view, key_bytes):
+            if option != UNANSWERED:
+                totals[question_id] = totals.get(question_id, 0) + 1
+                if option == expected:
+                    correct[question_id] = correct.get(question_id, 0) + 1
+        scores.append(score_percentage(*grade_packed(view, key_bytes)))
+    for answer_counts, score_sum in archived_rows:
+        for question_id, counts in answer_counts.items():
+            question_id = int(question_id)
+            for option, count in counts.items():
+                totals[question_id] = totals.get(question_id, 0) + count
+                if key.get(question_id) == int(option):
+                    correct[question_id] = correct.get(question_id, 0) + count
+        scores.append(score_sum)
+    average = round(sum(scores) / total_submissions, 2) if total_submissions else 0.0
+
+    question_stats = []
+    for eq in exam_questions:
+        question_id = eq.question_id
+        total_answers = totals.get(question_id, 0)
+        correct_count = correct.get(question_id, 0)
+        question_stats.append({
+            'question_id': question_id,
+            'question_content': eq.question.content,
+            'question_number': eq.number,
+            'correct_answers': correct_count,
+            'total_answers': total_answers,
+            'accuracy_percentage': round((correct_count / total_answers * 100) if total_answers else 0.0, 2),
+        })
+
+    return {
+        'success': True,
+        'exam_name': exam.name,
+        'statistics': {
+            'total_submissions': total_submissions,
+            'average_score': average,
+            'questions_statistics': question_stats,
+        },
+    }
@@ -1,6 +1,10 @@
 from rest_framework import serializers
-from django.db import transaction
-from .models import Exam, ExamSubmission, SubmissionAnswer, ExamQuestion
+from django.db import models, transaction
+from .drafts import get_draft_answers
+from .importer import FORMATS
+from .packing import store_answers
+from .structure import get_exam_structure, get_exam_structures, render_result_questions
+from .models import Exam, ExamDeletion, ExamSubmission, ExamQuestion
 from question.models import Question, Alternative
 from student.models import Student
 
@@ -28,11 +32,12 @@ class ExamSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Exam
-        fields = ['id', 'name', 'total_questions']
+        fields = ['id', 'name', 'starts_at', 'total_questions']
     
     def get_total_questions(self, obj):
-        """Conta o total de questões do exame"""
-        return obj.examquestion_set.count()
+        """Conta o total de questões do exame (anotado em ``queries.exam_list_queryset``)"""
+        total = getattr(obj, 'total_questions', None)
+        return total if total is not None else obj.examquestion_set.count()
 
 
 class ExamDetailSerializer(serializers.ModelSerializer):
@@ -46,13 +51,15 @@ class ExamDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'questions', 'total_questions', 'total_submissions']
     
     def get_questions(self, obj):
-        """Retorna questões ordenadas por número"""
-        exam_questions = obj.examquestion_set.select_related('question').order_by('number')
-        return ExamQuestionSerializer(exam_questions, many=True).data
+        """Retorna questões ordenadas por número (da estrutura em cache, ver ``exam.structure``)"""
+        return [
+            {'number': question.number, 'question': {'id': question.id, 'content': question.content}}
+            for question in get_exam_structure(obj.id).questions
+        ]
     
     def get_total_questions(self, obj):
         """Conta o total de questões do exame"""
-        return obj.examquestion_set.count()
+        return len(get_exam_structure(obj.id).questions)
     
     def get_total_submissions(self, obj):
         """Conta o total de submissões do exame"""
@@ -65,11 +72,46 @@ class AnswerSubmissionSerializer(serializers.Serializer):
     selected_option = serializers.IntegerField(min_value=1, max_value=5)  # A-E (1-5)
 
 
+class DraftAnswerDeltaSerializer(serializers.Serializer):
+    """Serializer for one autosaved answer change (``null`` clears the answer)"""
+    question_id = serializers.IntegerField()
+    selected_option = serializers.IntegerField(min_value=1, max_value=5, allow_null=True)
+
+
+class ExamDraftUpdateSerializer(serializers.Serializer):
+    """Serializer for autosave deltas of a student's draft"""
+    student_id = serializers.IntegerField()
+    answers = DraftAnswerDeltaSerializer(many=True)
+
+    def validate_student_id(self, value):
+        """Validate that student exists"""
+        if not Student.objects.filter(id=value).exists():
+            raise serializers.ValidationError("Student does not exist")
+        return value
+
+    def validate_answers(self, value):
+        """Validate that all questions belong to the exam given in the context"""
+        if not value:
+            raise serializers.ValidationError("At least one answer is required")
+        exam_question_ids = get_exam_structure(self.context['exam'].id).question_ids
+        invalid_questions = {answer['question_id'] for answer in value} - exam_question_ids
+        if invalid_questions:
+            raise serializers.ValidationError(
+                f"Questions {sorted(invalid_questions)} do not belong to exam {self.context['exam'].id}"
+            )
+        return value
+
+
 class ExamSubmissionCreateSerializer(serializers.Serializer):
-    """Serializer for creating an exam submission with all answers"""
+    """Serializer for creating an exam submission with all answers.
+
+    With ``use_draft`` the autosaved draft is promoted: its answers are used
+    as the base and any ``answers`` sent in the payload override them.
+    """
     student_id = serializers.IntegerField()
     exam_id = serializers.IntegerField()
-    answers = AnswerSubmissionSerializer(many=True)
+    answers = AnswerSubmissionSerializer(many=True, required=False)
+    use_draft = serializers.BooleanField(default=False, write_only=True)
 
     def validate_student_id(self, value):
         """Validate that student exists"""
@@ -80,9 +122,9 @@ class ExamSubmissionCreateSerializer(serializers.Serializer):
         return value
 
     def validate_exam_id(self, value):
-        """Validate that exam exists"""
+        """Validate that exam exists (through the cached exam structure)"""
         try:
-            Exam.objects.get(id=value)
+            get_exam_structure(value)
         except Exam.DoesNotExist:
             raise serializers.ValidationError("Exam does not exist")
         return value
@@ -107,11 +149,20 @@ class ExamSubmissionCreateSerializer(serializers.Serializer):
         """Cross-field validation to ensure questions belong to the exam"""
         exam_id = data['exam_id']
         student_id = data['student_id']
-        answers = data['answers']
-        
-        exam = Exam.objects.get(id=exam_id)
+        answers = data.get('answers', [])
+
+        if data.get('use_draft'):
+            merged = get_draft_answers(exam_id, student_id)
+            merged.update((answer['question_id'], answer['selected_option']) for answer in answers)
+            answers = [
+                {'question_id': question_id, 'selected_option': option}
+                for question_id, option in merged.items()
+            ]
+            data['answers'] = answers
+        if not answers:
+            raise serializers.ValidationError({'answers': ["At least one answer is required"]})
         
-        exam_question_ids = set(exam.questions.values_list('id', flat=True))
+        exam_question_ids = get_exam_structure(exam_id).question_ids
         submitted_question_ids = set(answer['question_id'] for answer in answers)
         
         if not submitted_question_ids.issubset(exam_question_ids):
@@ -138,18 +189,7 @@ class ExamSubmissionCreateSerializer(serializers.Serializer):
                 exam_id=exam_id
             )
             
-
-            submission_answers = []
-            for answer_data in answers_data:
-                submission_answers.append(
-                    SubmissionAnswer(
-                        submission=submission,
-                        question_id=answer_data['question_id'],
-                        selected_alternative_option=answer_data['selected_option']
-                    )
-                )
-            
-            SubmissionAnswer.objects.bulk_create(submission_answers)
+            store_answers(submission, answers_data)
         
         return submission
 
@@ -184,8 +224,7 @@ class QuestionResultSerializer(serializers.ModelSerializer):
     
     def get_student_answer(self, obj):
         """Get the student's selected option number"""
-        submission_answer = self.context.get('submission_answers', {}).get(obj.id)
-        return submission_answer.selected_alternative_option if submission_answer else None
+        return self.context.get('answer_map', {}).get(obj.id)
     
     def get_student_answer_letter(self, obj):
         """Get the student's selected option letter"""
@@ -196,12 +235,9 @@ class QuestionResultSerializer(serializers.ModelSerializer):
         return None
     
     def get_correct_answer(self, obj):
-        """Get the correct option number"""
-        try:
-            correct_alt = obj.alternatives.get(is_correct=True)
-            return correct_alt.option
-        except Alternative.DoesNotExist:
-            return None
+        """Get the correct option number (only when exactly one alternative is correct)"""
+        correct_options = [alt.option for alt in obj.alternatives.all() if alt.is_correct]
+        return correct_options[0] if len(correct_options) == 1 else None
     
     def get_correct_answer_letter(self, obj):
         """Get the correct option letter"""
@@ -213,42 +249,68 @@ class QuestionResultSerializer(serializers.ModelSerializer):
     
     def get_is_correct(self, obj):
         """Check if student's answer is correct"""
-        submission_answer = self.context.get('submission_answers', {}).get(obj.id)
-        return submission_answer.is_correct if submission_answer else False
+        student_answer = self.get_student_answer(obj)
+        return student_answer is not None and student_answer == self.get_correct_answer(obj)
+
+
+class ExamResultListSerializer(serializers.ListSerializer):
+    """Loads the structures of every exam in the list at once before rendering"""
+
+    def to_representation(self, data):
+        submissions = data.all() if isinstance(data, models.manager.BaseManager) else data
+        get_exam_structures({submission.exam_id for submission in submissions})
+        return super().to_representation(submissions)
 
 
 class ExamResultSerializer(serializers.ModelSerializer):
-    """Serializer for exam results with detailed question analysis"""
+    """Serializer for exam results with detailed question analysis.
+
+    Answers are read through ``ExamSubmission.get_answer_map()``, so both
+    ``SubmissionAnswer`` rows and packed answers are supported. Questions,
+    alternatives and the answer key come from the cached exam structure
+    (``exam.structure``).
+    """
     questions = serializers.SerializerMethodField()
     student_name = serializers.CharField(source='student.name', read_only=True)
     exam_name = serializers.CharField(source='exam.name', read_only=True)
     total_questions = serializers.SerializerMethodField()
-    correct_answers = serializers.IntegerField(source='correct_answers_count', read_only=True)
+    correct_answers = serializers.SerializerMethodField()
     score_percentage = serializers.FloatField(source='score', read_only=True)
     
     class Meta:
         model = ExamSubmission
+        list_serializer_class = ExamResultListSerializer
         fields = ['id', 'student_name', 'exam_name', 'submitted_at', 'total_questions', 
                  'correct_answers', 'score_percentage', 'questions']
     
     def get_total_questions(self, obj):
-        """Get total number of questions in the exam"""
-        return obj.answers.count()
+        """Get total number of questions answered in the submission"""
+        return len(obj.get_answer_map())
+
+    def get_correct_answers(self, obj):
+        """Same rule as ``ExamSubmission.correct_answers_count``, using the cached answer key"""
+        key = get_exam_structure(obj.exam_id).answer_key
+        return sum(1 for question_id, option in obj.get_answer_map().items() if key.get(question_id) == option)
     
     def get_questions(self, obj):
         """Get detailed question results"""
+        return render_result_questions(get_exam_structure(obj.exam_id), obj.get_answer_map())
 
-        submission_answers = {
-            answer.question_id: answer 
-            for answer in obj.answers.select_related('question').all()
-        }
 
-        exam_questions = obj.exam.examquestion_set.select_related('question').order_by('number')
-        questions = [eq.question for eq in exam_questions]
-        
-        serializer = QuestionResultSerializer(
-            questions, 
-            many=True, 
-            context={'submission_answers': submission_answers}
-        )
-        return serializer.data
\ No newline at end of file
+class QuestionBankImportSerializer(serializers.Serializer):
+    """Serializer for a question bank upload (JSON Lines, JSON or CSV)"""
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=FORMATS, required=False)
+    chunk_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+    resume = serializers.BooleanField(default=False)
+    skip_invalid = serializers.BooleanField(default=False)
+    allow_duplicates = serializers.BooleanField(default=False)
+
+
+class ExamDeletionSerializer(serializers.ModelSerializer):
+    """Serializer for the progress of an exam purge"""
+
+    class Meta:
+        model = ExamDeletion
+        fields = ['id', 'exam_id', 'exam_name', 'status', 'answers_deleted', 'submissions_deleted',
+                  'requested_at', 'finished_at', 'error']
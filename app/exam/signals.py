@@ -0,0 +1,52 @@
+"""
+Invalida a estrutura em cache dos exames (``exam.structure``) quando o exame,
+seus vínculos com questões, as questões ou as alternativas mudam.
+
+A versão só muda depois do commit (``transaction.on_commit``): invalidada antes,
+uma leitura concorrente entre a invalidação e o commit carregaria as linhas
+antigas e as gravaria no cache sob a versão nova, e as correções usariam o
+gabarito antigo até a estrutura expirar. Fora de uma transação a invalidação é
+imediata.
+
+Operações em lote sem sinais (``bulk_create``, ``QuerySet.update``/``delete``)
+precisam chamar ``invalidate_exam_structure`` por conta própria, como faz a
+importação do banco de questões.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from question.models import Alternative, Question
+
+from .models import Exam, ExamQuestion
+from .structure import invalidate_exam_structure
+
+
+def _exams_of_question(question_id):
+    # Avaliado já: após o commit, os vínculos de uma questão excluída não existem mais
+    return list(ExamQuestion.objects.filter(question_id=question_id).values_list('exam_id', flat=True))
+
+
+def _invalidate_on_commit(*exam_ids, using):
+    if exam_ids:
+        transaction.on_commit(lambda: invalidate_exam_structure(*exam_ids), using=using)
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def exam_changed(sender, instance, using, **kwargs):
+    _invalidate_on_commit(instance.pk, using=using)
+
+
+@receiver([post_save, post_delete], sender=ExamQuestion)
+def exam_question_changed(sender, instance, using, **kwargs):
+    _invalidate_on_commit(instance.exam_id, using=using)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, using, **kwargs):
+    _invalidate_on_commit(*_exams_of_question(instance.pk), using=using)
+
+
+@receiver([post_save, post_delete], sender=Alternative)
+def alternative_changed(sender, instance, using, **kwargs):
+    _invalidate_on_commit(*_exams_of_question(instance.question_id), using=using)
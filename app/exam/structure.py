@@ -0,0 +1,239 @@
+"""
+Estrutura imutável de um exame (questões em ordem e alternativas) em memória.
+
+O conteúdo de um exame praticamente não muda durante a aplicação, então os
+serializers renderizam a partir de ``ExamStructure`` em vez de refazer
+``ExamQuestion`` → ``Question`` → ``Alternative`` a cada requisição.
+
+Dois níveis de cache, ambos indexados pela versão do exame (namespace
+``exam:<id>:structure`` em ``utils.cache``):
+
+- LRU por processo com até ``EXAM_STRUCTURE_CACHE_SIZE`` exames;
+- cache compartilhado (``get_or_compute``), para que workers novos não
+  precisem ir ao banco.
+
+Com o cache quente, obter a estrutura custa uma leitura da versão no cache
+compartilhado e nenhuma consulta ao banco. ``invalidate_exam_structure`` é
+chamado pelos sinais de ``exam.signals`` (e pela importação em lote) sempre
+que exame, vínculos, questões ou alternativas mudam.
+"""
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from django.conf import settings
+
+from question.utils import AlternativesChoices
+from utils.cache import get_or_compute, invalidate_namespace, namespace_version
+
+from .models import Exam, ExamQuestion
+from .packing import layout_digest
+
+OPTION_LETTERS = {choice.value: choice.label for choice in AlternativesChoices}
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+
+class AlternativeData(_Frozen):
+    __slots__ = ('option', 'content', 'is_correct')
+
+    def __init__(self, option, content, is_correct):
+        object.__setattr__(self, 'option', option)
+        object.__setattr__(self, 'content', content)
+        object.__setattr__(self, 'is_correct', is_correct)
+
+    @property
+    def option_letter(self):
+        return OPTION_LETTERS.get(self.option, '')
+
+
+class QuestionData(_Frozen):
+    """Questão na posição ``number``; ``correct_option`` só com exatamente uma alternativa correta."""
+
+    __slots__ = ('id', 'number', 'content', 'alternatives', 'correct_option')
+
+    def __init__(self, id, number, content, alternatives, correct_option=None):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'number', number)
+        object.__setattr__(self, 'content', content)
+        object.__setattr__(self, 'alternatives', tuple(alternatives))
+        object.__setattr__(self, 'correct_option', correct_option)
+
+
+class ExamStructure(_Frozen):
+    __slots__ = (
+        'exam_id', 'name', 'version', 'questions', 'question_ids', 'answer_key', 'answer_key_bytes', 'layout',
+    )
+
+    def __init__(self, exam_id, name, version, questions):
+        questions = tuple(questions)
+        object.__setattr__(self, 'exam_id', exam_id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'questions', questions)
+        object.__setattr__(self, 'question_ids', frozenset(question.id for question in questions))
+        object.__setattr__(self, 'answer_key', MappingProxyType({
+            question.id: question.correct_option for question in questions if question.correct_option is not None
+        }))
+        # Gabarito alinhado às posições de ``packed_answers`` (ver ``exam.packing``)
+        object.__setattr__(self, 'answer_key_bytes', bytes(question.correct_option or 0 for question in questions))
+        object.__setattr__(self, 'layout', layout_digest(question.id for question in questions))
+
+    def __reduce__(self):
+        return type(self), (self.exam_id, self.name, self.version, self.questions)
+
+    @property
+    def question_order(self):
+        return [question.id for question in self.questions]
+
+
+def load_exam_structure(exam_id, version=None):
+    """Monta a estrutura a partir do banco (3 consultas)."""
+    structures = load_exam_structures({exam_id: version})
+    if exam_id not in structures:
+        raise Exam.DoesNotExist(f'Exam {exam_id} does not exist')
+    return structures[exam_id]
+
+
+def load_exam_structures(versions):
+    """Estruturas de vários exames (``{exam_id: versão}``) nas mesmas 3 consultas.
+
+    Exames inexistentes (ou excluídos) ficam fora do resultado.
+    """
+    names = dict(Exam.objects.filter(pk__in=versions).values_list('id', 'name'))
+    exam_questions = (
+        ExamQuestion.objects.filter(exam_id__in=names)
+        .select_related('question')
+        .prefetch_related('question__alternatives')
+        .order_by('exam_id', 'number')
+    )
+    questions = {exam_id: [] for exam_id in names}
+    for eq in exam_questions:
+        alternatives = [
+            AlternativeData(alt.option, alt.content, alt.is_correct) for alt in eq.question.alternatives.all()
+        ]
+        correct = [alt.option for alt in alternatives if alt.is_correct]
+        questions[eq.exam_id].append(QuestionData(
+            eq.question_id, eq.number, eq.question.content, alternatives, correct[0] if len(correct) == 1 else None
+        ))
+    return {
+        exam_id: ExamStructure(exam_id, name, versions[exam_id], questions[exam_id])
+        for exam_id, name in names.items()
+    }
+
+
+class StructureCache:
+    """LRU por processo de ``ExamStructure`` indexado por ``(exam_id, versão)``."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, exam_id):
+        return self.get_many([exam_id])[exam_id]
+
+    def get_many(self, exam_ids):
+        """``{exam_id: ExamStructure}``; as que faltam nos dois níveis são
+        montadas juntas (``load_exam_structures``), evitando 3 consultas por exame."""
+        found, missing = {}, {}
+        keys = [(exam_id, namespace_version(structure_namespace(exam_id))) for exam_id in dict.fromkeys(exam_ids)]
+        with self._lock:
+            for key in keys:
+                exam_id = key[0]
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[exam_id] = self._entries[key]
+                else:
+                    self.misses += 1
+                    missing[exam_id] = key[1]
+        loaded = None
+
+        def compute(exam_id):
+            nonlocal loaded
+            if loaded is None:
+                loaded = load_exam_structures(missing)
+            if exam_id not in loaded:
+                raise Exam.DoesNotExist(f'Exam {exam_id} does not exist')
+            return loaded[exam_id]
+
+        for exam_id, version in missing.items():
+            found[exam_id] = get_or_compute(
+                'structure',
+                lambda: compute(exam_id),
+                timeout=settings.EXAM_STRUCTURE_CACHE_SECONDS,
+                namespace=structure_namespace(exam_id),
+            )
+            with self._lock:
+                self._entries[(exam_id, version)] = found[exam_id]
+                self._entries.move_to_end((exam_id, version))
+                while len(self._entries) > settings.EXAM_STRUCTURE_CACHE_SIZE:
+                    self._entries.popitem(last=False)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+structure_cache = StructureCache()
+
+
+def structure_namespace(exam_id):
+    return f'exam:{exam_id}:structure'
+
+
+def get_exam_structure(exam_id):
+    """``ExamStructure`` do exame; levanta ``Exam.DoesNotExist`` se ele não existir."""
+    return structure_cache.get(exam_id)
+
+
+def get_exam_structures(exam_ids):
+    """``{exam_id: ExamStructure}`` para vários exames (ver ``StructureCache.get_many``)."""
+    return structure_cache.get_many(exam_ids)
+
+
+def invalidate_exam_structure(*exam_ids):
+    for exam_id in exam_ids:
+        invalidate_namespace(structure_namespace(exam_id))
+
+
+def render_result_questions(structure, answer_map):
+    """Questões no formato de ``QuestionResultSerializer`` para as respostas ``answer_map``."""
+    questions = []
+    for question in structure.questions:
+        student_answer = answer_map.get(question.id)
+        correct_option = question.correct_option
+        questions.append({
+            'id': question.id,
+            'content': question.content,
+            'alternatives': [
+                {
+                    'option': alt.option,
+                    'option_letter': alt.option_letter,
+                    'content': alt.content,
+                    'is_correct': alt.is_correct,
+                }
+                for alt in question.alternatives
+            ],
+            'student_answer': student_answer,
+            'student_answer_letter': OPTION_LETTERS.get(student_answer, '') if student_answer else None,
+            'correct_answer': correct_option,
+            'correct_answer_letter': OPTION_LETTERS.get(correct_option, '') if correct_option else None,
+            'is_correct': student_answer is not None and student_answer == correct_option,
+        })
+    return questions
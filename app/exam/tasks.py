@@ -1,7 +1,20 @@
 from celery import shared_task
+from celery.signals import task_failure, task_success
 from django.db import transaction, IntegrityError
 
-from .models import ExamSubmission, SubmissionAnswer
+from utils.db.routers import pin_to_primary, submission_pin
+
+from .caching import invalidate_exam_statistics
+from .drafts import discard_draft, flush_drafts
+from .models import Exam, ExamDeletion, ExamSubmission
+from .notifications import publish_submission_status
+from .packing import store_answers
+from .purge import purge_exam
+from .warming import upcoming_exams, warm_exam, warm_status
+
+
+class ExamUnavailable(Exception):
+    """The exam of a queued submission no longer exists or was soft-deleted."""
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=1)
@@ -13,7 +26,9 @@ def process_exam_submission(self, payload: dict):
     - exam_id: int
     - answers: list[{question_id: int, selected_option: int}]
 
-    Returns a dict with created flag and submission info.
+    Returns a dict with created flag and submission info. Raises
+    ``ExamUnavailable`` (no retry) when the exam was deleted after the
+    submission was enqueued.
     """
     student_id = payload.get('student_id')
     exam_id = payload.get('exam_id')
@@ -21,6 +36,8 @@ def process_exam_submission(self, payload: dict):
 
     try:
         with transaction.atomic():
+            if not Exam.objects.filter(pk=exam_id).exists():
+                raise ExamUnavailable(f'Exam {exam_id} does not exist or was deleted')
             created = False
             try:
                 submission, created = ExamSubmission.objects.get_or_create(
@@ -33,19 +50,24 @@ def process_exam_submission(self, payload: dict):
                 created = False
 
             if created and answers:
-                submission_answers = [
-                    SubmissionAnswer(
-                        submission=submission,
-                        question_id=a['question_id'],
-                        selected_alternative_option=a['selected_option'],
-                    )
-                    for a in answers
-                ]
-                SubmissionAnswer.objects.bulk_create(submission_answers, ignore_conflicts=True)
+                store_answers(submission, answers)
+
+            if created:
+                # After the commit: a rolled-back submission keeps its draft.
+                transaction.on_commit(lambda: discard_draft(exam_id, student_id))
 
     except IntegrityError as exc:
         raise self.retry(exc=exc)
 
+    if created:
+        invalidate_exam_statistics(exam_id)
+
+    # The replica may lag behind this write: keep the student's reads, and
+    # reads of this submission by id, on the primary for a short while so
+    # their result is visible right away.
+    pin_to_primary(student_id)
+    pin_to_primary(submission_pin(submission.id))
+
     return {
         'created': created,
         'submission': {
@@ -53,6 +75,66 @@ def process_exam_submission(self, payload: dict):
             'student_id': student_id,
             'exam_id': exam_id,
             'score': submission.score,
-            'total_answers': submission.answers.count(),
+            'total_answers': len(submission.get_answer_map()),
         }
     }
+
+
+@shared_task
+def flush_exam_drafts():
+    """Periodically persist the autosave buffer with bulk upserts."""
+    return {'flushed': flush_drafts()}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def purge_deleted_exam(self, deletion_id: int):
+    """Delete the rows of a soft-deleted exam in bounded chunks.
+
+    Safe to retry: every chunk is committed on its own and the next run
+    continues with whatever is left.
+    """
+    deletion = ExamDeletion.objects.get(pk=deletion_id)
+    try:
+        purge_exam(deletion)
+    except Exception as exc:
+        deletion.status = ExamDeletion.Status.FAILED
+        deletion.error = str(exc)
+        deletion.save(update_fields=['status', 'error'])
+        raise self.retry(exc=exc)
+    return {
+        'exam_id': deletion.exam_id,
+        'answers_deleted': deletion.answers_deleted,
+        'submissions_deleted': deletion.submissions_deleted,
+    }
+
+
+@shared_task
+def warm_upcoming_exam_caches(minutes=None):
+    """Warm the caches of exams starting within ``minutes`` (default
+    ``EXAM_WARM_AHEAD_MINUTES``) that are not warm yet. Runs on Celery beat."""
+    warmed = {}
+    for exam in upcoming_exams(minutes):
+        if warm_status(exam.id) is None:
+            warmed[exam.id] = warm_exam(exam)['timings_ms']
+    return {'warmed': warmed}
+
+
+@task_success.connect
+def notify_submission_success(sender=None, result=None, **kwargs):
+    """Empurra o resultado da correção para os clientes em SSE/long-poll."""
+    if sender is None or sender.name != process_exam_submission.name:
+        return
+    result = result or {}
+    publish_submission_status(sender.request.id, {
+        'state': 'SUCCESS',
+        'created': result.get('created'),
+        'submission': result.get('submission'),
+    })
+
+
+@task_failure.connect
+def notify_submission_failure(sender=None, task_id=None, exception=None, **kwargs):
+    """Avisa os clientes conectados quando a task falha definitivamente."""
+    if sender is None or sender.name != process_exam_submission.name:
+        return
+    publish_submission_status(task_id, {'state': 'FAILURE', 'error': str(exception)})
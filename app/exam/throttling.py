@@ -0,0 +1,104 @@
+"""
+Controle de admissão das submissões (throttles do DRF).
+
+- Token buckets por estudante e global em ``POST /submissions/`` e por
+  cliente em ``GET /submissions/status/``, guardados no cache compartilhado:
+  excedeu o limite → ``429`` com ``Retry-After``.
+- Quando a fila de ``process_exam_submission`` passa de ``MAX_QUEUE_DEPTH``
+  novas submissões são recusadas com ``503`` e ``Retry-After`` antes de
+  chegarem ao broker.
+
+Os limites ficam em ``settings.SUBMISSION_ADMISSION``.
+"""
+import math
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from utils.queues import cached_queue_depth, queue_for_task
+from utils.ratelimit import TokenBucket
+
+
+def admission_settings():
+    return settings.SUBMISSION_ADMISSION
+
+
+class GradingQueueSaturated(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Fila de correção cheia, tente novamente em instantes.'
+    default_code = 'grading_queue_saturated'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle baseado em ``TokenBucket``; subclasses definem chave e limites."""
+
+    rate_setting = None
+    burst_setting = None
+
+    def get_bucket_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = admission_settings()
+        if not config['ENABLED']:
+            return True
+        bucket = TokenBucket(
+            self.get_bucket_key(request, view),
+            rate=config[self.rate_setting],
+            capacity=config[self.burst_setting],
+        )
+        self._wait = bucket.consume()
+        return self._wait == 0
+
+    def wait(self):
+        return math.ceil(self._wait)
+
+
+class GradingQueueDepthThrottle(BaseThrottle):
+    """Recusa submissões (503) enquanto a fila de correção estiver saturada."""
+
+    def allow_request(self, request, view):
+        config = admission_settings()
+        if not config['ENABLED']:
+            return True
+        from .tasks import process_exam_submission
+
+        depth = cached_queue_depth(
+            queue_for_task(process_exam_submission.name), config['QUEUE_DEPTH_CACHE_SECONDS']
+        )
+        if depth >= config['MAX_QUEUE_DEPTH']:
+            raise GradingQueueSaturated(wait=config['QUEUE_RETRY_AFTER'])
+        return True
+
+
+class GlobalSubmissionThrottle(TokenBucketThrottle):
+    rate_setting = 'GLOBAL_RATE'
+    burst_setting = 'GLOBAL_BURST'
+
+    def get_bucket_key(self, request, view):
+        return 'submissions:global'
+
+
+class StudentSubmissionThrottle(TokenBucketThrottle):
+    rate_setting = 'STUDENT_RATE'
+    burst_setting = 'STUDENT_BURST'
+
+    def get_bucket_key(self, request, view):
+        student_id = request.data.get('student_id') if hasattr(request.data, 'get') else None
+        if isinstance(student_id, int) or (isinstance(student_id, str) and student_id.isdigit()):
+            return f'submissions:student:{student_id}'
+        return f'submissions:client:{self.get_ident(request)}'
+
+
+class SubmissionStatusThrottle(TokenBucketThrottle):
+    rate_setting = 'STATUS_RATE'
+    burst_setting = 'STATUS_BURST'
+
+    def get_bucket_key(self, request, view):
+        return f'submissions:status:{self.get_ident(request)}'
@@ -1,18 +1,32 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # Exams
     path('exams/', views.ExamsAPIView.as_view(), name='exams-list-create'),
     path('exams/<int:pk>/', views.ExamDetailAPIView.as_view(), name='exams-detail'),
+    path('exams/deletions/<int:pk>/', views.ExamDeletionAPIView.as_view(), name='exams-deletion'),
+    path('exams/<int:pk>/draft/', views.ExamDraftAPIView.as_view(), name='exams-draft'),
     path('exams/<int:pk>/statistics/', views.ExamStatisticsAPIView.as_view(), name='exams-statistics'),
+    path('exams/<int:pk>/cache-status/', views.ExamCacheStatusAPIView.as_view(), name='exams-cache-status'),
+
+    # Question bank
+    path('question-bank/import/', views.QuestionBankImportAPIView.as_view(), name='question-bank-import'),
 
     # Submissions
     path('submissions/', views.SubmissionsAPIView.as_view(), name='submissions-list-create'),
     path('submissions/status/', views.SubmissionStatusAPIView.as_view(), name='submissions-status'),
+    path('submissions/status/stream/', async_views.SubmissionStatusStreamView.as_view(), name='submissions-status-stream'),
     path('submissions/<int:pk>/', views.SubmissionDetailAPIView.as_view(), name='submissions-detail'),
     path('submissions/student_submission/', views.StudentSubmissionsAPIView.as_view(), name='submissions-student'),
     path('submissions/<int:pk>/detailed_analysis/', views.SubmissionDetailedAnalysisAPIView.as_view(), name='submissions-detailed-analysis'),
     path('submissions/student/<int:student_id>/exam/<int:exam_id>/', views.StudentExamResultsAPIView.as_view(), name='submissions-student-exam'),
     path('results/<int:pk>/', views.SubmissionDetailAPIView.as_view(), name='exam-results'),
+
+    # Async (ASGI) read endpoints
+    path('async/exams/', async_views.AsyncExamsView.as_view(), name='async-exams-list'),
+    path('async/exams/<int:pk>/', async_views.AsyncExamDetailView.as_view(), name='async-exams-detail'),
+    path('async/exams/<int:pk>/statistics/', async_views.AsyncExamStatisticsView.as_view(), name='async-exams-statistics'),
+    path('async/submissions/status/', async_views.AsyncSubmissionStatusView.as_view(), name='async-submissions-status'),
+    path('async/submissions/<int:pk>/', async_views.AsyncSubmissionDetailView.as_view(), name='async-submissions-detail'),
 ]
\ No newline at end of file
@@ -2,28 +2,47 @@ from rest_framework.views import APIView
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
+from django.db.models import Avg, Count, Q
 from celery.result import AsyncResult
 
-from .models import Exam, ExamSubmission, SubmissionAnswer
+from utils.db.routers import pin_to_primary
+from utils.mixins import ReplicaReadMixin, SerializerTimingMixin
+
+from . import queries
+from .caching import exam_statistics, invalidate_exam_statistics
+from .models import Exam, ExamDeletion, ExamSubmission
+from .drafts import buffer_answers, get_draft_answers
+from .importer import (
+    ImportValidationError,
+    QuestionBankImporter,
+    detect_format,
+    file_checksum,
+    iter_records,
+    start_import,
+)
 from .serializers import (
+    ExamDraftUpdateSerializer,
+    QuestionBankImportSerializer,
     ExamSubmissionCreateSerializer,
     ExamResultSerializer,
     ExamSerializer,
-    ExamDetailSerializer,
+    ExamDeletionSerializer,
+)
+from .tasks import process_exam_submission, purge_deleted_exam
+from .warming import cached_exam_detail, warm_status
+from .throttling import (
+    GlobalSubmissionThrottle,
+    GradingQueueDepthThrottle,
+    StudentSubmissionThrottle,
+    SubmissionStatusThrottle,
 )
-from .tasks import process_exam_submission
 
-class ExamsAPIView(APIView):
+class ExamsAPIView(SerializerTimingMixin, APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get(self, request):
-        search = request.query_params.get('search')
-        qs = Exam.objects.all().order_by('name')
-        if search:
-            qs = qs.filter(name__icontains=search)
-        serializer = ExamSerializer(qs, many=True)
-        return Response({'success': True, 'results': serializer.data})
+        serializer = ExamSerializer(queries.exam_list_queryset(request.query_params.get('search')), many=True)
+        return Response({'success': True, 'results': self.serializer_data(serializer)})
 
     def post(self, request):
         serializer = ExamSerializer(data=request.data)
@@ -33,13 +52,12 @@ class ExamsAPIView(APIView):
         return Response({'success': True, 'id': exam.id, 'name': exam.name}, status=201)
 
 
-class ExamDetailAPIView(APIView):
+class ExamDetailAPIView(SerializerTimingMixin, APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get(self, request, pk):
-        exam = get_object_or_404(Exam.objects.prefetch_related('examquestion_set__question__alternatives'), pk=pk)
-        serializer = ExamDetailSerializer(exam)
-        return Response(serializer.data)
+        exam = get_object_or_404(Exam, pk=pk)
+        return Response(cached_exam_detail(exam))
 
     def put(self, request, pk):
         exam = get_object_or_404(Exam, pk=pk)
@@ -47,7 +65,8 @@ class ExamDetailAPIView(APIView):
         if not serializer.is_valid():
             return Response({'success': False, 'errors': serializer.errors}, status=400)
         serializer.save()
-        return Response({'success': True, 'result': serializer.data})
+        invalidate_exam_statistics(exam.id)
+        return Response({'success': True, 'result': self.serializer_data(serializer)})
 
     def patch(self, request, pk):
         exam = get_object_or_404(Exam, pk=pk)
@@ -55,61 +74,118 @@ class ExamDetailAPIView(APIView):
         if not serializer.is_valid():
             return Response({'success': False, 'errors': serializer.errors}, status=400)
         serializer.save()
-        return Response({'success': True, 'result': serializer.data})
+        invalidate_exam_statistics(exam.id)
+        return Response({'success': True, 'result': self.serializer_data(serializer)})
 
     def delete(self, request, pk):
+        """Exclusão assíncrona: o exame some dos endpoints imediatamente e as
+        submissões/respostas são removidas em blocos pela task
+        ``purge_deleted_exam``. O progresso fica em ``/exams/deletions/<id>/``.
+        """
         exam = get_object_or_404(Exam, pk=pk)
-        exam.delete()
-        return Response(status=204)
+        exam.soft_delete()
+        invalidate_exam_statistics(exam.id)
+        deletion = ExamDeletion.objects.create(exam_id=exam.id, exam_name=exam.name)
+        task = purge_deleted_exam.delay(deletion.id)
+        return Response({
+            'success': True,
+            'deletion_id': deletion.id,
+            'task_id': task.id,
+            'status_url_hint': f'/api/exam/exams/deletions/{deletion.id}/',
+        }, status=status.HTTP_202_ACCEPTED)
 
 
-class ExamStatisticsAPIView(APIView):
-    permission_classes = [permissions.AllowAny]
+class ExamDeletionAPIView(SerializerTimingMixin, APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, pk):
+        deletion = get_object_or_404(ExamDeletion, pk=pk)
+        serializer = ExamDeletionSerializer(deletion)
+        return Response({'success': True, 'result': self.serializer_data(serializer)})
+
+
+class ExamCacheStatusAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
 
     def get(self, request, pk):
+        """Health check do pré-aquecimento: ``warmed`` fica ``false`` até o
+        próximo ``warm_exam_caches`` sempre que o conteúdo do exame muda."""
         exam = get_object_or_404(Exam, pk=pk)
-        submissions = ExamSubmission.objects.filter(exam=exam)
-        scores = [s.score for s in submissions]
-        avg_score = round(sum(scores) / len(scores), 2) if scores else 0.0
-
-        question_stats = []
-        exam_questions = exam.examquestion_set.select_related('question').prefetch_related('question__alternatives')
-        for eq in exam_questions:
-            correct_alt = next((a for a in eq.question.alternatives.all() if getattr(a, 'is_correct', False)), None)
-            correct_option = getattr(correct_alt, 'option', None)
-            total_answers = SubmissionAnswer.objects.filter(
-                question=eq.question, submission__exam=exam
-            ).count()
-            correct_count = SubmissionAnswer.objects.filter(
-                question=eq.question, submission__exam=exam,
-                selected_alternative_option=correct_option
-            ).count() if correct_option is not None else 0
-
-            question_stats.append({
-                'question_id': eq.question.id,
-                'question_content': getattr(eq.question, 'content', ''),
-                'question_number': eq.number,
-                'correct_answers': correct_count,
-                'total_answers': total_answers,
-                'accuracy_percentage': round((correct_count / total_answers * 100) if total_answers else 0.0, 2)
-            })
+        status_data = warm_status(exam.id)
+        return Response({
+            'success': True,
+            'exam_id': exam.id,
+            'starts_at': exam.starts_at,
+            'warmed': status_data is not None,
+            'warm_status': status_data,
+        })
+
 
+class ExamDraftAPIView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        student_id = request.query_params.get('student_id')
+        if not student_id:
+            return Response({'success': False, 'error': 'Parameter student_id is required'}, status=400)
+        try:
+            student_id = int(student_id)
+        except ValueError:
+            return Response({'success': False, 'error': 'Parameter student_id must be an integer'}, status=400)
+        answers = get_draft_answers(pk, student_id)
         return Response({
             'success': True,
-            'exam_name': exam.name,
-            'statistics': {
-                'total_submissions': submissions.count(),
-                'average_score': avg_score,
-                'questions_statistics': question_stats
-            }
+            'exam_id': pk,
+            'student_id': student_id,
+            'answers': [
+                {'question_id': question_id, 'selected_option': option}
+                for question_id, option in sorted(answers.items())
+            ],
+        })
+
+    def put(self, request, pk):
+        """Autosave de respostas em andamento.
+
+        Recebe apenas os deltas ``answers: [{question_id, selected_option}]``
+        (``selected_option: null`` apaga a resposta). As alterações ficam no
+        buffer compartilhado e são gravadas em lote periodicamente ou na
+        submissão final (``use_draft: true`` em ``POST /submissions/``).
+        """
+        exam = get_object_or_404(Exam, pk=pk)
+        serializer = ExamDraftUpdateSerializer(data=request.data, context={'exam': exam})
+        if not serializer.is_valid():
+            return Response({'success': False, 'errors': serializer.errors}, status=400)
+        data = serializer.validated_data
+        buffer_answers(exam.id, data['student_id'], {
+            answer['question_id']: answer['selected_option'] for answer in data['answers']
         })
+        return Response({'success': True, 'saved': len(data['answers'])})
+
 
+class ExamStatisticsAPIView(ReplicaReadMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        """Estatísticas do exame com consultas agrupadas (ver ``exam.queries``).
 
-class SubmissionsAPIView(APIView):
+        Considera respostas em linhas de ``SubmissionAnswer``, as gravadas no
+        modo compacto (``packed_answers``) e as de submissões arquivadas.
+        O payload fica no cache compartilhado (``exam.caching``) até a próxima
+        submissão do exame ou por ``EXAM_STATISTICS_CACHE_SECONDS``.
+        """
+        return Response(exam_statistics(pk))
+
+
+class SubmissionsAPIView(ReplicaReadMixin, SerializerTimingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
+    def get_throttles(self):
+        if self.request.method == 'POST':
+            return [GradingQueueDepthThrottle(), StudentSubmissionThrottle(), GlobalSubmissionThrottle()]
+        return super().get_throttles()
+
     def get(self, request):
-        qs = ExamSubmission.objects.select_related('student', 'exam').prefetch_related('answers__question__alternatives')
+        qs = ExamSubmission.objects.active().select_related('student', 'exam').prefetch_related('answers')
         student = request.query_params.get('student') or request.query_params.get('student_id')
         exam = request.query_params.get('exam') or request.query_params.get('exam_id')
         student_name = request.query_params.get('student_name')
@@ -121,7 +197,7 @@ class SubmissionsAPIView(APIView):
             qs = qs.filter(student__name__icontains=student_name)
         qs = qs.order_by('-submitted_at')
         serializer = ExamResultSerializer(qs, many=True)
-        return Response({'success': True, 'count': qs.count(), 'results': serializer.data})
+        return Response({'success': True, 'count': qs.count(), 'results': self.serializer_data(serializer)})
 
     def post(self, request):
         """Processa submissão de exame de forma assíncrona.
@@ -134,11 +210,14 @@ class SubmissionsAPIView(APIView):
         Respostas:
         - 202 Accepted: {'task_id': <str>, ...}
         - 400 Bad Request: erros de validação.
+        - 429 Too Many Requests / 503 Service Unavailable (com Retry-After):
+          controle de admissão, ver ``exam.throttling``.
         """
         serializer = ExamSubmissionCreateSerializer(data=request.data)
         if not serializer.is_valid():
             return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         payload = serializer.validated_data
+        pin_to_primary(payload['student_id'])
         task = process_exam_submission.delay(payload)
         return Response({
             'success': True,
@@ -151,6 +230,7 @@ class SubmissionsAPIView(APIView):
 
 class SubmissionStatusAPIView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [SubmissionStatusThrottle]
 
     def get(self, request):
         task_id = request.query_params.get('task_id')
@@ -168,76 +248,127 @@ class SubmissionStatusAPIView(APIView):
         return Response({'success': True, 'task': data}, status=202)
 
 
-class SubmissionDetailAPIView(APIView):
+class SubmissionDetailAPIView(SerializerTimingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, pk):
         submission = get_object_or_404(
-            ExamSubmission.objects.select_related('student', 'exam').prefetch_related('answers__question__alternatives'),
+            ExamSubmission.objects.active().select_related('student', 'exam').prefetch_related('answers'),
             pk=pk
         )
         serializer = ExamResultSerializer(submission)
-        return Response({'success': True, 'results': serializer.data})
+        return Response({'success': True, 'results': self.serializer_data(serializer)})
 
 
-class StudentSubmissionsAPIView(APIView):
+class StudentSubmissionsAPIView(ReplicaReadMixin, SerializerTimingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         student_id = request.query_params.get('student_id')
         if not student_id:
             return Response({'success': False, 'error': 'Parameter student_id is required'}, status=400)
-        qs = ExamSubmission.objects.select_related('student', 'exam').prefetch_related('answers__question__alternatives').filter(student_id=student_id)
-        serializer = ExamResultSerializer(qs, many=True)
-        avg = round(sum(s.score for s in qs) / qs.count(), 2) if qs.exists() else 0.0
+        qs = (
+            ExamSubmission.objects.active()
+            .select_related('student', 'exam')
+            .prefetch_related('answers')
+            .filter(student_id=student_id)
+        )
+        # Serializa primeiro: carrega as estruturas de todos os exames de uma vez
+        # (ver ExamResultListSerializer), usadas também por ``score``.
+        submissions = self.serializer_data(ExamResultSerializer(qs, many=True))
+        avg = round(sum(s.score for s in qs) / len(qs), 2) if qs else 0.0
         return Response({
             'success': True,
             'student_id': str(student_id),
-            'total_submissions': qs.count(),
+            'total_submissions': len(qs),
             'average_score': avg,
-            'submissions': serializer.data
+            'submissions': submissions
         })
 
 
-class StudentExamResultsAPIView(APIView):
+class StudentExamResultsAPIView(SerializerTimingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, student_id, exam_id):
         try:
-            submission = ExamSubmission.objects.select_related('student', 'exam').prefetch_related('answers__question__alternatives').get(
+            submission = ExamSubmission.objects.active().select_related('student', 'exam').prefetch_related('answers').get(
                 student_id=student_id, exam_id=exam_id
             )
         except ExamSubmission.DoesNotExist:
             return Response({'success': False, 'error': 'Submissão não encontrada para este estudante e exame'}, status=404)
         serializer = ExamResultSerializer(submission)
-        return Response({'success': True, 'results': serializer.data})
+        return Response({'success': True, 'results': self.serializer_data(serializer)})
 
 
-class SubmissionDetailedAnalysisAPIView(APIView):
+class SubmissionDetailedAnalysisAPIView(ReplicaReadMixin, SerializerTimingMixin, APIView):
     permission_classes = [permissions.AllowAny]
+    submission_kwarg = 'pk'
 
     def get(self, request, pk):
         submission = get_object_or_404(
-            ExamSubmission.objects.select_related('student', 'exam'),
+            ExamSubmission.objects.active().select_related('student', 'exam').prefetch_related('answers'),
             pk=pk
         )
-        exam = submission.exam
-        other_submissions = ExamSubmission.objects.filter(exam=exam).exclude(id=submission.id)
-        if other_submissions.exists():
-            avg_score = other_submissions.aggregate(avg=Avg('score'))['avg']
-            better_than = other_submissions.filter(score__lt=submission.score).count()
-            total_others = other_submissions.count()
-            percentile = round((better_than / total_others * 100) if total_others > 0 else 0, 2)
+        score = submission.score
+        others = ExamSubmission.objects.filter(exam=submission.exam).exclude(id=submission.id).aggregate(
+            total=Count('id'),
+            avg=Avg('graded_score'),
+            better_than=Count('id', filter=Q(graded_score__lt=score)),
+        )
+        if others['total']:
+            avg_score = others['avg']
+            percentile = round(others['better_than'] / others['total'] * 100, 2)
         else:
-            avg_score = submission.score
+            avg_score = score
             percentile = 100
         return Response({
             'success': True,
-            'submission': ExamResultSerializer(submission).data,
+            'submission': self.serializer_data(ExamResultSerializer(submission)),
             'comparison': {
                 'exam_average_score': round(avg_score or 0, 2),
-                'your_score': submission.score,
+                'your_score': score,
                 'percentile': percentile,
-                'total_submissions': other_submissions.count() + 1
+                'total_submissions': others['total'] + 1
             }
         })
+
+
+class QuestionBankImportAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        """Importação em lote do banco de questões a partir de um arquivo enviado.
+
+        Mesmo fluxo do comando ``import_question_bank``: leitura em streaming,
+        validação em memória e ``bulk_create`` em blocos. Com ``resume=true`` o
+        arquivo (identificado pelo SHA-256) continua de onde a última
+        importação incompleta parou.
+        """
+        serializer = QuestionBankImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'success': False, 'errors': serializer.errors}, status=400)
+        data = serializer.validated_data
+        upload = data['file']
+        try:
+            fmt = data.get('format') or detect_format(upload.name)
+        except ImportValidationError as exc:
+            return Response({'success': False, 'errors': {'format': [str(exc)]}}, status=400)
+
+        stream = upload.open('rb')
+        job = start_import(upload.name, file_checksum(stream), resume=data['resume'])
+        importer = QuestionBankImporter(
+            job,
+            chunk_size=data['chunk_size'],
+            skip_invalid=data['skip_invalid'],
+            dedupe=not data['allow_duplicates'],
+        )
+        try:
+            report = importer.run(iter_records(stream, fmt))
+        except ImportValidationError as exc:
+            return Response({
+                'success': False,
+                'import_id': job.id,
+                'records_processed': job.records_processed,
+                'errors': {'file': [str(exc)]},
+            }, status=400)
+        return Response({'success': True, 'report': report}, status=201)
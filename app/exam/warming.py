@@ -0,0 +1,84 @@
+"""
+Pré-aquecimento dos caches de um exame antes da abertura.
+
+``warm_exam`` grava no cache compartilhado tudo o que o primeiro minuto de
+prova vai pedir: a estrutura do exame (``exam.structure``, que já inclui o
+gabarito e os ids usados na validação das submissões) e o payload renderizado
+de ``GET /exams/<pk>/``. Ao final grava um status com os tempos de cada etapa
+no mesmo namespace da estrutura, então qualquer alteração no exame também
+marca o aquecimento como pendente.
+
+O comando ``warm_exam_caches`` e a task ``warm_upcoming_exam_caches``
+(Celery beat) usam estas funções.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from utils.cache import get_or_compute, namespaced_key
+
+from .models import Exam, ExamSubmission
+from .structure import get_exam_structure, invalidate_exam_structure, structure_namespace
+
+def cached_exam_detail(exam):
+    """Payload de ``ExamDetailSerializer``; só ``total_submissions`` é consultado a cada chamada."""
+    # Import tardio: o worker só carrega o DRF se realmente aquecer um exame (ver utils.startup)
+    from .serializers import ExamDetailSerializer
+
+    def render():
+        serializer = ExamDetailSerializer(exam)
+        return {
+            'id': exam.id,
+            'name': exam.name,
+            'questions': serializer.get_questions(exam),
+            'total_questions': serializer.get_total_questions(exam),
+        }
+
+    payload = get_or_compute(
+        'detail', render, timeout=settings.EXAM_STRUCTURE_CACHE_SECONDS, namespace=structure_namespace(exam.id)
+    )
+    return {**payload, 'total_submissions': ExamSubmission.objects.filter(exam_id=exam.id).count()}
+
+
+def _status_key(exam_id):
+    return namespaced_key(structure_namespace(exam_id), 'warm-status')
+
+
+def warm_exam(exam, force=False):
+    """Aquece os caches de ``exam`` e devolve o status gravado (tempos em ms)."""
+    if force:
+        invalidate_exam_structure(exam.id)
+    timings = {}
+
+    started = time.monotonic()
+    structure = get_exam_structure(exam.id)
+    timings['structure'] = round((time.monotonic() - started) * 1000, 2)
+
+    started = time.monotonic()
+    cached_exam_detail(exam)
+    timings['detail'] = round((time.monotonic() - started) * 1000, 2)
+
+    status = {
+        'exam_id': exam.id,
+        'version': structure.version,
+        'questions': len(structure.questions),
+        'warmed_at': timezone.now().isoformat(),
+        'timings_ms': timings,
+    }
+    cache.set(_status_key(exam.id), status, settings.EXAM_STRUCTURE_CACHE_SECONDS)
+    return status
+
+
+def warm_status(exam_id):
+    """Status do último aquecimento ainda válido do exame, ou ``None``."""
+    return cache.get(_status_key(exam_id))
+
+
+def upcoming_exams(minutes=None, now=None):
+    """Exames com ``starts_at`` entre agora e os próximos ``minutes`` minutos."""
+    now = now or timezone.now()
+    minutes = settings.EXAM_WARM_AHEAD_MINUTES if minutes is None else minutes
+    return Exam.objects.filter(starts_at__gte=now, starts_at__lte=now + timedelta(minutes=minutes)).order_by('starts_at')
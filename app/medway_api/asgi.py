@@ -3,6 +3,11 @@ ASGI config for medway_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Async views (e.g. ``/api/exam/submissions/status/stream/``) should be served
+through this entry point so long-lived connections don't pin a worker thread:
+
+    uvicorn medway_api.asgi:application --host 0.0.0.0 --port 8000
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -1,9 +1,21 @@
+import logging
 import os
 from celery import Celery
+from celery.signals import celeryd_init, worker_process_shutdown
+from kombu import Exchange, Queue
+
+from utils.task_metrics import install_task_metrics
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medway_api.settings')
 
+# Celery's Django fixup runs every system check when a worker boots, which
+# imports the URLconf, the views and DRF only to validate them: about a fifth of
+# a worker's cold start. The checks already run on each deploy (prepare_database
+# and the web process); CELERY_WORKER_SYSTEM_CHECKS=1 runs them on workers too.
+if os.getenv('CELERY_WORKER_SYSTEM_CHECKS', '0') != '1':
+    os.environ.setdefault('CELERY_SKIP_CHECKS', '1')
+
 app = Celery('medway_api')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
@@ -16,8 +28,93 @@ if not app.conf.result_backend:
 # Reasonable defaults
 app.conf.task_acks_late = app.conf.task_acks_late if app.conf.task_acks_late is not None else True
 app.conf.worker_prefetch_multiplier = app.conf.worker_prefetch_multiplier or int(os.getenv('CELERY_WORKER_PREFETCH_MULTIPLIER', '1'))
-app.conf.task_time_limit = app.conf.task_time_limit or int(os.getenv('CELERY_TASK_TIME_LIMIT', '300'))
-app.conf.task_soft_time_limit = app.conf.task_soft_time_limit or int(os.getenv('CELERY_TASK_SOFT_TIME_LIMIT', '240'))
+
+
+def _queue_setting(queue, name, default):
+    return int(os.getenv(f'CELERY_{queue.upper()}_{name.upper()}', default))
+
+
+# Dedicated queues: latency-sensitive grading never shares workers with heavy
+# jobs (regrades, stats rebuilds, exports). Each queue runs on its own worker
+# pool (`celery worker -Q grading`, `-Q analytics,maintenance`); priority
+# orders queues for a worker that consumes several of them.
+TASK_QUEUES = {
+    queue: {
+        'priority': priority,
+        'concurrency': _queue_setting(queue, 'concurrency', concurrency),
+        'time_limit': _queue_setting(queue, 'time_limit', time_limit),
+        'soft_time_limit': _queue_setting(queue, 'soft_time_limit', soft_time_limit),
+    }
+    for queue, priority, concurrency, time_limit, soft_time_limit in [
+        ('grading', 9, 8, 60, 45),
+        ('analytics', 5, 2, 900, 840),
+        ('maintenance', 1, 1, 3600, 3540),
+    ]
+}
+
+TASK_QUEUE_BY_NAME = {
+    'exam.tasks.process_exam_submission': 'grading',
+    'exam.tasks.flush_exam_drafts': 'maintenance',
+    'exam.tasks.purge_deleted_exam': 'maintenance',
+    'exam.tasks.warm_upcoming_exam_caches': 'analytics',
+    'medway_api.celery.debug_task': 'maintenance',
+}
+
+app.conf.task_queues = [
+    Queue(name, Exchange(name), routing_key=name, queue_arguments={'x-max-priority': 10})
+    for name in sorted(TASK_QUEUES, key=lambda queue: -TASK_QUEUES[queue]['priority'])
+]
+app.conf.task_default_queue = 'analytics'
+app.conf.task_default_exchange = 'analytics'
+app.conf.task_default_routing_key = 'analytics'
+app.conf.task_routes = {
+    task_name: {'queue': queue, 'routing_key': queue, 'priority': TASK_QUEUES[queue]['priority']}
+    for task_name, queue in TASK_QUEUE_BY_NAME.items()
+}
+app.conf.broker_transport_options = {
+    'priority_steps': list(range(10)),
+    'queue_order_strategy': 'priority',
+    **(app.conf.broker_transport_options or {}),
+}
+
+
+class QueueTimeLimits:
+    """Task annotations applying the time limits of the queue each task is routed to."""
+
+    def annotate(self, task):
+        queue = TASK_QUEUE_BY_NAME.get(task.name, app.conf.task_default_queue)
+        limits = TASK_QUEUES[queue]
+        return {'time_limit': limits['time_limit'], 'soft_time_limit': limits['soft_time_limit']}
+
+
+app.conf.task_annotations = [QueueTimeLimits()]
+
+
+@celeryd_init.connect
+def apply_queue_concurrency(sender=None, conf=None, options=None, **kwargs):
+    """Use the configured concurrency of the queue a worker is dedicated to.
+
+    Only applies when the worker consumes a single known queue and `-c` was
+    not given on the command line.
+    """
+    queues = (options or {}).get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    if len(queues) == 1 and queues[0] in TASK_QUEUES and not options.get('concurrency'):
+        conf.worker_concurrency = TASK_QUEUES[queues[0]]['concurrency']
+
+
+@worker_process_shutdown.connect
+def log_db_pool_stats(**kwargs):
+    """Log the connection pool metrics of a worker child, to help size DB_POOL_MAX_SIZE."""
+    from utils.db.pool import pool_stats
+
+    for alias, stats in pool_stats().items():
+        logging.getLogger(__name__).info('DB pool %s: %s', alias, stats)
+
+
+# Queue wait, run time, queries, retries and outcomes of every task (utils.task_metrics)
+install_task_metrics()
 
 app.autodiscover_tasks()
 
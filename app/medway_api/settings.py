@@ -53,6 +53,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "utils.middleware.RequestMetricsMiddleware",
+    "utils.middleware.RequestProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "medway_api.urls"
@@ -80,25 +82,59 @@ WSGI_APPLICATION = "medway_api.wsgi.application"
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
 # Database
+# Persistent connections (CONN_MAX_AGE seconds, checked before reuse) by
+# default; with DB_POOL_ENABLED=1 each process (web or Celery worker) keeps an
+# in-process pool instead and Django gives connections back to it after every
+# request/task. Pool metrics: GET /api/ops/db-pool/.
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', '0') == '1'
+
 if os.environ.get('USE_DOCKER'):
     DATABASES = {
         "default": {
-            'ENGINE': "django.db.backends.postgresql",
+            'ENGINE': "utils.db.backends.postgresql" if DB_POOL_ENABLED else "django.db.backends.postgresql",
             'NAME': os.environ.get("POSTGRES_DB", "teste"),
             'USER': os.environ.get("POSTGRES_USER"),
             'PASSWORD': os.environ.get("POSTGRES_PASSWORD"),
             'HOST': os.environ.get('POSTGRES_HOST', 'db'),
             'PORT': os.environ.get("POSTGRES_PORT", "5432"),
+            'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
+            'POOL': {
+                'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                'MAX_IDLE': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                'HEALTH_CHECK': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
+            },
         }
     }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
         }
     }
 
+# Read replica (``replica`` alias) for statistics, listings and exports. Set
+# POSTGRES_REPLICA_HOST in Docker, or SQLITE_REPLICA_PATH to try it locally
+# with a second SQLite file. See ``utils.db.routers``.
+if os.environ.get('USE_DOCKER') and os.getenv('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+    }
+elif not os.environ.get('USE_DOCKER') and os.getenv('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SQLITE_REPLICA_PATH'],
+    }
+
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '15'))
+DATABASE_ROUTERS = ['utils.db.routers.ReplicaRouter']
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -151,3 +187,211 @@ REST_FRAMEWORK = {
 
 AUTH_USER_MODEL = 'student.Student'
 
+# Armazenamento das respostas: 'rows' (uma linha de SubmissionAnswer por questão)
+# ou 'packed' (array compacto em ExamSubmission.packed_answers, ver exam.packing)
+SUBMISSION_ANSWER_STORAGE = os.getenv('SUBMISSION_ANSWER_STORAGE', 'rows')
+
+# Arquivamento (COLD) de submissões antigas: arquivos NDJSON + gzip no storage
+# 'archive' (disco local por padrão; qualquer backend de storage, ex. S3 do
+# django-storages, via SUBMISSION_ARCHIVE_STORAGE_BACKEND). Ver exam.archive.
+SUBMISSION_ARCHIVE_STORAGE_BACKEND = os.getenv(
+    'SUBMISSION_ARCHIVE_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'
+)
+SUBMISSION_ARCHIVE_ROOT = os.getenv('SUBMISSION_ARCHIVE_ROOT', str(BASE_DIR / 'archive'))
+SUBMISSION_ARCHIVE_BUCKET = os.getenv('SUBMISSION_ARCHIVE_BUCKET', '')
+SUBMISSION_ARCHIVE_AFTER_DAYS = int(os.getenv('SUBMISSION_ARCHIVE_AFTER_DAYS', '365'))
+SUBMISSION_ARCHIVE_BATCH_SIZE = int(os.getenv('SUBMISSION_ARCHIVE_BATCH_SIZE', '5000'))
+SUBMISSION_ARCHIVE_CACHE_SIZE = int(os.getenv('SUBMISSION_ARCHIVE_CACHE_SIZE', '32'))
+
+# Perfis de requisições (utils.profiling): disco local por padrão, qualquer
+# backend de storage via REQUEST_PROFILING_STORAGE_BACKEND (ex. S3 para juntar
+# os perfis de todos os hosts).
+REQUEST_PROFILING_STORAGE_BACKEND = os.getenv(
+    'REQUEST_PROFILING_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'
+)
+REQUEST_PROFILING_ROOT = os.getenv('REQUEST_PROFILING_ROOT', str(BASE_DIR / 'profiles'))
+REQUEST_PROFILING_BUCKET = os.getenv('REQUEST_PROFILING_BUCKET', '')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'archive': {
+        'BACKEND': SUBMISSION_ARCHIVE_STORAGE_BACKEND,
+        'OPTIONS': (
+            {'bucket_name': SUBMISSION_ARCHIVE_BUCKET, 'location': 'archive'}
+            if SUBMISSION_ARCHIVE_BUCKET else {'location': SUBMISSION_ARCHIVE_ROOT}
+        ),
+    },
+    'profiles': {
+        'BACKEND': REQUEST_PROFILING_STORAGE_BACKEND,
+        'OPTIONS': (
+            {'bucket_name': REQUEST_PROFILING_BUCKET, 'location': 'profiles'}
+            if REQUEST_PROFILING_BUCKET else {'location': REQUEST_PROFILING_ROOT}
+        ),
+    },
+}
+
+# Notificação de conclusão das submissões (SSE / long-poll em /submissions/status/stream/)
+SUBMISSION_NOTIFY_BACKEND = os.getenv('SUBMISSION_NOTIFY_BACKEND', 'redis')
+SUBMISSION_NOTIFY_REDIS_URL = os.getenv('REDIS_URL', os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0'))
+SUBMISSION_NOTIFY_RESULT_TTL = int(os.getenv('SUBMISSION_NOTIFY_RESULT_TTL', '600'))
+SUBMISSION_STREAM_TIMEOUT = 30
+SUBMISSION_STREAM_MAX_TIMEOUT = 120
+SUBMISSION_STREAM_HEARTBEAT = 15
+
+# Cache compartilhado entre processos web e workers (Redis do Celery quando
+# disponível; locmem só serve para um processo). Chaves com prefixo e versão
+# globais (CACHE_VERSION invalida tudo após um deploy que mude os payloads);
+# namespaces e get_or_compute em utils.cache.
+_CACHE_REDIS_URL = os.getenv('REDIS_URL') or os.getenv('CELERY_BROKER_URL', '')
+CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', '300'))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': _CACHE_REDIS_URL,
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'medway'),
+        'VERSION': int(os.getenv('CACHE_VERSION', '1')),
+        'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+    } if _CACHE_REDIS_URL.startswith('redis') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+    }
+}
+# get_or_compute: peso da expiração antecipada, validade do lock de cálculo e
+# quanto tempo os demais processos esperam pelo valor antes de calcular também.
+CACHE_EARLY_EXPIRATION_BETA = float(os.getenv('CACHE_EARLY_EXPIRATION_BETA', '1.0'))
+CACHE_COMPUTE_LOCK_TIMEOUT = int(os.getenv('CACHE_COMPUTE_LOCK_TIMEOUT', '30'))
+CACHE_COMPUTE_WAIT = float(os.getenv('CACHE_COMPUTE_WAIT', '5'))
+
+# Estatísticas de exame em cache (invalidadas a cada nova submissão do exame)
+EXAM_STATISTICS_CACHE_SECONDS = int(os.getenv('EXAM_STATISTICS_CACHE_SECONDS', '60'))
+
+# Estrutura dos exames (questões e alternativas) usada pelos serializers:
+# LRU por processo com EXAM_STRUCTURE_CACHE_SIZE exames + cache compartilhado.
+# Ver exam.structure; invalidada por sinais quando o conteúdo muda.
+EXAM_STRUCTURE_CACHE_SIZE = int(os.getenv('EXAM_STRUCTURE_CACHE_SIZE', '256'))
+EXAM_STRUCTURE_CACHE_SECONDS = int(os.getenv('EXAM_STRUCTURE_CACHE_SECONDS', str(24 * 60 * 60)))
+
+# Pré-aquecimento (exam.warming): a cada EXAM_WARM_INTERVAL segundos o beat
+# aquece os exames com starts_at nos próximos EXAM_WARM_AHEAD_MINUTES minutos.
+EXAM_WARM_AHEAD_MINUTES = int(os.getenv('EXAM_WARM_AHEAD_MINUTES', '15'))
+EXAM_WARM_INTERVAL = int(os.getenv('EXAM_WARM_INTERVAL', '60'))
+
+# Autosave de rascunhos: buffer no cache compartilhado e flush periódico em lote
+EXAM_DRAFT_BUFFER_TTL = int(os.getenv('EXAM_DRAFT_BUFFER_TTL', str(6 * 60 * 60)))
+EXAM_DRAFT_FLUSH_INTERVAL = int(os.getenv('EXAM_DRAFT_FLUSH_INTERVAL', '30'))
+
+# Exclusão de exames: soft delete imediato + remoção em blocos pela task purge_deleted_exam
+EXAM_PURGE_CHUNK_SIZE = int(os.getenv('EXAM_PURGE_CHUNK_SIZE', '5000'))
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-exam-drafts': {
+        'task': 'exam.tasks.flush_exam_drafts',
+        'schedule': EXAM_DRAFT_FLUSH_INTERVAL,
+    },
+    'warm-upcoming-exam-caches': {
+        'task': 'exam.tasks.warm_upcoming_exam_caches',
+        'schedule': EXAM_WARM_INTERVAL,
+    },
+}
+
+# Sem Redis (ex.: teste de carga local com simulate_exam_sitting): a correção
+# roda no próprio processo web, com broker, resultados e notificações em memória.
+if os.getenv('CELERY_TASK_ALWAYS_EAGER') == '1':
+    CELERY_TASK_ALWAYS_EAGER = True
+    CELERY_TASK_STORE_EAGER_RESULT = True
+    CELERY_BROKER_URL = 'memory://'
+    CELERY_RESULT_BACKEND = 'cache+memory://'
+    SUBMISSION_NOTIFY_BACKEND = 'memory'
+
+# Controle de admissão em POST /submissions/ e GET /submissions/status/ (exam.throttling).
+# Taxas em tokens por segundo; BURST é a capacidade do bucket.
+SUBMISSION_ADMISSION = {
+    'ENABLED': os.getenv('SUBMISSION_ADMISSION_ENABLED', '1') == '1',
+    'STUDENT_RATE': float(os.getenv('SUBMISSION_STUDENT_RATE', '0.2')),
+    'STUDENT_BURST': int(os.getenv('SUBMISSION_STUDENT_BURST', '3')),
+    'GLOBAL_RATE': float(os.getenv('SUBMISSION_GLOBAL_RATE', '200')),
+    'GLOBAL_BURST': int(os.getenv('SUBMISSION_GLOBAL_BURST', '1000')),
+    'STATUS_RATE': float(os.getenv('SUBMISSION_STATUS_RATE', '2')),
+    'STATUS_BURST': int(os.getenv('SUBMISSION_STATUS_BURST', '10')),
+    'MAX_QUEUE_DEPTH': int(os.getenv('SUBMISSION_MAX_QUEUE_DEPTH', '5000')),
+    'QUEUE_DEPTH_CACHE_SECONDS': 1,
+    'QUEUE_RETRY_AFTER': 5,
+}
+
+# Métricas por endpoint (utils.middleware / utils.metrics) expostas em /metrics.
+# Budgets: máximo de consultas por requisição para cada nome de URL; acima dele
+# um warning lista as SQL agrupadas por fingerprint. None desativa o budget.
+# Os valores são contagens medidas com caches frios; test_query_scaling falha
+# quando uma rota passa do seu budget.
+REQUEST_METRICS = {
+    'ENABLED': os.getenv('REQUEST_METRICS_ENABLED', '1') == '1',
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+    'DEFAULT_QUERY_BUDGET': int(os.getenv('DEFAULT_QUERY_BUDGET', '20')),
+    'QUERY_BUDGETS': {
+        'exams-list-create': 4,
+        'exams-detail': 5,
+        'exams-statistics': 10,
+        'exams-draft': 6,
+        'submissions-list-create': 12,
+        'submissions-status': 4,
+        'submissions-detail': 6,
+        'exam-results': 6,
+        'submissions-student': 6,
+        'submissions-detailed-analysis': 6,
+        'submissions-student-exam': 6,
+        'question-bank-import': None,
+    },
+}
+
+# Profiling sob demanda (utils.profiling): desligado por padrão (o middleware
+# sai da cadeia). Com ele ligado, perfila requisições com header X-Profile
+# assinado (`python manage.py profile_token`) ou uma amostra de SAMPLE_RATE.
+REQUEST_PROFILING = {
+    'ENABLED': os.getenv('REQUEST_PROFILING_ENABLED', '0') == '1',
+    'HEADER': 'X-Profile',
+    'SECRET': os.getenv('REQUEST_PROFILING_SECRET', ''),
+    'TOKEN_MAX_AGE': int(os.getenv('REQUEST_PROFILING_TOKEN_MAX_AGE', '3600')),
+    'SAMPLE_RATE': float(os.getenv('REQUEST_PROFILING_SAMPLE_RATE', '0')),
+    'SAMPLE_INTERVAL': float(os.getenv('REQUEST_PROFILING_SAMPLE_INTERVAL', '0.005')),
+    'MAX_PROFILES': int(os.getenv('REQUEST_PROFILING_MAX_PROFILES', '200')),
+}
+
+# Log de consultas lentas (utils.slow_queries): consultas acima de THRESHOLD_MS
+# vão, com fingerprint, ponto de chamada e plano (EXPLAIN), para um arquivo
+# JSON rotativo; `python manage.py slow_queries` mostra o top N. EXPLAIN ANALYZE
+# (PostgreSQL) executa a consulta de novo, por isso só em uma amostra.
+SLOW_QUERY_LOG = {
+    'ENABLED': os.getenv('SLOW_QUERY_LOG_ENABLED', '1') == '1',
+    'THRESHOLD_MS': float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200')),
+    'EXPLAIN': os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1',
+    'EXPLAIN_ANALYZE_SAMPLE_RATE': float(os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE_SAMPLE_RATE', '0.1')),
+    'EXPLAIN_INTERVAL_SECONDS': int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', '300')),
+    'FILE': os.getenv('SLOW_QUERY_LOG_FILE', str(BASE_DIR / 'logs' / 'slow_queries.log')),
+    'MAX_BYTES': int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+    'BACKUP_COUNT': int(os.getenv('SLOW_QUERY_LOG_BACKUP_COUNT', '5')),
+}
+
+# Telemetria das tasks do Celery (utils.task_metrics): espera na fila, duração,
+# consultas, retries e resultado por task e exame. Cada processo publica um
+# snapshot no cache compartilhado a cada FLUSH_SECONDS; /metrics soma os
+# processos vivos e o comando task_metrics resume os últimos minutos.
+TASK_METRICS = {
+    'ENABLED': os.getenv('TASK_METRICS_ENABLED', '1') == '1',
+    'FLUSH_SECONDS': float(os.getenv('TASK_METRICS_FLUSH_SECONDS', '10')),
+    'WINDOW_MINUTES': int(os.getenv('TASK_METRICS_WINDOW_MINUTES', '60')),
+}
+
+# Inicialização (utils.startup): espera pelo banco com backoff exponencial
+# (wait_for_postgres / prepare_database, até DB_WAIT_TIMEOUT segundos, pausas de
+# no máximo DB_WAIT_MAX_DELAY) e orçamento, em segundos, do boot de um processo
+# web (settings, middlewares e URLs) e de um worker (settings e tasks),
+# verificado por `python manage.py startup_report --check` e test_startup.py.
+STARTUP = {
+    'DB_WAIT_TIMEOUT': float(os.getenv('DB_WAIT_TIMEOUT', '60')),
+    'DB_WAIT_MAX_DELAY': float(os.getenv('DB_WAIT_MAX_DELAY', '5')),
+    'BUDGET_SECONDS': {
+        'web': float(os.getenv('STARTUP_BUDGET_WEB_SECONDS', '2.5')),
+        'worker': float(os.getenv('STARTUP_BUDGET_WORKER_SECONDS', '2')),
+    },
+}
@@ -17,7 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from utils.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/exam/", include('exam.urls')),
+    path("api/ops/", include('utils.urls')),
+    path("metrics", metrics_view, name="metrics"),
 ]
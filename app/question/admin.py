@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.forms.models import BaseInlineFormSet
 from django.core.exceptions import ValidationError
 
+from question.dedup import content_hash
 from question.models import Question, Alternative
 
 
@@ -13,6 +14,7 @@ class AlternativeInlineFormSet(BaseInlineFormSet):
         super().clean()
         if not hasattr(self, 'instance') or not self.instance:
             return
+        self._check_duplicate()
         if self.instance.selection_type == QuestiosTypeChoices.SINGLE:
             correct_count = 0
             for form in self.forms:
@@ -26,6 +28,26 @@ class AlternativeInlineFormSet(BaseInlineFormSet):
             if correct_count > 1:
                 raise ValidationError('Questões de escolha única só podem ter uma alternativa correta.')
 
+    def _check_duplicate(self):
+        alternatives = [
+            form.cleaned_data['content']
+            for form in self.forms
+            if getattr(form, 'cleaned_data', None)
+            and not form.cleaned_data.get('DELETE')
+            and form.cleaned_data.get('content')
+        ]
+        duplicates = list(
+            Question.objects
+            .filter(content_hash=content_hash(self.instance.content, alternatives))
+            .exclude(pk=self.instance.pk)
+            .values_list('pk', flat=True)[:5]
+        )
+        if duplicates:
+            raise ValidationError(
+                'Já existe uma questão com o mesmo enunciado e alternativas (id %s).'
+                % ', '.join(str(pk) for pk in duplicates)
+            )
+
 
 class AlternativeInline(admin.TabularInline):
     model = Alternative
@@ -38,3 +60,11 @@ class AlternativeInline(admin.TabularInline):
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     inlines = [AlternativeInline]
+    list_display = ('id', '__str__', 'selection_type', 'content_hash')
+    search_fields = ('content', '=content_hash')
+    readonly_fields = ('content_hash',)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Um único recálculo depois de salvar todas as alternativas do inline.
+        form.instance.refresh_content_hash()
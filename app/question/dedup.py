@@ -0,0 +1,159 @@
+"""
+Detecção de questões duplicadas no banco.
+
+Duplicatas exatas: ``content_hash`` é o SHA-256 do enunciado e das
+alternativas normalizados (sem diferença de maiúsculas, acentos e espaços;
+alternativas em qualquer ordem). Fica indexado em ``Question`` e é conferido
+na importação em lote e no admin.
+
+Quase-duplicatas: ``minhash_signature`` resume os shingles (trigramas de
+palavras) de uma questão em ``NUM_PERM`` valores de 32 bits usando *one
+permutation hashing* com densificação — um único hash por shingle em vez de um
+por permutação. ``find_similar_groups`` aplica LSH por bandas: para cada banda
+os ids são ordenados pelo hash da banda e só vizinhos com o mesmo hash viram
+candidatos, que são confirmados pela similaridade estimada das assinaturas.
+Custo O(bandas · n log n) e memória O(n · NUM_PERM), sem comparar todos os
+pares.
+"""
+import functools
+import hashlib
+import operator
+import random
+import re
+import unicodedata
+from array import array
+
+NUM_PERM = 64
+BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+_WHITESPACE = re.compile(r'\s+')
+_WORD = re.compile(r'\w+')
+_MASK32 = 0xFFFFFFFF
+_EMPTY = _MASK32 + 1
+
+
+def normalize_text(text):
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _WHITESPACE.sub(' ', stripped.casefold()).strip()
+
+
+def content_hash(content, alternatives):
+    """Hash normalizado do enunciado e dos textos das alternativas (ordem irrelevante)."""
+    parts = [normalize_text(content)]
+    parts.extend(sorted(normalize_text(alternative) for alternative in alternatives))
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+def shingles(content, alternatives):
+    texts = [normalize_text(content), *sorted(normalize_text(alternative) for alternative in alternatives)]
+    words = _WORD.findall(' '.join(texts))
+    if len(words) <= SHINGLE_SIZE:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+@functools.lru_cache(maxsize=None)
+def _donor_sequences(num_perm):
+    generator = random.Random(num_perm)
+    return tuple(tuple(generator.sample(range(num_perm), num_perm)) for _ in range(num_perm))
+
+
+def minhash_signature(content, alternatives, num_perm=NUM_PERM):
+    """Assinatura MinHash (``array('I')`` com ``num_perm`` valores) de uma questão."""
+    bins = [_EMPTY] * num_perm
+    for shingle in shingles(content, alternatives):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        index = value % num_perm
+        value = (value // num_perm) & _MASK32
+        if value < bins[index]:
+            bins[index] = value
+
+    # Densificação: cada bin vazio copia o valor de um bin preenchido, escolhido
+    # por uma sequência pseudoaleatória fixa por posição. Questões parecidas
+    # continuam com os mesmos valores nas mesmas posições, e bins vazios de
+    # questões diferentes não copiam sempre o mesmo vizinho.
+    if all(value == _EMPTY for value in bins):
+        return array('I', [0] * num_perm)
+    original = bins[:]
+    for index, donors in enumerate(_donor_sequences(num_perm)):
+        if original[index] == _EMPTY:
+            bins[index] = next(original[donor] for donor in donors if original[donor] != _EMPTY)
+    return array('I', bins)
+
+
+def estimated_similarity(signatures, num_perm, first, second):
+    """Fração de posições iguais nas assinaturas das linhas ``first`` e ``second``."""
+    a = signatures[first * num_perm:(first + 1) * num_perm]
+    b = signatures[second * num_perm:(second + 1) * num_perm]
+    return sum(map(operator.eq, a, b)) / num_perm
+
+
+class SignatureIndex:
+    """Assinaturas de muitas questões em um único ``array('I')`` contíguo."""
+
+    def __init__(self, num_perm=NUM_PERM):
+        self.num_perm = num_perm
+        self.ids = array('q')
+        self.signatures = array('I')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, question_id, content, alternatives):
+        self.ids.append(question_id)
+        self.signatures.extend(minhash_signature(content, alternatives, self.num_perm))
+
+
+def find_similar_groups(index, bands=BANDS, threshold=DEFAULT_THRESHOLD):
+    """
+    Agrupa as questões do ``index`` com similaridade estimada >= ``threshold``.
+
+    Retorna listas de ids (mais de um por grupo), cada uma ordenada, em ordem do
+    menor id.
+    """
+    num_perm = index.num_perm
+    if num_perm % bands:
+        raise ValueError(f'num_perm ({num_perm}) deve ser múltiplo de bands ({bands})')
+    rows = num_perm // bands
+    count = len(index)
+    parent = list(range(count))
+
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    signatures = index.signatures
+    for band in range(bands):
+        offset = band * rows
+        keys = [hash(tuple(signatures[row * num_perm + offset:row * num_perm + offset + rows])) for row in range(count)]
+        order = sorted(range(count), key=keys.__getitem__)
+        start = 0
+        for position in range(1, count + 1):
+            if position < count and keys[order[position]] == keys[order[start]]:
+                continue
+            bucket = order[start:position]
+            start = position
+            # Compara cada linha só com um representante de cada grupo já
+            # visto no bucket: duplicatas exatas em massa ficam O(k).
+            representatives = [bucket[0]]
+            for row in bucket[1:]:
+                for representative in representatives:
+                    if find(representative) == find(row):
+                        break
+                    if estimated_similarity(signatures, num_perm, representative, row) >= threshold:
+                        parent[find(row)] = find(representative)
+                        break
+                else:
+                    representatives.append(row)
+        del keys, order
+
+    groups = {}
+    for row in range(count):
+        groups.setdefault(find(row), []).append(index.ids[row])
+    return sorted((sorted(ids) for ids in groups.values() if len(ids) > 1), key=lambda ids: ids[0])
@@ -0,0 +1,73 @@
+import json
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from question.dedup import BANDS, DEFAULT_THRESHOLD, NUM_PERM, SignatureIndex, find_similar_groups
+from question.models import Alternative, Question
+from utils.db.routers import replica_reads
+
+
+class Command(BaseCommand):
+    """
+    Command that groups near-duplicate questions (statement and alternatives)
+    with MinHash signatures and LSH banding, see ``question.dedup``. Only the
+    signatures are kept in memory (NUM_PERM 32-bit values per question), so it
+    scales to the whole bank without comparing every pair.
+
+    You can call it by terminal like this:
+    -> "python manage.py find_duplicate_questions"
+    -> "python manage.py find_duplicate_questions --threshold 0.9 --json > duplicates.jsonl"
+    """
+
+    help = 'Group near-duplicate questions using MinHash/LSH.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Minimum estimated Jaccard similarity (0-1) between grouped questions.')
+        parser.add_argument('--num-perm', type=int, default=NUM_PERM, help='Signature length.')
+        parser.add_argument('--bands', type=int, default=BANDS, help='LSH bands (must divide --num-perm).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Questions read per query.')
+        parser.add_argument('--json', action='store_true', help='Print one JSON object per group.')
+
+    def handle(self, *args, **options):
+        if not 0 < options['threshold'] <= 1:
+            raise CommandError('--threshold must be between 0 and 1')
+        if options['num_perm'] % options['bands']:
+            raise CommandError('--bands must divide --num-perm')
+
+        started = time.monotonic()
+        with replica_reads():
+            index = self._build_index(options['num_perm'], options['batch_size'])
+            groups = find_similar_groups(index, bands=options['bands'], threshold=options['threshold'])
+            previews = Question.objects.in_bulk([ids[0] for ids in groups])
+        elapsed = time.monotonic() - started
+
+        for ids in groups:
+            preview = previews[ids[0]].content if ids[0] in previews else ''
+            if options['json']:
+                self.stdout.write(json.dumps({'question_ids': ids, 'content': preview}, ensure_ascii=False))
+            else:
+                self.stdout.write(f"{len(ids)} questions {ids}: {preview[:80]!r}")
+        self.stderr.write(self.style.SUCCESS(
+            f'{len(groups)} groups of duplicates ({sum(len(ids) for ids in groups)} questions) '
+            f'among {len(index)} questions in {elapsed:.1f}s.'
+        ))
+
+    def _build_index(self, num_perm, batch_size):
+        index = SignatureIndex(num_perm)
+        last_id = 0
+        while True:
+            batch = list(
+                Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'content')[:batch_size]
+            )
+            if not batch:
+                return index
+            alternatives = {}
+            for question_id, content in Alternative.objects.filter(
+                question_id__gte=batch[0][0], question_id__lte=batch[-1][0]
+            ).values_list('question_id', 'content'):
+                alternatives.setdefault(question_id, []).append(content)
+            for question_id, content in batch:
+                index.add(question_id, content, alternatives.get(question_id, []))
+            last_id = batch[-1][0]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0004_alter_alternative_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alternative',
+            index=models.Index(condition=models.Q(('is_correct', True)), fields=['question', 'option'], name='alternative_correct_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:20
+
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    from question.dedup import content_hash
+
+    Question = apps.get_model('question', 'Question')
+    Alternative = apps.get_model('question', 'Alternative')
+    last_id, batch_size = 0, 2000
+    while True:
+        questions = list(Question.objects.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not questions:
+            break
+        alternatives = {}
+        for question_id, content in Alternative.objects.filter(
+            question_id__in=[question.id for question in questions]
+        ).values_list('question_id', 'content'):
+            alternatives.setdefault(question_id, []).append(content)
+        for question in questions:
+            question.content_hash = content_hash(question.content, alternatives.get(question.id, []))
+        Question.objects.bulk_update(questions, ['content_hash'])
+        last_id = questions[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0005_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='SHA-256 do enunciado e das alternativas normalizados (ver question.dedup).', max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
+from question.dedup import content_hash
 from question.utils import AlternativesChoices, QuestiosTypeChoices
 
 
@@ -14,10 +15,38 @@ class Question(models.Model):
         db_index=True,
         help_text='Define se a questão aceita uma única resposta ou múltiplas.'
     )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text='SHA-256 do enunciado e das alternativas normalizados (ver question.dedup).'
+    )
 
     def __str__(self):
         return self.content
 
+    def compute_content_hash(self):
+        alternatives = self.alternatives.values_list('content', flat=True) if self.pk else []
+        return content_hash(self.content, alternatives)
+
+    def refresh_content_hash(self):
+        """Recalcula o hash depois de mudanças nas alternativas.
+
+        ``Alternative.save``/``delete`` não chamam este método: quem altera as
+        alternativas recalcula uma vez por questão (ver ``QuestionAdmin.save_related``).
+        """
+        self.content_hash = self.compute_content_hash()
+        Question.objects.filter(pk=self.pk).update(content_hash=self.content_hash)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_hash'}
+        return super().save(*args, **kwargs)
+
 
 class Alternative(models.Model):
     question = models.ForeignKey(Question, related_name='alternatives', on_delete=models.CASCADE)
@@ -28,6 +57,14 @@ class Alternative(models.Model):
     class Meta:
         unique_together = ('question', 'option')
         ordering = ['option']
+        indexes = [
+            # Answer-key lookups only ever read the correct alternatives.
+            models.Index(
+                fields=['question', 'option'],
+                condition=models.Q(is_correct=True),
+                name='alternative_correct_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.question_id} - {self.get_option_display()}: {self.content[:30]}'
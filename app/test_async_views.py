@@ -0,0 +1,99 @@
+"""
+Testes das views de leitura assíncronas (ASGI)
+"""
+
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from exam.notifications import publish_submission_status
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews(APITestCase):
+    """As views em /async/ devolvem o mesmo payload das views síncronas"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Async Exam')
+        self.questions = []
+        for number in range(1, 4):
+            question = Question.objects.create(content=f'Async question {number}?')
+            for option in range(1, 5):
+                Alternative.objects.create(
+                    question=question, content=f'Alt {option}', option=option, is_correct=option == number
+                )
+            ExamQuestion.objects.create(exam=self.exam, question=question, number=number)
+            self.questions.append(question)
+
+        self.submissions = []
+        for index, selected in enumerate([[1, 2, 3], [1, 1, 1], [2, 2]]):
+            student = Student.objects.create(
+                username=f'async{index}', email=f'async{index}@example.com', name=f'Async {index}'
+            )
+            submission = ExamSubmission.objects.create(student=student, exam=self.exam)
+            for question, option in zip(self.questions, selected):
+                SubmissionAnswer.objects.create(
+                    submission=submission, question=question, selected_alternative_option=option
+                )
+            self.submissions.append(submission)
+
+    def _async_get(self, url, data=None):
+        response = async_to_sync(self.async_client.get)(url, data or {})
+        return response.status_code, json.loads(response.content)
+
+    def test_exam_list(self):
+        sync_response = self.client.get('/api/exam/exams/', {'search': 'async'})
+        code, body = self._async_get('/api/exam/async/exams/', {'search': 'async'})
+
+        assert code == status.HTTP_200_OK
+        assert body == json.loads(sync_response.content)
+
+    def test_exam_detail(self):
+        sync_response = self.client.get(f'/api/exam/exams/{self.exam.id}/')
+        code, body = self._async_get(f'/api/exam/async/exams/{self.exam.id}/')
+
+        assert code == status.HTTP_200_OK
+        assert body == json.loads(sync_response.content)
+        assert body['total_submissions'] == 3
+
+    def test_exam_statistics(self):
+        sync_response = self.client.get(f'/api/exam/exams/{self.exam.id}/statistics/')
+        code, body = self._async_get(f'/api/exam/async/exams/{self.exam.id}/statistics/')
+
+        assert code == status.HTTP_200_OK
+        assert body == json.loads(sync_response.content)
+        assert body['statistics']['average_score'] == round((100 + 100 / 3 + 50) / 3, 2)
+
+    def test_submission_detail(self):
+        for submission in self.submissions:
+            sync_response = self.client.get(f'/api/exam/submissions/{submission.id}/')
+            code, body = self._async_get(f'/api/exam/async/submissions/{submission.id}/')
+
+            assert code == status.HTTP_200_OK
+            assert body == json.loads(sync_response.content)
+
+    def test_not_found(self):
+        assert self._async_get('/api/exam/async/exams/999999/')[0] == status.HTTP_404_NOT_FOUND
+        assert self._async_get('/api/exam/async/submissions/999999/')[0] == status.HTTP_404_NOT_FOUND
+
+    def test_submission_status_uses_published_message(self):
+        message = {'state': 'SUCCESS', 'created': True, 'submission': {'id': self.submissions[0].id}}
+        publish_submission_status('async-task', message)
+
+        code, body = self._async_get('/api/exam/async/submissions/status/', {'task_id': 'async-task'})
+
+        assert code == status.HTTP_200_OK
+        assert body['task'] == message
+
+    def test_submission_status_pending(self):
+        code, body = self._async_get('/api/exam/async/submissions/status/', {'task_id': 'unknown'})
+
+        assert code == status.HTTP_202_ACCEPTED
+        assert body['task']['state'] == 'PENDING'
@@ -0,0 +1,77 @@
+"""
+Testes da suíte de benchmarks (benchmarks/)
+"""
+
+import json
+
+import pytest
+from django.test import TestCase
+
+from benchmarks.__main__ import main
+from benchmarks.suite import CASES, compare, load_report, run_suite, save_report
+from exam.dataset import AccuracyDistribution, DatasetGenerator
+
+
+class TestCompare:
+    """Detecção de regressões contra o baseline"""
+
+    baseline = {
+        'exams-detail': {'p50_ms': 10.0, 'p95_ms': 20.0, 'queries': 2},
+        'render-exam-detail': {'p50_ms': 0.1, 'p95_ms': 0.2, 'queries': 2},
+    }
+
+    def test_slowdown_over_threshold(self):
+        current = {**self.baseline, 'exams-detail': {'p50_ms': 10.5, 'p95_ms': 30.0, 'queries': 2}}
+
+        regressions = compare(self.baseline, current, threshold=0.2)
+
+        assert [(r['case'], r['metric']) for r in regressions] == [('exams-detail', 'p95_ms')]
+        assert regressions[0]['change'] == 0.5
+
+    def test_small_absolute_changes_are_noise(self):
+        current = {**self.baseline, 'render-exam-detail': {'p50_ms': 0.3, 'p95_ms': 0.6, 'queries': 2}}
+
+        assert compare(self.baseline, current, threshold=0.2) == []
+
+    def test_any_extra_query_is_a_regression(self):
+        current = {**self.baseline, 'exams-detail': {'p50_ms': 10.0, 'p95_ms': 20.0, 'queries': 3}}
+
+        assert [r['metric'] for r in compare(self.baseline, current)] == ['queries']
+
+    def test_report_round_trip(self, tmp_path):
+        path = tmp_path / 'baseline.json'
+        save_report(path, {'scale': 'small'}, self.baseline)
+
+        assert load_report(path)['results'] == self.baseline
+        assert json.loads(path.read_text())['meta'] == {'scale': 'small'}
+
+    def test_compare_command_with_a_zero_baseline(self, tmp_path, capsys):
+        baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+        save_report(baseline, {}, {'exams-detail': {'p50_ms': 0.0, 'p95_ms': 0.0, 'queries': 2}})
+        save_report(current, {}, {'exams-detail': {'p50_ms': 5.0, 'p95_ms': 8.0, 'queries': 2}})
+
+        status = main(['compare', str(baseline), '--current', str(current)])
+
+        assert status == 1
+        assert 'REGRESSION exams-detail p95_ms: 0.0 -> 8.0 (new)' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+class TestRunSuite(TestCase):
+    """Todos os casos rodam contra um dataset gerado"""
+
+    def setUp(self):
+        DatasetGenerator(
+            students=20, exams=2, questions=30, questions_per_exam=10, submissions=30,
+            accuracy=AccuracyDistribution.parse('beta:6,3'),
+        ).run()
+
+    def test_every_case_runs(self):
+        results = run_suite(iterations=2, warmup=1)
+
+        assert set(results) == {case.name for case in CASES}
+        for result in results.values():
+            assert result['iterations'] == 2
+            assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+        assert results['exams-statistics']['queries'] == 0
+        assert results['exams-statistics-cold']['queries'] > 0
@@ -0,0 +1,49 @@
+"""
+Testes do roteamento de tasks para filas dedicadas
+"""
+
+import io
+from unittest.mock import patch
+
+from django.core.management import call_command
+
+from exam.tasks import process_exam_submission, flush_exam_drafts
+from medway_api.celery import app, debug_task, TASK_QUEUES, apply_queue_concurrency
+from utils.queues import queue_for_task
+
+
+class TestTaskRouting:
+    """Testes de filas, prioridades e limites de tempo por fila"""
+
+    def test_grading_is_isolated(self):
+        assert queue_for_task(process_exam_submission.name) == 'grading'
+        assert queue_for_task(flush_exam_drafts.name) == 'maintenance'
+        assert queue_for_task(debug_task.name) == 'maintenance'
+        assert queue_for_task('exam.tasks.some_future_export') == 'analytics'
+
+    def test_route_carries_queue_priority(self):
+        route = app.amqp.router.route({}, process_exam_submission.name)
+        assert route['priority'] == TASK_QUEUES['grading']['priority']
+
+    def test_time_limits_follow_queue(self):
+        assert process_exam_submission.time_limit == TASK_QUEUES['grading']['time_limit']
+        assert process_exam_submission.soft_time_limit == TASK_QUEUES['grading']['soft_time_limit']
+        assert debug_task.time_limit == TASK_QUEUES['maintenance']['time_limit']
+        assert app.conf.task_time_limit is None
+
+    def test_dedicated_worker_uses_queue_concurrency(self):
+        conf = type('Conf', (), {'worker_concurrency': None})()
+        apply_queue_concurrency(conf=conf, options={'queues': 'grading', 'concurrency': None})
+        assert conf.worker_concurrency == TASK_QUEUES['grading']['concurrency']
+
+        conf.worker_concurrency = None
+        apply_queue_concurrency(conf=conf, options={'queues': 'analytics,maintenance', 'concurrency': None})
+        assert conf.worker_concurrency is None
+
+
+class TestQueueDepthsCommand:
+    def test_reports_every_queue(self):
+        out = io.StringIO()
+        with patch('utils.management.commands.queue_depths.queue_depth', side_effect=[3, 0, 12]):
+            call_command('queue_depths', '--json', stdout=out)
+        assert out.getvalue().strip() == '{"grading": 3, "analytics": 0, "maintenance": 12}'
@@ -0,0 +1,146 @@
+"""
+Testes do pool de conexões em processo
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from student.models import Student
+from utils.db.pool import ConnectionPool, PoolTimeout, get_pool, pool_stats
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    created = []
+
+    def factory():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    check = lambda conn: conn.healthy
+    return ConnectionPool(factory, check=check, **options), created
+
+
+class TestConnectionPool:
+    """Testes do ConnectionPool com conexões falsas"""
+
+    def test_reuses_released_connections(self):
+        pool, created = make_pool(max_size=2)
+
+        first = pool.acquire()
+        pool.release(first)
+
+        assert pool.acquire() is first
+        assert len(created) == 1
+
+    def test_burst_waits_instead_of_failing(self):
+        """Rajada maior que o pool: as requisições esperam na fila"""
+        pool, created = make_pool(max_size=3, timeout=5)
+        in_use, peak = [0], [0]
+        lock = threading.Lock()
+
+        def request(_):
+            conn = pool.acquire()
+            with lock:
+                in_use[0] += 1
+                peak[0] = max(peak[0], in_use[0])
+            time.sleep(0.01)
+            with lock:
+                in_use[0] -= 1
+            pool.release(conn)
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            list(executor.map(request, range(60)))
+
+        stats = pool.stats()
+        assert len(created) == 3
+        assert peak[0] == 3
+        assert stats['acquired'] == 60
+        assert stats['waits'] > 0
+        assert stats['timeouts'] == 0
+        assert stats['in_use'] == 0
+
+    def test_timeout_when_exhausted(self):
+        pool, _ = make_pool(max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+        assert pool.stats()['timeouts'] == 1
+
+    def test_failed_health_check_is_replaced(self):
+        """Conexão quebrada é descartada ao ser reutilizada"""
+        pool, created = make_pool(max_size=1)
+        broken = pool.acquire()
+        pool.release(broken)
+        broken.healthy = False
+
+        conn = pool.acquire()
+
+        assert conn is not broken
+        assert broken.closed
+        assert pool.stats()['failed_checks'] == 1
+        assert len(created) == 2
+
+    def test_idle_and_lifetime_expiry(self):
+        pool, created = make_pool(max_size=2, max_idle=10, max_lifetime=100)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        with patch('utils.db.pool.time.monotonic', return_value=time.monotonic() + 50):
+            assert pool.acquire() is not conn
+        assert conn.closed
+
+    def test_discard_frees_slot(self):
+        pool, created = make_pool(max_size=1, timeout=0.05)
+        conn = pool.acquire()
+        pool.release(conn, discard=True)
+
+        assert pool.acquire() is not conn
+        assert pool.stats()['connections_discarded'] == 1
+
+    def test_pool_per_process(self):
+        """Um processo filho (fork) não herda o pool do pai"""
+        parent = get_pool('test-fork', lambda: make_pool()[0])
+        with patch('utils.db.pool.os.getpid', return_value=-1):
+            child = get_pool('test-fork', lambda: make_pool()[0])
+
+        assert child is not parent
+        assert 'test-fork' in pool_stats()
+
+
+@pytest.mark.django_db
+class TestDatabasePoolStatsAPI(APITestCase):
+    """Testes do endpoint /api/ops/db-pool/"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_admin(self):
+        response = self.client.get('/api/ops/db-pool/')
+        assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
+
+    def test_reports_pools(self):
+        get_pool('test-api', lambda: make_pool()[0])
+        admin = Student.objects.create(username='ops', email='ops@example.com', name='Ops', is_staff=True)
+        self.client.force_authenticate(admin)
+
+        response = self.client.get('/api/ops/db-pool/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['pools']['test-api']['max_size'] == 10
@@ -0,0 +1,103 @@
+"""
+Testes do pré-aquecimento dos caches de exames (warm_exam_caches)
+"""
+
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamQuestion
+from exam.serializers import ExamSubmissionCreateSerializer
+from exam.structure import structure_cache
+from exam.tasks import warm_upcoming_exam_caches
+from exam.warming import warm_status
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestWarmExamCaches(TestCase):
+    """Testes do comando, da task e do health check"""
+
+    def setUp(self):
+        self.client = APIClient()
+        now = timezone.now()
+        self.soon = Exam.objects.create(name='Prova em 10 min', starts_at=now + timedelta(minutes=10))
+        self.later = Exam.objects.create(name='Prova amanhã', starts_at=now + timedelta(days=1))
+        self.question = Question.objects.create(content='Questão?')
+        Alternative.objects.create(question=self.question, option=1, content='A', is_correct=True)
+        Alternative.objects.create(question=self.question, option=2, content='B')
+        for exam in (self.soon, self.later):
+            ExamQuestion.objects.create(exam=exam, question=self.question, number=1)
+        self.admin = Student.objects.create(
+            username='admin', email='admin@example.com', name='Admin', is_staff=True
+        )
+
+    def test_command_reports_timings(self):
+        out = io.StringIO()
+
+        call_command('warm_exam_caches', self.soon.id, stdout=out)
+
+        assert f'Exam {self.soon.id} (1 questions): structure' in out.getvalue()
+        assert 'detail' in out.getvalue()
+        assert warm_status(self.soon.id)['questions'] == 1
+        assert warm_status(self.later.id) is None
+
+    def test_command_requires_exams(self):
+        with pytest.raises(CommandError):
+            call_command('warm_exam_caches', stdout=io.StringIO())
+        with pytest.raises(CommandError):
+            call_command('warm_exam_caches', 999999, stdout=io.StringIO())
+
+    def test_starting_within_selects_upcoming_exams(self):
+        call_command('warm_exam_caches', starting_within=30, stdout=io.StringIO())
+
+        assert warm_status(self.soon.id) is not None
+        assert warm_status(self.later.id) is None
+
+    def test_beat_task_warms_only_cold_exams(self):
+        assert list(warm_upcoming_exam_caches()['warmed']) == [self.soon.id]
+        assert warm_upcoming_exam_caches()['warmed'] == {}
+
+    def test_warmed_exam_serves_without_structure_queries(self):
+        call_command('warm_exam_caches', self.soon.id, stdout=io.StringIO())
+        structure_cache.clear()
+        student = Student.objects.create(username='aluno', email='aluno@example.com', name='Aluno')
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/exam/exams/{self.soon.id}/')
+        assert response.data['questions'][0]['question']['id'] == self.question.id
+
+        serializer = ExamSubmissionCreateSerializer(data={
+            'student_id': student.id,
+            'exam_id': self.soon.id,
+            'answers': [{'question_id': self.question.id, 'selected_option': 1}],
+        })
+        with CaptureQueriesContext(connection) as queries:
+            assert serializer.is_valid(), serializer.errors
+        assert not any('exam_examquestion' in query['sql'] for query in queries.captured_queries)
+
+    def test_health_check_follows_changes(self):
+        self.client.force_authenticate(self.admin)
+        url = f'/api/exam/exams/{self.soon.id}/cache-status/'
+        assert self.client.get(url).data['warmed'] is False
+
+        call_command('warm_exam_caches', self.soon.id, stdout=io.StringIO())
+        response = self.client.get(url)
+        assert response.data['warmed'] is True
+        assert set(response.data['warm_status']['timings_ms']) == {'structure', 'detail'}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Alternative.objects.create(question=self.question, option=3, content='C')
+        assert self.client.get(url).data['warmed'] is False
+
+    def test_health_check_requires_admin(self):
+        response = self.client.get(f'/api/exam/exams/{self.soon.id}/cache-status/')
+        assert response.status_code in (401, 403)
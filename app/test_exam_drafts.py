@@ -0,0 +1,184 @@
+"""
+Testes do autosave de rascunhos (buffer write-behind)
+"""
+
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.drafts import flush_drafts, get_draft_answers
+from exam.models import Exam, ExamQuestion, ExamSubmission, DraftAnswer
+from exam.tasks import process_exam_submission
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestExamDraftAPI(APITestCase):
+    """Testes para PUT/GET /exams/<pk>/draft/"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.student = Student.objects.create(
+            username='draftstudent',
+            email='draft@example.com',
+            name='Draft Student'
+        )
+        self.questions = []
+        self.exam = Exam.objects.create(name='Draft Exam')
+        for number in range(1, 4):
+            question = Question.objects.create(content=f'Draft question {number}?')
+            Alternative.objects.create(question=question, content='A', option=1, is_correct=True)
+            Alternative.objects.create(question=question, content='B', option=2, is_correct=False)
+            ExamQuestion.objects.create(exam=self.exam, question=question, number=number)
+            self.questions.append(question)
+        self.url = f'/api/exam/exams/{self.exam.id}/draft/'
+
+    def _save(self, *answers):
+        return self.client.put(self.url, {
+            'student_id': self.student.id,
+            'answers': [{'question_id': q.id, 'selected_option': option} for q, option in answers],
+        }, format='json')
+
+    def test_autosave_is_buffered_and_coalesced(self):
+        """Deltas ficam no buffer e só o último valor por questão é gravado"""
+        q1, q2, _ = self.questions
+
+        assert self._save((q1, 1)).status_code == status.HTTP_200_OK
+        assert self._save((q1, 2), (q2, 1)).status_code == status.HTTP_200_OK
+        assert self._save((q1, 1)).status_code == status.HTTP_200_OK
+        assert DraftAnswer.objects.count() == 0
+
+        response = self.client.get(self.url, {'student_id': self.student.id})
+        assert response.data['answers'] == [
+            {'question_id': q1.id, 'selected_option': 1},
+            {'question_id': q2.id, 'selected_option': 1},
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert flush_drafts() == 2
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        assert len(inserts) == 1
+        assert dict(DraftAnswer.objects.values_list('question_id', 'selected_alternative_option')) == {
+            q1.id: 1, q2.id: 1,
+        }
+
+    def test_flush_upserts_and_clears(self):
+        """Flush atualiza linhas existentes e remove respostas apagadas"""
+        q1, q2, _ = self.questions
+        self._save((q1, 1), (q2, 2))
+        flush_drafts()
+
+        self._save((q1, 2), (q2, None))
+        flush_drafts()
+
+        assert dict(DraftAnswer.objects.values_list('question_id', 'selected_alternative_option')) == {q1.id: 2}
+
+    def test_buffer_is_released_only_after_commit(self):
+        """Um upsert que falha mantém o buffer; depois do commit ele é apagado"""
+        q1, q2, _ = self.questions
+        self._save((q1, 1), (q2, 2))
+
+        with mock.patch.object(DraftAnswer.objects, 'bulk_create', side_effect=RuntimeError('db down')):
+            with pytest.raises(RuntimeError):
+                flush_drafts()
+        assert DraftAnswer.objects.count() == 0
+        assert get_draft_answers(self.exam.id, self.student.id) == {q1.id: 1, q2.id: 2}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            assert flush_drafts() == 2
+        assert cache.get(f'exam:draft:{self.exam.id}:{self.student.id}') is None
+        assert flush_drafts() == 0
+
+    def test_put_during_flush_is_not_dropped(self):
+        """Deltas que chegam entre a leitura do buffer e o commit ficam para o próximo flush"""
+        q1, q2, _ = self.questions
+        self._save((q1, 1))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            flush_drafts()
+        self._save((q2, 2))
+        for callback in callbacks:
+            callback()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_drafts()
+        assert dict(DraftAnswer.objects.values_list('question_id', 'selected_alternative_option')) == {
+            q1.id: 1, q2.id: 2,
+        }
+
+    def test_invalid_student_id(self):
+        response = self.client.get(self.url, {'student_id': 'abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rejects_question_outside_exam(self):
+        """Questões de outro exame são rejeitadas"""
+        other = Question.objects.create(content='Other?')
+
+        response = self._save((other, 1))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'answers' in response.data['errors']
+
+    def test_submit_promotes_draft(self):
+        """Submissão com use_draft usa o rascunho sem reenviar as respostas"""
+        q1, q2, q3 = self.questions
+        self._save((q1, 1), (q2, 2))
+        flush_drafts()
+        self._save((q3, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/exam/submissions/', {
+                'student_id': self.student.id,
+                'exam_id': self.exam.id,
+                'use_draft': True,
+                'answers': [{'question_id': q2.id, 'selected_option': 1}],
+            }, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        submission = ExamSubmission.objects.get(student=self.student, exam=self.exam)
+        assert dict(submission.answers.values_list('question_id', 'selected_alternative_option')) == {
+            q1.id: 1, q2.id: 1, q3.id: 1,
+        }
+        assert submission.score == 100.0
+        assert DraftAnswer.objects.count() == 0
+        assert self.client.get(self.url, {'student_id': self.student.id}).data['answers'] == []
+
+    def test_draft_is_discarded_after_commit(self):
+        """O rascunho (buffer e linhas) só é descartado depois do commit da submissão"""
+        q1, q2, _ = self.questions
+        self._save((q1, 1))
+        flush_drafts()
+        self._save((q2, 2))
+
+        payload = {
+            'student_id': self.student.id,
+            'exam_id': self.exam.id,
+            'answers': [{'question_id': q1.id, 'selected_option': 1}],
+        }
+        with self.captureOnCommitCallbacks() as callbacks:
+            process_exam_submission.apply(args=[payload])
+        assert get_draft_answers(self.exam.id, self.student.id) == {q1.id: 1, q2.id: 2}
+
+        for callback in callbacks:
+            callback()
+        assert get_draft_answers(self.exam.id, self.student.id) == {}
+
+    def test_submit_without_answers_or_draft(self):
+        """Sem respostas e sem rascunho a submissão é inválida"""
+        response = self.client.post('/api/exam/submissions/', {
+            'student_id': self.student.id,
+            'exam_id': self.exam.id,
+            'use_draft': True,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'answers' in response.data['errors']
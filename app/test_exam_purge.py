@@ -0,0 +1,162 @@
+"""
+Testes da exclusão assíncrona de exames (soft delete + remoção em blocos)
+"""
+
+import tracemalloc
+
+import pytest
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.models import Exam, ExamDeletion, ExamQuestion, ExamSubmission, SubmissionAnswer
+from exam.purge import purge_exam
+from exam.tasks import ExamUnavailable, process_exam_submission
+from question.models import Question, Alternative
+from student.models import Student
+from utils.queues import queue_for_task
+
+
+@pytest.mark.django_db
+class TestExamSoftDelete(APITestCase):
+    """O DELETE esconde o exame na hora e agenda a remoção"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Exam to delete')
+        self.other = Exam.objects.create(name='Exam to keep')
+        questions = Question.objects.bulk_create([Question(content=f'Purge {i}?') for i in range(3)])
+        Alternative.objects.bulk_create([
+            Alternative(question=question, content=str(option), option=option, is_correct=option == 1)
+            for question in questions for option in range(1, 5)
+        ])
+        for exam in (self.exam, self.other):
+            ExamQuestion.objects.bulk_create([
+                ExamQuestion(exam=exam, question=question, number=number)
+                for number, question in enumerate(questions, start=1)
+            ])
+        self.student = Student.objects.create(username='purge', email='purge@example.com', name='Purge')
+        for exam in (self.exam, self.other):
+            submission = ExamSubmission.objects.create(student=self.student, exam=exam)
+            SubmissionAnswer.objects.bulk_create([
+                SubmissionAnswer(submission=submission, question=question, selected_alternative_option=1)
+                for question in questions
+            ])
+
+    def test_delete_is_accepted_and_purged(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.delete(f'/api/exam/exams/{self.exam.id}/')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        # Celery roda em modo eager nos testes: a remoção já terminou.
+        progress = self.client.get(f"/api/exam/exams/deletions/{response.data['deletion_id']}/").data['result']
+        assert progress['status'] == ExamDeletion.Status.COMPLETED
+        assert progress['answers_deleted'] == 3
+        assert progress['submissions_deleted'] == 1
+        assert not Exam.all_objects.filter(id=self.exam.id).exists()
+        assert SubmissionAnswer.objects.filter(submission__exam=self.other).count() == 3
+
+    def test_soft_deleted_exam_is_hidden(self):
+        self.exam.soft_delete()
+
+        assert self.client.get(f'/api/exam/exams/{self.exam.id}/').status_code == status.HTTP_404_NOT_FOUND
+        names = [exam['name'] for exam in self.client.get('/api/exam/exams/').data['results']]
+        assert names == ['Exam to keep']
+        assert list(ExamSubmission.objects.active().values_list('exam_id', flat=True)) == [self.other.id]
+        submission = ExamSubmission.objects.get(exam=self.exam)
+        assert self.client.get(f'/api/exam/submissions/{submission.id}/').status_code == status.HTTP_404_NOT_FOUND
+        results = self.client.get(f'/api/exam/submissions/student_submission/?student_id={self.student.id}').data
+        assert [s['exam_name'] for s in results['submissions']] == ['Exam to keep']
+
+    def test_default_manager_does_not_join_exams(self):
+        """Só ``active()`` filtra pelo exame; o gerenciador padrão não faz JOIN em exam_exam"""
+        self.exam.soft_delete()
+
+        assert 'JOIN' not in str(ExamSubmission.objects.filter(student=self.student).query)
+        assert ExamSubmission.objects.filter(student=self.student).count() == 2
+
+    def test_queued_submission_to_a_deleted_exam_is_rejected(self):
+        other_student = Student.objects.create(username='late', email='late@example.com', name='Late')
+        self.exam.soft_delete()
+
+        result = process_exam_submission.apply(args=[{
+            'student_id': other_student.id, 'exam_id': self.exam.id,
+            'answers': [{'question_id': Question.objects.first().id, 'selected_option': 1}],
+        }], throw=False)
+
+        assert result.state == 'FAILURE'
+        assert isinstance(result.result, ExamUnavailable)
+        assert not ExamSubmission.objects.filter(student=other_student).exists()
+
+    def test_purge_reports_progress_per_chunk(self):
+        self.exam.soft_delete()
+        deletion = ExamDeletion.objects.create(exam_id=self.exam.id, exam_name=self.exam.name)
+
+        purge_exam(deletion, chunk_size=2)
+
+        deletion.refresh_from_db()
+        assert deletion.answers_deleted == 3
+        assert deletion.finished_at is not None
+
+    def test_purge_never_removes_active_exam(self):
+        deletion = ExamDeletion.objects.create(exam_id=self.other.id, exam_name=self.other.name)
+        self.other.soft_delete()
+        Exam.all_objects.filter(id=self.other.id).update(deleted_at=None)
+
+        purge_exam(deletion)
+
+        assert Exam.objects.filter(id=self.other.id).exists()
+
+    def test_purge_runs_on_maintenance_queue(self):
+        assert queue_for_task('exam.tasks.purge_deleted_exam') == 'maintenance'
+
+
+@pytest.mark.django_db
+class TestExamPurgeMemory(TestCase):
+    """Excluir um exame com 1M de respostas não pode carregar tudo na memória"""
+
+    QUESTIONS = 1000
+    SUBMISSIONS = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.exam = Exam.objects.create(name='Huge exam')
+        questions = Question.objects.bulk_create([
+            Question(content=f'Huge {i}?') for i in range(cls.QUESTIONS)
+        ])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=cls.exam, question=question, number=number)
+            for number, question in enumerate(questions, start=1)
+        ])
+        students = Student.objects.bulk_create([
+            Student(username=f'huge{i}', email=f'huge{i}@example.com', name=f'Huge {i}')
+            for i in range(cls.SUBMISSIONS)
+        ])
+        ExamSubmission.objects.bulk_create([ExamSubmission(student=student, exam=cls.exam) for student in students])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO exam_submissionanswer (submission_id, question_id, selected_alternative_option) '
+                'SELECT s.id, q.id, 1 FROM exam_examsubmission s CROSS JOIN question_question q '
+                'WHERE s.exam_id = %s',
+                [cls.exam.id],
+            )
+
+    @override_settings(EXAM_PURGE_CHUNK_SIZE=5000)
+    def test_memory_stays_flat(self):
+        total = self.QUESTIONS * self.SUBMISSIONS
+        assert SubmissionAnswer.objects.count() == total
+        self.exam.soft_delete()
+        deletion = ExamDeletion.objects.create(exam_id=self.exam.id, exam_name=self.exam.name)
+
+        tracemalloc.start()
+        try:
+            purge_exam(deletion)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert deletion.answers_deleted == total
+        assert SubmissionAnswer.objects.count() == 0
+        # Um bloco de 5000 ids custa poucos MB; carregar 1M de linhas passaria de centenas.
+        assert peak < 20 * 1024 * 1024, f'peak {peak / 1024 / 1024:.1f} MB'
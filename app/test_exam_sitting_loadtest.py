@@ -0,0 +1,120 @@
+"""
+Testes da simulação de carga de aplicação de prova (exam/loadtest.py)
+"""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase
+
+from exam.dataset import AccuracyDistribution, DatasetGenerator
+from exam.loadtest import Recorder, build_plans, percentiles
+from exam.models import Exam, ExamSubmission
+from student.models import Student
+
+QUESTIONS = [(10, 4), (11, 5), (12, 4), (13, 4)]
+
+
+def plans(**overrides):
+    options = dict(
+        student_ids=range(1, 201), questions=QUESTIONS, ramp=30.0, duration=100.0,
+        burst_fraction=0.5, burst_window=10.0, autosaves=3, seed=7,
+    )
+    options.update(overrides)
+    return build_plans(**options)
+
+
+class TestBuildPlans:
+    """Agenda dos estudantes simulados"""
+
+    def test_same_seed_same_schedule(self):
+        assert plans() == plans()
+        assert plans() != plans(seed=8)
+
+    def test_burst_students_submit_in_the_closing_window(self):
+        schedule = plans()
+
+        burst = [plan for plan in schedule if plan.in_burst]
+        assert 60 <= len(burst) <= 140
+        assert all(90.0 <= plan.submit_at <= 100.0 for plan in burst)
+        assert all(plan.arrive_at <= 30.0 for plan in schedule)
+
+    def test_autosaves_happen_between_arrival_and_submission(self):
+        for plan in plans():
+            assert len(plan.autosave_at) == 3
+            assert plan.autosave_at == sorted(plan.autosave_at)
+            assert all(plan.arrive_at <= at <= plan.submit_at for at in plan.autosave_at)
+
+    def test_answers_are_valid_alternatives(self):
+        limits = dict(QUESTIONS)
+        for plan in plans():
+            assert set(plan.answers) == set(limits)
+            assert all(1 <= option <= limits[question] for question, option in plan.answers.items())
+
+
+class TestReport:
+    """Percentis e taxa de erro por etapa"""
+
+    def test_percentiles(self):
+        result = percentiles([i / 1000 for i in range(1, 101)], scale=1000, suffix='ms')
+
+        assert result == {'p50_ms': 51.0, 'p95_ms': 96.0, 'p99_ms': 100.0, 'max_ms': 100.0}
+        assert percentiles([], scale=1, suffix='s')['p50_s'] is None
+
+    def test_throttled_responses_are_not_errors(self):
+        recorder = Recorder()
+        for status in (202, 429, 503, 500, None):
+            recorder.record('submit', status, 0.01)
+
+        step = recorder.report(1.0, 5)['steps']['submit']
+
+        assert (step['requests'], step['errors'], step['throttled']) == (5, 2, 2)
+        assert step['error_rate'] == 0.4
+
+
+@pytest.mark.django_db
+class TestSimulateExamSittingCommand(TestCase):
+    """Validação de argumentos do comando"""
+
+    def test_unknown_exam(self):
+        with pytest.raises(CommandError, match='not found'):
+            call_command('simulate_exam_sitting', exam=999, stdout=StringIO())
+
+    def test_not_enough_students_without_create(self):
+        DatasetGenerator(students=1, exams=1, questions=3, questions_per_exam=3, submissions=0,
+                         accuracy=AccuracyDistribution.parse('fixed:0.5')).run()
+        exam = Exam.objects.get()
+
+        with pytest.raises(CommandError, match='--create-students'):
+            call_command('simulate_exam_sitting', exam=exam.pk, students=5, stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestExamSittingAgainstLiveServer(LiveServerTestCase):
+    """Fluxo completo contra um servidor real (Celery em modo eager)"""
+
+    def setUp(self):
+        DatasetGenerator(
+            students=0, exams=1, questions=8, questions_per_exam=8, submissions=0,
+            accuracy=AccuracyDistribution.parse('fixed:0.5'), seed=3,
+        ).run()
+        self.exam = Exam.objects.get()
+
+    def test_every_student_is_graded(self):
+        # Uma conexão por vez: o servidor de teste compartilha a mesma conexão
+        # SQLite em memória entre as threads das requisições.
+        out = StringIO()
+        call_command(
+            'simulate_exam_sitting', url=self.live_server_url, exam=self.exam.pk, students=6,
+            create_students=True, ramp=0.2, duration=0.6, burst_window=0.3, autosaves=2,
+            poll_interval=0.05, grading_timeout=10, max_connections=1, json=True, stdout=out,
+        )
+        report = json.loads(out.getvalue())
+
+        assert Student.objects.count() == 6
+        assert ExamSubmission.objects.filter(exam=self.exam).count() == 6
+        assert report['grading']['graded'] == 6
+        assert set(report['steps']) == {'exam-detail', 'autosave', 'submit', 'status', 'results'}
+        assert all(step['errors'] == 0 for step in report['steps'].values())
@@ -0,0 +1,129 @@
+"""
+Testes da estrutura de exame em cache (exam.structure)
+"""
+
+import pickle
+
+import pytest
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from exam.serializers import ExamDetailSerializer
+from exam.structure import get_exam_structure, structure_cache
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestExamStructureCache(TestCase):
+    """Testes do cache em dois níveis da estrutura do exame"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Prova Estrutura')
+        questions = Question.objects.bulk_create([Question(content=f'Questão {i}?') for i in range(150)])
+        Alternative.objects.bulk_create([
+            Alternative(question=question, option=option, content=f'Alt {option}', is_correct=option == 2)
+            for question in questions
+            for option in range(1, 5)
+        ])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=self.exam, question=question, number=number)
+            for number, question in enumerate(questions, start=1)
+        ])
+        self.questions = questions
+        structure_cache.clear()
+
+    def test_hot_render_does_not_touch_database(self):
+        ExamDetailSerializer(self.exam).data
+
+        with CaptureQueriesContext(connection) as queries:
+            structure = get_exam_structure(self.exam.id)
+            ExamDetailSerializer(self.exam).fields['questions'].to_representation(self.exam)
+
+        assert len(queries) == 0
+        assert len(structure.questions) == 150
+        assert structure.answer_key[self.questions[0].id] == 2
+        assert structure_cache.hits >= 1
+
+    def test_detail_endpoint_queries_do_not_grow_with_questions(self):
+        url = f'/api/exam/exams/{self.exam.id}/'
+        self.client.get(url)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        assert response.data['total_questions'] == 150
+        assert response.data['questions'][0] == {
+            'number': 1, 'question': {'id': self.questions[0].id, 'content': 'Questão 0?'},
+        }
+
+    def test_new_process_warms_from_shared_cache(self):
+        get_exam_structure(self.exam.id)
+        structure_cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            structure = get_exam_structure(self.exam.id)
+
+        assert len(queries) == 0
+        assert structure.name == 'Prova Estrutura'
+
+    def test_changes_invalidate_structure(self):
+        before = get_exam_structure(self.exam.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alternative = Alternative.objects.get(question=self.questions[0], option=3)
+            alternative.is_correct = True
+            alternative.save()
+            extra = Question.objects.create(content='Extra?')
+            ExamQuestion.objects.create(exam=self.exam, question=extra, number=151)
+
+        after = get_exam_structure(self.exam.id)
+        assert after.version != before.version
+        assert after.answer_key[self.questions[0].id] == 3
+        assert after.questions[-1].id == extra.id
+
+    def test_answer_key_changes_are_invalidated_after_commit(self):
+        before = get_exam_structure(self.exam.id)
+        alternatives = Alternative.objects.filter(question=self.questions[0])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for alternative in alternatives:
+                    alternative.is_correct = alternative.option == 4
+                    alternative.save()
+                # Até o commit, outros processos ainda leem o gabarito antigo: a
+                # versão não pode mudar (seria gravada com as linhas antigas).
+                assert get_exam_structure(self.exam.id).version == before.version
+
+        after = get_exam_structure(self.exam.id)
+        assert callbacks
+        assert after.version != before.version
+        assert after.answer_key[self.questions[0].id] == 4
+
+    def test_result_renders_from_structure(self):
+        student = Student.objects.create(username='estrutura', email='e@example.com', name='Estrutura')
+        submission = ExamSubmission.objects.create(student=student, exam=self.exam)
+        SubmissionAnswer.objects.create(submission=submission, question=self.questions[0], selected_alternative_option=2)
+        SubmissionAnswer.objects.create(submission=submission, question=self.questions[1], selected_alternative_option=1)
+
+        results = self.client.get(f'/api/exam/results/{submission.id}/').data['results']
+
+        assert results['correct_answers'] == 1
+        assert results['questions'][0]['is_correct'] is True
+        assert results['questions'][0]['correct_answer_letter'] == 'B'
+        assert [alt['option_letter'] for alt in results['questions'][0]['alternatives']] == ['A', 'B', 'C', 'D']
+
+    def test_structure_is_immutable_and_picklable(self):
+        structure = get_exam_structure(self.exam.id)
+
+        with pytest.raises(AttributeError):
+            structure.name = 'Outro'
+        with pytest.raises(AttributeError):
+            structure.questions[0].content = 'Outro?'
+        copy = pickle.loads(pickle.dumps(structure))
+        assert copy.question_order == structure.question_order
+        assert dict(copy.answer_key) == dict(structure.answer_key)
@@ -236,6 +236,32 @@ class TestExamSubmissionViewSet(APITestCase):
         assert 'submission' in response.data
         assert 'comparison' in response.data
         assert response.data['comparison']['your_score'] == 50.0
+
+    def test_detailed_analysis_comparison(self):
+        """Comparação com as demais submissões em uma consulta; respostas lidas uma vez"""
+        submission = ExamSubmission.objects.create(student=self.student, exam=self.exam)
+        SubmissionAnswer.objects.create(submission=submission, question=self.question1, selected_alternative_option=1)
+        SubmissionAnswer.objects.create(submission=submission, question=self.question2, selected_alternative_option=1)
+        submission.grade()
+        for index, option in enumerate([1, 2, 2]):
+            other = Student.objects.create(username=f'other{index}', email=f'other{index}@example.com', name='Other')
+            other_submission = ExamSubmission.objects.create(student=other, exam=self.exam)
+            SubmissionAnswer.objects.create(
+                submission=other_submission, question=self.question1, selected_alternative_option=option
+            )
+            other_submission.grade()
+
+        url = f'/api/exam/submissions/{submission.id}/detailed_analysis/'
+        self.client.get(url)
+        # Submissão + respostas (prefetch) + agregado das demais submissões.
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        comparison = response.data['comparison']
+        assert comparison['your_score'] == 50.0
+        assert comparison['exam_average_score'] == round(100 / 3, 2)
+        assert comparison['percentile'] == round(2 / 3 * 100, 2)
+        assert comparison['total_submissions'] == 4
     
     def test_filter_submissions_by_student_name(self):
         """Teste filtrar submissões por nome do estudante"""
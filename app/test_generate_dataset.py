@@ -0,0 +1,112 @@
+"""
+Testes do gerador de dados sintéticos (generate_dataset)
+"""
+
+import io
+import json
+import random
+
+import pytest
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from exam.dataset import AccuracyDistribution
+from exam.models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from question.models import Question
+from student.models import Student
+
+
+def generate(**options):
+    out = io.StringIO()
+    defaults = {'students': 30, 'exams': 3, 'questions': 40, 'questions_per_exam': 10, 'submissions': 45}
+    call_command('generate_dataset', json=True, stdout=out, **{**defaults, **options})
+    return json.loads(out.getvalue())
+
+
+def answer_pattern(prefix):
+    """Respostas por (aluno, número da questão), independente dos ids gerados."""
+    numbers = {
+        (eq.exam_id, eq.question_id): eq.number
+        for eq in ExamQuestion.objects.filter(exam__name__contains=prefix)
+    }
+    return sorted(
+        (answer.submission.student.username.split('-')[-1], answer.submission.exam.name.split('-')[-1],
+         numbers[answer.submission.exam_id, answer.question_id], answer.selected_alternative_option)
+        for answer in SubmissionAnswer.objects.filter(
+            submission__exam__name__contains=prefix
+        ).select_related('submission__student', 'submission__exam')
+    )
+
+
+class TestAccuracyDistribution:
+    """Parsing e limites da distribuição de acertos"""
+
+    def test_parse(self):
+        assert str(AccuracyDistribution.parse('beta:6,3')) == 'beta:6,3'
+        with pytest.raises(ValueError):
+            AccuracyDistribution.parse('poisson:3')
+        with pytest.raises(ValueError):
+            AccuracyDistribution.parse('normal:0.5')
+
+    def test_samples_are_clipped(self):
+        distribution = AccuracyDistribution.parse('normal:0.5,3')
+        rng = random.Random(1)
+        assert all(0.0 <= distribution.sample(rng) <= 1.0 for _ in range(200))
+
+
+@pytest.mark.django_db
+class TestGenerateDataset(TestCase):
+    """Testes do comando generate_dataset"""
+
+    def test_generates_requested_volume(self):
+        report = generate()
+
+        assert report['answers'] == 450
+        assert Student.objects.count() == 30
+        assert Question.objects.count() == 40
+        assert Exam.objects.count() == 3
+        assert ExamSubmission.objects.count() == 45
+        assert SubmissionAnswer.objects.count() == 450
+        alternatives = {question.alternatives.count() for question in Question.objects.all()}
+        assert alternatives <= {4, 5}
+        assert all(question.alternatives.filter(is_correct=True).count() == 1 for question in Question.objects.all())
+
+    def test_scores_match_grading(self):
+        generate(storage='packed')
+
+        for submission in ExamSubmission.objects.all():
+            assert submission.packed_answers is not None
+            assert submission.graded_score == submission.compute_score()
+
+    def test_accuracy_distribution(self):
+        generate(accuracy='fixed:1', prefix='gabarito')
+        generate(accuracy='fixed:0', prefix='zerado')
+
+        assert set(ExamSubmission.objects.filter(exam__name__contains='gabarito')
+                   .values_list('graded_score', flat=True)) == {100.0}
+        assert set(ExamSubmission.objects.filter(exam__name__contains='zerado')
+                   .values_list('graded_score', flat=True)) == {0.0}
+
+    def test_same_seed_same_data(self):
+        generate(seed=7, prefix='a')
+        generate(seed=7, prefix='b')
+        generate(seed=8, prefix='c')
+
+        assert answer_pattern('a-7-') == answer_pattern('b-7-')
+        assert answer_pattern('a-7-') != answer_pattern('c-8-')
+
+    def test_students_can_log_in(self):
+        generate(password='segredo')
+
+        student = Student.objects.first()
+        assert student.check_password('segredo')
+
+    def test_invalid_options(self):
+        with pytest.raises(CommandError):
+            generate(students=2, exams=2, submissions=5)
+        with pytest.raises(CommandError):
+            generate(questions=5, questions_per_exam=10)
+        with pytest.raises(CommandError):
+            generate(accuracy='beta:1')
+        with pytest.raises(CommandError):
+            generate(alternatives='4,7')
@@ -0,0 +1,155 @@
+"""
+Testes do armazenamento compacto de respostas (packed_answers)
+"""
+
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from exam.packing import UnknownPackedLayout, grade_packed, layout_order, pack_answers, register_layout, unpack_answers
+from question.models import Question, Alternative
+from student.models import Student
+
+
+class TestPacking:
+    """Testes do formato do array"""
+
+    def test_round_trip(self):
+        order = [10, 20, 30, 40]
+        packed = pack_answers(order, {30: 2, 10: 5})
+
+        assert packed == bytes([5, 0, 2, 0])
+        assert unpack_answers(order, memoryview(packed)) == {10: 5, 30: 2}
+
+    def test_array_must_match_its_order(self):
+        with pytest.raises(UnknownPackedLayout):
+            unpack_answers([10, 20, 30], bytes([5, 0, 2, 0]))
+
+    def test_rejects_question_outside_exam(self):
+        with pytest.raises(ValueError):
+            pack_answers([1, 2], {3: 1})
+
+    def test_grade_skips_unanswered(self):
+        assert grade_packed(bytes([1, 0, 3, 2]), bytes([1, 2, 3, 0])) == (2, 3)
+
+
+@pytest.mark.django_db
+class TestPackedSubmissions(APITestCase):
+    """O modo compacto deve ser transparente para as APIs de resultado"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Packed Exam')
+        self.questions = []
+        for number in range(1, 6):
+            question = Question.objects.create(content=f'Packed question {number}?')
+            for option in range(1, 5):
+                Alternative.objects.create(
+                    question=question, content=f'Alt {option}', option=option, is_correct=option == 2
+                )
+            # Números fora da ordem de criação: a posição segue ExamQuestion.number.
+            ExamQuestion.objects.create(exam=self.exam, question=question, number=10 - number)
+            self.questions.append(question)
+        self.students = [
+            Student.objects.create(username=f'packed{i}', email=f'packed{i}@example.com', name=f'Packed {i}')
+            for i in range(2)
+        ]
+        self.answers = [
+            {'question_id': question.id, 'selected_option': 2 if index % 2 == 0 else 3}
+            for index, question in enumerate(self.questions[:4])
+        ]
+
+    def _submit(self, student):
+        response = self.client.post('/api/exam/submissions/', {
+            'student_id': student.id, 'exam_id': self.exam.id, 'answers': self.answers,
+        }, format='json')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        return ExamSubmission.objects.get(student=student, exam=self.exam)
+
+    def _results(self, submission):
+        sync = self.client.get(f'/api/exam/submissions/{submission.id}/').data['results']
+        response = async_to_sync(self.async_client.get)(f'/api/exam/async/submissions/{submission.id}/')
+        assert json.loads(response.content)['results'] == json.loads(json.dumps(sync))
+        return sync
+
+    def test_packed_matches_rows(self):
+        rows = self._submit(self.students[0])
+        with override_settings(SUBMISSION_ANSWER_STORAGE='packed'):
+            packed = self._submit(self.students[1])
+
+        assert SubmissionAnswer.objects.filter(submission=packed).count() == 0
+        assert len(packed.packed_answers) == len(self.questions)
+        assert packed.graded_score == rows.graded_score == 50.0
+
+        rows_result, packed_result = self._results(rows), self._results(packed)
+        for field in ['total_questions', 'correct_answers', 'score_percentage', 'questions']:
+            assert rows_result[field] == packed_result[field]
+
+    def test_statistics_include_packed(self):
+        self._submit(self.students[0])
+        expected = self.client.get(f'/api/exam/exams/{self.exam.id}/statistics/').data['statistics']
+        with override_settings(SUBMISSION_ANSWER_STORAGE='packed'):
+            self._submit(self.students[1])
+
+        stats = self.client.get(f'/api/exam/exams/{self.exam.id}/statistics/').data['statistics']
+
+        assert stats['total_submissions'] == 2
+        assert stats['average_score'] == expected['average_score']
+        for before, after in zip(expected['questions_statistics'], stats['questions_statistics']):
+            assert after['total_answers'] == before['total_answers'] * 2
+            assert after['correct_answers'] == before['correct_answers'] * 2
+
+    def test_question_changes_do_not_shift_packed_answers(self):
+        """Arrays gravados antes de o exame mudar de questões são lidos com a própria ordem"""
+        with override_settings(SUBMISSION_ANSWER_STORAGE='packed'):
+            packed = self._submit(self.students[1])
+        before = self._results(packed)
+        new_question = Question.objects.create(content='Packed question 0?')
+        Alternative.objects.create(question=new_question, content='Alt 1', option=1, is_correct=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            ExamQuestion.objects.create(exam=self.exam, question=new_question, number=1)
+            ExamQuestion.objects.filter(exam=self.exam, question=self.questions[4]).delete()
+        rows = self._submit(self.students[0])
+        packed.refresh_from_db()
+
+        after = self._results(packed)
+        stats = self.client.get(f'/api/exam/exams/{self.exam.id}/statistics/').data['statistics']
+
+        assert packed.compute_score() == 50.0
+        assert {question['id']: question['student_answer'] for question in after['questions'] if question['student_answer']} \
+            == {question['id']: question['student_answer'] for question in before['questions'] if question['student_answer']}
+        assert after['correct_answers'] == before['correct_answers']
+        assert stats['average_score'] == rows.graded_score == 50.0
+        assert sum(question['total_answers'] for question in stats['questions_statistics']) == 2 * len(self.answers)
+
+    def test_layout_is_stored_once(self):
+        order = [question.id for question in self.questions]
+
+        assert register_layout(order) == register_layout(order)
+        assert layout_order(register_layout(order)) == order
+        with pytest.raises(UnknownPackedLayout):
+            layout_order('0' * 16)
+
+    def test_pack_command_converts_rows(self):
+        submissions = [self._submit(student) for student in self.students]
+        before = [self._results(submission) for submission in submissions]
+        out = io.StringIO()
+
+        call_command('pack_submission_answers', batch_size=1, stdout=out)
+
+        assert SubmissionAnswer.objects.count() == 0
+        assert '2 submissions packed' in out.getvalue()
+        for submission, result in zip(submissions, before):
+            submission.refresh_from_db()
+            assert submission.packed_answers is not None
+            assert self._results(submission) == result
+
+        call_command('pack_submission_answers', stdout=out)
+        assert '0 submissions packed' in out.getvalue()
@@ -0,0 +1,84 @@
+"""
+Testes de plano de execução (EXPLAIN) das consultas mais frequentes
+"""
+
+import re
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+
+from exam.models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestHotQueryIndexes(TestCase):
+    """Cada consulta quente deve usar o índice composto correspondente"""
+
+    @classmethod
+    def setUpTestData(cls):
+        questions = Question.objects.bulk_create([Question(content=f'Indexed {i}?') for i in range(20)])
+        Alternative.objects.bulk_create([
+            Alternative(question=question, content=str(option), option=option, is_correct=option == 1)
+            for question in questions for option in range(1, 5)
+        ])
+        cls.exams = Exam.objects.bulk_create([Exam(name=f'Indexed exam {i}') for i in range(10)])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, question=question, number=number)
+            for exam in cls.exams for number, question in enumerate(questions, start=1)
+        ])
+        cls.students = Student.objects.bulk_create([
+            Student(username=f'indexed{i}', email=f'indexed{i}@example.com', name=f'Indexed {i}')
+            for i in range(50)
+        ])
+        submissions = ExamSubmission.objects.bulk_create([
+            ExamSubmission(student=student, exam=exam, graded_score=(student.id * 7 + exam.id) % 101)
+            for student in cls.students for exam in cls.exams
+        ])
+        SubmissionAnswer.objects.bulk_create([
+            SubmissionAnswer(submission=submission, question=question, selected_alternative_option=(i % 4) + 1)
+            for submission in submissions for i, question in enumerate(questions[:5])
+        ])
+        cls.question = questions[0]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assert_uses_index(self, queryset, index_name=None):
+        """O plano deve acessar as tabelas só por índice, sem varredura completa
+        nem ordenação extra; com ``index_name``, deve usar aquele índice."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Tabelas pequenas no teste: força o planner a mostrar o índice escolhido.
+                cursor.execute('SET enable_seqscan = off')
+        plan = queryset.explain()
+        if index_name:
+            assert index_name in plan, plan
+        assert 'Seq Scan' not in plan, plan
+        assert not re.search(r'\bSCAN \w+\s*$', plan, re.MULTILINE), plan
+        assert 'USE TEMP B-TREE' not in plan, plan
+
+    def test_submissions_by_exam_and_score(self):
+        qs = ExamSubmission.objects.filter(exam=self.exams[0], graded_score__gte=60)
+        self.assert_uses_index(qs, 'exam_sub_exam_score_idx')
+
+    def test_student_submissions_most_recent_first(self):
+        qs = ExamSubmission.objects.filter(student=self.students[0]).order_by('-submitted_at')
+        self.assert_uses_index(qs, 'exam_sub_student_recent_idx')
+
+    def test_exam_submissions_most_recent_first(self):
+        qs = ExamSubmission.objects.filter(exam=self.exams[0]).order_by('-submitted_at')
+        self.assert_uses_index(qs, 'exam_sub_exam_recent_idx')
+
+    def test_answers_per_question_and_option(self):
+        qs = SubmissionAnswer.objects.filter(question=self.question, selected_alternative_option=1)
+        self.assert_uses_index(qs.values('submission_id'), 'sub_answer_question_option_idx')
+
+    def test_answers_per_question_in_exam(self):
+        qs = SubmissionAnswer.objects.filter(question=self.question, submission__exam=self.exams[0])
+        self.assert_uses_index(qs.values('id'))
+
+    def test_correct_alternatives(self):
+        qs = Alternative.objects.filter(question=self.question, is_correct=True).order_by()
+        self.assert_uses_index(qs.values('option'), 'alternative_correct_idx')
@@ -0,0 +1,211 @@
+"""
+Guarda contra N+1: o número de consultas de cada rota de exam/urls.py não
+pode crescer com o volume de dados (ver utils.testing)
+"""
+
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import URLPattern
+from rest_framework.test import APIClient
+
+from exam import urls as exam_urls
+from exam.models import Exam, ExamDeletion, ExamQuestion, ExamSubmission, SubmissionAnswer
+from exam.packing import pack_submission
+from exam.structure import structure_cache
+from exam.tasks import process_exam_submission
+from question.models import Question, Alternative
+from student.models import Student
+from utils.testing import QueryScalingTestMixin, RouteCheck
+
+
+def _get(path, **params):
+    return lambda test, data: test.client.get(path.format(**data), params)
+
+
+def _async_get(path, **params):
+    return lambda test, data: async_to_sync(test.async_client.get)(path.format(**data), params)
+
+
+def _as_admin(call):
+    def wrapped(test, data):
+        test.client.force_authenticate(data['admin'])
+        try:
+            return call(test, data)
+        finally:
+            test.client.force_authenticate(None)
+    return wrapped
+
+
+def _put_draft(test, data):
+    return test.client.put(f"/api/exam/exams/{data['exam_id']}/draft/", {
+        'student_id': data['student_id'],
+        'answers': [{'question_id': question_id, 'selected_option': 2} for question_id in data['question_ids']],
+    }, format='json')
+
+
+def _post_submission(test, data):
+    return test.client.post('/api/exam/submissions/', {
+        'student_id': data['new_student_id'],
+        'exam_id': data['exam_id'],
+        'answers': [{'question_id': question_id, 'selected_option': 1} for question_id in data['question_ids']],
+    }, format='json')
+
+
+def _import_question_bank(test, data):
+    records = [
+        {
+            'content': f"Questão importada {data['scale']}-{index}?",
+            'exam': f"Banco {data['scale']}",
+            'number': index,
+            'alternatives': [
+                {'option': letter, 'content': f'Alternativa {letter}', 'is_correct': letter == 'B'}
+                for letter in 'ABCD'
+            ],
+        }
+        for index in range(1, data['scale'] + 1)
+    ]
+    upload = SimpleUploadedFile(
+        'banco.jsonl', '\n'.join(json.dumps(record) for record in records).encode(),
+        content_type='application/x-ndjson',
+    )
+    return test.client.post('/api/exam/question-bank/import/', {'file': upload}, format='multipart')
+
+
+ROUTE_CHECKS = [
+    RouteCheck('exams-list-create', _get('/api/exam/exams/')),
+    RouteCheck('exams-detail', _get('/api/exam/exams/{exam_id}/')),
+    RouteCheck('exams-deletion', _get('/api/exam/exams/deletions/{deletion_id}/')),
+    RouteCheck('exams-draft', _put_draft, 'PUT'),
+    RouteCheck('exams-draft', _get('/api/exam/exams/{exam_id}/draft/?student_id={student_id}'), 'GET'),
+    RouteCheck('exams-statistics', _get('/api/exam/exams/{exam_id}/statistics/')),
+    RouteCheck('exams-cache-status', _as_admin(_get('/api/exam/exams/{exam_id}/cache-status/'))),
+    RouteCheck('question-bank-import', _as_admin(_import_question_bank), expected_status=(201,)),
+    RouteCheck('submissions-list-create', _get('/api/exam/submissions/?exam_id={exam_id}'), 'GET'),
+    RouteCheck('submissions-list-create', _post_submission, 'POST', expected_status=(202,)),
+    RouteCheck('submissions-status', _get('/api/exam/submissions/status/?task_id={task_id}')),
+    RouteCheck(
+        'submissions-status-stream', _async_get('/api/exam/submissions/status/stream/?task_id={task_id}&timeout=0')
+    ),
+    RouteCheck('submissions-detail', _get('/api/exam/submissions/{submission_id}/')),
+    RouteCheck('submissions-student', _get('/api/exam/submissions/student_submission/?student_id={student_id}')),
+    RouteCheck('submissions-detailed-analysis', _get('/api/exam/submissions/{submission_id}/detailed_analysis/')),
+    RouteCheck('submissions-student-exam', _get('/api/exam/submissions/student/{student_id}/exam/{exam_id}/')),
+    RouteCheck('exam-results', _get('/api/exam/results/{submission_id}/')),
+    RouteCheck('async-exams-list', _async_get('/api/exam/async/exams/')),
+    RouteCheck('async-exams-detail', _async_get('/api/exam/async/exams/{exam_id}/')),
+    RouteCheck('async-exams-statistics', _async_get('/api/exam/async/exams/{exam_id}/statistics/')),
+    RouteCheck('async-submissions-status', _async_get('/api/exam/async/submissions/status/?task_id={task_id}')),
+    RouteCheck('async-submissions-detail', _async_get('/api/exam/async/submissions/{submission_id}/')),
+]
+
+
+@pytest.mark.django_db
+class TestQueryScaling(QueryScalingTestMixin, TestCase):
+    """Mesmas requisições com 5 e 50 questões, submissões e exames"""
+
+    packed = False
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = Student.objects.create(
+            username='admin', email='admin@example.com', name='Admin', is_staff=True
+        )
+
+    def reset_caches(self):
+        super().reset_caches()
+        structure_cache.clear()
+
+    def seed(self, scale):
+        """Exame com ``scale`` questões e ``scale`` submissões; o primeiro
+        estudante também responde ``scale`` exames avulsos."""
+        exam = Exam.objects.create(name=f'Prova {scale}')
+        questions = Question.objects.bulk_create([
+            Question(content=f'Questão {scale}-{index}?') for index in range(scale)
+        ])
+        Alternative.objects.bulk_create([
+            Alternative(question=question, option=option, content=f'Alt {option}', is_correct=option == 1)
+            for question in questions
+            for option in range(1, 5)
+        ])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, question=question, number=number)
+            for number, question in enumerate(questions, start=1)
+        ])
+        students = Student.objects.bulk_create([
+            Student(username=f'aluno{scale}-{index}', email=f'aluno{scale}-{index}@example.com', name=f'Aluno {index}')
+            for index in range(scale)
+        ])
+        question_ids = [question.id for question in questions]
+        answers = [
+            {question.id: (index + position) % 4 + 1 for position, question in enumerate(questions)}
+            for index in range(scale)
+        ]
+        submissions = [ExamSubmission(student=student, exam=exam) for student in students]
+        if self.packed:
+            for submission, student_answers in zip(submissions, answers):
+                pack_submission(submission, question_ids, student_answers)
+        ExamSubmission.objects.bulk_create(submissions)
+        if not self.packed:
+            SubmissionAnswer.objects.bulk_create([
+                SubmissionAnswer(submission=submission, question_id=question_id, selected_alternative_option=option)
+                for submission, student_answers in zip(submissions, answers)
+                for question_id, option in student_answers.items()
+            ])
+
+        extra_exams = Exam.objects.bulk_create([Exam(name=f'Avulsa {scale}-{index}') for index in range(scale)])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=extra, question=questions[0], number=1) for extra in extra_exams
+        ])
+        extra_submissions = [ExamSubmission(student=students[0], exam=extra) for extra in extra_exams]
+        if self.packed:
+            for submission in extra_submissions:
+                pack_submission(submission, [questions[0].id], {questions[0].id: 1})
+        ExamSubmission.objects.bulk_create(extra_submissions)
+        if not self.packed:
+            SubmissionAnswer.objects.bulk_create([
+                SubmissionAnswer(submission=submission, question=questions[0], selected_alternative_option=1)
+                for submission in extra_submissions
+            ])
+
+        grader = Student.objects.create(
+            username=f'corrigido{scale}', email=f'corrigido{scale}@example.com', name='Corrigido'
+        )
+        task = process_exam_submission.delay({
+            'student_id': grader.id,
+            'exam_id': exam.id,
+            'answers': [{'question_id': question.id, 'selected_option': 1} for question in questions],
+        })
+        new_student = Student.objects.create(
+            username=f'novo{scale}', email=f'novo{scale}@example.com', name='Novo'
+        )
+        deletion = ExamDeletion.objects.create(exam_id=extra_exams[-1].id, exam_name=extra_exams[-1].name)
+
+        return {
+            'scale': scale,
+            'admin': self.admin,
+            'exam_id': exam.id,
+            'question_ids': question_ids,
+            'student_id': students[0].id,
+            'new_student_id': new_student.id,
+            'submission_id': submissions[0].id,
+            'task_id': task.id,
+            'deletion_id': deletion.id,
+        }
+
+    def test_every_exam_route_is_covered(self):
+        names = {pattern.name for pattern in exam_urls.urlpatterns if isinstance(pattern, URLPattern)}
+        assert names == {check.url_name for check in ROUTE_CHECKS}
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.assert_queries_do_not_grow(ROUTE_CHECKS)
+
+
+@override_settings(SUBMISSION_ANSWER_STORAGE='packed')
+class TestQueryScalingPacked(TestQueryScaling):
+    """As mesmas rotas com as respostas no array compacto (packed_answers)"""
+
+    packed = True
@@ -0,0 +1,159 @@
+"""
+Testes da importação em lote do banco de questões
+"""
+
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.importer import ImportValidationError, iter_records, validate_record
+from exam.models import Exam, ExamQuestion, QuestionBankImport
+from question.models import Question, Alternative
+from student.models import Student
+
+
+def make_record(index, exam='Banco Importado', correct='B', selection_type='SINGLE'):
+    return {
+        'content': f'Questão importada {index}?',
+        'selection_type': selection_type,
+        'exam': exam,
+        'number': index if exam else None,
+        'alternatives': [
+            {'option': letter, 'content': f'Alternativa {letter}', 'is_correct': letter in correct}
+            for letter in 'ABCD'
+        ],
+    }
+
+
+def write_jsonl(tmp_path, records, name='banco.jsonl'):
+    path = tmp_path / name
+    path.write_text('\n'.join(json.dumps(record) for record in records), encoding='utf-8')
+    return str(path)
+
+
+class TestRecordValidation:
+    """Testes da validação em memória"""
+
+    def test_single_requires_exactly_one_correct(self):
+        with pytest.raises(ImportValidationError):
+            validate_record(make_record(1, correct='AB'))
+        with pytest.raises(ImportValidationError):
+            validate_record(make_record(1, correct=''))
+
+    def test_multiple_accepts_several_correct(self):
+        record = validate_record(make_record(1, correct='AB', selection_type='MULTIPLE'))
+        assert [is_correct for _, _, is_correct in record['alternatives']] == [True, True, False, False]
+
+    def test_options_must_be_unique(self):
+        record = make_record(1)
+        record['alternatives'][1]['option'] = 'A'
+        with pytest.raises(ImportValidationError):
+            validate_record(record)
+
+    def test_json_array_is_streamed(self):
+        records = [make_record(i) for i in range(1, 6)]
+        stream = io.BytesIO(json.dumps(records, indent=2).encode())
+        assert list(iter_records(stream, 'json')) == records
+
+    def test_csv_rows_become_records(self):
+        content = 'content,selection_type,exam,number,A,B,C,D,E,correct\nQ1?,SINGLE,Prova CSV,1,a,b,c,,,C\n'
+        record = validate_record(next(iter_records(io.BytesIO(content.encode()), 'csv')))
+        assert record['exam'] == 'Prova CSV'
+        assert record['alternatives'] == [(1, 'a', False), (2, 'b', False), (3, 'c', True)]
+
+
+@pytest.mark.django_db
+class TestImportQuestionBankCommand(TestCase):
+    """Testes do comando import_question_bank"""
+
+    @pytest.fixture(autouse=True)
+    def _tmp_path(self, tmp_path):
+        self.tmp_path = tmp_path
+
+    def test_imports_in_chunks(self):
+        """Importa questões, alternativas, exame e vínculos em blocos"""
+        path = write_jsonl(self.tmp_path, [make_record(i) for i in range(1, 26)])
+        out = io.StringIO()
+
+        with self.assertNumQueries(26):
+            call_command('import_question_bank', path, chunk_size=10, stdout=out)
+
+        exam = Exam.objects.get(name='Banco Importado')
+        assert Question.objects.count() == 25
+        assert Alternative.objects.filter(is_correct=True).count() == 25
+        assert list(ExamQuestion.objects.filter(exam=exam).values_list('number', flat=True)) == list(range(1, 26))
+        assert 'records/s' in out.getvalue()
+        job = QuestionBankImport.objects.get()
+        assert job.status == QuestionBankImport.Status.COMPLETED
+        assert job.records_processed == 25
+
+    def test_resume_after_invalid_record(self):
+        """Uma importação interrompida continua do último bloco gravado"""
+        records = [make_record(i) for i in range(1, 13)]
+        records[10]['alternatives'][0]['is_correct'] = True
+        path = write_jsonl(self.tmp_path, records)
+
+        with pytest.raises(CommandError):
+            call_command('import_question_bank', path, chunk_size=5, stdout=io.StringIO())
+        assert Question.objects.count() == 10
+
+        call_command('import_question_bank', path, chunk_size=5, resume=True, skip_invalid=True,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+        assert Question.objects.count() == 11
+        job = QuestionBankImport.objects.get()
+        assert job.status == QuestionBankImport.Status.COMPLETED
+        assert job.records_skipped == 1
+
+    def test_rejects_existing_exam_number(self):
+        """Números já ocupados no exame existente são rejeitados"""
+        exam = Exam.objects.create(name='Banco Importado')
+        question = Question.objects.create(content='Existente?')
+        ExamQuestion.objects.create(exam=exam, question=question, number=1)
+        path = write_jsonl(self.tmp_path, [make_record(1)])
+
+        with pytest.raises(CommandError):
+            call_command('import_question_bank', path, stdout=io.StringIO())
+        assert Question.objects.count() == 1
+
+    def test_already_imported_file_requires_force(self):
+        path = write_jsonl(self.tmp_path, [make_record(1, exam=None)])
+        call_command('import_question_bank', path, stdout=io.StringIO())
+
+        with pytest.raises(CommandError):
+            call_command('import_question_bank', path, stdout=io.StringIO())
+
+
+@pytest.mark.django_db
+class TestQuestionBankImportAPI(APITestCase):
+    """Testes do endpoint /question-bank/import/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/api/exam/question-bank/import/'
+
+    def _upload(self):
+        content = '\n'.join(json.dumps(make_record(i)) for i in range(1, 4)).encode()
+        return SimpleUploadedFile('banco.jsonl', content, content_type='application/x-ndjson')
+
+    def test_requires_admin(self):
+        response = self.client.post(self.url, {'file': self._upload()}, format='multipart')
+        assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
+
+    def test_admin_import(self):
+        admin = Student.objects.create(
+            username='admin', email='admin@example.com', name='Admin', is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.post(self.url, {'file': self._upload()}, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['report']['questions_created'] == 3
+        assert ExamQuestion.objects.count() == 3
@@ -0,0 +1,179 @@
+"""
+Testes da detecção de questões duplicadas (content_hash e MinHash/LSH)
+"""
+
+import io
+import json
+
+import pytest
+from django.contrib.admin import site as admin_site
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management import call_command
+from django.db import connection
+from django.forms import inlineformset_factory
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from exam.models import Exam, ExamQuestion, QuestionBankImport
+from question.admin import AlternativeInlineFormSet
+from question.dedup import SignatureIndex, content_hash, find_similar_groups, normalize_text
+from question.models import Alternative, Question
+from student.models import Student
+
+
+def make_question(content, alternatives):
+    question = Question.objects.create(content=content)
+    for option, text in enumerate(alternatives, start=1):
+        Alternative.objects.create(question=question, option=option, content=text, is_correct=option == 1)
+    question.refresh_content_hash()
+    return question
+
+
+class TestContentHash:
+    """Testes da normalização"""
+
+    def test_ignores_case_accents_and_whitespace(self):
+        assert normalize_text('  Qual  ÓRGÃO\n bombeia o sangue? ') == 'qual orgao bombeia o sangue?'
+        assert content_hash('Qual órgão?', ['Coração', 'Pulmão']) == content_hash('qual  ORGAO?', ['pulmao', 'CORACAO'])
+
+    def test_alternatives_are_part_of_the_hash(self):
+        assert content_hash('Qual órgão?', ['Coração', 'Pulmão']) != content_hash('Qual órgão?', ['Coração', 'Rim'])
+
+    def test_lsh_groups_near_duplicates_only(self):
+        base = 'Paciente de 45 anos chega ao pronto socorro com dor torácica intensa irradiando para o braço esquerdo'
+        index = SignatureIndex()
+        index.add(1, base, ['Infarto agudo do miocárdio', 'Pneumotórax', 'Refluxo'])
+        index.add(2, base + ' há duas horas', ['Infarto agudo do miocárdio', 'Pneumotórax', 'Refluxo'])
+        index.add(3, base.upper(), ['Refluxo', 'Pneumotórax', 'Infarto agudo do miocárdio'])
+        index.add(4, 'Qual a capital do Brasil considerando a constituição de 1988?', ['Brasília', 'Rio', 'Salvador'])
+
+        assert find_similar_groups(index, threshold=0.7) == [[1, 2, 3]]
+
+
+@pytest.mark.django_db
+class TestQuestionContentHash(TestCase):
+    """Testes do content_hash mantido em Question"""
+
+    def test_hash_follows_alternatives(self):
+        question = make_question('Qual órgão bombeia o sangue?', ['Coração', 'Pulmão'])
+        assert question.content_hash == content_hash(question.content, ['Coração', 'Pulmão'])
+
+        question.alternatives.get(option=2).delete()
+        question.refresh_content_hash()
+        question.refresh_from_db()
+        assert question.content_hash == content_hash(question.content, ['Coração'])
+
+    def test_admin_recomputes_hash_once_per_question(self):
+        question = make_question('Qual órgão bombeia o sangue?', ['Coração', 'Pulmão', 'Rim'])
+        admin = Student.objects.create_superuser(
+            username='admin', email='admin@example.com', password='secret', name='Admin'
+        )
+        data = {
+            'content': question.content, 'selection_type': question.selection_type,
+            'alternatives-TOTAL_FORMS': '3', 'alternatives-INITIAL_FORMS': '3',
+            'alternatives-MIN_NUM_FORMS': '1', 'alternatives-MAX_NUM_FORMS': '5',
+        }
+        for index, alternative in enumerate(question.alternatives.all()):
+            prefix = f'alternatives-{index}-'
+            data.update({
+                f'{prefix}id': alternative.id, f'{prefix}question': question.id,
+                f'{prefix}option': alternative.option, f'{prefix}content': alternative.content.upper(),
+            })
+        data['alternatives-0-is_correct'] = 'on'
+        data['alternatives-2-DELETE'] = 'on'
+
+        request = RequestFactory().post(f'/admin/question/question/{question.id}/change/', data)
+        request.user = admin
+        request._dont_enforce_csrf_checks = True
+        request._messages = CookieStorage(request)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_site._registry[Question].change_view(request, str(question.id))
+
+        assert response.status_code == 302
+        question.refresh_from_db()
+        assert question.content_hash == content_hash(question.content, ['Coração', 'Pulmão'])
+        hash_updates = [q for q in queries if q['sql'].startswith('UPDATE "question_question" SET "content_hash"')]
+        assert len(hash_updates) == 1
+
+    def test_admin_formset_rejects_duplicate(self):
+        make_question('Qual órgão bombeia o sangue?', ['Coração', 'Pulmão'])
+        question = Question(content='qual orgao bombeia o  sangue?')
+        data = {
+            'alternatives-TOTAL_FORMS': '2', 'alternatives-INITIAL_FORMS': '0',
+            'alternatives-MIN_NUM_FORMS': '1', 'alternatives-MAX_NUM_FORMS': '5',
+            'alternatives-0-option': '1', 'alternatives-0-content': 'pulmão', 'alternatives-0-is_correct': 'on',
+            'alternatives-1-option': '2', 'alternatives-1-content': 'CORAÇÃO',
+        }
+        formset_class = inlineformset_factory(
+            Question, Alternative, formset=AlternativeInlineFormSet, fields=['option', 'content', 'is_correct']
+        )
+
+        formset = formset_class(data, instance=question, prefix='alternatives')
+
+        assert not formset.is_valid()
+        assert 'Já existe uma questão' in str(formset.non_form_errors())
+
+
+@pytest.mark.django_db
+class TestDuplicateImport(TestCase):
+    """Testes da deduplicação na importação em lote"""
+
+    @pytest.fixture(autouse=True)
+    def _tmp_path(self, tmp_path):
+        self.tmp_path = tmp_path
+
+    def test_import_reuses_existing_question(self):
+        existing = make_question('Qual órgão bombeia o sangue?', ['Coração', 'Pulmão'])
+        records = [
+            {'content': 'QUAL ORGAO bombeia o sangue?', 'exam': 'Prova Dedup', 'number': 1,
+             'alternatives': [{'option': 'A', 'content': 'Pulmão'}, {'option': 'B', 'content': 'coração', 'is_correct': True}]},
+            {'content': 'Nova questão?', 'exam': 'Prova Dedup', 'number': 2,
+             'alternatives': [{'option': 'A', 'content': 'Sim', 'is_correct': True}]},
+            {'content': 'nova   questao?', 'exam': None,
+             'alternatives': [{'option': 'A', 'content': 'sim', 'is_correct': True}]},
+        ]
+        path = self.tmp_path / 'banco.jsonl'
+        path.write_text('\n'.join(json.dumps(record) for record in records), encoding='utf-8')
+        out = io.StringIO()
+
+        call_command('import_question_bank', str(path), stdout=out)
+
+        assert Question.objects.count() == 2
+        exam = Exam.objects.get(name='Prova Dedup')
+        assert ExamQuestion.objects.get(exam=exam, number=1).question_id == existing.id
+        assert '2 duplicates reused' in out.getvalue()
+
+    def test_import_rejects_duplicate_with_another_answer_key(self):
+        """Duplicatas que marcam outra alternativa como correta são rejeitadas, não reaproveitadas"""
+        existing = make_question('Qual órgão bombeia o sangue?', ['Coração', 'Pulmão'])
+        records = [
+            {'content': 'Qual órgão bombeia o sangue?', 'exam': 'Prova Dedup', 'number': 1,
+             'alternatives': [{'option': 'A', 'content': 'Coração'}, {'option': 'B', 'content': 'Pulmão', 'is_correct': True}]},
+            {'content': 'Nova questão?', 'exam': 'Prova Dedup', 'number': 2,
+             'alternatives': [{'option': 'A', 'content': 'Sim', 'is_correct': True}, {'option': 'B', 'content': 'Não'}]},
+            {'content': 'nova questao?', 'exam': 'Prova Dedup', 'number': 3,
+             'alternatives': [{'option': 'A', 'content': 'sim'}, {'option': 'B', 'content': 'não', 'is_correct': True}]},
+        ]
+        path = self.tmp_path / 'banco.jsonl'
+        path.write_text('\n'.join(json.dumps(record) for record in records), encoding='utf-8')
+
+        call_command('import_question_bank', str(path), skip_invalid=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+        exam = Exam.objects.get(name='Prova Dedup')
+        assert list(ExamQuestion.objects.filter(exam=exam).values_list('number', flat=True)) == [2]
+        assert Question.objects.count() == 2
+        assert list(existing.alternatives.filter(is_correct=True).values_list('content', flat=True)) == ['Coração']
+        job = QuestionBankImport.objects.get()
+        assert job.records_skipped == 2
+
+    def test_find_duplicate_questions_command(self):
+        first = make_question('Qual órgão bombeia o sangue no corpo humano?', ['Coração', 'Pulmão', 'Fígado'])
+        second = make_question('qual orgao bombeia o sangue no corpo humano', ['Fígado', 'Coração', 'Pulmão'])
+        make_question('Qual é a unidade de medida da pressão arterial?', ['mmHg', 'kg', 'litros'])
+        out = io.StringIO()
+
+        call_command('find_duplicate_questions', json=True, stdout=out, stderr=io.StringIO())
+
+        groups = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [group['question_ids'] for group in groups] == [[first.id, second.id]]
@@ -0,0 +1,129 @@
+"""
+Testes do roteamento de leituras para a réplica (dois bancos SQLite)
+"""
+
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.models import Exam, ExamQuestion, ExamSubmission, SubmissionAnswer
+from exam.tasks import process_exam_submission
+from question.models import Question, Alternative
+from student.models import Student
+from utils.db.routers import PIN_KEY, pin_to_primary, primary_reads, replica_reads, submission_pin
+
+
+def create_exam(using, exam_name, student_name):
+    """Cria o mesmo conjunto de ids no banco ``using``, com nomes distintos."""
+    student = Student.objects.db_manager(using).create(
+        username='replica', email='replica@example.com', name=student_name
+    )
+    question = Question.objects.using(using).create(content='Replica question?')
+    # bulk_create: Alternative.save() valida a unicidade sempre no primário
+    Alternative.objects.using(using).bulk_create([
+        Alternative(question=question, content='A', option=1, is_correct=True),
+    ])
+    exam = Exam.objects.using(using).create(name=exam_name)
+    ExamQuestion.objects.using(using).create(exam=exam, question=question, number=1)
+    submission = ExamSubmission.objects.using(using).create(student=student, exam=exam)
+    SubmissionAnswer.objects.using(using).create(
+        submission=submission, question=question, selected_alternative_option=1
+    )
+    return student, exam
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+@override_settings(REPLICA_DATABASE='replica')
+class TestReplicaRouter(APITestCase):
+    """Leituras das views analíticas vão para a réplica; escritas, para o primário"""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.student, self.exam = create_exam('default', 'Primary Exam', 'Primary Student')
+        create_exam('replica', 'Replica Exam', 'Replica Student')
+
+    def test_context_managers(self):
+        with replica_reads():
+            assert Exam.objects.get(pk=self.exam.pk).name == 'Replica Exam'
+            with primary_reads():
+                assert Exam.objects.get(pk=self.exam.pk).name == 'Primary Exam'
+        assert Exam.objects.get(pk=self.exam.pk).name == 'Primary Exam'
+
+    def test_writes_go_to_primary(self):
+        with replica_reads():
+            exam = Exam.objects.get(pk=self.exam.pk)
+            exam.name = 'Renamed'
+            exam.save()
+
+        assert Exam.objects.using('default').get(pk=self.exam.pk).name == 'Renamed'
+        assert Exam.objects.using('replica').get(pk=self.exam.pk).name == 'Replica Exam'
+
+    def test_statistics_read_from_replica(self):
+        response = self.client.get(f'/api/exam/exams/{self.exam.pk}/statistics/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['exam_name'] == 'Replica Exam'
+
+    def test_async_statistics_follow_the_same_routing(self):
+        url = f'/api/exam/async/exams/{self.exam.pk}/statistics/'
+
+        response = async_to_sync(self.async_client.get)(url)
+        assert json.loads(response.content)['exam_name'] == 'Replica Exam'
+        cache.clear()
+        response = async_to_sync(self.async_client.get)(url, {'read_primary': '1'})
+        assert json.loads(response.content)['exam_name'] == 'Primary Exam'
+
+    def test_force_primary(self):
+        url = f'/api/exam/exams/{self.exam.pk}/statistics/'
+
+        assert self.client.get(url, HTTP_X_READ_PRIMARY='1').data['exam_name'] == 'Primary Exam'
+        assert self.client.get(url, {'read_primary': '1'}).data['exam_name'] == 'Primary Exam'
+
+    def test_student_pinned_after_submission(self):
+        """Read-your-writes: logo após submeter, o estudante lê do primário"""
+        url = '/api/exam/submissions/student_submission/'
+        params = {'student_id': self.student.pk}
+
+        assert self.client.get(url, params).data['submissions'][0]['student_name'] == 'Replica Student'
+
+        pin_to_primary(self.student.pk)
+
+        assert self.client.get(url, params).data['submissions'][0]['student_name'] == 'Primary Student'
+        other = self.client.get('/api/exam/submissions/', {'student_id': self.student.pk + 1})
+        assert other.data['count'] == 0
+
+    def test_submission_pinned_after_grading(self):
+        """A análise detalhada, endereçada só pelo id, não pode ler uma réplica atrasada"""
+        student = Student.objects.create(username='novo', email='novo@example.com', name='Novo')
+        result = process_exam_submission.delay({
+            'student_id': student.pk, 'exam_id': self.exam.pk,
+            'answers': [{'question_id': Question.objects.get().pk, 'selected_option': 1}],
+        }).get()
+        submission_id = result['submission']['id']
+        url = f'/api/exam/submissions/{submission_id}/detailed_analysis/'
+
+        pinned = self.client.get(url)
+        cache.delete(PIN_KEY.format(submission_pin(submission_id)))
+        lagging = self.client.get(url)
+
+        assert pinned.status_code == status.HTTP_200_OK
+        assert pinned.data['submission']['id'] == submission_id
+        assert lagging.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_other_views_use_primary(self):
+        response = self.client.get(f'/api/exam/exams/{self.exam.pk}/')
+
+        assert response.data['name'] == 'Primary Exam'
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_without_replica(self):
+        response = self.client.get(f'/api/exam/exams/{self.exam.pk}/statistics/')
+
+        assert response.data['exam_name'] == 'Primary Exam'
@@ -0,0 +1,101 @@
+"""
+Testes das métricas por endpoint (utils.middleware / utils.metrics)
+"""
+
+import pytest
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamQuestion
+from question.models import Question, Alternative
+from utils import metrics
+from utils.metrics import sql_fingerprint
+
+METRICS_MIDDLEWARE = [*settings.MIDDLEWARE, 'utils.middleware.RequestMetricsMiddleware']
+
+
+def _budgets(**budgets):
+    return {**settings.REQUEST_METRICS, 'QUERY_BUDGETS': budgets}
+
+
+class TestSqlFingerprint:
+    """Agrupamento de SQL que só difere nos parâmetros"""
+
+    def test_literals_and_in_lists_are_collapsed(self):
+        first = sql_fingerprint("SELECT * FROM exam_exam WHERE id = 12 AND name = 'Prova'")
+        second = sql_fingerprint("SELECT *  FROM exam_exam WHERE id = 7 AND name = 'Outra ''prova'''")
+        assert first == second == 'SELECT * FROM exam_exam WHERE id = ? AND name = ?'
+        assert sql_fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)') == 'SELECT ? FROM t WHERE id IN (...)'
+
+
+@pytest.mark.django_db
+@override_settings(MIDDLEWARE=METRICS_MIDDLEWARE)
+class TestRequestMetricsMiddleware(TestCase):
+    """Latência, consultas, tempo de banco e de serializer por nome de URL"""
+
+    def setUp(self):
+        metrics.reset_metrics()
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Prova Métricas')
+        question = Question.objects.create(content='Questão?')
+        Alternative.objects.create(question=question, option=1, content='A', is_correct=True)
+        ExamQuestion.objects.create(exam=self.exam, question=question, number=1)
+
+    def test_records_per_endpoint(self):
+        self.client.get(f'/api/exam/exams/{self.exam.id}/')
+        self.client.get(f'/api/exam/exams/{self.exam.id}/')
+        self.client.get('/api/exam/nao-existe/')
+
+        body = self.client.get('/metrics').content.decode()
+
+        assert 'http_request_duration_seconds_count{endpoint="exams-detail",method="GET"} 2' in body
+        assert 'http_request_db_queries_count{endpoint="exams-detail"} 2' in body
+        assert 'http_requests_total{endpoint="exams-detail",method="GET",status="200"} 2' in body
+        assert 'http_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in body
+        assert '# TYPE http_request_serializer_duration_seconds histogram' in body
+        samples = {
+            name: value for name, labels, value in metrics.REQUEST_DB_TIME.samples()
+            if labels.get('endpoint') == 'exams-detail' and 'le' not in labels
+        }
+        assert samples['http_request_db_duration_seconds_sum'] > 0
+
+    def test_serializer_time_is_recorded(self):
+        self.client.get('/api/exam/exams/')
+
+        totals = {
+            name: value for name, labels, value in metrics.REQUEST_SERIALIZER_TIME.samples()
+            if labels.get('endpoint') == 'exams-list-create' and 'le' not in labels
+        }
+        assert totals['http_request_serializer_duration_seconds_count'] == 1
+        assert totals['http_request_serializer_duration_seconds_sum'] > 0
+
+    def test_drf_serializers_are_not_patched(self):
+        """O tempo vem de SerializerTimingMixin nas views, sem alterar o DRF no processo todo"""
+        self.client.get('/api/exam/exams/')
+
+        assert serializers.Serializer.data.fget.__qualname__ == 'Serializer.data'
+        assert serializers.ListSerializer.data.fget.__qualname__ == 'ListSerializer.data'
+
+    def test_over_budget_logs_fingerprints(self):
+        with override_settings(REQUEST_METRICS=_budgets(**{'exams-detail': 0})):
+            with self.assertLogs('utils.middleware', 'WARNING') as logs:
+                self.client.get(f'/api/exam/exams/{self.exam.id}/')
+
+        assert 'Query budget exceeded' in logs.output[0]
+        assert 'exams-detail' in logs.output[0]
+        assert '1x SELECT' in logs.output[0]
+        assert metrics.BUDGET_EXCEEDED.value('exams-detail') == 1
+
+    def test_within_budget_does_not_log(self):
+        with override_settings(REQUEST_METRICS=_budgets(**{'exams-detail': 50})):
+            with self.assertNoLogs('utils.middleware', 'WARNING'):
+                self.client.get(f'/api/exam/exams/{self.exam.id}/')
+
+    def test_metrics_token(self):
+        with override_settings(REQUEST_METRICS={**settings.REQUEST_METRICS, 'TOKEN': 'segredo'}):
+            assert self.client.get('/metrics').status_code == 403
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
@@ -0,0 +1,160 @@
+"""
+Testes do profiling sob demanda (utils.profiling / RequestProfilingMiddleware)
+"""
+
+import pstats
+import threading
+import time
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamQuestion
+from question.models import Alternative, Question
+from student.models import Student
+from utils.profiling import StackSampler, list_profiles, make_profile_token
+
+PROFILING_MIDDLEWARE = [*settings.MIDDLEWARE, 'utils.middleware.RequestProfilingMiddleware']
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+class TestStackSampler:
+    """Stacks amostradas no formato collapsed (flamegraph)"""
+
+    def test_collapsed_stacks_of_the_sampled_thread(self):
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        busy(0.1)
+        sampler.stop()
+
+        lines = sampler.collapsed().splitlines()
+
+        assert lines
+        stack, count = lines[0].rsplit(' ', 1)
+        assert int(count) >= 1
+        assert any('busy (test_request_profiling.py:' in line for line in lines)
+        assert stack.split(';')[0] != stack.split(';')[-1]
+
+
+@pytest.mark.django_db
+@override_settings(MIDDLEWARE=PROFILING_MIDDLEWARE)
+class TestRequestProfilingMiddleware(TestCase):
+    """Perfis por header assinado ou amostragem, guardados e listados pelo admin"""
+
+    @pytest.fixture(autouse=True)
+    def profiles_dir(self, tmp_path):
+        self.root = tmp_path / 'profiles'
+        storages = {**settings.STORAGES, 'profiles': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': str(self.root)},
+        }}
+        config = {**settings.REQUEST_PROFILING, 'ENABLED': True}
+        with self.settings(STORAGES=storages, REQUEST_PROFILING=config):
+            yield
+
+    def setUp(self):
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Prova Perfil')
+        question = Question.objects.create(content='Questão?')
+        Alternative.objects.create(question=question, option=1, content='A', is_correct=True)
+        ExamQuestion.objects.create(exam=self.exam, question=question, number=1)
+        self.url = f'/api/exam/exams/{self.exam.id}/'
+
+    def config(self, **overrides):
+        return self.settings(REQUEST_PROFILING={**settings.REQUEST_PROFILING, **overrides})
+
+    def test_signed_header_profiles_the_request(self):
+        response = self.client.get(self.url, HTTP_X_PROFILE=make_profile_token(), HTTP_X_REQUEST_ID='req-42')
+
+        profile_id = response['X-Profile-Id']
+        assert response.status_code == 200
+        assert '-req-42-' in profile_id
+        assert {path.name for path in self.root.iterdir()} == {
+            f'{profile_id}.pstats', f'{profile_id}.collapsed', f'{profile_id}.json',
+        }
+        stats = pstats.Stats(str(self.root / f'{profile_id}.pstats'), stream=StringIO())
+        assert any(function[2] == 'get' for function in stats.stats)
+        [meta] = list_profiles()
+        assert (meta['endpoint'], meta['status'], meta['trigger']) == ('exams-detail', 200, 'header')
+
+    def test_requests_without_a_valid_token_are_not_profiled(self):
+        plain = self.client.get(self.url)
+        forged = self.client.get(self.url, HTTP_X_PROFILE='abc:def:ghi')
+        with self.config(TOKEN_MAX_AGE=-1):
+            expired = self.client.get(self.url, HTTP_X_PROFILE=make_profile_token())
+
+        assert all('X-Profile-Id' not in response for response in (plain, forged, expired))
+        assert not self.root.exists()
+
+    def test_sampling(self):
+        with self.config(SAMPLE_RATE=1.0):
+            response = self.client.get(self.url)
+
+        assert list_profiles()[0] == {**list_profiles()[0], 'id': response['X-Profile-Id'], 'trigger': 'sample'}
+
+    def test_disabled_middleware_is_removed_from_the_chain(self):
+        with self.config(ENABLED=False, SAMPLE_RATE=1.0):
+            response = self.client.get(self.url, HTTP_X_PROFILE=make_profile_token())
+
+        assert 'X-Profile-Id' not in response
+
+    def test_only_the_newest_profiles_are_kept(self):
+        with self.config(SAMPLE_RATE=1.0, MAX_PROFILES=2):
+            ids = [self.client.get(self.url, HTTP_X_REQUEST_ID=f'r{index}')['X-Profile-Id'] for index in range(3)]
+
+        assert sorted(profile['id'] for profile in list_profiles()) == sorted(ids[1:])
+        assert len(list(self.root.iterdir())) == 6
+
+    def test_ids_do_not_collide(self):
+        with self.config(SAMPLE_RATE=1.0):
+            ids = [self.client.get(self.url, HTTP_X_REQUEST_ID='mesmo')['X-Profile-Id'] for _ in range(3)]
+
+        assert len(set(ids)) == 3
+        assert {path.name for path in self.root.iterdir()} == {
+            f'{profile_id}.{kind}' for profile_id in ids for kind in ('pstats', 'collapsed', 'json')
+        }
+
+    async def test_asgi_requests_are_not_profiled(self):
+        from django.test import AsyncClient
+
+        response = await AsyncClient().get(
+            f'/api/exam/async/exams/{self.exam.id}/', headers={'X-Profile': make_profile_token()}
+        )
+
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response
+        assert not self.root.exists()
+
+    def test_admin_endpoints(self):
+        profile_id = self.client.get(self.url, HTTP_X_PROFILE=make_profile_token())['X-Profile-Id']
+        anonymous = self.client.get('/api/ops/profiles/')
+        admin = Student.objects.create(username='ops', email='ops@example.com', name='Ops', is_staff=True)
+        self.client.force_authenticate(admin)
+
+        listing = self.client.get('/api/ops/profiles/')
+        collapsed = self.client.get(f'/api/ops/profiles/{profile_id}/collapsed/')
+        missing = self.client.get(f'/api/ops/profiles/{profile_id}/json/')
+        traversal = self.client.get('/api/ops/profiles/..%2Fsecret/pstats/')
+
+        assert anonymous.status_code in (401, 403)
+        assert [profile['id'] for profile in listing.data['profiles']] == [profile_id]
+        assert collapsed.status_code == 200
+        assert collapsed['Content-Disposition'] == f'attachment; filename="{profile_id}.collapsed"'
+        assert missing.status_code == 404
+        assert traversal.status_code == 404
+
+    def test_token_command(self):
+        out = StringIO()
+
+        call_command('profile_token', quiet=True, stdout=out)
+        response = self.client.get(self.url, HTTP_X_PROFILE=out.getvalue().strip())
+
+        assert 'X-Profile-Id' in response
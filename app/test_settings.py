@@ -7,8 +7,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
+    # Second SQLite database for the replica router tests; replica reads stay
+    # off unless a test sets REPLICA_DATABASE='replica'.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
 }
+REPLICA_DATABASE = None
 
 # Disable migrations for faster tests
 class DisableMigrations:
@@ -50,4 +57,19 @@ CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_STORE_EAGER_RESULT = True
 CELERY_TASK_EAGER_PROPAGATES = True
 CELERY_BROKER_URL = 'memory://'
-CELERY_RESULT_BACKEND = 'cache+memory://'
\ No newline at end of file
+CELERY_RESULT_BACKEND = 'cache+memory://'
+
+# Notificações de submissão em processo (sem Redis)
+SUBMISSION_NOTIFY_BACKEND = 'memory'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Telemetria das tasks publicada a cada execução (sem timers em segundo plano)
+TASK_METRICS = {**TASK_METRICS, 'FLUSH_SECONDS': 0}
+
+# Log de consultas lentas desligado (os testes de utils.slow_queries o ligam)
+SLOW_QUERY_LOG = {**SLOW_QUERY_LOG, 'ENABLED': False}
@@ -0,0 +1,135 @@
+"""
+Testes do cache compartilhado (namespaces, single flight e expiração antecipada)
+"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamQuestion
+from exam.tasks import process_exam_submission
+from question.models import Question, Alternative
+from student.models import Student
+from utils.cache import _redis_clients, get_or_compute, invalidate_namespace, namespaced_key, redis_client
+
+
+class TestGetOrCompute:
+    """Testes de utils.cache"""
+
+    def test_namespace_invalidation(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        assert get_or_compute('value', compute, namespace='test') == 1
+        assert get_or_compute('value', compute, namespace='test') == 1
+        old_key = namespaced_key('test', 'value')
+
+        invalidate_namespace('test')
+
+        assert namespaced_key('test', 'value') != old_key
+        assert get_or_compute('value', compute, namespace='test') == 2
+
+    def test_single_flight(self):
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'stats'
+
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute('hot', compute, wait=2)))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ['stats'] * 20
+
+    def test_early_expiration(self):
+        """Perto de expirar, um acesso recalcula antes do TTL"""
+        values = iter(['old', 'new'])
+        compute = lambda: next(values)
+
+        assert get_or_compute('entry', compute, timeout=60) == 'old'
+        assert get_or_compute('entry', compute, timeout=60, beta=0) == 'old'
+
+        value, delta, expires_at = cache.get('entry')
+        cache.set('entry', (value, 1.0, time.time() - 1), 60)
+
+        assert get_or_compute('entry', compute, timeout=60) == 'new'
+
+    def test_refresh_in_progress_serves_current_value(self):
+        get_or_compute('entry', lambda: 'current', timeout=60)
+        value, delta, expires_at = cache.get('entry')
+        cache.set('entry', (value, 1.0, time.time()), 60)
+        cache.add('entry:lock', 1, 30)
+
+        assert get_or_compute('entry', lambda: 'refreshed', timeout=60) == 'current'
+
+    def test_redis_client_uses_the_write_server(self):
+        location = 'redis://primary:6379/1,redis://replica:6379/1'
+        caches = {**settings.CACHES, 'redis': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': location}}
+        with override_settings(CACHES=caches), mock.patch('redis.Redis.from_url') as from_url:
+            assert redis_client('redis') is redis_client('redis')
+        from_url.assert_called_once_with('redis://primary:6379/1')
+        _redis_clients.clear()
+
+
+@pytest.mark.django_db
+class TestCachedExamStatistics(TestCase):
+    """Estatísticas do exame servidas do cache até a próxima submissão"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Prova Cache')
+        self.question = Question.objects.create(content='Questão?')
+        Alternative.objects.create(question=self.question, option=1, content='A', is_correct=True)
+        Alternative.objects.create(question=self.question, option=2, content='B')
+        ExamQuestion.objects.create(exam=self.exam, question=self.question, number=1)
+        self.url = f'/api/exam/exams/{self.exam.id}/statistics/'
+
+    def _submit(self, username):
+        student = Student.objects.create(username=username, email=f'{username}@example.com', name=username)
+        process_exam_submission.delay({
+            'student_id': student.id,
+            'exam_id': self.exam.id,
+            'answers': [{'question_id': self.question.id, 'selected_option': 1}],
+        })
+
+    def test_hit_does_not_query_database(self):
+        self._submit('first')
+        assert self.client.get(self.url).data['statistics']['total_submissions'] == 1
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        assert response.data['statistics']['total_submissions'] == 1
+        assert len(queries) == 0
+
+    def test_new_submission_invalidates(self):
+        self._submit('first')
+        assert self.client.get(self.url).data['statistics']['total_submissions'] == 1
+
+        self._submit('second')
+
+        assert self.client.get(self.url).data['statistics']['total_submissions'] == 2
+
+    def test_missing_exam_is_not_cached(self):
+        assert self.client.get('/api/exam/exams/999999/statistics/').status_code == 404
+        assert cache.get(namespaced_key('exam:999999:statistics', 'payload')) is None
@@ -0,0 +1,170 @@
+"""
+Testes do log de consultas lentas (utils.slow_queries)
+"""
+
+import json
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from exam.models import Exam, ExamQuestion
+from exam.tasks import process_exam_submission
+from question.models import Alternative, Question
+from student.models import Student
+from utils import slow_queries
+from utils.slow_queries import explain, read_entries, top_queries
+
+
+class TestTopQueries:
+    """Agregação por fingerprint"""
+
+    def entry(self, fingerprint, ms, site, at='2026-01-01T10:00:00.000+00:00', plan=None):
+        return {'fingerprint': fingerprint, 'sql': fingerprint, 'ms': ms, 'call_site': site, 'task': None,
+                'at': at, 'plan': plan, 'plan_kind': 'EXPLAIN' if plan else None}
+
+    def test_groups_and_orders(self):
+        entries = [
+            self.entry('SELECT a', 300, 'exam/views.py:10 A.get'),
+            self.entry('SELECT a', 500, 'exam/serializers.py:20 S.get_score', plan='Seq Scan on a'),
+            self.entry('SELECT b', 900, 'exam/views.py:30 B.get'),
+        ]
+
+        by_total = top_queries(entries, top=5)
+        by_count = top_queries(entries, top=1, order='count')
+
+        assert [group['fingerprint'] for group in by_total] == ['SELECT b', 'SELECT a']
+        assert by_count[0]['fingerprint'] == 'SELECT a'
+        assert by_count[0]['count'] == 2
+        assert by_count[0]['mean_ms'] == 400
+        assert by_count[0]['plan'] == 'Seq Scan on a'
+        assert set(by_count[0]['call_sites']) == {'exam/views.py:10 A.get', 'exam/serializers.py:20 S.get_score'}
+
+
+class TestExplainAnalyze:
+    """ANALYZE executa a consulta de novo: só SELECT simples"""
+
+    @pytest.mark.parametrize('sql, analyze', [
+        ('SELECT * FROM exam_exam WHERE id = %s', True),
+        ('  select count(*) from exam_exam', True),
+        ('SELECT * FROM exam_exam WHERE id = %s FOR UPDATE', False),
+        ('SELECT * FROM exam_exam FOR NO KEY UPDATE SKIP LOCKED', False),
+        ('WITH gone AS (DELETE FROM exam_exam RETURNING id) SELECT count(*) FROM gone', False),
+    ])
+    def test_only_plain_selects_are_analyzed(self, sql, analyze):
+        connection = mock.Mock(vendor='postgresql', alias='default')
+        config = {**settings.SLOW_QUERY_LOG, 'EXPLAIN_ANALYZE_SAMPLE_RATE': 1.0}
+        slow_queries._explained_at.clear()
+
+        with mock.patch.object(slow_queries, 'explain', return_value=('EXPLAIN', 'plan')) as explain_mock, \
+                mock.patch.object(slow_queries, 'write_entry'):
+            slow_queries.record_slow_query(connection, sql, [], False, 500, config)
+
+        assert explain_mock.call_args.args[3] is analyze
+
+
+@pytest.mark.django_db
+class TestSlowQueryLog(TestCase):
+    """Consultas acima do limite vão para o arquivo com ponto de chamada e plano"""
+
+    @pytest.fixture(autouse=True)
+    def log_file(self, tmp_path):
+        self.path = tmp_path / 'slow.log'
+        config = {**settings.SLOW_QUERY_LOG, 'ENABLED': True, 'THRESHOLD_MS': 0, 'FILE': str(self.path)}
+        with self.settings(SLOW_QUERY_LOG=config):
+            yield
+        slow_queries.close_log()
+
+    def setUp(self):
+        slow_queries._explained_at.clear()
+        slow_queries.install_on_connection(connection)
+        self.exam = Exam.objects.create(name='Prova Lenta')
+        self.question = Question.objects.create(content='Questão?')
+        Alternative.objects.create(question=self.question, option=1, content='A', is_correct=True)
+        ExamQuestion.objects.create(exam=self.exam, question=self.question, number=1)
+        slow_queries.close_log()
+        self.path.unlink(missing_ok=True)
+
+    def test_view_queries_with_call_site_and_plan(self):
+        APIClient().get(f'/api/exam/exams/{self.exam.id}/')
+
+        entries = read_entries(self.path)
+
+        assert entries
+        selects = [entry for entry in entries if entry['fingerprint'].startswith('SELECT')]
+        assert all(entry['plan_kind'] == 'EXPLAIN QUERY PLAN' for entry in selects)
+        assert any('exam_exam' in (entry['plan'] or '') for entry in selects)
+        assert any('exam/views.py' in frame and 'APIView.get' in frame for frame in entries[-1]['stack'])
+        assert all(entry['task'] is None for entry in entries)
+        assert '%s' in entries[0]['sql'] or '?' in entries[0]['fingerprint']
+
+    def test_each_fingerprint_is_explained_once_per_interval(self):
+        Exam.objects.filter(pk=self.exam.id).count()
+        Exam.objects.filter(pk=self.exam.id + 1).count()
+
+        entries = read_entries(self.path)
+
+        assert len(entries) == 2
+        assert entries[0]['fingerprint'] == entries[1]['fingerprint']
+        assert entries[0]['plan'] is not None and entries[1]['plan'] is None
+
+    def test_task_queries_are_labelled(self):
+        student = Student.objects.create(username='lento', email='lento@example.com', name='Lento')
+        process_exam_submission.delay({
+            'student_id': student.id, 'exam_id': self.exam.id,
+            'answers': [{'question_id': self.question.id, 'selected_option': 1}],
+        }).get()
+
+        entries = read_entries(self.path)
+
+        in_task = [entry for entry in entries if entry['task'] == 'exam.tasks.process_exam_submission']
+        assert in_task
+        inserts = [entry for entry in in_task if entry['fingerprint'].startswith('INSERT')]
+        assert inserts and all(entry['plan'] is None for entry in inserts)
+        assert any('exam/tasks.py' in entry['call_site'] or 'exam/packing.py' in entry['call_site']
+                   for entry in inserts)
+
+    def test_failed_explain_does_not_break_the_transaction(self):
+        with transaction.atomic():
+            kind, plan = explain(connection, 'SELECT missing_column FROM exam_exam', [])
+            assert Exam.objects.count() == 1
+
+        assert (kind, plan) == ('EXPLAIN QUERY PLAN', None)
+
+    def test_below_threshold_or_disabled_is_not_logged(self):
+        with self.settings(SLOW_QUERY_LOG={**settings.SLOW_QUERY_LOG, 'THRESHOLD_MS': 10_000}):
+            Exam.objects.count()
+        with self.settings(SLOW_QUERY_LOG={**settings.SLOW_QUERY_LOG, 'ENABLED': False}):
+            Exam.objects.count()
+
+        assert read_entries(self.path) == []
+
+    def test_rotated_files_are_read(self):
+        with self.settings(SLOW_QUERY_LOG={**settings.SLOW_QUERY_LOG, 'MAX_BYTES': 600, 'BACKUP_COUNT': 20}):
+            slow_queries.close_log()
+            for _ in range(10):
+                Exam.objects.count()
+            slow_queries.close_log()
+
+        assert list(self.path.parent.glob('slow.log.*'))
+        assert len(read_entries(self.path)) == 10
+
+    def test_command(self):
+        for _ in range(3):
+            Exam.objects.filter(name__startswith='Prova').count()
+        out = StringIO()
+
+        call_command('slow_queries', top=1, order='count', plans=True, stdout=out)
+        report = out.getvalue()
+        json_out = StringIO()
+        call_command('slow_queries', json=True, stdout=json_out)
+
+        assert '3x  total' in report
+        assert 'EXPLAIN QUERY PLAN:' in report
+        assert 'test_slow_queries.py' in report
+        assert json.loads(json_out.getvalue())[0]['count'] == 3
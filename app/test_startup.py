@@ -0,0 +1,147 @@
+"""
+Testes da inicialização dos processos web e worker (utils.startup)
+"""
+
+import json
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase, override_settings
+
+from utils.startup import (
+    backoff_delay, import_times, measure_startup, migration_files, unapplied_migrations, wait_for_database,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestWaitForDatabase:
+    """Backoff exponencial com jitter e limite de tempo"""
+
+    def test_delays_double_up_to_the_cap(self):
+        for attempt, full in [(1, 0.1), (2, 0.2), (4, 0.8), (10, 5.0), (500, 5.0)]:
+            assert full / 2 <= backoff_delay(attempt, 0.1, 5.0) <= full
+
+    def test_retries_until_connected(self):
+        clock = FakeClock()
+        database = mock.Mock()
+        database.ensure_connection.side_effect = [OperationalError('down')] * 4 + [None]
+        retries = []
+
+        attempts = wait_for_database(database, timeout=60, on_retry=lambda *args: retries.append(args),
+                                     sleep=clock.sleep, clock=clock)
+
+        assert attempts == 5
+        assert [attempt for attempt, _, _ in retries] == [1, 2, 3, 4]
+        assert clock.sleeps == [delay for _, delay, _ in retries]
+        assert clock.sleeps[-1] > clock.sleeps[0]
+        assert sum(clock.sleeps) < 1.6
+
+    def test_gives_up_after_the_timeout(self):
+        clock = FakeClock()
+        database = mock.Mock()
+        database.ensure_connection.side_effect = OperationalError('down')
+
+        with pytest.raises(OperationalError):
+            wait_for_database(database, timeout=10, max_delay=2, sleep=clock.sleep, clock=clock)
+
+        assert clock.now == pytest.approx(10)
+        assert max(clock.sleeps) <= 2
+
+
+@pytest.mark.django_db
+class TestPrepareDatabase(TestCase):
+    """migrate só roda quando há migrações não aplicadas"""
+
+    def test_fast_check_lists_migration_files_without_importing_them(self):
+        with override_settings(MIGRATION_MODULES={}):
+            files = migration_files()
+            applied = {migration: None for migration in files}
+            with mock.patch.object(MigrationRecorder, 'has_table', return_value=True), \
+                    mock.patch.object(MigrationRecorder, 'applied_migrations', return_value=applied):
+                current = unapplied_migrations(connection)
+            fresh = unapplied_migrations(connection)
+
+        assert ('exam', '0001_initial') in files
+        assert current == []
+        assert fresh == sorted(files)
+
+    def test_current_schema_skips_migrate(self):
+        out = StringIO()
+
+        with mock.patch('utils.management.commands.prepare_database.unapplied_migrations', return_value=[]), \
+                mock.patch('django.core.management.commands.migrate.Command.handle') as migrate:
+            call_command('prepare_database', stdout=out)
+
+        assert 'Database is available! (1 attempt(s))' in out.getvalue()
+        assert 'Schema is up to date, skipping migrate.' in out.getvalue()
+        migrate.assert_not_called()
+
+    def test_pending_migrations_are_applied(self):
+        out = StringIO()
+        pending = [('exam', '0099_new_index')]
+
+        with mock.patch('utils.management.commands.prepare_database.unapplied_migrations', return_value=pending), \
+                mock.patch('django.core.management.commands.migrate.Command.handle', return_value='') as migrate:
+            call_command('prepare_database', stdout=out)
+
+        assert '1 pending migration(s): exam.0099_new_index' in out.getvalue()
+        migrate.assert_called_once()
+
+    def test_unreachable_database_fails_the_command(self):
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError('down')):
+            with pytest.raises(CommandError, match='not possible to establish the connection'):
+                call_command('wait_for_postgres', timeout=0, stdout=StringIO())
+
+
+class TestStartupBudget:
+    """Benchmark do boot em processos novos contra STARTUP['BUDGET_SECONDS']"""
+
+    @pytest.mark.parametrize('target', ['web', 'worker'])
+    def test_cold_start_within_budget(self, target):
+        result = measure_startup(target, runs=1)
+
+        assert result['budget_s'] == settings.STARTUP['BUDGET_SECONDS'][target]
+        assert result['wall_s'] <= result['budget_s'], result
+
+    def test_worker_does_not_import_the_api_layer(self):
+        modules = set(measure_startup('worker', runs=1)['modules'])
+
+        assert 'exam.tasks' in modules
+        assert not modules & {
+            'medway_api.urls', 'exam.views', 'exam.serializers', 'rest_framework.serializers', 'django.test',
+            'exam.loadtest', 'exam.dataset', 'benchmarks.suite',
+        }
+
+    def test_report_command(self):
+        out = StringIO()
+
+        call_command('startup_report', target=['worker'], runs=1, top=3, json=True, stdout=out)
+        [report] = json.loads(out.getvalue())
+
+        assert report['target'] == 'worker'
+        assert len(report['packages']) == 3
+        assert 'medway_api.celery' in report['first_party']
+        assert report['over_budget'] is False
+
+    def test_import_time_report(self):
+        entries = import_times('web')
+
+        assert {'django.urls', 'exam.views'} <= {entry['module'] for entry in entries}
+        assert all(entry['cumulative_us'] >= entry['self_us'] >= 0 for entry in entries)
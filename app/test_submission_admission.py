@@ -0,0 +1,114 @@
+"""
+Testes do controle de admissão (token bucket + profundidade da fila)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.models import Exam, ExamQuestion, ExamSubmission
+from question.models import Question, Alternative
+from student.models import Student
+from utils.ratelimit import TokenBucket
+
+
+def admission(**overrides):
+    return override_settings(SUBMISSION_ADMISSION={**settings.SUBMISSION_ADMISSION, **overrides})
+
+
+class TestTokenBucket:
+    """Testes do TokenBucket no cache compartilhado"""
+
+    def test_concurrent_burst_only_admits_capacity(self):
+        """Rajada concorrente: apenas `capacity` requisições passam"""
+        bucket = TokenBucket('test:burst', rate=0.001, capacity=10)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            waits = list(pool.map(lambda _: bucket.consume(), range(64)))
+
+        assert sum(1 for wait in waits if wait == 0) == 10
+        assert all(wait > 0 for wait in waits if wait != 0)
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket('test:refill', rate=1000, capacity=1)
+
+        assert bucket.consume() == 0
+        with patch('utils.ratelimit.time.monotonic', side_effect=lambda: 10 ** 6):
+            assert bucket.consume() == 0
+
+
+@pytest.mark.django_db
+class TestSubmissionAdmission(APITestCase):
+    """Testes de rajadas em POST /submissions/ e GET /submissions/status/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.question = Question.objects.create(content='Admission question?')
+        Alternative.objects.create(question=self.question, content='A', option=1, is_correct=True)
+        self.exam = Exam.objects.create(name='Admission Exam')
+        ExamQuestion.objects.create(exam=self.exam, question=self.question, number=1)
+        self.students = [
+            Student.objects.create(username=f'burst{i}', email=f'burst{i}@example.com', name=f'Burst {i}')
+            for i in range(12)
+        ]
+
+    def _submit(self, student):
+        return self.client.post('/api/exam/submissions/', {
+            'student_id': student.id,
+            'exam_id': self.exam.id,
+            'answers': [{'question_id': self.question.id, 'selected_option': 1}],
+        }, format='json')
+
+    @admission(STUDENT_RATE=0.01, STUDENT_BURST=2)
+    def test_per_student_limit(self):
+        """Reenvios em rajada do mesmo estudante recebem 429 com Retry-After"""
+        student = self.students[0]
+        responses = [self._submit(student) for _ in range(5)]
+
+        assert [r.status_code for r in responses[:2]] == [status.HTTP_202_ACCEPTED, status.HTTP_400_BAD_REQUEST]
+        assert all(r.status_code == status.HTTP_429_TOO_MANY_REQUESTS for r in responses[2:])
+        assert int(responses[-1]['Retry-After']) >= 1
+        assert self._submit(self.students[1]).status_code == status.HTTP_202_ACCEPTED
+
+    @admission(GLOBAL_RATE=0.01, GLOBAL_BURST=8)
+    def test_global_limit(self):
+        """Rajada de fechamento: só GLOBAL_BURST submissões são admitidas"""
+        responses = [self._submit(student) for student in self.students]
+
+        accepted = [r for r in responses if r.status_code == status.HTTP_202_ACCEPTED]
+        rejected = [r for r in responses if r.status_code == status.HTTP_429_TOO_MANY_REQUESTS]
+        assert len(accepted) == 8
+        assert len(rejected) == 4
+        assert all('Retry-After' in r for r in rejected)
+        assert ExamSubmission.objects.count() == 8
+
+    @admission(MAX_QUEUE_DEPTH=100, QUEUE_RETRY_AFTER=7)
+    def test_saturated_queue_returns_503(self):
+        """Fila de correção acima do limite: 503 sem enfileirar a task"""
+        with patch('exam.throttling.cached_queue_depth', return_value=250), \
+                patch('exam.views.process_exam_submission.delay') as delay:
+            response = self._submit(self.students[0])
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '7'
+        delay.assert_not_called()
+
+    @admission(STATUS_RATE=0.01, STATUS_BURST=3)
+    def test_status_polling_limit(self):
+        """Polling agressivo do status recebe 429"""
+        codes = [
+            self.client.get('/api/exam/submissions/status/?task_id=abc').status_code
+            for _ in range(5)
+        ]
+
+        assert codes[3:] == [status.HTTP_429_TOO_MANY_REQUESTS] * 2
+
+    @admission(ENABLED=False, STUDENT_RATE=0.01, STUDENT_BURST=1)
+    def test_disabled(self):
+        responses = [self._submit(student) for student in self.students[:3]]
+        assert all(r.status_code == status.HTTP_202_ACCEPTED for r in responses)
@@ -0,0 +1,173 @@
+"""
+Testes do arquivamento (COLD) de submissões antigas
+"""
+
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+
+from exam.archive import archive_storage, decode_cache
+from exam.models import Exam, ExamDeletion, ExamQuestion, ExamSubmission, SubmissionAnswer, SubmissionArchive
+from exam.packing import pack_submission
+from exam.purge import purge_exam
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestSubmissionArchive(APITestCase):
+    """Submissões arquivadas continuam legíveis pelas mesmas APIs"""
+
+    def setUp(self):
+        archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_root, True)
+        storages = {**settings.STORAGES, 'archive': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': archive_root},
+        }}
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+        decode_cache.clear()
+
+        self.client = APIClient()
+        self.exam = Exam.objects.create(name='Archived exam')
+        self.questions = Question.objects.bulk_create([Question(content=f'Old {i}?') for i in range(4)])
+        Alternative.objects.bulk_create([
+            Alternative(question=question, content=str(option), option=option, is_correct=option == 1)
+            for question in self.questions for option in range(1, 5)
+        ])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=self.exam, question=question, number=number)
+            for number, question in enumerate(self.questions, start=1)
+        ])
+        self.students = Student.objects.bulk_create([
+            Student(username=f'old{i}', email=f'old{i}@example.com', name=f'Old {i}') for i in range(4)
+        ])
+        old = timezone.now() - timedelta(days=800)
+        self.submissions = []
+        for index, student in enumerate(self.students):
+            submission = ExamSubmission.objects.create(
+                student=student, exam=self.exam, submitted_at=old if index < 3 else timezone.now()
+            )
+            answers = {question.id: 1 if (index + number) % 2 else 2 for number, question in enumerate(self.questions)}
+            if index == 2:
+                pack_submission(submission, [q.id for q in self.questions], answers)
+                submission.save(update_fields=['packed_answers', 'packed_layout'])
+            else:
+                SubmissionAnswer.objects.bulk_create([
+                    SubmissionAnswer(submission=submission, question_id=question_id, selected_alternative_option=option)
+                    for question_id, option in answers.items()
+                ])
+            submission.grade()
+            self.submissions.append(submission)
+
+    def _snapshot(self):
+        details = [self.client.get(f'/api/exam/submissions/{s.id}/').data['results'] for s in self.submissions]
+        per_student = [
+            self.client.get(f'/api/exam/submissions/student/{s.student_id}/exam/{self.exam.id}/').data['results']
+            for s in self.submissions
+        ]
+        stats = self.client.get(f'/api/exam/exams/{self.exam.id}/statistics/').data
+        return details, per_student, stats
+
+    def test_archived_results_are_unchanged(self):
+        before = self._snapshot()
+        out = io.StringIO()
+
+        call_command('archive_submissions', stdout=out)
+
+        assert '3 submissions archived in 1 files' in out.getvalue()
+        archive = SubmissionArchive.objects.get()
+        assert archive.submissions_count == 3
+        assert not SubmissionAnswer.objects.filter(submission__archive=archive).exists()
+        assert not ExamSubmission.objects.filter(archive=archive, packed_answers__isnull=False).exists()
+        assert SubmissionAnswer.objects.filter(submission=self.submissions[3]).count() == 4
+        assert self._snapshot() == before
+
+        response = async_to_sync(self.async_client.get)(f'/api/exam/async/submissions/{self.submissions[0].id}/')
+        assert json.loads(response.content)['results'] == json.loads(json.dumps(before[0][0]))
+
+    def test_unknown_packed_layout_is_skipped_and_reported(self):
+        """Uma submissão ilegível não interrompe o arquivamento das demais"""
+        ExamSubmission.objects.filter(pk=self.submissions[2].pk).update(packed_layout='0' * 16)
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command('archive_submissions', batch_size=2, stdout=out, stderr=err)
+
+        assert '2 submissions archived in 1 files' in out.getvalue()
+        assert '1 skipped' in out.getvalue()
+        assert f'[{self.submissions[2].id}]' in err.getvalue()
+        assert ExamSubmission.objects.filter(archive__isnull=True, packed_answers__isnull=False).count() == 1
+
+    def test_packed_answers_from_an_older_layout_are_archived(self):
+        before = self._snapshot()[0][2]
+        with self.captureOnCommitCallbacks(execute=True):
+            ExamQuestion.objects.filter(exam=self.exam, question=self.questions[0]).delete()
+
+        call_command('archive_submissions', stdout=io.StringIO())
+
+        after = self.client.get(f'/api/exam/submissions/{self.submissions[2].id}/').data['results']
+        assert after['total_questions'] == before['total_questions'] == 4
+        assert after['correct_answers'] == before['correct_answers']
+
+    def test_archive_file_is_compressed_ndjson(self):
+        call_command('archive_submissions', batch_size=2, stdout=io.StringIO())
+
+        archives = list(SubmissionArchive.objects.order_by('id'))
+        assert [archive.submissions_count for archive in archives] == [2, 1]
+        with archive_storage().open(archives[0].file_name, 'rb') as raw:
+            lines = gzip.decompress(raw.read()).decode().splitlines()
+        header = json.loads(lines[0])
+        assert header['question_order'] == [question.id for question in self.questions]
+        assert [json.loads(line)['answers'] for line in lines[1:]] == ['2121', '1212']
+
+    def test_reads_use_lru_decode_cache(self):
+        call_command('archive_submissions', stdout=io.StringIO())
+
+        for submission in self.submissions[:3]:
+            self.client.get(f'/api/exam/submissions/{submission.id}/')
+
+        assert decode_cache.misses == 1
+        assert decode_cache.hits >= 2
+
+    @override_settings(SUBMISSION_ARCHIVE_CACHE_SIZE=1)
+    def test_cache_evicts_least_recently_used(self):
+        call_command('archive_submissions', batch_size=1, stdout=io.StringIO())
+
+        for submission in self.submissions[:3] + self.submissions[:1]:
+            submission.refresh_from_db()
+            submission.get_answer_map()
+
+        assert decode_cache.misses == 4
+
+    def test_rerun_and_dry_run(self):
+        call_command('archive_submissions', stdout=io.StringIO())
+        out = io.StringIO()
+
+        call_command('archive_submissions', dry_run=True, stdout=out)
+        call_command('archive_submissions', stdout=out)
+
+        assert '0 submissions would be archived' in out.getvalue()
+        assert '0 submissions archived' in out.getvalue()
+        assert SubmissionArchive.objects.count() == 1
+
+    def test_purge_removes_archive_files(self):
+        call_command('archive_submissions', stdout=io.StringIO())
+        name = SubmissionArchive.objects.get().file_name
+        self.exam.soft_delete()
+
+        purge_exam(ExamDeletion.objects.create(exam_id=self.exam.id, exam_name=self.exam.name))
+
+        assert not archive_storage().exists(name)
+        assert not SubmissionArchive.objects.exists()
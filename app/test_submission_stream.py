@@ -0,0 +1,116 @@
+"""
+Testes do acompanhamento de submissões por push (SSE / long-poll)
+"""
+
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from exam.models import Exam, ExamQuestion
+from exam.notifications import MemoryBackend
+from question.models import Question, Alternative
+from student.models import Student
+
+
+@pytest.mark.django_db
+class TestSubmissionStatusStream(APITestCase):
+    """Testes para /submissions/status/stream/"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.student = Student.objects.create(
+            username='streamstudent',
+            email='stream@example.com',
+            name='Stream Student'
+        )
+        self.question = Question.objects.create(content='Stream question?')
+        Alternative.objects.create(question=self.question, content='A', option=1, is_correct=True)
+        Alternative.objects.create(question=self.question, content='B', option=2, is_correct=False)
+
+        self.exam = Exam.objects.create(name='Stream Exam')
+        ExamQuestion.objects.create(exam=self.exam, question=self.question, number=1)
+
+    def _submit(self):
+        response = self.client.post('/api/exam/submissions/', {
+            'student_id': self.student.id,
+            'exam_id': self.exam.id,
+            'answers': [{'question_id': self.question.id, 'selected_option': 1}],
+        }, format='json')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        return response.data['task_id']
+
+    def test_long_poll_returns_graded_result(self):
+        """Long-poll devolve o resultado publicado pela task"""
+        task_id = self._submit()
+
+        response = async_to_sync(self.async_client.get)(
+            '/api/exam/submissions/status/stream/', {'task_id': task_id, 'timeout': 1}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        body = json.loads(response.content)
+        assert body['task']['state'] == 'SUCCESS'
+        assert body['task']['submission']['score'] == 100.0
+
+    def test_sse_emits_status_event(self):
+        """SSE envia um evento 'status' com o resultado da correção"""
+        task_id = self._submit()
+
+        async def read_stream():
+            response = await self.async_client.get(
+                '/api/exam/submissions/status/stream/',
+                {'task_id': task_id, 'timeout': 1},
+                headers={'Accept': 'text/event-stream'},
+            )
+            chunks = [chunk async for chunk in response.streaming_content]
+            return response, b''.join(chunks).decode()
+
+        response, content = async_to_sync(read_stream)()
+
+        assert response['Content-Type'] == 'text/event-stream'
+        assert 'event: status' in content
+        data = content.split('event: status\ndata: ')[1].split('\n\n')[0]
+        assert json.loads(data)['state'] == 'SUCCESS'
+
+    def test_long_poll_timeout_is_pending(self):
+        """Sem notificação dentro do timeout, responde 202 PENDING"""
+        response = async_to_sync(self.async_client.get)(
+            '/api/exam/submissions/status/stream/', {'task_id': 'unknown-task', 'timeout': 0.05}
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert json.loads(response.content)['task']['state'] == 'PENDING'
+
+    def test_task_id_required(self):
+        """task_id é obrigatório"""
+        response = async_to_sync(self.async_client.get)('/api/exam/submissions/status/stream/')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestMemoryNotificationBackend:
+    """Testes do backend de notificação em memória"""
+
+    def test_wakes_waiting_listener_from_another_thread(self):
+        """Uma publicação vinda de outra thread acorda quem está aguardando"""
+        backend = MemoryBackend(result_ttl=60)
+        message = {'state': 'SUCCESS', 'created': True, 'submission': {'id': 1}}
+
+        async def wait():
+            timer = threading.Timer(0.05, backend.publish, args=('task-1', message))
+            timer.start()
+            return await backend.wait('task-1', timeout=2)
+
+        assert async_to_sync(wait)() == message
+        assert backend.get_latest('task-1') == message
+
+    def test_wait_expires_without_message(self):
+        """Sem publicação, wait retorna None após o timeout"""
+        backend = MemoryBackend(result_ttl=60)
+
+        assert async_to_sync(backend.wait)('task-2', 0.01) is None
@@ -0,0 +1,145 @@
+"""
+Testes da telemetria das tasks do Celery (utils.task_metrics)
+"""
+
+import json
+import time
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+
+from exam.models import Exam, ExamQuestion
+from exam.tasks import process_exam_submission
+from question.models import Alternative, Question
+from student.models import Student
+from utils import task_metrics
+from utils.metrics import Histogram
+from utils.task_metrics import SNAPSHOT_KEY, REGISTRY_KEY, TaskMetricSet, summarize, task_exam_id, telemetry
+
+TASK = 'exam.tasks.process_exam_submission'
+
+
+class TestHistogramMerge:
+    """Snapshots de outros processos somados e quantis estimados"""
+
+    def test_dump_load_and_quantile(self):
+        first = Histogram('h', 'h', ('task',), (1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3.0):
+            first.observe(value, 't')
+        second = Histogram('h', 'h', ('task',), (1.0, 2.0, 4.0))
+        second.load(json.loads(json.dumps(first.dump())))
+        second.load(first.dump())
+
+        assert second.count_and_sum('t') == (8, 13.0)
+        assert second.quantile(0.5, 't') == 1.5
+        assert second.quantile(0.5, 'outra') is None
+
+    def test_exam_label(self):
+        assert task_exam_id(({'exam_id': 7, 'answers': []},), {}) == '7'
+        assert task_exam_id((), {'exam_id': 3}) == '3'
+        assert task_exam_id((12,), {}) == ''
+
+
+@pytest.mark.django_db
+class TestTaskTelemetry(TestCase):
+    """Execução, consultas, espera na fila, retries e exportação"""
+
+    def setUp(self):
+        cache.clear()
+        telemetry.reset()
+        self.exam = Exam.objects.create(name='Prova Telemetria')
+        question = Question.objects.create(content='Questão?')
+        Alternative.objects.create(question=question, option=1, content='A', is_correct=True)
+        ExamQuestion.objects.create(exam=self.exam, question=question, number=1)
+        self.question = question
+
+    def payload(self, username):
+        student = Student.objects.create(username=username, email=f'{username}@example.com', name=username)
+        return {
+            'student_id': student.id, 'exam_id': self.exam.id,
+            'answers': [{'question_id': self.question.id, 'selected_option': 1}],
+        }
+
+    def test_run_is_recorded_per_task_and_exam(self):
+        process_exam_submission.delay(self.payload('ana')).get()
+        process_exam_submission.delay(self.payload('bia')).get()
+
+        rows = summarize(minutes=1)
+
+        assert len(rows) == 1
+        row = rows[0]
+        assert (row['task'], row['exam'], row['runs']) == (TASK, str(self.exam.id), 2)
+        assert row['outcomes'] == {'success': 2}
+        assert row['queries_mean'] > 0
+        assert row['queue_wait_mean_s'] is None  # eager: não passa pela fila
+
+    def test_queue_wait_from_enqueued_header(self):
+        process_exam_submission.apply(
+            args=[self.payload('ana')], headers={'enqueued_at': time.time() - 2}
+        ).get()
+
+        row = summarize(minutes=1)[0]
+
+        assert 1.9 <= row['queue_wait_mean_s'] < 5
+
+    def test_retries_are_counted_by_exception(self):
+        with mock.patch('exam.tasks.store_answers', side_effect=[IntegrityError('duplicada'), None]):
+            result = process_exam_submission.apply(args=[self.payload('ana')], throw=False)
+
+        row = summarize(minutes=1)[0]
+
+        assert result.state == 'SUCCESS'
+        assert row['retries'] == {'IntegrityError': 1}
+        assert row['outcomes'] == {'retry': 1, 'success': 1}
+
+    def test_metrics_endpoint_exports_every_process(self):
+        process_exam_submission.delay(self.payload('ana')).get()
+        here = telemetry.process_id()
+        other = TaskMetricSet()
+        other.runs.inc(TASK, str(self.exam.id), 'success', amount=5)
+        cache.set(SNAPSHOT_KEY.format('worker-2:99'),
+                  {'process': 'worker-2:99', 'totals': other.dump(), 'minutes': {}}, 60)
+        cache.set(REGISTRY_KEY, {**cache.get(REGISTRY_KEY), SNAPSHOT_KEY.format('worker-2:99'): time.time()})
+
+        body = self.client.get('/metrics').content.decode()
+        cache.delete(SNAPSHOT_KEY.format('worker-2:99'))  # o processo saiu e o snapshot expirou
+        after_exit = self.client.get('/metrics').content.decode()
+
+        mine = f'celery_task_runs_total{{task="{TASK}",exam="{self.exam.id}",process="{here}",outcome="success"}} 1'
+        assert mine in body
+        assert (f'celery_task_runs_total{{task="{TASK}",exam="{self.exam.id}",process="worker-2:99",'
+                f'outcome="success"}} 5') in body
+        assert '# TYPE celery_task_queue_wait_seconds histogram' in body
+        assert f'celery_task_db_queries_count{{task="{TASK}",exam="{self.exam.id}",process="{here}"}} 1' in body
+        # A série deste processo não diminui quando outro processo some
+        assert mine in after_exit
+        assert 'worker-2:99' not in after_exit
+
+    def test_window_only_counts_recent_minutes(self):
+        now = time.time()
+        telemetry.record_run(TASK, '1', 'success', 0.2, 5, 0.05, now=now - 600)
+        telemetry.record_run(TASK, '1', 'success', 0.1, 5, 0.05, now=now)
+
+        assert summarize(minutes=5, now=now)[0]['runs'] == 1
+        assert summarize(minutes=15, now=now)[0]['runs'] == 2
+        assert summarize(minutes=15, exam=2, now=now) == []
+
+    def test_command(self):
+        process_exam_submission.delay(self.payload('ana')).get()
+        out = StringIO()
+
+        call_command('task_metrics', minutes=5, stdout=out)
+
+        assert f'{TASK} exam={self.exam.id}: 1 runs' in out.getvalue()
+        assert 'retries: -' in out.getvalue()
+
+    def test_disabled(self):
+        with self.settings(TASK_METRICS={**task_metrics.settings.TASK_METRICS, 'ENABLED': False}):
+            process_exam_submission.delay(self.payload('ana')).get()
+
+        assert summarize(minutes=1) == []
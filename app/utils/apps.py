@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class UtilsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'utils'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .slow_queries import install_on_connection
+
+        # Slow-query log on every connection (web, workers and commands)
+        connection_created.connect(install_on_connection, dispatch_uid='utils.slow_queries.install_on_connection')
@@ -0,0 +1,145 @@
+"""
+Helpers for the shared cache (``django.core.cache``).
+
+Keys built with ``namespaced_key`` carry the current version of their
+namespace, so ``invalidate_namespace`` drops every key of a namespace at once
+(old entries simply stop being read and expire on their own). ``get_or_compute``
+adds stampede protection on top: a single caller recomputes a missing entry
+while the others wait for it, and entries are refreshed a little before they
+expire with the probabilistic early expiration of Vattani et al. ("XFetch"),
+so a hot entry is not recomputed by every concurrent request at the same
+instant.
+"""
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+NAMESPACE_KEY = 'ns:{}'
+
+_redis_clients = {}
+
+
+@contextmanager
+def cache_lock(key, timeout=5, wait=1.0, using=None):
+    """Short best-effort lock based on ``cache.add``.
+
+    Meant to protect read-modify-write sequences on a cache entry. If the lock
+    cannot be acquired within ``wait`` seconds the block runs anyway, so a
+    stuck lock never blocks callers for longer than that.
+    """
+    using = using or cache
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + wait
+    acquired = using.add(lock_key, 1, timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.005)
+        acquired = using.add(lock_key, 1, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            using.delete(lock_key)
+
+
+def redis_client(alias='default'):
+    """redis-py client for the server of the ``RedisCache`` cache ``alias``.
+
+    For the commands the cache API lacks (sets, pipelines). Built with the
+    public ``redis.Redis.from_url`` from the alias ``LOCATION``; like Django's
+    backend, it talks to the first server listed, the one that takes writes.
+    Keys still go through ``cache.make_and_validate_key``.
+    """
+    client = _redis_clients.get(alias)
+    if client is None:
+        import redis
+
+        location = settings.CACHES[alias]['LOCATION']
+        if isinstance(location, str):
+            location = location.split(',')
+        client = _redis_clients[alias] = redis.Redis.from_url(location[0])
+    return client
+
+
+def namespace_version(namespace, using=None):
+    using = using or cache
+    version = using.get(NAMESPACE_KEY.format(namespace))
+    if version is None:
+        # Starts from the clock rather than 1: after a cache flush the new
+        # versions never repeat old ones (which may still be held in
+        # per-process caches keyed by version).
+        using.add(NAMESPACE_KEY.format(namespace), time.time_ns(), None)
+        version = using.get(NAMESPACE_KEY.format(namespace))
+    return version
+
+
+def invalidate_namespace(namespace, using=None):
+    """Make every key of ``namespace`` stale by bumping its version."""
+    using = using or cache
+    try:
+        return using.incr(NAMESPACE_KEY.format(namespace))
+    except ValueError:
+        return namespace_version(namespace, using)
+
+
+def namespaced_key(namespace, *parts, using=None):
+    """``<namespace>:v<version>[:<part>...]``; the global ``CACHES`` prefix/version is added by Django."""
+    return ':'.join([namespace, f'v{namespace_version(namespace, using)}', *(str(part) for part in parts)])
+
+
+def get_or_compute(key, compute, timeout=None, namespace=None, beta=None, lock_timeout=None, wait=None,
+                   using=None):
+    """Return the cached value of ``key`` or store ``compute()`` under it.
+
+    - ``namespace``: the key is built with ``namespaced_key`` so that
+      ``invalidate_namespace(namespace)`` drops it.
+    - single flight: on a miss only the caller holding ``<key>:lock`` runs
+      ``compute``; the others poll for up to ``wait`` seconds and only then
+      compute on their own (never blocking longer than that).
+    - early expiration: each hit recomputes ahead of time with probability
+      growing as the entry gets close to expiring, weighted by how long the
+      last computation took (``beta`` > 1 favours earlier refreshes). Only the
+      caller that gets the lock refreshes; the rest keep serving the value.
+    """
+    using = using or cache
+    timeout = settings.CACHE_DEFAULT_TIMEOUT if timeout is None else timeout
+    beta = settings.CACHE_EARLY_EXPIRATION_BETA if beta is None else beta
+    lock_timeout = settings.CACHE_COMPUTE_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+    wait = settings.CACHE_COMPUTE_WAIT if wait is None else wait
+    if namespace is not None:
+        key = namespaced_key(namespace, key, using=using)
+    lock_key = f'{key}:lock'
+
+    entry = using.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+        if not using.add(lock_key, 1, lock_timeout):
+            return value
+        return _compute_and_store(using, key, lock_key, compute, timeout)
+
+    if using.add(lock_key, 1, lock_timeout):
+        return _compute_and_store(using, key, lock_key, compute, timeout)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        entry = using.get(key)
+        if entry is not None:
+            return entry[0]
+    return _compute_and_store(using, key, None, compute, timeout)
+
+
+def _compute_and_store(using, key, lock_key, compute, timeout):
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        using.set(key, (value, delta, time.time() + timeout), timeout)
+        return value
+    finally:
+        if lock_key is not None:
+            using.delete(lock_key)
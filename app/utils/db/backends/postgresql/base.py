@@ -0,0 +1,64 @@
+"""
+PostgreSQL backend that borrows connections from an in-process pool.
+
+Use it as ``ENGINE`` together with a ``POOL`` dict in the database settings
+(``MAX_SIZE``, ``TIMEOUT``, ``MAX_IDLE``, ``MAX_LIFETIME``, ``HEALTH_CHECK``).
+Django's ``close()`` at the end of a request or Celery task gives the
+connection back to the pool instead of disconnecting, so ``CONN_MAX_AGE``
+should stay at 0 with this backend.
+"""
+from django.db.backends.postgresql import base
+
+from utils.db.pool import ConnectionPool, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _pool(self, conn_params):
+        options = self.settings_dict.get('POOL') or {}
+
+        def create():
+            return ConnectionPool(
+                factory=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 30.0),
+                max_idle=options.get('MAX_IDLE', 300.0),
+                max_lifetime=options.get('MAX_LIFETIME', 1800.0),
+                check=_ping if options.get('HEALTH_CHECK', True) else None,
+            )
+
+        return get_pool(self.alias, create)
+
+    def get_new_connection(self, conn_params):
+        connection = self._pool(conn_params).acquire()
+        # Set by the parent class when it opens a connection; keep it
+        # consistent on wrappers that get an already opened one.
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            base.IsolationLevel(isolation_level) if isolation_level is not None
+            else base.IsolationLevel.READ_COMMITTED
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        # A connection closed inside an atomic block stays referenced by this
+        # wrapper until the block exits, so it can't be shared yet.
+        discard = bool(self.in_atomic_block or connection.closed)
+        if not discard:
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                discard = True
+        self._pool(self.get_connection_params()).release(connection, discard=discard)
+
+
+def _ping(connection):
+    if connection.closed:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    connection.rollback()
+    return True
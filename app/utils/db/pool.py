@@ -0,0 +1,191 @@
+"""
+In-process database connection pool.
+
+One pool per database alias and per process (web worker or Celery worker
+child), shared by all of its threads. Django still opens and closes
+connections as usual; the pooled backend (``utils.db.backends.postgresql``)
+borrows them from here and gives them back instead of disconnecting.
+
+When every connection is in use, ``acquire`` waits up to ``timeout`` seconds
+for one to be released, so a burst queues instead of erroring.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """No connection was released within the pool timeout."""
+
+
+class ConnectionPool:
+    """Bounded pool of raw DB-API connections.
+
+    ``factory()`` opens a new connection, ``check(conn)`` returns whether an
+    idle connection still works (run on reuse) and ``close(conn)`` disposes of
+    one. Idle connections are reused most-recent first so the extra ones age
+    out after ``max_idle`` seconds; any connection is retired after
+    ``max_lifetime`` seconds.
+    """
+
+    def __init__(self, factory, max_size=10, timeout=30.0, max_idle=300.0, max_lifetime=1800.0,
+                 check=None, close=None):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check = check
+        self.close_connection = close or (lambda conn: conn.close())
+        self._condition = threading.Condition()
+        self._idle = []  # [(conn, created_at, released_at)]
+        self._created_at = {}
+        self._size = 0
+        self._waiting = 0
+        self._stats = {
+            'connections_created': 0, 'connections_discarded': 0, 'acquired': 0,
+            'waits': 0, 'wait_seconds': 0.0, 'timeouts': 0, 'failed_checks': 0,
+        }
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        with self._condition:
+            while True:
+                conn = self._pop_idle()
+                if conn is not None:
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    logger.warning('Database pool exhausted: %d connections in use for %.1fs', self._size, timeout)
+                    raise PoolTimeout(f'No database connection available after {timeout}s')
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            if waited:
+                self._stats['wait_seconds'] += timeout - max(deadline - time.monotonic(), 0)
+
+        if conn is not None:
+            if self.check is None or self._passes_check(conn):
+                with self._condition:
+                    self._stats['acquired'] += 1
+                return conn
+            self._discard(conn, failed_check=True)
+            return self.acquire(max(deadline - time.monotonic(), 0))
+
+        try:
+            conn = self.factory()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats['connections_created'] += 1
+            self._stats['acquired'] += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        now = time.monotonic()
+        with self._condition:
+            created_at = self._created_at.get(id(conn), now)
+            if not discard and now - created_at < self.max_lifetime:
+                self._idle.append((conn, created_at, now))
+                self._condition.notify()
+                return
+        self._discard(conn)
+
+    def close(self):
+        """Close every idle connection (in-use ones are closed on release)."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self.max_lifetime = 0
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._size - len(self._idle),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                **self._stats,
+                'wait_seconds': round(self._stats['wait_seconds'], 3),
+            }
+
+    def _pop_idle(self):
+        now = time.monotonic()
+        while self._idle:
+            conn, created_at, released_at = self._idle.pop()
+            if now - released_at < self.max_idle and now - created_at < self.max_lifetime:
+                return conn
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._created_at.pop(id(conn), None)
+            self._close_quietly(conn)
+        return None
+
+    def _passes_check(self, conn):
+        try:
+            return self.check(conn)
+        except Exception:
+            return False
+
+    def _discard(self, conn, failed_check=False):
+        with self._condition:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            if failed_check:
+                self._stats['failed_checks'] += 1
+            self._created_at.pop(id(conn), None)
+            self._condition.notify()
+        self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        try:
+            self.close_connection(conn)
+        except Exception:
+            logger.debug('Error closing pooled connection', exc_info=True)
+
+
+def get_pool(alias, create):
+    """Pool of ``alias`` in the current process, built by ``create()`` on first use.
+
+    Pools are keyed by PID so a forked child (prefork Celery pool, preloaded
+    gunicorn) never reuses sockets inherited from its parent.
+    """
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = create()
+    return pool
+
+
+def pool_stats():
+    """Metrics of the pools living in the current process, by alias."""
+    pid = os.getpid()
+    return {alias: pool.stats() for (alias, owner), pool in list(_pools.items()) if owner == pid}
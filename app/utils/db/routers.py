@@ -0,0 +1,75 @@
+"""
+Read-replica routing.
+
+Reads go to ``settings.REPLICA_DATABASE`` only inside ``replica_reads()``
+(entered by ``utils.mixins.ReplicaReadMixin`` for read-only views); every
+other query, and every write, uses ``default``. The flag lives in a
+``ContextVar``, so it is per request in both threads and async tasks.
+
+Read-your-writes: ``pin_to_primary(student_id)`` keeps a student's reads on
+the primary for ``REPLICA_STICKY_SECONDS`` after they submit, covering the
+replication lag. The grading task also pins ``submission_pin(submission_id)``
+for views addressed only by the submission id.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_KEY = 'db:primary-pin:{}'
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads of the block to the replica, when one is configured."""
+    token = _read_alias.set(settings.REPLICA_DATABASE)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Keep the reads of the block on the primary, even inside ``replica_reads()``."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_to_primary(key, seconds=None):
+    """Route reads for ``key`` (usually a student id) to the primary for a while."""
+    cache.set(PIN_KEY.format(key), 1, seconds or settings.REPLICA_STICKY_SECONDS)
+
+
+def submission_pin(submission_id):
+    """Pin key of one submission, for views that only know the submission id."""
+    return f'submission:{submission_id}'
+
+
+def is_pinned_to_primary(*keys):
+    keys = [PIN_KEY.format(key) for key in keys if key not in (None, '')]
+    return bool(keys) and bool(cache.get_many(keys))
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {'default', settings.REPLICA_DATABASE}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
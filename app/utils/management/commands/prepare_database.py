@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management import BaseCommand, call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from utils.startup import unapplied_migrations
+
+
+class Command(BaseCommand):
+    """
+    Command that gets the database ready for the web process, in one Django boot:
+    waits for it (wait_for_postgres) and runs migrate only when a migration file
+    is not applied yet. With the schema current it costs a couple of queries
+    instead of a full migrate.
+
+    You can call it by terminal like this:
+    -> "python manage.py prepare_database"
+    -> "python manage.py prepare_database --force-migrate"
+    """
+
+    help = 'Wait for the database and apply pending migrations, if any.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--timeout', type=float, default=settings.STARTUP['DB_WAIT_TIMEOUT'])
+        parser.add_argument('--force-migrate', action='store_true', help='Run migrate even if nothing is pending.')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        call_command('wait_for_postgres', database=database, timeout=options['timeout'], stdout=self.stdout,
+                     stderr=self.stderr)
+
+        pending = unapplied_migrations(connections[database])
+        if not pending and not options['force_migrate']:
+            self.stdout.write(self.style.SUCCESS('Schema is up to date, skipping migrate.'))
+            return
+
+        if pending:
+            shown = ', '.join(f'{app}.{name}' for app, name in pending[:5])
+            more = f' and {len(pending) - 5} more' if len(pending) > 5 else ''
+            self.stdout.write(f'{len(pending)} pending migration(s): {shown}{more}')
+        call_command('migrate', database=database, interactive=False, verbosity=options['verbosity'],
+                     stdout=self.stdout, stderr=self.stderr)
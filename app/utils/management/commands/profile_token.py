@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from utils.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    """
+    Command that prints a signed ``X-Profile`` header value: requests sending
+    it are profiled (see ``utils.profiling``) while the token is valid.
+
+    You can call it by terminal like this:
+    -> "python manage.py profile_token"
+    -> curl -H "X-Profile: $(python manage.py profile_token --quiet)" https://.../api/exam/exams/3/statistics/
+    """
+
+    help = 'Print a signed token for the X-Profile header (request profiling).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiet', action='store_true', help='Print only the token.')
+
+    def handle(self, *args, **options):
+        config = settings.REQUEST_PROFILING
+        token = make_profile_token()
+        if options['quiet']:
+            self.stdout.write(token)
+            return
+        if not config['ENABLED']:
+            self.stderr.write('REQUEST_PROFILING_ENABLED is off: the servers will ignore the header.')
+        self.stdout.write(f"{config['HEADER']}: {token}")
+        self.stdout.write(f"Valid for {config['TOKEN_MAX_AGE']} seconds; the response carries X-Profile-Id.")
@@ -0,0 +1,40 @@
+import json
+import time
+
+from django.core.management import BaseCommand
+
+from medway_api.celery import TASK_QUEUES
+from utils.queues import queue_depth
+
+
+class Command(BaseCommand):
+    """
+    Command that reports how many messages are waiting in each Celery queue.
+
+    You can call it by terminal like this:
+    -> "python manage.py queue_depths"
+    -> "python manage.py queue_depths --watch 2"
+    """
+
+    help = 'Report the depth of the grading, analytics and maintenance queues.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print a JSON object instead of a table.')
+        parser.add_argument('--watch', type=float, metavar='SECONDS', help='Repeat every SECONDS until interrupted.')
+
+    def handle(self, *args, **options):
+        while True:
+            depths = {queue: queue_depth(queue) for queue in TASK_QUEUES}
+            if options['json']:
+                self.stdout.write(json.dumps(depths))
+            else:
+                for queue, depth in depths.items():
+                    config = TASK_QUEUES[queue]
+                    self.stdout.write(
+                        f"{queue:<12} {depth:>8} waiting  "
+                        f"(priority {config['priority']}, concurrency {config['concurrency']}, "
+                        f"time limit {config['time_limit']}s)"
+                    )
+            if not options['watch']:
+                return
+            time.sleep(options['watch'])
@@ -0,0 +1,53 @@
+import json
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from utils.slow_queries import read_entries, since_minutes, top_queries
+
+
+class Command(BaseCommand):
+    """
+    Command that reports the slowest query fingerprints of the slow-query log
+    (see ``utils.slow_queries``), with their call sites and latest plan.
+
+    You can call it by terminal like this:
+    -> "python manage.py slow_queries"
+    -> "python manage.py slow_queries --top 5 --minutes 60 --order max --plans"
+    """
+
+    help = 'Top slow queries by fingerprint from the slow-query log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--minutes', type=int, help='Only entries of the last MINUTES minutes.')
+        parser.add_argument('--order', choices=['total', 'max', 'mean', 'count'], default='total')
+        parser.add_argument('--plans', action='store_true', help='Print the latest plan of each fingerprint.')
+        parser.add_argument('--file', default=None, help='Log file (default SLOW_QUERY_LOG_FILE).')
+        parser.add_argument('--json', action='store_true', help='Print a JSON list instead of a report.')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.SLOW_QUERY_LOG['FILE']
+        entries = read_entries(path, since_minutes(options['minutes']))
+        groups = top_queries(entries, options['top'], options['order'])
+        if options['json']:
+            self.stdout.write(json.dumps(groups, indent=2))
+            return
+        if not groups:
+            self.stdout.write(f'No slow queries in {path}.')
+            return
+        self.stdout.write(f'{len(entries)} slow queries in {path}, top {len(groups)} by {options["order"]}:')
+        for rank, group in enumerate(groups, 1):
+            self.stdout.write(
+                f"\n{rank}. {group['count']}x  total {group['total_ms']:.0f} ms  mean {group['mean_ms']:.1f} ms  "
+                f"max {group['max_ms']:.1f} ms  last {group['last_at']}"
+            )
+            self.stdout.write(f"   {group['fingerprint'][:300]}")
+            for site, count in list(group['call_sites'].items())[:3]:
+                self.stdout.write(f'   {count}x at {site}')
+            for task, count in group['tasks'].items():
+                self.stdout.write(f'   {count}x in task {task}')
+            if options['plans'] and group['plan']:
+                self.stdout.write(f"   {group['plan_kind']}:")
+                for line in group['plan'].splitlines():
+                    self.stdout.write(f'     {line}')
@@ -0,0 +1,72 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from utils.startup import STARTUP_TARGETS, first_party_imports, import_times, measure_startup, package_totals
+
+
+class Command(BaseCommand):
+    """
+    Command that measures the cold start of a web process and of a Celery worker
+    (a fresh interpreter each run) and reports where the import time goes
+    (python -X importtime).
+
+    You can call it by terminal like this:
+    -> "python manage.py startup_report"
+    -> "python manage.py startup_report --target worker --top 20"
+    -> "python manage.py startup_report --runs 5 --check"
+    """
+
+    help = 'Report the startup time of the web and worker processes against their budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', choices=sorted(STARTUP_TARGETS),
+                            help='Only this process kind (repeatable). Default: all.')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes per target; the median is kept.')
+        parser.add_argument('--top', type=int, default=10, help='Packages and modules listed per target.')
+        parser.add_argument('--check', action='store_true',
+                            help="Fail when a target is over STARTUP['BUDGET_SECONDS'].")
+        parser.add_argument('--json', action='store_true', help='Print a JSON object instead of a report.')
+
+    def handle(self, *args, **options):
+        reports = []
+        for target in options['target'] or sorted(STARTUP_TARGETS):
+            report = measure_startup(target, options['runs'])
+            entries = import_times(target)
+            report['modules'] = len(report['modules'])
+            report['packages'] = {
+                name: {'self_ms': round(total['self_us'] / 1000, 1), 'modules': total['modules']}
+                for name, total in list(package_totals(entries).items())[:options['top']]
+            }
+            report['first_party'] = {
+                entry['module']: round(entry['cumulative_us'] / 1000, 1)
+                for entry in first_party_imports(entries)[:options['top']]
+            }
+            report['over_budget'] = report['budget_s'] is not None and report['wall_s'] > report['budget_s']
+            reports.append(report)
+
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2))
+        else:
+            for report in reports:
+                self.write_report(report)
+
+        over = [report['target'] for report in reports if report['over_budget']]
+        if options['check'] and over:
+            raise CommandError(f"Startup over budget: {', '.join(over)}")
+
+    def write_report(self, report):
+        verdict = ''
+        if report['budget_s'] is not None:
+            status = self.style.ERROR('OVER') if report['over_budget'] else self.style.SUCCESS('OK')
+            verdict = f"; budget {report['budget_s']:.2f}s {status}"
+        self.stdout.write(
+            f"{report['target']}: {report['wall_s']:.3f}s wall (median of {report['runs']}), "
+            f"{report['boot_s']:.3f}s booting, {report['modules']} modules{verdict}"
+        )
+        self.stdout.write('  By package (self time):')
+        for name, total in report['packages'].items():
+            self.stdout.write(f"    {name:<28} {total['self_ms']:>8.1f} ms  {total['modules']:>4} modules")
+        self.stdout.write('  Slowest first-party imports (cumulative):')
+        for module, ms in report['first_party'].items():
+            self.stdout.write(f'    {module:<40} {ms:>8.1f} ms')
@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from utils.task_metrics import summarize
+
+
+class Command(BaseCommand):
+    """
+    Command that summarises the Celery task telemetry of the last minutes,
+    across every worker process (see ``utils.task_metrics``).
+
+    You can call it by terminal like this:
+    -> "python manage.py task_metrics"
+    -> "python manage.py task_metrics --minutes 15 --task exam.tasks.process_exam_submission --json"
+    """
+
+    help = 'Summarise task runs, queue wait, run time, queries and retries of the last minutes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=5)
+        parser.add_argument('--task', help='Only this task name.')
+        parser.add_argument('--exam', type=int, help='Only runs labelled with this exam id.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON list instead of a table.')
+
+    def handle(self, *args, **options):
+        window = settings.TASK_METRICS['WINDOW_MINUTES']
+        if not 1 <= options['minutes'] <= window:
+            raise CommandError(f'--minutes must be between 1 and {window} (TASK_METRICS_WINDOW_MINUTES).')
+        rows = summarize(options['minutes'], options['task'], options['exam'])
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write(f"No task runs in the last {options['minutes']} minutes.")
+            return
+        for row in rows:
+            outcomes = ', '.join(f'{outcome} {count}' for outcome, count in sorted(row['outcomes'].items()))
+            retries = ', '.join(f'{reason} {count}' for reason, count in sorted(row['retries'].items())) or '-'
+            self.stdout.write(
+                f"{row['task']} exam={row['exam'] or '-'}: {row['runs']} runs ({row['per_minute']}/min; {outcomes})  "
+                f"queue wait mean {_ms(row['queue_wait_mean_s'])} p95 {_ms(row['queue_wait_p95_s'])}  "
+                f"run p50 {_ms(row['duration_p50_s'])} p95 {_ms(row['duration_p95_s'])}  "
+                f"db {_ms(row['db_mean_s'])}/run, {row['queries_mean']} queries/run  retries: {retries}"
+            )
+
+
+def _ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.1f} ms'
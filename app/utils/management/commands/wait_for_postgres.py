@@ -1,33 +1,42 @@
-import time
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
 
-from django.core.management import BaseCommand
-from django.db import OperationalError, connection
+from utils.startup import wait_for_database
 
 
 class Command(BaseCommand):
     """
     Command that waits for the postgres connection to be available.
 
+    Retries with exponential backoff (0.1s, 0.2s, 0.4s... up to --max-delay,
+    with jitter) and fails after --timeout seconds.
+
     You can call it by terminal like this:
     -> "python manage.py wait_for_postgres"
+    -> "python manage.py wait_for_postgres --timeout 120 --max-delay 2"
     """
 
-    def handle(self, *args, **options):
-        has_establish_db_connection = None
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--timeout', type=float, default=settings.STARTUP['DB_WAIT_TIMEOUT'],
+                            help='Give up after this many seconds.')
+        parser.add_argument('--max-delay', type=float, default=settings.STARTUP['DB_WAIT_MAX_DELAY'],
+                            help='Longest pause between two attempts, in seconds.')
 
+    def handle(self, *args, **options):
         self.stdout.write("Waiting for the database to become available...")
 
-        max_seconds_to_wait = 60
-        for _ in range(max_seconds_to_wait):
-            try:
-                connection.ensure_connection()
-                has_establish_db_connection = True
-                break
-            except OperationalError:
-                self.stdout.write("Still waiting for database connection, waiting 1 second...")
-                time.sleep(1)
-
-        if has_establish_db_connection:
-            self.stdout.write(self.style.SUCCESS("Database is available!"))
-        else:
-            self.stderr.write(self.style.ERROR("Error! It was not possible to establish the connection."))
+        def on_retry(attempt, delay, error):
+            self.stdout.write(f"Still waiting for database connection (attempt {attempt}), "
+                              f"retrying in {delay:.2f}s...")
+
+        try:
+            attempts = wait_for_database(
+                connections[options['database']], timeout=options['timeout'], max_delay=options['max_delay'],
+                on_retry=on_retry,
+            )
+        except OperationalError as exc:
+            raise CommandError(f"Error! It was not possible to establish the connection: {exc}") from exc
+
+        self.stdout.write(self.style.SUCCESS(f"Database is available! ({attempts} attempt(s))"))
@@ -0,0 +1,278 @@
+"""
+Per-endpoint request metrics in the Prometheus text format.
+
+``utils.middleware.RequestMetricsMiddleware`` records, for each resolved URL
+name, the latency, the number of queries, the time spent in the database and
+the time spent rendering DRF serializers (in views using
+``utils.mixins.SerializerTimingMixin``). Metrics live in memory, per process
+(like the connection pool stats): Prometheus scrapes every web process, or a
+single-process server, on ``/metrics``.
+
+No client library is needed: histograms are cumulative bucket counters
+rendered by ``render_metrics``.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative histogram with one series per tuple of label values."""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for label_values, counts, total in sorted(items):
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def count_and_sum(self, *label_values):
+        with self._lock:
+            counts, total = self._series.get(label_values, ((), 0.0))
+            return sum(counts), total
+
+    def quantile(self, fraction, *label_values):
+        """Estimate from the buckets, interpolating linearly like Prometheus' ``histogram_quantile``."""
+        with self._lock:
+            counts = list(self._series.get(label_values, ((),))[0])
+        rank = sum(counts) * fraction
+        if not counts or rank == 0:
+            return None
+        cumulative, lower = 0, 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]
+
+    def dump(self):
+        with self._lock:
+            return [[list(labels), list(counts), total] for labels, (counts, total) in self._series.items()]
+
+    def load(self, dump):
+        """Add the series of ``dump()`` (e.g. from another process) to this histogram."""
+        with self._lock:
+            for label_values, counts, total in dump:
+                series = self._series.setdefault(tuple(label_values), [[0] * (len(self.buckets) + 1), 0.0])
+                for index, count in enumerate(counts):
+                    series[0][index] += count
+                series[1] += total
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._series.items())
+        for label_values, value in items:
+            yield f'{self.name}_total', dict(zip(self.labels, label_values)), value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def dump(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._series.items()]
+
+    def load(self, dump):
+        with self._lock:
+            for label_values, value in dump:
+                self._series[tuple(label_values)] = self._series.get(tuple(label_values), 0) + value
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method'), LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request.', ('endpoint',), QUERY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request.', ('endpoint',),
+    LATENCY_BUCKETS,
+)
+REQUEST_SERIALIZER_TIME = Histogram(
+    'http_request_serializer_duration_seconds', 'Time spent rendering serializers per request.', ('endpoint',),
+    LATENCY_BUCKETS,
+)
+REQUESTS = Counter('http_requests', 'Requests by endpoint and status code.', ('endpoint', 'method', 'status'))
+BUDGET_EXCEEDED = Counter(
+    'http_request_query_budget_exceeded', 'Requests over the query budget of their endpoint.', ('endpoint',)
+)
+
+METRICS = (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, REQUEST_SERIALIZER_TIME, REQUESTS, BUDGET_EXCEEDED)
+
+
+def render_metrics(metrics=METRICS):
+    lines = []
+    for metric in metrics:
+        kind = 'histogram' if isinstance(metric, Histogram) else 'counter'
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {kind}')
+        for name, labels, value in metric.samples():
+            label_text = ','.join(f'{key}="{_escape(value_)}"' for key, value_ in labels.items())
+            lines.append(f'{name}{{{label_text}}} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.clear()
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) or abs(value) >= 1e15 else f'{value:.1f}'
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def sql_fingerprint(sql):
+    """SQL with literals and IN lists collapsed, to group queries that differ only by parameters."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class RequestStats:
+    """Queries, database time and serializer time of the request being served."""
+
+    __slots__ = ('queries', 'db_seconds', 'serializer_seconds', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.statements = []
+
+    def fingerprints(self):
+        counts = {}
+        for sql in self.statements:
+            fingerprint = sql_fingerprint(sql)
+            counts[fingerprint] = counts.get(fingerprint, 0) + 1
+        return sorted(counts.items(), key=lambda item: -item[1])
+
+
+MAX_RECORDED_STATEMENTS = 1000
+
+# The stats live in a ContextVar so that ORM calls made through
+# ``sync_to_async`` (async views) are attributed to the right request.
+_current_stats = ContextVar('request_stats', default=None)
+
+
+def start_request():
+    return _current_stats.set(RequestStats())
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+def finish_request(token):
+    stats = _current_stats.get()
+    _current_stats.reset(token)
+    return stats
+
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` installed on every connection; a pass-through outside requests."""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - started
+        stats.queries += 1
+        if len(stats.statements) < MAX_RECORDED_STATEMENTS:
+            stats.statements.append(sql)
+
+
+def _install_on_connection(connection, **kwargs):
+    # Inserted first so that ``connection.execute_wrapper()`` blocks, which pop
+    # the last wrapper on exit, never remove it.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def install_query_recorder():
+    """Hook ``record_query`` on the open connections of this thread and on every new one."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_install_on_connection, dispatch_uid='utils.metrics.record_query')
+    for connection in connections.all(initialized_only=True):
+        _install_on_connection(connection)
+
+
+@contextmanager
+def serializer_timer():
+    """Add the time spent in the block to the serializer time of the current request.
+
+    Used by ``utils.mixins.SerializerTimingMixin``; a no-op outside requests.
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_seconds += time.perf_counter() - started
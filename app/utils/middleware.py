@@ -0,0 +1,137 @@
+"""
+Request metrics middleware (see ``utils.metrics``).
+
+Records latency, query count, database time and serializer time per resolved
+URL name and logs a warning, with the SQL fingerprints, when a request runs
+more queries than the budget of its endpoint (``REQUEST_METRICS`` in the
+settings).
+
+``RequestProfilingMiddleware`` profiles requests on demand (see
+``utils.profiling``).
+"""
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from . import metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ENDPOINT = 'unmatched'
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name if match else None) or UNMATCHED_ENDPOINT
+
+
+def query_budget(endpoint):
+    config = settings.REQUEST_METRICS
+    return config['QUERY_BUDGETS'].get(endpoint, config['DEFAULT_QUERY_BUDGET'])
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.install_query_recorder()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            metrics._install_on_connection(connection)
+        started = time.perf_counter()
+        token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = metrics.finish_request(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stats = metrics.finish_request(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, stats, latency):
+        endpoint = endpoint_name(request)
+        metrics.REQUEST_LATENCY.observe(latency, endpoint, request.method)
+        metrics.REQUEST_QUERIES.observe(stats.queries, endpoint)
+        metrics.REQUEST_DB_TIME.observe(stats.db_seconds, endpoint)
+        metrics.REQUEST_SERIALIZER_TIME.observe(stats.serializer_seconds, endpoint)
+        metrics.REQUESTS.inc(endpoint, request.method, str(response.status_code))
+
+        budget = query_budget(endpoint)
+        if budget is not None and stats.queries > budget:
+            metrics.BUDGET_EXCEEDED.inc(endpoint)
+            fingerprints = '\n'.join(f'  {count}x {sql}' for sql, count in stats.fingerprints()[:10])
+            logger.warning(
+                'Query budget exceeded on %s %s (%s): %d queries, budget %d, %.1f ms in the database\n%s',
+                request.method, request.path, endpoint, stats.queries, budget, stats.db_seconds * 1000,
+                fingerprints,
+            )
+
+
+class RequestProfilingMiddleware:
+    """Profile the requests picked by ``utils.profiling.profile_trigger``.
+
+    Removed from the chain (``MiddlewareNotUsed``) unless
+    ``REQUEST_PROFILING['ENABLED']``, and from async (ASGI) chains, where the
+    profiler would see every coroutine of the event loop, not just this request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING['ENABLED']:
+            raise MiddlewareNotUsed
+        if iscoroutinefunction(get_response):
+            logger.info('Request profiling is only available under WSGI; not profiling ASGI requests')
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profiling.profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profile = profiling.RequestProfile(profiling.new_profile_id(request), trigger)
+        started = time.perf_counter()
+        with profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile, time.perf_counter() - started)
+
+    def finish(self, request, response, profile, duration):
+        try:
+            profile.save({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'endpoint': endpoint_name(request),
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'created_at': timezone.now().isoformat(),
+            })
+        except Exception:
+            logger.exception('Could not store the profile of %s %s', request.method, request.path)
+            return response
+        response['X-Profile-Id'] = profile.profile_id
+        return response
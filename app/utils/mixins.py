@@ -0,0 +1,68 @@
+from asgiref.sync import sync_to_async
+
+from . import metrics
+from .db.routers import is_pinned_to_primary, replica_reads, submission_pin
+
+READ_PRIMARY_HEADER = 'X-Read-Primary'
+
+
+class ReplicaReadMixin:
+    """Serve the safe methods of an ``APIView`` from the read replica.
+
+    Reads stay on the primary when the client asks for it (``X-Read-Primary: 1``
+    header or ``?read_primary=1``) or when the student of the request was
+    pinned by ``pin_to_primary`` after a recent submission. Students are
+    identified by ``student_id``/``student`` in the URL or query string, or by
+    the authenticated user. Views addressed by a submission id set
+    ``submission_kwarg`` to the URL keyword holding it, so a just-graded
+    submission (``submission_pin``) is read from the primary.
+
+    Also works on async Django views: the routing decision (which may load
+    the session user) runs in a thread and the replica flag, a ``ContextVar``,
+    covers the awaited handler.
+    """
+
+    replica_methods = ('GET', 'HEAD', 'OPTIONS')
+    submission_kwarg = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if getattr(self, 'view_is_async', False):
+            return self._async_dispatch(request, *args, **kwargs)
+        if request.method in self.replica_methods and not self.must_read_primary(request, **kwargs):
+            with replica_reads():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def _async_dispatch(self, request, *args, **kwargs):
+        if request.method in self.replica_methods and not await sync_to_async(self.must_read_primary)(
+            request, **kwargs
+        ):
+            with replica_reads():
+                return await super().dispatch(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def must_read_primary(self, request, **kwargs):
+        if request.headers.get(READ_PRIMARY_HEADER) == '1' or request.GET.get('read_primary') == '1':
+            return True
+        user = getattr(request, 'user', None)
+        submission_id = kwargs.get(self.submission_kwarg) if self.submission_kwarg else None
+        return is_pinned_to_primary(
+            kwargs.get('student_id'),
+            request.GET.get('student_id'),
+            request.GET.get('student'),
+            user.pk if user is not None and user.is_authenticated else None,
+            submission_pin(submission_id) if submission_id is not None else None,
+        )
+
+
+class SerializerTimingMixin:
+    """Count serializer rendering in the request's serializer time.
+
+    Views read ``self.serializer_data(serializer)`` instead of
+    ``serializer.data``; ``RequestMetricsMiddleware`` reports the total as
+    ``http_request_serializer_duration_seconds``.
+    """
+
+    def serializer_data(self, serializer):
+        with metrics.serializer_timer():
+            return serializer.data
@@ -0,0 +1,180 @@
+"""
+On-demand request profiling (``utils.middleware.RequestProfilingMiddleware``).
+
+A request is profiled when it carries a valid signed ``X-Profile`` header
+(``make_profile_token``, or ``python manage.py profile_token``) or is picked
+by ``REQUEST_PROFILING['SAMPLE_RATE']``. Profiling is opt-in
+(``REQUEST_PROFILING_ENABLED=1``); when off the middleware removes itself
+from the chain, so unprofiled deployments pay nothing.
+
+Each profile is stored in the ``profiles`` storage (``STORAGES``) as:
+
+- ``<id>.pstats``: ``cProfile`` output, for ``pstats``/snakeviz;
+- ``<id>.collapsed``: stacks sampled every ``SAMPLE_INTERVAL`` seconds by a
+  background thread, one ``frame;frame;frame count`` line per stack (the input
+  of ``flamegraph.pl``, speedscope or inferno);
+- ``<id>.json``: method, path, endpoint, status, duration and trigger.
+
+Ids start with a UTC timestamp, so listing is chronological, followed by the
+``X-Request-ID`` (if any) and a random suffix, so the three files of a profile
+never collide with another one; only the newest ``MAX_PROFILES`` are kept.
+
+Only the thread serving the request is profiled, so profiling needs the sync
+(WSGI) middleware chain. Under ASGI the request runs on the event loop thread,
+together with every other coroutine in flight, and a profiler there would
+measure all of them: the middleware removes itself from an async chain. Async
+views served by WSGI are profiled as the time the request thread waits for
+them.
+"""
+import cProfile
+import json
+import marshal
+import random
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+
+TOKEN_SALT = 'utils.profiling'
+PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-zA-Z_-]{1,64}$')
+KINDS = {'pstats': 'application/octet-stream', 'collapsed': 'text/plain; charset=utf-8'}
+
+
+def profile_storage():
+    return storages['profiles']
+
+
+def make_profile_token():
+    """Value for the ``X-Profile`` header; valid for ``TOKEN_MAX_AGE`` seconds from now."""
+    return signing.TimestampSigner(key=_signing_key(), salt=TOKEN_SALT).sign(uuid.uuid4().hex)
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(key=_signing_key(), salt=TOKEN_SALT).unsign(
+            token, max_age=settings.REQUEST_PROFILING['TOKEN_MAX_AGE']
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _signing_key():
+    return settings.REQUEST_PROFILING['SECRET'] or settings.SECRET_KEY
+
+
+def profile_trigger(request):
+    """``'header'``, ``'sample'`` or ``None`` when the request should not be profiled."""
+    config = settings.REQUEST_PROFILING
+    token = request.headers.get(config['HEADER'])
+    if token and valid_token(token):
+        return 'header'
+    if config['SAMPLE_RATE'] and random.random() < config['SAMPLE_RATE']:
+        return 'sample'
+    return None
+
+
+def new_profile_id(request):
+    request_id = re.sub(r'[^0-9a-zA-Z_-]', '', request.headers.get('X-Request-ID', ''))[:48]
+    prefix = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{request_id + '-' if request_id else ''}"
+    return f'{prefix}{uuid.uuid4().hex[:12]}'
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread every ``interval`` seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{getattr(code, 'co_qualname', code.co_name)} ({_short_path(code.co_filename)}:"
+                             f"{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def _short_path(filename):
+    for marker in ('site-packages/', str(settings.BASE_DIR) + '/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+class RequestProfile:
+    """``cProfile`` plus the stack sampler around one request."""
+
+    def __init__(self, profile_id, trigger):
+        self.profile_id = profile_id
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), settings.REQUEST_PROFILING['SAMPLE_INTERVAL'])
+
+    def __enter__(self):
+        self.sampler.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        self.sampler.stop()
+        return False
+
+    def pstats_bytes(self):
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+    def save(self, meta):
+        storage = profile_storage()
+        storage.save(f'{self.profile_id}.pstats', ContentFile(self.pstats_bytes()))
+        storage.save(f'{self.profile_id}.collapsed', ContentFile(self.sampler.collapsed().encode()))
+        storage.save(f'{self.profile_id}.json', ContentFile(json.dumps({
+            'id': self.profile_id, 'trigger': self.trigger, 'samples': sum(self.sampler.stacks.values()), **meta,
+        }).encode()))
+        prune_profiles()
+
+
+def list_profiles(limit=None):
+    """Metadata of the stored profiles, newest first."""
+    storage = profile_storage()
+    if not storage.exists(''):
+        return []
+    names = sorted((name[:-5] for name in storage.listdir('')[1] if name.endswith('.json')), reverse=True)
+    profiles = []
+    for profile_id in names[:limit]:
+        with storage.open(f'{profile_id}.json') as handle:
+            profiles.append(json.loads(handle.read()))
+    return profiles
+
+
+def prune_profiles():
+    storage = profile_storage()
+    names = sorted({name.rsplit('.', 1)[0] for name in storage.listdir('')[1]}, reverse=True)
+    for profile_id in names[settings.REQUEST_PROFILING['MAX_PROFILES']:]:
+        for extension in ('json', *KINDS):
+            if storage.exists(f'{profile_id}.{extension}'):
+                storage.delete(f'{profile_id}.{extension}')
+
@@ -0,0 +1,34 @@
+"""
+Broker helpers: queue lookup and depth for Celery tasks.
+"""
+from celery import current_app
+from django.core.cache import cache
+
+
+def queue_for_task(task_name):
+    """Name of the queue a task is routed to (honours ``task_routes``)."""
+    return current_app.amqp.router.route({}, task_name)['queue'].name
+
+
+def queue_depth(queue_name):
+    """Number of messages waiting in ``queue_name`` (0 if it does not exist yet)."""
+    with current_app.connection_for_read() as connection:
+        channel = connection.default_channel
+        try:
+            return channel.queue_declare(queue=queue_name, passive=True).message_count
+        except connection.channel_errors:
+            return 0
+
+
+def cached_queue_depth(queue_name, ttl):
+    """``queue_depth`` cached in the shared cache for ``ttl`` seconds.
+
+    Admission checks run on every request; this keeps them from turning into
+    one broker round trip per request.
+    """
+    key = f'queues:depth:{queue_name}'
+    depth = cache.get(key)
+    if depth is None:
+        depth = queue_depth(queue_name)
+        cache.set(key, depth, ttl)
+    return depth
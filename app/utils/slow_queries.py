@@ -0,0 +1,257 @@
+"""
+Slow-query log with the plan of each slow statement.
+
+``log_slow_query`` is an ``execute_wrapper`` installed on every connection
+(``utils.apps``). A statement slower than ``SLOW_QUERY_LOG['THRESHOLD_MS']``
+is written as one JSON line to a rotating file with:
+
+- the SQL fingerprint (``utils.metrics.sql_fingerprint``) and the SQL text,
+  never the parameters;
+- the call site: the innermost frame of our code (e.g. a serializer method),
+  the outermost one (the view or task entry point) and, inside a Celery task,
+  the task name;
+- the plan of SELECT statements: ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on
+  SQLite), or ``EXPLAIN (ANALYZE, BUFFERS)`` on PostgreSQL for a sample of
+  ``EXPLAIN_ANALYZE_SAMPLE_RATE``. ANALYZE runs the query again, so it is only
+  used for plain ``SELECT`` (no ``WITH``, which may modify data, and no
+  ``FOR UPDATE``/``FOR SHARE``), and each fingerprint is explained at most once
+  per ``EXPLAIN_INTERVAL_SECONDS`` in a process.
+
+``python manage.py slow_queries`` aggregates the log (rotated files included)
+into a top-N report by fingerprint.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .metrics import sql_fingerprint
+
+MAX_SQL_LENGTH = 4000
+MAX_STACK_FRAMES = 8
+EXPLAINABLE = ('SELECT', 'WITH')
+# ANALYZE executes the statement again: only for plain reads (a WITH may hide
+# a data-modifying CTE, FOR UPDATE/SHARE takes row locks).
+LOCKING_CLAUSE = re.compile(r'\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b', re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+# Dedicated logger for the JSON lines; its file handler is set up lazily from the settings.
+slow_log = logging.getLogger('slow_queries')
+slow_log.propagate = False
+
+# Set while explaining, so the savepoint around the EXPLAIN is not logged.
+_explaining = ContextVar('slow_query_explaining', default=False)
+_explained_at = {}
+_handler_lock = threading.Lock()
+_handler = None
+_OWN_FILES = {str(Path(__file__).resolve()), str(Path(__file__).resolve().with_name('metrics.py'))}
+
+
+def log_slow_query(execute, sql, params, many, context):
+    config = settings.SLOW_QUERY_LOG
+    if not config['ENABLED'] or _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms >= config['THRESHOLD_MS']:
+        try:
+            record_slow_query(context['connection'], sql, params, many, elapsed_ms, config)
+        except Exception:
+            # Never fail the query because of the log
+            logger.exception('Could not record a slow query')
+    return result
+
+
+def record_slow_query(connection, sql, params, many, elapsed_ms, config):
+    fingerprint = sql_fingerprint(sql)
+    stack = call_stack()
+    entry = {
+        'at': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'ms': round(elapsed_ms, 2),
+        'fingerprint': fingerprint,
+        'sql': sql[:MAX_SQL_LENGTH],
+        'alias': connection.alias,
+        'vendor': connection.vendor,
+        'many': many,
+        'call_site': stack[-1] if stack else None,
+        'origin': stack[0] if stack else None,
+        'task': current_task_name(),
+        'stack': stack,
+        'plan': None,
+        'plan_kind': None,
+    }
+    if config['EXPLAIN'] and not many and _should_explain(fingerprint, config):
+        analyze = (connection.vendor == 'postgresql' and is_plain_select(sql)
+                   and random.random() < config['EXPLAIN_ANALYZE_SAMPLE_RATE'])
+        entry['plan_kind'], entry['plan'] = explain(connection, sql, params, analyze)
+    write_entry(entry, config)
+    return entry
+
+
+def is_plain_select(sql):
+    """``SELECT`` without a locking clause: safe to run again under ``EXPLAIN ANALYZE``."""
+    return sql.lstrip().upper().startswith('SELECT') and not LOCKING_CLAUSE.search(sql)
+
+
+def call_stack():
+    """Frames of our code (under ``BASE_DIR``), outermost first, as ``path:line Qualified.name``."""
+    base = str(settings.BASE_DIR) + os.sep
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base) and filename not in _OWN_FILES and os.sep + 'site-packages' not in filename:
+            code = frame.f_code
+            frames.append(f"{filename[len(base):]}:{frame.f_lineno} {getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    frames.reverse()
+    if len(frames) > MAX_STACK_FRAMES:
+        frames = [frames[0], *frames[-(MAX_STACK_FRAMES - 1):]]
+    return frames
+
+
+def current_task_name():
+    from celery import current_task
+
+    return current_task.name if current_task and current_task.request.id else None
+
+
+def _should_explain(fingerprint, config):
+    if not fingerprint.upper().startswith(EXPLAINABLE):
+        return False
+    now = time.monotonic()
+    last = _explained_at.get(fingerprint)
+    if last is not None and now - last < config['EXPLAIN_INTERVAL_SECONDS']:
+        return False
+    _explained_at[fingerprint] = now
+    if len(_explained_at) > 10000:
+        _explained_at.clear()
+    return True
+
+
+def explain(connection, sql, params, analyze=False):
+    """``(kind, plan text)`` of a statement, or ``(kind, None)`` if the backend refuses it."""
+    if connection.vendor == 'postgresql':
+        kind = 'EXPLAIN (ANALYZE, BUFFERS)' if analyze else 'EXPLAIN'
+    elif connection.vendor == 'sqlite':
+        kind = 'EXPLAIN QUERY PLAN'
+    else:
+        kind = 'EXPLAIN'
+    token = _explaining.set(True)
+    try:
+        # In a transaction a failing EXPLAIN must not abort the caller's work.
+        # The backend cursor skips the execute wrappers: the EXPLAIN is neither
+        # logged again nor counted in the request metrics.
+        savepoint = transaction.atomic(using=connection.alias) if connection.in_atomic_block else nullcontext()
+        with savepoint, connection.wrap_database_errors:
+            cursor = connection.create_cursor()
+            try:
+                cursor.execute(f'{kind} {sql}', params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+    except DatabaseError as exc:
+        logger.info('EXPLAIN failed for a slow query: %s', exc)
+        return kind, None
+    finally:
+        _explaining.reset(token)
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return kind, '\n'.join(str(row[-1]) for row in rows)
+    return kind, '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def write_entry(entry, config):
+    global _handler
+    with _handler_lock:
+        if _handler is None or _handler.baseFilename != os.path.abspath(config['FILE']):
+            close_log()
+            os.makedirs(os.path.dirname(os.path.abspath(config['FILE'])), exist_ok=True)
+            _handler = RotatingFileHandler(
+                config['FILE'], maxBytes=config['MAX_BYTES'], backupCount=config['BACKUP_COUNT'],
+                encoding='utf-8', delay=True,
+            )
+            _handler.setFormatter(logging.Formatter('%(message)s'))
+            slow_log.addHandler(_handler)
+            slow_log.setLevel(logging.INFO)
+    slow_log.info(json.dumps(entry, default=str))
+
+
+def close_log():
+    """Detach the file handler (it is reopened, from the current settings, on the next entry)."""
+    global _handler
+    if _handler is not None:
+        slow_log.removeHandler(_handler)
+        _handler.close()
+        _handler = None
+
+
+def install_on_connection(connection, **kwargs):
+    # First in the list, like utils.metrics.record_query: never popped by
+    # ``connection.execute_wrapper()`` blocks.
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_query)
+
+
+def read_entries(path, since=None):
+    """Entries of the log and of its rotated files (``.1``, ``.2``...), oldest file first."""
+    path = Path(path)
+    rotated = [file for file in path.parent.glob(path.name + '.*') if file.suffix[1:].isdigit()]
+    files = sorted(rotated, key=lambda file: -int(file.suffix[1:]))
+    entries = []
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        with open(file, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or datetime.fromisoformat(entry['at']) >= since:
+                    entries.append(entry)
+    return entries
+
+
+def top_queries(entries, top=10, order='total'):
+    """Aggregate by fingerprint: count, total/mean/max time, call sites and the latest plan."""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'call_sites': {}, 'tasks': {}, 'example_sql': entry['sql'], 'plan': None, 'plan_kind': None,
+            'last_at': entry['at'],
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['last_at'] = max(group['last_at'], entry['at'])
+        site = entry.get('call_site') or '?'
+        group['call_sites'][site] = group['call_sites'].get(site, 0) + 1
+        if entry.get('task'):
+            group['tasks'][entry['task']] = group['tasks'].get(entry['task'], 0) + 1
+        if entry.get('plan'):
+            group['plan'], group['plan_kind'] = entry['plan'], entry['plan_kind']
+    for group in groups.values():
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['mean_ms'] = round(group['total_ms'] / group['count'], 2)
+        group['call_sites'] = dict(sorted(group['call_sites'].items(), key=lambda item: -item[1]))
+    key = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count', 'mean': 'mean_ms'}[order]
+    return sorted(groups.values(), key=lambda group: -group[key])[:top]
+
+
+def since_minutes(minutes):
+    return datetime.now(timezone.utc) - timedelta(minutes=minutes) if minutes else None
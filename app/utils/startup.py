@@ -0,0 +1,201 @@
+"""
+Startup of the web and Celery worker processes.
+
+Autoscaling adds workers during exam spikes, so a cold start is paid many
+times. This module keeps it short and measured:
+
+- ``wait_for_database``: connect with capped exponential backoff and jitter
+  (``wait_for_postgres`` / ``prepare_database``), instead of fixed 1-second
+  sleeps, so a container whose database is already up starts right away;
+- ``unapplied_migrations``: a fast "is the schema current?" check that lists
+  the migration files instead of importing them, so ``prepare_database`` only
+  runs ``migrate`` (and its post-migrate content type and permission queries)
+  when there is something to apply;
+- ``measure_startup`` / ``import_times``: wall time and ``python -X importtime``
+  report of a fresh process booting as a web server (settings, middlewares and
+  URLconf) or as a worker (settings and task modules), used by
+  ``python manage.py startup_report`` and checked against
+  ``STARTUP['BUDGET_SECONDS']``.
+"""
+import json
+import os
+import pkgutil
+import random
+import statistics
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import OperationalError
+
+# What each kind of process imports before it can serve its first request/task.
+STARTUP_TARGETS = {
+    'web': (
+        'from medway_api.wsgi import application\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    ),
+    'worker': (
+        'from medway_api.celery import app\n'
+        'app.loader.import_default_modules()\n'
+    ),
+}
+
+
+def backoff_delay(attempt, initial_delay, max_delay):
+    """Delay after the ``attempt``-th failure: doubles up to ``max_delay``, half of it random.
+
+    The jitter keeps replicas that boot together from retrying in lockstep.
+    """
+    delay = min(max_delay, initial_delay * 2 ** min(attempt - 1, 32))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def wait_for_database(connection, timeout=60.0, initial_delay=0.1, max_delay=5.0, on_retry=None,
+                      sleep=time.sleep, clock=time.monotonic):
+    """Open ``connection``, retrying with backoff; returns the number of attempts.
+
+    Raises the last ``OperationalError`` once ``timeout`` seconds have passed.
+    ``on_retry(attempt, delay, error)`` is called before each sleep.
+    """
+    deadline = clock() + timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            connection.ensure_connection()
+            return attempt
+        except OperationalError as exc:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                raise
+            delay = min(backoff_delay(attempt, initial_delay, max_delay), remaining)
+            if on_retry:
+                on_retry(attempt, delay, exc)
+            sleep(delay)
+
+
+def migration_files():
+    """``(app_label, name)`` of every migration on disk, found like ``MigrationLoader`` does but not imported."""
+    from django.db.migrations.loader import MigrationLoader
+
+    found = []
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError as exc:
+            if exc.name != module_name and not module_name.startswith(f'{exc.name}.'):
+                raise
+            continue
+        if not hasattr(module, '__path__'):
+            continue
+        found.extend(
+            (app_config.label, name)
+            for _, name, is_pkg in pkgutil.iter_modules(module.__path__)
+            if not is_pkg and name[0] not in '_~'
+        )
+    return found
+
+
+def unapplied_migrations(connection):
+    """Migration files not recorded in ``django_migrations`` (every file on a fresh database).
+
+    Conservative: anything not recorded, e.g. a new squashed migration, makes
+    ``prepare_database`` run ``migrate``, which is a no-op when the plan is empty.
+    """
+    from django.db.migrations.recorder import MigrationRecorder
+
+    recorder = MigrationRecorder(connection)
+    applied = set(recorder.applied_migrations()) if recorder.has_table() else set()
+    return sorted(migration for migration in migration_files() if migration not in applied)
+
+
+def _subprocess_env():
+    # Same layout as conftest.py: ``app.test_settings`` imports ``app.medway_api``
+    paths = [str(settings.BASE_DIR), str(settings.BASE_DIR.parent), os.environ.get('PYTHONPATH', '')]
+    return {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        'PYTHONPATH': os.pathsep.join(path for path in paths if path),
+    }
+
+
+def _run_target(target, *python_options):
+    code = f'import json, sys, time\n_started = time.perf_counter()\n{STARTUP_TARGETS[target]}' \
+           f'print(json.dumps([time.perf_counter() - _started, sorted(sys.modules)]))\n'
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *python_options, '-c', code], cwd=settings.BASE_DIR, env=_subprocess_env(),
+        capture_output=True, text=True, timeout=120,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(f'{target} startup failed:\n{result.stderr[-2000:]}')
+    booting, modules = json.loads(result.stdout.strip().splitlines()[-1])
+    return wall, booting, modules, result.stderr
+
+
+def measure_startup(target, runs=3):
+    """Boot ``target`` in ``runs`` fresh interpreters: median wall time (the cold start) and boot time.
+
+    ``modules`` is what the process has in ``sys.modules`` once booted.
+    """
+    samples = [_run_target(target)[:3] for _ in range(runs)]
+    return {
+        'target': target,
+        'runs': runs,
+        'wall_s': round(statistics.median(wall for wall, _, _ in samples), 4),
+        'boot_s': round(statistics.median(booting for _, booting, _ in samples), 4),
+        'budget_s': settings.STARTUP['BUDGET_SECONDS'].get(target),
+        'modules': samples[-1][2],
+    }
+
+
+def import_times(target):
+    """Modules imported by a fresh ``target`` process, in import order, from ``python -X importtime``.
+
+    Each entry has ``module``, ``depth`` (nesting under the module that
+    imported it), ``self_us`` and ``cumulative_us``. Modules loaded without the
+    import system's usual path (e.g. task modules found by Celery's
+    autodiscovery) are missing: use ``measure_startup(...)['modules']`` to know
+    what was loaded.
+    """
+    stderr = _run_target(target, '-X', 'importtime')[3]
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # header
+        module = name.lstrip()
+        entries.append({
+            'module': module,
+            'depth': (len(name) - len(module) - 1) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+    return entries
+
+
+def package_totals(entries):
+    """Self time and module count per top-level package, slowest first."""
+    totals = {}
+    for entry in entries:
+        package = totals.setdefault(entry['module'].split('.')[0], {'self_us': 0, 'modules': 0})
+        package['self_us'] += entry['self_us']
+        package['modules'] += 1
+    return dict(sorted(totals.items(), key=lambda item: -item[1]['self_us']))
+
+
+def first_party_imports(entries):
+    """Our own modules (packages under ``BASE_DIR``), slowest cumulative import first."""
+    packages = {path.name for path in settings.BASE_DIR.iterdir() if (path / '__init__.py').exists()}
+    ours = [entry for entry in entries if entry['module'].split('.')[0] in packages]
+    return sorted(ours, key=lambda entry: -entry['cumulative_us'])
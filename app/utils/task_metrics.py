@@ -0,0 +1,330 @@
+"""
+Celery task telemetry: queue wait, run time, database work, retries and
+outcomes per task name and exam id.
+
+``install_task_metrics`` (called from ``medway_api.celery``) connects:
+
+- ``before_task_publish``: stamps the ``enqueued_at`` header (wall clock of the
+  publisher, so queue wait includes any clock skew between hosts; measured
+  from the ETA for countdowns and retries);
+- ``task_prerun``: starts a ``utils.metrics.RequestStats`` so that the query
+  recorder counts the queries and database time of the task;
+- ``task_retry``: counts retries by exception class (e.g. ``IntegrityError``);
+- ``task_postrun``: records the run and its outcome (``success``, ``retry``,
+  ``failure``...).
+
+Worker children are separate processes that Prometheus does not scrape: each
+process keeps its cumulative series plus one set of series per minute for the
+last ``TASK_METRICS['WINDOW_MINUTES']`` minutes, and publishes a snapshot to
+the shared cache at most every ``FLUSH_SECONDS``. ``/metrics`` exports the
+snapshot of every live process with a ``process`` label
+(``render_task_metrics``): a worker child that exits (max tasks per child,
+autoscaling) takes its series away instead of making a summed counter go
+down, which Prometheus would read as a reset. Aggregate in the query, e.g.
+``sum without (process) (rate(celery_task_runs_total[5m]))``. The
+``task_metrics`` command summarises the last minutes (``summarize``).
+Eager tasks (tests, ``CELERY_TASK_ALWAYS_EAGER=1``) are recorded the same way,
+without queue wait.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .cache import cache_lock
+from .metrics import LATENCY_BUCKETS, QUERY_BUCKETS, Counter, Histogram
+
+LABELS = ('task', 'exam')
+QUEUE_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+ENQUEUED_AT_HEADER = 'enqueued_at'
+SNAPSHOT_KEY = 'task-metrics:process:{}'
+REGISTRY_KEY = 'task-metrics:processes'
+
+logger = logging.getLogger(__name__)
+
+
+class TaskMetricSet:
+    """The task series, for one process and one period (cumulative or one minute)."""
+
+    def __init__(self, labels=LABELS):
+        self.queue_wait = Histogram(
+            'celery_task_queue_wait_seconds', 'Time between publishing a task and a worker starting it.', labels,
+            QUEUE_WAIT_BUCKETS,
+        )
+        self.duration = Histogram('celery_task_duration_seconds', 'Task run time.', labels, LATENCY_BUCKETS)
+        self.db_time = Histogram(
+            'celery_task_db_duration_seconds', 'Time spent in database queries per task run.', labels,
+            LATENCY_BUCKETS,
+        )
+        self.queries = Histogram('celery_task_db_queries', 'Database queries per task run.', labels, QUERY_BUCKETS)
+        self.runs = Counter('celery_task_runs', 'Task runs by outcome.', (*labels, 'outcome'))
+        self.retries = Counter('celery_task_retries', 'Task retries by exception.', (*labels, 'reason'))
+
+    def all(self):
+        return (self.queue_wait, self.duration, self.db_time, self.queries, self.runs, self.retries)
+
+    def dump(self):
+        return [metric.dump() for metric in self.all()]
+
+    def load(self, dump):
+        for metric, series in zip(self.all(), dump):
+            metric.load(series)
+        return self
+
+    def series(self):
+        """``(task, exam)`` pairs with at least one finished run."""
+        return sorted({tuple(labels) for labels, _, _ in self.duration.dump()})
+
+
+class TaskTelemetry:
+    """Series of this process and their publication to the shared cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.totals = TaskMetricSet()
+            self.minutes = {}
+            self._dirty = False
+            self._published_at = 0.0
+            self._registered_at = 0.0
+
+    @staticmethod
+    def process_id():
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def _periods(self, now):
+        minute = int(now // 60)
+        with self._lock:
+            if minute not in self.minutes:
+                self.minutes[minute] = TaskMetricSet()
+                oldest = minute - settings.TASK_METRICS['WINDOW_MINUTES']
+                for stale in [key for key in self.minutes if key <= oldest]:
+                    del self.minutes[stale]
+            self._dirty = True
+            return self.totals, self.minutes[minute]
+
+    def record_run(self, task, exam, outcome, duration, queries, db_seconds, queue_wait=None, now=None):
+        for period in self._periods(time.time() if now is None else now):
+            if queue_wait is not None:
+                period.queue_wait.observe(queue_wait, task, exam)
+            period.duration.observe(duration, task, exam)
+            period.db_time.observe(db_seconds, task, exam)
+            period.queries.observe(queries, task, exam)
+            period.runs.inc(task, exam, outcome)
+
+    def record_retry(self, task, exam, reason, now=None):
+        for period in self._periods(time.time() if now is None else now):
+            period.retries.inc(task, exam, reason)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'process': self.process_id(),
+                'updated_at': time.time(),
+                'totals': self.totals.dump(),
+                'minutes': {minute: series.dump() for minute, series in self.minutes.items()},
+            }
+
+    def publish(self):
+        """Store the snapshot of this process in the shared cache and register the process."""
+        window = settings.TASK_METRICS['WINDOW_MINUTES'] * 60
+        key = SNAPSHOT_KEY.format(self.process_id())
+        snapshot = self.snapshot()
+        cache.set(key, snapshot, window)
+        with self._lock:
+            self._dirty = False
+            self._published_at = time.monotonic()
+            register = time.monotonic() - self._registered_at > 60
+        if register:
+            with cache_lock(REGISTRY_KEY):
+                processes = cache.get(REGISTRY_KEY) or {}
+                processes = {name: seen for name, seen in processes.items() if seen > time.time() - window}
+                processes[key] = time.time()
+                cache.set(REGISTRY_KEY, processes, None)
+            self._registered_at = time.monotonic()
+
+    def flush(self):
+        if self._dirty:
+            self.publish()
+
+    def maybe_publish(self):
+        """Publish now if the last snapshot is older than ``FLUSH_SECONDS``, otherwise schedule it."""
+        delay = self._published_at + settings.TASK_METRICS['FLUSH_SECONDS'] - time.monotonic()
+        if delay <= 0:
+            self.publish()
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(delay, self._scheduled_publish)
+            self._timer.daemon = True
+        self._timer.start()
+
+    def _scheduled_publish(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Could not publish the task metrics of %s', self.process_id())
+
+
+telemetry = TaskTelemetry()
+
+
+def collect_snapshots():
+    """Snapshots of every live process (this one included, published first)."""
+    telemetry.flush()
+    processes = cache.get(REGISTRY_KEY) or {}
+    return list(cache.get_many(list(processes)).values())
+
+
+def render_task_metrics():
+    """Cumulative series of every live process, labelled with its ``process`` (``host:pid``)."""
+    exported = TaskMetricSet(labels=(*LABELS, 'process'))
+    for snapshot in collect_snapshots():
+        process = snapshot.get('process', 'unknown')
+        exported.load([_with_process(dump, process) for dump in snapshot['totals']])
+    return metrics.render_metrics(exported.all())
+
+
+def _with_process(dump, process):
+    # (task, exam[, outcome/reason]) -> (task, exam, process[, outcome/reason])
+    return [[[*labels[:len(LABELS)], process, *labels[len(LABELS):]], *values] for labels, *values in dump]
+
+
+def summarize(minutes=5, task=None, exam=None, now=None):
+    """Per ``(task, exam)`` figures of the last ``minutes`` minutes, across every process."""
+    first_minute = int((time.time() if now is None else now) // 60) - minutes + 1
+    window = TaskMetricSet()
+    for snapshot in collect_snapshots():
+        for minute, dump in snapshot['minutes'].items():
+            if int(minute) >= first_minute:
+                window.load(dump)
+
+    runs = {}
+    for labels, value in window.runs.dump():
+        runs.setdefault(tuple(labels[:2]), {})[labels[2]] = value
+    retries = {}
+    for labels, value in window.retries.dump():
+        retries.setdefault(tuple(labels[:2]), {})[labels[2]] = value
+
+    rows = []
+    for task_name, exam_id in window.series():
+        if (task and task_name != task) or (exam is not None and exam_id != str(exam)):
+            continue
+        count, duration_total = window.duration.count_and_sum(task_name, exam_id)
+        waited, wait_total = window.queue_wait.count_and_sum(task_name, exam_id)
+        queries = window.queries.count_and_sum(task_name, exam_id)[1]
+        db_total = window.db_time.count_and_sum(task_name, exam_id)[1]
+        rows.append({
+            'task': task_name,
+            'exam': exam_id or None,
+            'runs': count,
+            'per_minute': round(count / minutes, 2),
+            'outcomes': runs.get((task_name, exam_id), {}),
+            'retries': retries.get((task_name, exam_id), {}),
+            'queue_wait_mean_s': round(wait_total / waited, 4) if waited else None,
+            'queue_wait_p95_s': _round(window.queue_wait.quantile(0.95, task_name, exam_id)),
+            'duration_mean_s': round(duration_total / count, 4),
+            'duration_p50_s': _round(window.duration.quantile(0.50, task_name, exam_id)),
+            'duration_p95_s': _round(window.duration.quantile(0.95, task_name, exam_id)),
+            'db_mean_s': round(db_total / count, 4),
+            'queries_mean': round(queries / count, 1),
+        })
+    return rows
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+def task_exam_id(args, kwargs):
+    """Exam id label: an ``exam_id`` keyword or the ``exam_id`` of a payload dict (``''`` if none)."""
+    if kwargs and 'exam_id' in kwargs:
+        return str(kwargs['exam_id'])
+    for arg in args or ():
+        if isinstance(arg, dict) and arg.get('exam_id') is not None:
+            return str(arg['exam_id'])
+    return ''
+
+
+# Runs in progress in this process, by task id.
+_running = {}
+_installed_pid = None
+
+
+def _enabled():
+    return settings.TASK_METRICS['ENABLED']
+
+
+def stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None and _enabled():
+        # Overwritten on every publish: a retry copies the headers of the previous run.
+        headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+def start_task(task_id=None, task=None, **kwargs):
+    global _installed_pid
+    if not _enabled() or task_id is None:
+        return
+    if _installed_pid != os.getpid():
+        metrics.install_query_recorder()
+        _installed_pid = os.getpid()
+    _running[task_id] = (time.perf_counter(), metrics.start_request(), queue_wait(task.request))
+
+
+def queue_wait(request):
+    """Seconds between publishing (or the ETA of a countdown/retry) and now; ``None`` without the header."""
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None) or (request.headers or {}).get(ENQUEUED_AT_HEADER)
+    if not enqueued_at:
+        return None
+    ready_at = float(enqueued_at)
+    if request.eta:
+        ready_at = max(ready_at, datetime.fromisoformat(request.eta).timestamp())
+    return max(0.0, time.time() - ready_at)
+
+
+def count_retry(sender=None, request=None, reason=None, **kwargs):
+    if not _enabled() or sender is None:
+        return
+    reason = getattr(reason, 'exc', None) or reason
+    telemetry.record_retry(
+        sender.name, task_exam_id(request.args, request.kwargs), type(reason).__name__
+    )
+
+
+def finish_task(task_id=None, task=None, args=None, kwargs=None, state=None, **extra):
+    started = _running.pop(task_id, None)
+    if started is None:
+        return
+    started_at, token, queue_wait = started
+    stats = metrics.finish_request(token)
+    telemetry.record_run(
+        task.name, task_exam_id(args, kwargs), (state or 'unknown').lower(),
+        time.perf_counter() - started_at, stats.queries, stats.db_seconds, queue_wait,
+    )
+    try:
+        telemetry.maybe_publish()
+    except Exception:
+        # Telemetry never fails a task; the next run publishes again.
+        logger.exception('Could not publish the task metrics of %s', telemetry.process_id())
+
+
+def install_task_metrics():
+    from celery.signals import before_task_publish, task_postrun, task_prerun, task_retry
+
+    before_task_publish.connect(stamp_enqueued_at, dispatch_uid='utils.task_metrics.stamp_enqueued_at', weak=False)
+    task_prerun.connect(start_task, dispatch_uid='utils.task_metrics.start_task', weak=False)
+    task_retry.connect(count_retry, dispatch_uid='utils.task_metrics.count_retry', weak=False)
+    task_postrun.connect(finish_task, dispatch_uid='utils.task_metrics.finish_task', weak=False)
@@ -0,0 +1,102 @@
+"""
+Query-count regression harness for endpoint tests.
+
+``QueryScalingTestMixin`` seeds the same fixture at increasing scales (e.g.
+5 and 50 questions/submissions), sends the same request at every scale and
+fails when an endpoint runs more queries on the larger dataset, which is what
+an N+1 looks like, or when it runs more queries than the budget of its URL
+name in ``REQUEST_METRICS`` (the same limit the metrics middleware warns
+about). Queries are counted with the request recorder from ``utils.metrics``,
+so ORM calls made by async views through ``sync_to_async`` are included.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+from django.core.cache import cache
+
+from . import metrics
+from .middleware import query_budget
+
+
+@contextmanager
+def count_queries():
+    """Yields the ``RequestStats`` that collects every query run inside the block."""
+    metrics.install_query_recorder()
+    token = metrics.start_request()
+    stats = metrics.current_stats()
+    try:
+        yield stats
+    finally:
+        metrics.finish_request(token)
+
+
+@dataclass(frozen=True)
+class RouteCheck:
+    """One request against a named route; ``call(test, data)`` returns the response."""
+
+    url_name: str
+    call: Callable
+    label: str = ''
+    expected_status: tuple = (200,)
+
+    def __str__(self):
+        return f'{self.url_name} {self.label}'.strip()
+
+
+class QueryScalingTestMixin:
+    """Mixin for ``TestCase`` subclasses.
+
+    Subclasses define ``seed(scale)`` (returns the objects the checks need)
+    and call ``assert_queries_do_not_grow(checks)``. Checks are measured cold
+    (see ``reset_caches``), so budgets must allow for cache misses.
+    """
+
+    scales = (5, 50)
+
+    def seed(self, scale):
+        raise NotImplementedError
+
+    def reset_caches(self):
+        """Every request is measured cold, so cache hits do not hide queries."""
+        cache.clear()
+
+    def measure(self, check, data):
+        self.reset_caches()
+        with count_queries() as stats:
+            response = check.call(self, data)
+        self.assertIn(
+            response.status_code, check.expected_status,
+            f'{check}: unexpected status {response.status_code}',
+        )
+        return stats
+
+    def assert_queries_do_not_grow(self, checks):
+        counts = {check: [] for check in checks}
+        statements = {}
+        for scale in self.scales:
+            data = self.seed(scale)
+            for check in checks:
+                stats = self.measure(check, data)
+                counts[check].append(stats.queries)
+                statements[check] = stats.fingerprints()
+
+        grown = [check for check, values in counts.items() if values[-1] > values[0]]
+        over_budget = [
+            (check, budget) for check, budget in ((check, query_budget(check.url_name)) for check in checks)
+            if budget is not None and max(counts[check]) > budget
+        ]
+        lines = []
+        if grown:
+            lines.append(f'Query count grows with data size (scales {self.scales}):')
+            for check in grown:
+                lines.append(f'  {check}: {counts[check]}')
+                lines.extend(f'      {count}x {sql}' for sql, count in statements[check][:5])
+        if over_budget:
+            lines.append('Query count above the REQUEST_METRICS budget:')
+            for check, budget in over_budget:
+                lines.append(f'  {check}: {counts[check]}, budget {budget}')
+                lines.extend(f'      {count}x {sql}' for sql, count in statements[check][:5])
+        if lines:
+            self.fail('\n'.join(lines))
+        return counts
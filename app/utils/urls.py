@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('db-pool/', views.DatabasePoolStatsAPIView.as_view(), name='ops-db-pool'),
+    path('profiles/', views.ProfileListAPIView.as_view(), name='ops-profiles'),
+    path('profiles/<str:profile_id>/<str:kind>/', views.ProfileDownloadAPIView.as_view(),
+         name='ops-profile-download'),
+]
@@ -0,0 +1,60 @@
+from rest_framework.views import APIView
+from rest_framework import permissions
+from rest_framework.response import Response
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+
+from . import profiling
+from .metrics import render_metrics
+from .task_metrics import render_task_metrics
+from .db.pool import pool_stats
+
+
+class DatabasePoolStatsAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Métricas do pool de conexões deste processo (em uso, esperas, timeouts)."""
+        return Response({
+            'success': True,
+            'pool_enabled': settings.DB_POOL_ENABLED,
+            'pools': pool_stats(),
+        })
+
+
+class ProfileListAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Perfis de requisições guardados (mais recentes primeiro, ver utils.profiling)."""
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return Response({'success': False, 'error': 'limit deve ser um inteiro'}, status=400)
+        return Response({'success': True, 'profiles': profiling.list_profiles(limit)})
+
+
+class ProfileDownloadAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profile_id, kind):
+        """Download do perfil: ``pstats`` (cProfile) ou ``collapsed`` (stacks para flamegraph)."""
+        storage = profiling.profile_storage()
+        name = f'{profile_id}.{kind}'
+        if not profiling.PROFILE_ID.match(profile_id) or kind not in profiling.KINDS or not storage.exists(name):
+            raise Http404
+        return FileResponse(
+            storage.open(name), as_attachment=True, filename=name, content_type=profiling.KINDS[kind]
+        )
+
+
+def metrics_view(request):
+    """Métricas por endpoint e das tasks do Celery no formato texto do Prometheus
+    (ver utils.metrics e utils.task_metrics)."""
+    token = settings.REQUEST_METRICS['TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    body = render_metrics()
+    if settings.TASK_METRICS['ENABLED']:
+        body += render_task_metrics()
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,13 @@
 #!/bin/bash
+set -e
 
-python manage.py wait_for_postgres
-python manage.py migrate
-python manage.py runserver 0.0.0.0:8000
+# Espera o banco (backoff exponencial) e só roda migrate se houver migrações pendentes
+python manage.py prepare_database
+
+# prepare_database já rodou os system checks; DJANGO_AUTORELOAD=0 dispensa o
+# processo extra do autoreloader (imagem sem o código montado como volume)
+RUNSERVER_OPTIONS="--skip-checks"
+if [ "${DJANGO_AUTORELOAD:-1}" = "0" ]; then
+    RUNSERVER_OPTIONS="$RUNSERVER_OPTIONS --noreload"
+fi
+exec python manage.py runserver 0.0.0.0:8000 $RUNSERVER_OPTIONS